@@ -23,6 +23,7 @@ This module represents a backup.
 import datetime
 import filecmp
 import io
+import itertools
 import json
 import logging
 import os
@@ -31,13 +32,14 @@ import shutil
 import sys
 import tarfile
 import tempfile
+import time
 from collections import defaultdict
 from contextlib import closing
 from glob import glob
 
 import dateutil.tz
 
-from barman import output, xlog
+from barman import output, version, xlog
 from barman.annotations import (
     AnnotationManagerFile,
     KeepManager,
@@ -59,7 +61,7 @@ from barman.cloud_providers import (
     recognize_cloud_provider,
 )
 from barman.command_wrappers import PgVerifyBackup
-from barman.compression import CompressionManager
+from barman.compression import CompressionManager, ZSTDCompressor
 from barman.config import BackupOptions, RecoveryOptions
 from barman.encryption import EncryptionManager
 from barman.exceptions import (
@@ -99,8 +101,11 @@ from barman.utils import (
     get_last_backup_id,
     human_readable_timedelta,
     pretty_size,
+    read_json_cache,
+    write_json_cache,
 )
 from barman.wal_archiver import CloudWalArchiver, CloudWalStorageStrategy
+from barman.xlogdb import XLogDBIndex, move_xlogdb_start, replace_xlogdb_content
 
 _logger = logging.getLogger(__name__)
 
@@ -111,7 +116,19 @@ _PG_TBLSPC_TARBALL_PREFIX = "backup/data/pg_tblspc/"
 
 
 class BackupManager(RemoteStatusMixin, KeepManagerMixin):
-    """Manager of the backup archive for a server"""
+    """
+    Manager of the backup archive for a server
+
+    :cvar BACKUP_CATALOGUE_CACHE_FILE: Name of the file, in the server backup
+        directory, holding a snapshot of the parsed ``backup.info`` files.
+    :cvar BACKUP_CATALOGUE_CACHE_RACY_NS: Modifications more recent than this
+        (in nanoseconds) are not trusted to be reflected by a timestamp, as a
+        later change could happen without altering it.
+    """
+
+    BACKUP_CATALOGUE_CACHE_FILE = "backup-catalogue.cache"
+    BACKUP_CATALOGUE_CACHE_VERSION = 2
+    BACKUP_CATALOGUE_CACHE_RACY_NS = 2 * 10**9
 
     DEFAULT_STATUS_FILTER = BackupInfo.STATUS_COPY_DONE
     DELETE_ANNOTATION = "delete_this"
@@ -201,8 +218,15 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         """
         Populate the cache of the available backups, reading information
         from disk.
+
+        A snapshot of the parsed ``backup.info`` files is kept in
+        :attr:`backup_catalogue_cache_path`. Files whose modification time
+        and size match the snapshot are not read again, and the listing of
+        the meta directory is skipped if its modification time is unchanged.
         """
         self._backup_cache = {}
+        snapshot = self._read_backup_catalogue_cache()
+        new_snapshot = self._new_backup_catalogue_snapshot()
         # Previous to version 3.13.2, Barman used to store the backup.info file
         # alongside with the base backup. While that, in general, is not a problem,
         # when dealing with WORM environments that could cause issues as the
@@ -210,16 +234,20 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         # code is only maintained as a fallback mechanism during a transient state
         # in the backup catalog, where we will find backup.info files in both
         # locations because of backups taken with < 3.13.2
+        # The backup.info files live in subdirectories here, so the modification
+        # time of the base backups directory cannot be used to skip the listing.
         for filename in glob("%s/*/backup.info" % self.config.basebackups_directory):
-            backup = BackupInfoFactory.build_backup_info(self.server, filename)
+            backup = self._build_cached_backup_info(filename, snapshot, new_snapshot)
             self._backup_cache[backup.backup_id] = backup
         # In version 3.13.2, Barman changed the location of backup.info files.
         # That was done so we have common location for the metadata, which
         # should always be in a mutable storage, independently if worm_mode
         # is enabled or not. So, this new approach takes precedence.
-        for filename in glob("%s/*-backup.info" % self.server.meta_directory):
-            backup = BackupInfoFactory.build_backup_info(self.server, filename)
+        for filename in self._list_meta_backup_info_files(snapshot, new_snapshot):
+            backup = self._build_cached_backup_info(filename, snapshot, new_snapshot)
             self._backup_cache[backup.backup_id] = backup
+        if new_snapshot != snapshot:
+            self._write_backup_catalogue_cache(new_snapshot)
         # If the server is disabled and configured to use cloud storage for backups, it
         # might be a new Barman instance on a target host configured specifically for
         # restoring a cloud backup taken by another Barman instance. In that case, we
@@ -228,6 +256,135 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         if not self.config.active and self.server.use_backup_cloud_storage:
             self._load_backups_from_cloud()
 
+    @property
+    def backup_catalogue_cache_path(self):
+        """
+        Path of the backup catalogue cache file.
+
+        It is kept outside the meta directory, as writing it there would change
+        the modification time of the directory it describes.
+
+        :return: Absolute path to the cache file.
+        :rtype: str
+        """
+        return os.path.join(
+            self.config.backup_directory, self.BACKUP_CATALOGUE_CACHE_FILE
+        )
+
+    def _new_backup_catalogue_snapshot(self):
+        """
+        Return an empty backup catalogue snapshot.
+
+        The snapshot records, for each ``backup.info`` file, its modification
+        time, size and its fields as dumped by
+        :meth:`~barman.infofile.FieldListFile.dump_fields`. It also records
+        the modification time and content of the meta directory listing.
+
+        :rtype: dict
+        """
+        return {"meta_directory": None, "files": {}}
+
+    @property
+    def _backup_catalogue_cache_version(self):
+        """
+        Version of the backup catalogue cache, which is discarded when written
+        by a different version of Barman.
+
+        :rtype: str
+        """
+        return "%s-%s" % (self.BACKUP_CATALOGUE_CACHE_VERSION, version.__version__)
+
+    def _read_backup_catalogue_cache(self):
+        """
+        Read the backup catalogue snapshot from the cache file.
+
+        Any problem reading the file just results in an empty snapshot, so
+        that every ``backup.info`` file is parsed again.
+
+        :return: The backup catalogue snapshot
+        :rtype: dict
+        """
+        snapshot = read_json_cache(
+            self.backup_catalogue_cache_path, self._backup_catalogue_cache_version
+        )
+        if snapshot is None:
+            return self._new_backup_catalogue_snapshot()
+        return snapshot
+
+    def _write_backup_catalogue_cache(self, snapshot):
+        """
+        Write the backup catalogue snapshot to the cache file atomically.
+
+        The cache is only an optimisation, so failures are logged and ignored.
+
+        :param dict snapshot: The backup catalogue snapshot
+        """
+        write_json_cache(
+            self.backup_catalogue_cache_path,
+            self._backup_catalogue_cache_version,
+            snapshot,
+        )
+
+    def _is_racy_timestamp(self, mtime_ns):
+        """
+        Check if a modification time is too recent to be trusted.
+
+        :param int mtime_ns: Modification time in nanoseconds
+        :rtype: bool
+        """
+        return time.time_ns() - mtime_ns < self.BACKUP_CATALOGUE_CACHE_RACY_NS
+
+    def _list_meta_backup_info_files(self, snapshot, new_snapshot):
+        """
+        Return the ``backup.info`` files in the meta directory.
+
+        The listing recorded in *snapshot* is reused if the modification time
+        of the meta directory has not changed since it was taken.
+
+        :param dict snapshot: The backup catalogue snapshot read from the cache
+        :param dict new_snapshot: The backup catalogue snapshot being built
+        :return: The list of ``backup.info`` file paths
+        :rtype: list[str]
+        """
+        try:
+            mtime_ns = os.stat(self.server.meta_directory).st_mtime_ns
+        except OSError:
+            return []
+        cached = snapshot["meta_directory"]
+        if cached is not None and cached[0] == mtime_ns:
+            filenames = cached[1]
+        else:
+            filenames = glob("%s/*-backup.info" % self.server.meta_directory)
+        if not self._is_racy_timestamp(mtime_ns):
+            new_snapshot["meta_directory"] = [mtime_ns, filenames]
+        return filenames
+
+    def _build_cached_backup_info(self, filename, snapshot, new_snapshot):
+        """
+        Build the backup info object for the given ``backup.info`` file.
+
+        If the modification time and size of the file match the ones recorded
+        in *snapshot*, the fields parsed previously are used instead of the
+        file content.
+
+        :param str filename: Path of the ``backup.info`` file
+        :param dict snapshot: The backup catalogue snapshot read from the cache
+        :param dict new_snapshot: The backup catalogue snapshot being built
+        :rtype: barman.infofile.LocalBackupInfo
+        """
+        stat = os.stat(filename)
+        key = [stat.st_mtime_ns, stat.st_size]
+        cached = snapshot["files"].get(filename)
+        if cached is not None and cached[0] == key:
+            backup = BackupInfoFactory.build_backup_info(
+                self.server, filename, cached_fields=cached[1]
+            )
+        else:
+            backup = BackupInfoFactory.build_backup_info(self.server, filename)
+        if not self._is_racy_timestamp(stat.st_mtime_ns):
+            new_snapshot["files"][filename] = [key, backup.dump_fields()]
+        return backup
+
     def _load_backups_from_cloud(self):
         """
         Fetch ``backup.info`` files from the cloud storage and populate the cache.
@@ -235,6 +392,7 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         cloud_catalog = CloudBackupCatalog(
             cloud_interface=self.server.get_backup_cloud_interface(),
             server_name=self.config.name,
+            cache_dir=self.config.backup_directory,
         )
         backup_list = cloud_catalog.get_backup_list()
         for bk_name, bk_info in backup_list.items():
@@ -1209,6 +1367,11 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             when invoking ``barman-wal-restore``
         :kwparam str|None custom_restore_command: Custom restore command
             to override Barman's default (only used with get-wal mode)
+        :kwparam bool lazy_wal: copy only the WAL files required to reach
+            consistency, the following ones being fetched by the get-wal
+            restore command during recovery
+        :kwparam bool batch_get_wal: use the ``--batch`` option of
+            ``barman-wal-restore`` in the restore command
         """
 
         # Archive every WAL files in the incoming directory of the server
@@ -1768,63 +1931,117 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         # A dictionary where key is the WAL directory name and value is a list of
         # wal_info object representing the WALs to be deleted in that directory
         wals_to_remove = defaultdict(list)
+        # Lines of the removed portion of the xlogdb which have to be kept
+        kept_lines = []
+        xlogdb_changed = False
         with self.server.xlogdb("r+") as fxlogdb:
-            xlogdb_dir = os.path.dirname(fxlogdb.name)
-            with tempfile.TemporaryFile(mode="w+", dir=xlogdb_dir) as fxlogdb_new:
-                for line in fxlogdb:
-                    wal_info = WalFileInfo.from_xlogdb_line(line)
-                    if not xlog.is_any_xlog_file(wal_info.name):
-                        output.error(
-                            "invalid WAL segment name %r\n"
-                            'HINT: Please run "barman rebuild-xlogdb %s" '
-                            "to solve this issue",
-                            wal_info.name,
-                            self.config.name,
-                        )
-                        continue
-
-                    # Keeps the WAL segment if it is a history file
-                    keep = xlog.is_history_file(wal_info.name)
-
-                    # Keeps the WAL segment if its timeline is in
-                    # `timelines_to_protect`
-                    if timelines_to_protect:
-                        tli, _, _ = xlog.decode_segment_name(wal_info.name)
-                        keep |= tli in timelines_to_protect
-
-                    # Keeps the WAL segment if it is within a protected range
-                    if xlog.is_backup_file(wal_info.name):
-                        # If we have a .backup file then truncate the name for the
-                        # range check
-                        wal_name = wal_info.name[:24]
-                    else:
-                        wal_name = wal_info.name
-                    for begin_wal, end_wal in wal_ranges_to_protect:
-                        keep |= wal_name >= begin_wal and wal_name <= end_wal
-
-                    # Keeps the WAL segment if it is a newer
-                    # than the given backup (the first available)
-                    if backup_info and backup_info.begin_wal is not None:
-                        keep |= wal_info.name >= backup_info.begin_wal
-
-                    # If the file has to be kept write it in the new xlogdb
-                    # otherwise add it to the removal list
-                    if keep:
-                        fxlogdb_new.write(wal_info.to_xlogdb_line())
-                    else:
-                        wal_dir = os.path.dirname(wal_info.fullpath(self.server))
-                        wals_to_remove[wal_dir].append(wal_info)
+            start = offset = fxlogdb.tell()
+            # When the xlogdb is sorted, every WAL from the beginning of the
+            # backup onwards is kept, so we can stop reading the file there
+            # and trim it in place
+            xlogdb_index = XLogDBIndex(fxlogdb.name)
+            stop_name = None
+            if backup_info and backup_info.begin_wal and xlogdb_index.refresh():
+                stop_name = backup_info.begin_wal
+            cut_name = None
+            for line in fxlogdb:
+                wal_info = WalFileInfo.from_xlogdb_line(line)
+                if (
+                    stop_name
+                    and wal_info.name >= stop_name
+                    and not xlog.is_history_file(wal_info.name)
+                ):
+                    cut_name = wal_info.name
+                    break
+                offset += len(line)
+                if not xlog.is_any_xlog_file(wal_info.name):
+                    xlogdb_changed = True
+                    output.error(
+                        "invalid WAL segment name %r\n"
+                        'HINT: Please run "barman rebuild-xlogdb %s" '
+                        "to solve this issue",
+                        wal_info.name,
+                        self.config.name,
+                    )
+                    continue
 
-                wals_removed = self.server.wal_storage.delete(wals_to_remove)
+                # Keeps the WAL segment if it is a history file
+                keep = xlog.is_history_file(wal_info.name)
 
-                fxlogdb_new.flush()
-                fxlogdb_new.seek(0)
-                fxlogdb.seek(0)
-                shutil.copyfileobj(fxlogdb_new, fxlogdb)
-                fxlogdb.truncate()
+                # Keeps the WAL segment if its timeline is in
+                # `timelines_to_protect`
+                if timelines_to_protect:
+                    tli, _, _ = xlog.decode_segment_name(wal_info.name)
+                    keep |= tli in timelines_to_protect
+
+                # Keeps the WAL segment if it is within a protected range
+                if xlog.is_backup_file(wal_info.name):
+                    # If we have a .backup file then truncate the name for the
+                    # range check
+                    wal_name = wal_info.name[:24]
+                else:
+                    wal_name = wal_info.name
+                for begin_wal, end_wal in wal_ranges_to_protect:
+                    keep |= wal_name >= begin_wal and wal_name <= end_wal
+
+                # Keeps the WAL segment if it is a newer
+                # than the given backup (the first available)
+                if backup_info and backup_info.begin_wal is not None:
+                    keep |= wal_info.name >= backup_info.begin_wal
+
+                # If the file has to be kept write it in the new xlogdb
+                # otherwise add it to the removal list
+                if keep:
+                    kept_lines.append(line)
+                else:
+                    xlogdb_changed = True
+                    wal_dir = os.path.dirname(wal_info.fullpath(self.server))
+                    wals_to_remove[wal_dir].append(wal_info)
+
+            wals_removed = self.server.wal_storage.delete(wals_to_remove)
+
+            if xlogdb_changed:
+                self._trim_xlogdb(
+                    fxlogdb, xlogdb_index, start, offset, kept_lines, cut_name
+                )
 
         return wals_removed
 
+    def _trim_xlogdb(self, fxlogdb, xlogdb_index, start, cut, kept_lines, cut_name):
+        """
+        Remove from the xlogdb the portion between *start* and *cut*, except
+        for *kept_lines*.
+
+        The kept lines (history files and protected WALs) are moved right
+        before *cut* and the logical start of the xlogdb is moved to the
+        first of them (see :func:`barman.xlogdb.move_xlogdb_start`), so that
+        the cost does not depend on the size of the file. The whole file is
+        atomically rewritten instead when the removed portion is the largest
+        part of the file, or when the xlogdb has been processed to its end.
+
+        :param fxlogdb: the xlogdb file object, opened in ``r+`` mode
+        :param XLogDBIndex xlogdb_index: the index of the xlogdb
+        :param int start: the current logical start of the xlogdb
+        :param int cut: the offset of the first line which must be preserved
+        :param list[str] kept_lines: lines between *start* and *cut*
+            which must be preserved
+        :param str|None cut_name: the name of the WAL at *cut*, ``None``
+            if the whole file has been processed
+        """
+        size = os.fstat(fxlogdb.fileno()).st_size
+        new_start = cut - sum(len(line) for line in kept_lines)
+        if cut_name and start <= new_start and new_start <= size - new_start:
+            move_xlogdb_start(fxlogdb.name, cut, kept_lines)
+            xlogdb_index.trim(cut, cut_name, kept_lines)
+            return
+
+        xlogdb_dir = os.path.dirname(fxlogdb.name)
+        with tempfile.TemporaryFile(mode="w+", dir=xlogdb_dir) as fxlogdb_new:
+            fxlogdb_new.writelines(kept_lines)
+            fxlogdb.seek(cut)
+            shutil.copyfileobj(fxlogdb, fxlogdb_new)
+            replace_xlogdb_content(fxlogdb, fxlogdb_new)
+
     def validate_last_backup_maximum_age(self, last_backup_maximum_age):
         """
         Evaluate the age of the last available backup in a catalogue.
@@ -1969,17 +2186,19 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             return
 
         # Check the intersection between the required WALs and the archived
-        # ones. They should all exist
-        segments = backup_info.get_required_wal_segments()
-        missing_wal = None
-        for wal in segments:
-            # Stop checking if we reach the last archived wal
-            if wal > last_archived_wal:
-                break
-            wal_full_path = self.server.wal_storage.get_full_path(wal)
-            if not self.server.wal_storage.exists(wal_full_path):
-                missing_wal = wal
-                break
+        # ones. They should all exist. The segments already verified by a
+        # previous check are skipped, while the others are looked up at once
+        # by the WAL storage.
+        last_verified_wal = backup_info.last_verified_wal
+        segments = [
+            wal
+            for wal in itertools.takewhile(
+                lambda wal: wal <= last_archived_wal,
+                backup_info.get_required_wal_segments(),
+            )
+            if not last_verified_wal or wal > last_verified_wal
+        ]
+        missing_wal = self.server.wal_storage.get_first_missing_wal(segments)
 
         if missing_wal:
             # Case 3: the most recent WAL file archived is more recent than
@@ -1993,6 +2212,7 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
                 "The first missing WAL file is %s" % missing_wal
             )
             backup_info.status = BackupInfo.FAILED
+            backup_info.last_verified_wal = None
             backup_info.save()
             output.error(
                 "This backup has been marked as FAILED due to the "
@@ -2006,11 +2226,16 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             # every WAL that will be required by the recovery is available,
             # we can mark the backup as DONE.
             backup_info.status = BackupInfo.DONE
+            backup_info.last_verified_wal = None
         else:
             # Case 5: if the most recent WAL file archived is older than
             # the one corresponding to the end of the backup but
             # all the WAL files until that point are present.
+            # Remember the last verified WAL file, so that the next check
+            # only has to verify the WAL files archived in the meantime.
             backup_info.status = BackupInfo.WAITING_FOR_WALS
+            if segments:
+                backup_info.last_verified_wal = segments[-1]
         backup_info.save()
 
     def verify_backup(self, backup_info):
@@ -2067,6 +2292,8 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         - ``barman.json`` with system information
         - ``backup/`` directory with complete backup data
         - ``wals/`` directory with all required WAL files preserving hash structure
+        - ``zstd_dictionaries/`` directory with the zstd dictionaries required to
+          decompress the exported WAL files, if any
         - ``xlog.db`` metadata file for exported WAL files
 
         Metadata files are written first so that the importer can validate
@@ -2225,6 +2452,10 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
                     tar, backup_info, xlogdb_file
                 )
 
+            # Add the zstd dictionaries, without which the WAL files
+            # compressed with them cannot be decompressed
+            self._add_zstd_dictionaries_to_tar(tar, xlogdb_path)
+
             # Add xlog.db to tar
             tar.add(xlogdb_path, arcname="xlog.db")
 
@@ -2234,6 +2465,40 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             if xlogdb_path and os.path.exists(xlogdb_path):
                 os.unlink(xlogdb_path)
 
+    def _add_zstd_dictionaries_to_tar(self, tar, xlogdb_path):
+        """
+        Add the zstd dictionaries referenced by the exported WAL files to the
+        tarball, as ``zstd_dictionaries/<dict_id>.dict``.
+
+        The name of the server is not part of the stored name, so that the
+        dictionaries can be imported in a server with a different name.
+
+        :param TarFile tar: the tar file object
+        :param str xlogdb_path: path of the xlog.db file of the exported WALs
+        :raises ExportBackupException: if a dictionary is missing
+        """
+        dict_ids = set()
+        with open(xlogdb_path) as fxlogdb:
+            for line in fxlogdb:
+                wal_info = WalFileInfo.from_xlogdb_line(line)
+                if wal_info.compression_dictionary:
+                    dict_ids.add(wal_info.compression_dictionary)
+
+        for dict_id in sorted(dict_ids):
+            dict_path = os.path.join(
+                self.config.xlogdb_directory,
+                ZSTDCompressor.DICTIONARY_NAME.format(
+                    server=self.config.name, dict_id=dict_id
+                ),
+            )
+            if not os.path.exists(dict_path):
+                raise ExportBackupException(
+                    "zstd dictionary required to decompress the WAL files not "
+                    "found: %s" % dict_path
+                )
+            tar.add(dict_path, arcname="zstd_dictionaries/%s.dict" % dict_id)
+        output.debug("Added %d zstd dictionaries to export" % len(dict_ids))
+
     def _collect_wal_files_for_export(self, tar, backup_info, xlogdb_file):
         """
         Merge-step algorithm for collecting WAL files and xlog.db metadata for export.
@@ -2654,6 +2919,7 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             raise ImportBackupException("Failed to load backup.info: %s" % e)
 
         self._verify_staged_wals(staging_dir, backup_info)
+        self._verify_staged_dictionaries(staging_dir)
 
     def _verify_staging_layout(self, staging_dir):
         """
@@ -2812,6 +3078,64 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
                 msg += " (and %d more)" % (len(conflicts) - 5)
             raise ImportBackupException(msg)
 
+    def _staged_dictionary_path(self, staging_dir, dict_id):
+        """
+        Return the path of a zstd dictionary in the staging directory.
+
+        :param str staging_dir: path to the staging directory
+        :param int dict_id: the id of the dictionary
+        :rtype: str
+        """
+        return os.path.join(staging_dir, "zstd_dictionaries", "%s.dict" % dict_id)
+
+    def _server_dictionary_path(self, dict_id):
+        """
+        Return the path of a zstd dictionary of the target server.
+
+        :param int dict_id: the id of the dictionary
+        :rtype: str
+        """
+        return os.path.join(
+            self.config.xlogdb_directory,
+            ZSTDCompressor.DICTIONARY_NAME.format(
+                server=self.config.name, dict_id=dict_id
+            ),
+        )
+
+    def _verify_staged_dictionaries(self, staging_dir):
+        """
+        Verify that every zstd dictionary referenced by the staged
+        ``xlog.db`` is available, either in the ``zstd_dictionaries/``
+        directory of the tarball or in the target server, and that a
+        dictionary present in both has the same content.
+
+        :param str staging_dir: path to the staging directory
+        :raises ImportBackupException: if a dictionary is missing or
+            conflicts with the one of the target server
+        """
+        dict_ids = set()
+        for tarball_line, _ in self._iter_tarball_xlogdb(staging_dir):
+            wal_info = WalFileInfo.from_xlogdb_line(tarball_line)
+            if wal_info.compression_dictionary:
+                dict_ids.add(wal_info.compression_dictionary)
+
+        for dict_id in sorted(dict_ids):
+            staged_path = self._staged_dictionary_path(staging_dir, dict_id)
+            server_path = self._server_dictionary_path(dict_id)
+            if not os.path.exists(staged_path):
+                if not os.path.exists(server_path):
+                    raise ImportBackupException(
+                        "zstd dictionary %s required to decompress the WAL "
+                        "files not found in tarball" % dict_id
+                    )
+            elif os.path.exists(server_path) and not filecmp.cmp(
+                staged_path, server_path, shallow=False
+            ):
+                raise ImportBackupException(
+                    "zstd dictionary %s already exists in target server with "
+                    "conflicting content" % dict_id
+                )
+
     def _wal_conflicts_with_server(
         self,
         wal_name,
@@ -2915,6 +3239,8 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         """
         Import WAL files from the staging directory into the server's WAL
         archive and merge xlog.db entries into the server's WAL catalog.
+        The zstd dictionaries required by the imported WAL files are
+        installed in the server's xlogdb directory.
 
         Uses a streaming merge-step to combine import entries with the
         existing xlog.db without loading the entire file into memory.
@@ -2949,6 +3275,16 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             shutil.move(tarball_wal_path, server_wal_path)
             moved_files.append(server_wal_path)
 
+        def _install_tarball_dictionary(dict_id):
+            """Move a zstd dictionary of the tarball into the server's
+            xlogdb directory, unless already there, and record the move
+            for the rollback closure."""
+            staged_path = self._staged_dictionary_path(staging_dir, dict_id)
+            server_path = self._server_dictionary_path(dict_id)
+            if os.path.exists(staged_path) and not os.path.exists(server_path):
+                shutil.move(staged_path, server_path)
+                moved_files.append(server_path)
+
         def _next_tarball_entry(iter_):
             """Advance the tarball xlog.db iterator, returning
             ``(None, None)`` at exhaustion so the merge-step below can
@@ -2957,6 +3293,17 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
             return next(iter_, (None, None))
 
         try:
+            # Install the zstd dictionaries first, so that the imported WAL
+            # files can be decompressed as soon as they are in the catalog.
+            # ``_verify_staged_dictionaries`` has already guaranteed that
+            # they are available and do not conflict.
+            for tarball_line, _ in self._iter_tarball_xlogdb(staging_dir):
+                dict_id = WalFileInfo.from_xlogdb_line(
+                    tarball_line
+                ).compression_dictionary
+                if dict_id:
+                    _install_tarball_dictionary(dict_id)
+
             # Single-pass merge of the tarball into the server catalog.
             # Both xlog.db streams are sorted by WAL name (fixed-width
             # hex), so the merge runs in O(1) extra memory. For each
@@ -3007,11 +3354,7 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
                         tmp.write(tarball_line + "\n")
                         tarball_line, tarball_name = _next_tarball_entry(tarball_iter)
 
-                    tmp.flush()
-                    tmp.seek(0)
-                    server_fp.seek(0)
-                    shutil.copyfileobj(tmp, server_fp)
-                    server_fp.truncate()
+                    replace_xlogdb_content(server_fp, tmp)
 
             output.debug("Successfully imported %d WAL files" % len(moved_files))
 
@@ -3035,7 +3378,8 @@ class BackupManager(RemoteStatusMixin, KeepManagerMixin):
         newly-created empty hash directories, and rebuild xlog.db from
         the WAL archive on disk.
 
-        :param list moved_files: list of WAL file paths that were moved
+        :param list moved_files: list of WAL file and zstd dictionary paths
+            that were moved
         :param list created_dirs: list of hash directories that were created
         """
         # Remove moved WAL files
@@ -26,9 +26,12 @@ import logging
 import os
 import sys
 import tarfile
+import time
 from argparse import SUPPRESS, ArgumentParser, ArgumentTypeError, HelpFormatter
 from collections import OrderedDict
 from contextlib import closing
+from multiprocessing import Process
+from multiprocessing.connection import wait
 
 import barman.config
 import barman.diagnose
@@ -333,7 +336,15 @@ def terminate_process(args):
             "--keep-descriptors",
             help="Keep the stdout and the stderr streams attached to Barman subprocesses",
             action="store_true",
-        )
+        ),
+        argument(
+            "--jobs",
+            "-j",
+            help="Run the maintenance of up to NJOBS servers in parallel "
+            "(overrides the 'cron_parallel_jobs' global option).",
+            type=check_positive,
+            metavar="NJOBS",
+        ),
     ]
 )
 def cron(args):
@@ -353,25 +364,17 @@ def cron(args):
     servers = get_server_list(
         skip_inactive=True, skip_disabled=True, wal_streaming=True
     )
-    for name in sorted(servers):
-        server = servers[name]
-
-        # Exception: manage_server_command is not invoked here
-        # Normally you would call manage_server_command to check if the
-        # server is None and to report inactive and disabled servers,
-        # but here we have only active and well configured servers.
-
-        try:
-            server.cron(keep_descriptors=args.keep_descriptors)
-        except Exception:
-            # A cron should never raise an exception, so this code
-            # should never be executed. However, it is here to protect
-            # unrelated servers in case of unexpected failures.
-            output.exception(
-                "Unable to run cron on server '%s', "
-                "please look in the barman log file for more details.",
-                name,
-            )
+    jobs = args.jobs or barman.__config__.cron_parallel_jobs
+
+    # Exception: manage_server_command is not invoked here
+    # Normally you would call manage_server_command to check if the
+    # server is None and to report inactive and disabled servers,
+    # but here we have only active and well configured servers.
+    if jobs > 1 and len(servers) > 1:
+        _parallel_cron(servers, jobs, args.keep_descriptors)
+    else:
+        for name in sorted(servers):
+            _server_cron(servers[name], args.keep_descriptors)
     # Lockfile directory cleanup
     barman.utils.lock_files_cleanup(
         barman.__config__.barman_lock_directory,
@@ -380,6 +383,93 @@ def cron(args):
     output.close_and_exit()
 
 
+def _server_cron(server, keep_descriptors):
+    """
+    Run the maintenance tasks of a server, logging how long they took.
+
+    :param barman.server.Server server: the server
+    :param bool keep_descriptors: whether to keep subprocess descriptors
+    """
+    name = server.config.name
+    start_time = time.time()
+    try:
+        server.cron(keep_descriptors=keep_descriptors)
+    except Exception:
+        # A cron should never raise an exception, so this code
+        # should never be executed. However, it is here to protect
+        # unrelated servers in case of unexpected failures.
+        output.exception(
+            "Unable to run cron on server '%s', "
+            "please look in the barman log file for more details.",
+            name,
+        )
+    _logger.info(
+        "Cron maintenance of server '%s' took %.3f seconds",
+        name,
+        time.time() - start_time,
+    )
+
+
+def _server_cron_process(server, keep_descriptors):
+    """
+    Entry point of the processes started by :func:`_parallel_cron`.
+
+    The exit code of the process tells the parent whether any error
+    has been reported.
+
+    :param barman.server.Server server: the server
+    :param bool keep_descriptors: whether to keep subprocess descriptors
+    """
+    # Only report errors of this server to the parent
+    output.error_occurred = False
+    _server_cron(server, keep_descriptors)
+    sys.exit(1 if output.error_occurred else 0)
+
+
+def _parallel_cron(servers, jobs, keep_descriptors):
+    """
+    Run the maintenance tasks of the given servers in parallel.
+
+    Each server is handled by its own process, with at most *jobs* of them
+    running at the same time, so that a slow server does not delay the others.
+    The per-server locking is still taken care of by :meth:`Server.cron`.
+
+    :param dict[str,barman.server.Server] servers: the servers, by name
+    :param int jobs: the maximum number of servers processed at the same time
+    :param bool keep_descriptors: whether to keep subprocess descriptors
+    """
+    pending = sorted(servers)
+    pending.reverse()
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                name = pending.pop()
+                process = Process(
+                    target=_server_cron_process,
+                    args=(servers[name], keep_descriptors),
+                    name="barman-cron-%s" % name,
+                )
+                process.start()
+                running[process.sentinel] = (name, process)
+            for sentinel in wait(list(running)):
+                name, process = running.pop(sentinel)
+                process.join()
+                if process.exitcode == 1:
+                    # The error has already been reported by the process
+                    output.error_occurred = True
+                elif process.exitcode != 0:
+                    output.error(
+                        "Cron process of server '%s' terminated unexpectedly "
+                        "(exit code %s)",
+                        name,
+                        process.exitcode,
+                    )
+    finally:
+        for _, process in running.values():
+            process.join()
+
+
 @command(cmd_aliases=["lock-directory-cleanup"])
 def lock_directory_cleanup(args=None):
     """
@@ -772,7 +862,23 @@ def replication_status(args):
             completer=server_completer_all,
             nargs="+",
             help="specifies the server name for the command ",
-        )
+        ),
+        argument(
+            "--jobs",
+            "-j",
+            help="Scan the WAL archive in parallel using NJOBS processes.",
+            type=check_positive,
+            metavar="NJOBS",
+            default=1,
+        ),
+        argument(
+            "--no-reuse",
+            help="Inspect every WAL file of the archive, instead of reusing the "
+            "compression and encryption recorded for unchanged files.",
+            dest="reuse",
+            action="store_false",
+            default=True,
+        ),
     ]
 )
 def rebuild_xlogdb(args):
@@ -788,7 +894,7 @@ def rebuild_xlogdb(args):
             continue
 
         with closing(server):
-            server.rebuild_xlogdb()
+            server.rebuild_xlogdb(jobs=args.jobs, reuse=args.reuse)
     output.close_and_exit()
 
 
@@ -848,7 +954,7 @@ def rebuild_xlogdb(args):
         argument(
             "--staging-wal-directory",
             help="a staging directory in the target host for WAL files when performing "
-            "PITR. If unspecified, it uses a `barman_wal` directory inside the "
+            "PITR or using --lazy-wal. If unspecified, it uses a `barman_wal` directory inside the "
             "destination directory.",
         ),
         argument(
@@ -909,6 +1015,25 @@ def rebuild_xlogdb(args):
             action="store_false",
             default=SUPPRESS,
         ),
+        argument(
+            "--lazy-wal",
+            help="Copy only the WAL files required to reach consistency, and let "
+            "the get-wal restore command fetch the following ones during the "
+            "recovery. Implies --get-wal.",
+            dest="lazy_wal",
+            action="store_true",
+            default=False,
+        ),
+        argument(
+            "--batch-get-wal",
+            help="Use the --batch option of barman-wal-restore in the restore "
+            "command of a remote recovery, so that the WAL files read ahead are "
+            "received in a single stream. Requires barman-cli 3.19.0 or later on "
+            "the PostgreSQL host.",
+            dest="batch_get_wal",
+            action="store_true",
+            default=False,
+        ),
         argument(
             "--partial-wal",
             help="Copy .partial WAL files, if any, to the recovery destination. Only "
@@ -1316,6 +1441,17 @@ def restore(args):
         server.config.basebackup_retry_sleep = args.retry_sleep
     if args.retry_times is not None:
         server.config.basebackup_retry_times = args.retry_times
+    if args.lazy_wal:
+        if server.use_wal_cloud_storage:
+            output.error(
+                "The --lazy-wal option is not supported for servers with WALs "
+                "stored in cloud storage"
+            )
+            output.close_and_exit()
+        if getattr(args, "get_wal", True) is False:
+            output.error("The --lazy-wal option cannot be used with --no-get-wal")
+            output.close_and_exit()
+        args.get_wal = True
     if hasattr(args, "get_wal"):
         if args.get_wal:
             server.config.recovery_options.add(RecoveryOptions.GET_WAL)
@@ -1454,6 +1590,8 @@ def restore(args):
                 recovery_option_port=args.recovery_option_port,
                 custom_restore_command=args.restore_command,
                 copy_partial=args.partial_wal,
+                lazy_wal=args.lazy_wal,
+                batch_get_wal=args.batch_get_wal,
                 **snapshot_kwargs,
             )
         except RecoveryException as exc:
@@ -1909,6 +2047,16 @@ def delete(args):
             type=check_positive,
             default=SUPPRESS,
         ),
+        argument(
+            "--batch",
+            "-b",
+            help="send up to 'SIZE' WAL files, starting from the requested one "
+            "and following the same rules as '--peek', as a tar stream on "
+            "standard output. 'SIZE' must be an integer >= 1.",
+            metavar="SIZE",
+            type=check_positive,
+            default=SUPPRESS,
+        ),
         argument(
             "--test",
             "-t",
@@ -1955,6 +2103,7 @@ def get_wal(args):
     keep_compression = getattr(args, "keep_compression", False)
     output_directory = getattr(args, "output_directory", None)
     peek = getattr(args, "peek", None)
+    batch = getattr(args, "batch", None)
 
     if compression and keep_compression:
         output.error(
@@ -1962,6 +2111,13 @@ def get_wal(args):
         )
         output.close_and_exit()
 
+    if batch and (peek or output_directory is not None):
+        output.error(
+            "argument `batch` not allowed with arguments `peek` and "
+            "`output-directory`"
+        )
+        output.close_and_exit()
+
     with closing(server):
         server.get_wal(
             args.wal_name,
@@ -1970,6 +2126,7 @@ def get_wal(args):
             output_directory=output_directory,
             peek=peek,
             partial=args.partial,
+            batch=batch,
         )
     output.close_and_exit()
 
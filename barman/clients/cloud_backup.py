@@ -189,6 +189,7 @@ def main(args=None):
                 "max_archive_size": config.max_archive_size,
                 "min_chunk_size": config.min_chunk_size,
                 "max_bandwidth": config.max_bandwidth,
+                "tar_streams": config.tar_streams,
                 "cloud_interface": cloud_interface,
             }
             if __is_hook_script():
@@ -366,6 +367,13 @@ def parse_arguments(args=None):
         "(default: 100GB)",
         default="100GB",
     )
+    parser.add_argument(
+        "--tar-streams",
+        type=check_positive,
+        help="number of archives the content of each tablespace and of PGDATA "
+        "is split into, built and compressed in parallel (default: 1)",
+        default=1,
+    )
     parser.add_argument(
         "--min-chunk-size",
         type=check_size,
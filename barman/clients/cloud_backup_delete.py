@@ -27,6 +27,7 @@ from barman.clients.cloud_cli import (
     CLIErrorExit,
     GeneralErrorExit,
     OperationErrorExit,
+    add_cache_dir_argument,
     create_argument_parser,
 )
 from barman.cloud import CloudBackupCatalog, configure_logging
@@ -38,7 +39,7 @@ from barman.cloud_providers.aws_s3 import S3CloudInterface
 from barman.exceptions import BadXlogPrefix, InvalidRetentionPolicy
 from barman.infofile import BackupInfo
 from barman.retention_policies import RetentionPolicyFactory
-from barman.utils import check_non_negative, force_str
+from barman.utils import check_non_negative, check_positive, force_str
 
 _logger = logging.getLogger(__name__)
 
@@ -63,6 +64,8 @@ def _get_files_for_backup(catalog, backup_info):
                     "Will delete archive for %s at %s" % (key, file_info.path)
                 )
                 backup_files.append(file_info.path)
+            if file_info.index_path is not None:
+                backup_files.append(file_info.index_path)
 
     return backup_files
 
@@ -93,7 +96,10 @@ def _remove_wals_for_backup(
         a standalone archival backup. Defaults to ``True``.
     :type skip_wal_cleanup_if_standalone: :class:`bool`
 
-    :return: ``None``. Exits early if an error occurs during WAL listing.
+    :return: ``False`` if some of the WALs could not be deleted, ``True``
+        otherwise. Exits early, returning ``True``, if an error occurs during
+        WAL listing.
+    :rtype: :class:`bool`
     """
     # An implementation of BackupManager.remove_wal_before_backup which does not
     # use xlogdb, since xlogdb is not available to barman-cloud
@@ -196,7 +202,7 @@ def _remove_wals_for_backup(
                 deleted_backup.backup_id,
                 force_str(exc),
             )
-            return
+            return True
         for wal_name, wal in wal_paths.items():
             # If the wal starts with a prefix we deleted then ignore it so that the
             # dry-run output is accurate
@@ -228,8 +234,11 @@ def _remove_wals_for_backup(
     wal_paths_to_delete = sorted(wals_to_delete.values())
     if len(wal_paths_to_delete) > 0:
         if not dry_run:
+            deleted_wal_paths = []
             try:
-                cloud_interface.delete_objects(wal_paths_to_delete)
+                cloud_interface.delete_objects(
+                    wal_paths_to_delete, progress=deleted_wal_paths.extend
+                )
             except Exception as exc:
                 _logger.error(
                     "Could not delete the following WALs for backup %s: %s, Reason: %s",
@@ -237,9 +246,14 @@ def _remove_wals_for_backup(
                     wal_paths_to_delete,
                     force_str(exc),
                 )
-                # Return early so that we leave the WALs in the local cache so they
-                # can be cleaned up should there be a subsequent backup deletion.
-                return
+                # Only remove from the local cache the WALs which have been
+                # deleted, so that the others can be cleaned up should there be
+                # a subsequent backup deletion.
+                wal_names = dict((path, name) for name, path in wals_to_delete.items())
+                for wal_path in deleted_wal_paths:
+                    catalog.remove_wal_from_cache(wal_names[wal_path])
+                catalog.save_wal_index()
+                return False
         else:
             print(
                 "Skipping deletion of objects %s due to --dry-run option"
@@ -247,6 +261,8 @@ def _remove_wals_for_backup(
             )
         for wal_name in wals_to_delete.keys():
             catalog.remove_wal_from_cache(wal_name)
+        catalog.save_wal_index()
+    return True
 
 
 def _delete_backup(
@@ -313,13 +329,22 @@ def _delete_backup(
     # Remove WALs without checking locks. Since base backup is already gone,
     # the WALs no longer have value, and it's not worth the overhead of checking
     # their lock status.
-    _remove_wals_for_backup(
+    # The backup.info file has already been deleted, so that a backup without
+    # data is never listed. The WALs to delete are found by listing the WAL
+    # archive, so any WAL left behind by an interrupted or failed deletion is
+    # removed when the next oldest backup is deleted.
+    if not _remove_wals_for_backup(
         cloud_interface,
         catalog,
         backup_info,
         config.dry_run,
         skip_wal_cleanup_if_standalone,
-    )
+    ):
+        _logger.warning(
+            "The WALs of backup %s which could not be deleted will be deleted "
+            "when the next oldest backup is deleted",
+            backup_id,
+        )
     # It is important that the backup is removed from the catalog after cleaning
     # up the WALs because the code in _remove_wals_for_backup depends on the
     # deleted backup existing in the backup catalog
@@ -356,7 +381,9 @@ def main(args=None):
                 raise SystemExit(0)
 
             catalog = CloudBackupCatalog(
-                cloud_interface=cloud_interface, server_name=config.server_name
+                cloud_interface=cloud_interface,
+                server_name=config.server_name,
+                cache_dir=config.cache_dir,
             )
             # Call catalog.get_backup_list now so we know we can read the whole catalog
             # (the results are cached so this does not result in extra calls to cloud
@@ -487,6 +514,14 @@ def parse_arguments(args=None):
         "specified cloud provider will be used (1000 for aws-s3, 256 for "
         "azure-blob-storage and 100 for google-cloud-storage).",
     )
+    parser.add_argument(
+        "-J",
+        "--jobs",
+        type=check_positive,
+        help="The maximum number of batches of objects deleted concurrently "
+        "(default: 2).",
+        default=2,
+    )
     parser.add_argument(
         "--check-object-lock",
         action="store_true",
@@ -494,6 +529,7 @@ def parse_arguments(args=None):
         "objects. This option adds overhead as it requires a request to the object "
         "store for each object of the base backup to delete.",
     )
+    add_cache_dir_argument(parser)
     return parser.parse_args(args=args)
 
 
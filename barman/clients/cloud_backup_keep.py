@@ -23,6 +23,7 @@ from barman.annotations import KeepManager
 from barman.clients.cloud_cli import (
     GeneralErrorExit,
     OperationErrorExit,
+    add_cache_dir_argument,
     create_argument_parser,
 )
 from barman.cloud import CloudBackupCatalog, configure_logging
@@ -52,7 +53,9 @@ def main(args=None):
                 cloud_interface.verify_cloud_connectivity_and_bucket_existence()
                 raise SystemExit(0)
 
-            catalog = CloudBackupCatalog(cloud_interface, config.server_name)
+            catalog = CloudBackupCatalog(
+                cloud_interface, config.server_name, cache_dir=config.cache_dir
+            )
             backup_id = catalog.parse_backup_id(config.backup_id)
             if config.release:
                 catalog.release_keep(backup_id)
@@ -114,6 +117,7 @@ def parse_arguments(args=None):
         help="Specify the recovery target for this backup",
         choices=[KeepManager.TARGET_FULL, KeepManager.TARGET_STANDALONE],
     )
+    add_cache_dir_argument(parser)
     return parser.parse_args(args=args)
 
 
@@ -20,7 +20,11 @@ import json
 import logging
 from contextlib import closing
 
-from barman.clients.cloud_cli import GeneralErrorExit, create_argument_parser
+from barman.clients.cloud_cli import (
+    GeneralErrorExit,
+    add_cache_dir_argument,
+    create_argument_parser,
+)
 from barman.cloud import CloudBackupCatalog, configure_logging
 from barman.cloud_providers import get_cloud_interface
 from barman.infofile import BackupInfo
@@ -49,7 +53,9 @@ def main(args=None):
                 raise SystemExit(0)
 
             catalog = CloudBackupCatalog(
-                cloud_interface=cloud_interface, server_name=config.server_name
+                cloud_interface=cloud_interface,
+                server_name=config.server_name,
+                cache_dir=config.cache_dir,
             )
 
             backup_list = catalog.get_backup_list()
@@ -134,6 +140,7 @@ def parse_arguments(args=None):
         default="console",
         help="Output format (console or json). Default console.",
     )
+    add_cache_dir_argument(parser)
     return parser.parse_args(args=args)
 
 
@@ -25,6 +25,7 @@ from contextlib import closing
 from barman.clients.cloud_cli import (
     GeneralErrorExit,
     OperationErrorExit,
+    add_cache_dir_argument,
     create_argument_parser,
 )
 from barman.cloud import CloudBackupCatalog, configure_logging
@@ -55,7 +56,9 @@ def main(args=None):
                 raise SystemExit(0)
 
             catalog = CloudBackupCatalog(
-                cloud_interface=cloud_interface, server_name=config.server_name
+                cloud_interface=cloud_interface,
+                server_name=config.server_name,
+                cache_dir=config.cache_dir,
             )
 
             backup_id = catalog.parse_backup_id(config.backup_id)
@@ -103,6 +106,7 @@ def parse_arguments(args=None):
         default="console",
         help="Output format (console or json). Default console.",
     )
+    add_cache_dir_argument(parser)
     return parser.parse_args(args=args)
 
 
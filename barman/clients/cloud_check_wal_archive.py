@@ -24,6 +24,7 @@ from barman.clients.cloud_cli import (
     NetworkErrorExit,
     OperationErrorExit,
     UrlArgumentType,
+    add_cache_dir_argument,
     create_argument_parser,
 )
 from barman.cloud import CloudBackupCatalog, configure_logging
@@ -57,7 +58,9 @@ def main(args=None):
         with closing(cloud_interface):
             cloud_interface.setup_bucket()
 
-            catalog = CloudBackupCatalog(cloud_interface, config.server_name)
+            catalog = CloudBackupCatalog(
+                cloud_interface, config.server_name, cache_dir=config.cache_dir
+            )
             wals = list(catalog.get_wal_paths().keys())
             check_archive_usable(
                 wals,
@@ -93,6 +96,7 @@ def parse_arguments(args=None):
         help="The earliest timeline whose WALs should cause the check to fail",
         type=check_positive,
     )
+    add_cache_dir_argument(parser)
     return parser.parse_args(args=args)
 
 
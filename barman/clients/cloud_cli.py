@@ -109,6 +109,16 @@ def add_tag_argument(parser, name, dest, help):
     )
 
 
+def add_cache_dir_argument(parser):
+    parser.add_argument(
+        "--cache-dir",
+        help="directory where the backup.info files and the list of WAL files "
+        "are cached between runs, so that only what changed is retrieved "
+        "(default: no cache)",
+        default=None,
+    )
+
+
 class CloudArgumentParser(argparse.ArgumentParser):
     """ArgumentParser which exits with CLIErrorExit on errors."""
 
@@ -30,8 +30,18 @@ from barman.utils import with_metaclass
 class ChunkedCompressor(with_metaclass(ABCMeta, object)):
     """
     Base class for all ChunkedCompressors
+
+    The output of each :meth:`add_chunk` call can be decompressed on its own,
+    provided that it is preceded by the first :attr:`STREAM_HEADER_SIZE` bytes
+    of the compressed stream, so a stream can be decompressed starting from
+    any chunk.
+
+    :cvar STREAM_HEADER_SIZE: Size in bytes of the header written at the
+        beginning of the compressed stream
     """
 
+    STREAM_HEADER_SIZE = 0
+
     @abstractmethod
     def add_chunk(self, data):
         """
@@ -72,6 +82,9 @@ class SnappyCompressor(ChunkedCompressor):
     A ChunkedCompressor implementation based on python-snappy
     """
 
+    # The stream identifier chunk of the snappy framing format
+    STREAM_HEADER_SIZE = 10
+
     def __init__(self):
         snappy = _try_import_snappy()
         self.compressor = snappy.StreamCompressor()
@@ -106,8 +119,15 @@ class Lz4Compressor(ChunkedCompressor):
     Uses lz4.frame for streaming compression and decompression. The compressor
     maintains state across add_chunk() calls and requires flush() to be called
     at the end to write the frame end marker.
+
+    The blocks of the frame are independent, and each add_chunk() call ends
+    with a complete block, so the frame can be decompressed starting from any
+    chunk once preceded by the frame header.
     """
 
+    # The frame header, without content size, of the frames written by add_chunk
+    STREAM_HEADER_SIZE = 7
+
     def __init__(self):
         lz4 = _try_import_lz4()
         self._lz4_frame = lz4.frame
@@ -128,7 +148,9 @@ class Lz4Compressor(ChunkedCompressor):
         :rtype: bytes
         """
         if self._compressor is None:
-            self._compressor = self._lz4_frame.LZ4FrameCompressor(auto_flush=True)
+            self._compressor = self._lz4_frame.LZ4FrameCompressor(
+                auto_flush=True, block_linked=False
+            )
 
         if not self._started:
             self._started = True
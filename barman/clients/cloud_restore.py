@@ -15,8 +15,12 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
+import datetime
 import logging
+import multiprocessing
 import os
+import signal
+import time
 from abc import ABCMeta, abstractmethod
 from contextlib import closing
 
@@ -24,9 +28,10 @@ from barman.clients.cloud_cli import (
     CLIErrorExit,
     GeneralErrorExit,
     OperationErrorExit,
+    add_cache_dir_argument,
     create_argument_parser,
 )
-from barman.cloud import CloudBackupCatalog, configure_logging
+from barman.cloud import CloudBackupCatalog, CloudTarIndex, configure_logging
 from barman.cloud_providers import (
     get_cloud_interface,
     get_snapshot_interface_from_backup_info,
@@ -36,18 +41,66 @@ from barman.fs import UnixLocalCommand
 from barman.infofile import BackupInfo
 from barman.recovery_executor import SnapshotRecoveryExecutor
 from barman.utils import (
+    check_positive,
     check_tli,
     force_str,
     get_backup_id_from_target_lsn,
     get_backup_id_from_target_time,
     get_backup_id_from_target_tli,
     get_last_backup_id,
+    human_readable_timedelta,
     parse_target_tli,
+    pretty_size,
     with_metaclass,
 )
 
 _logger = logging.getLogger(__name__)
 
+# Cloud interface used by the worker processes of a parallel restore,
+# set by _init_download_worker
+_download_worker_cloud_interface = None
+
+
+def _init_download_worker(cloud_interface):
+    """
+    Initializer for the worker processes of a parallel restore.
+
+    The worker processes open their own session with the cloud provider,
+    ignore SIGINT, leaving the parent process in charge of handling it, and
+    restore the default SIGTERM handler, so they can be terminated if the
+    parent stops early.
+
+    :param CloudInterface cloud_interface: The interface to the cloud storage
+    """
+    global _download_worker_cloud_interface
+    cloud_interface._reinit_session()
+    _download_worker_cloud_interface = cloud_interface
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _run_download_worker(copy_job):
+    """
+    Download and extract a tar file in a worker process, logging its throughput.
+
+    :param tuple[str,str,int] copy_job: the key of the tar file, the directory
+        it is extracted into and the number of parallel ranged requests
+    """
+    key, target_dir, jobs = copy_job
+    cloud_interface = _download_worker_cloud_interface
+    size = cloud_interface.get_object_size(key)
+    start_time = time.time()
+    cloud_interface.extract_tar(key, target_dir, jobs=jobs, size=size)
+    elapsed = max(time.time() - start_time, 0.001)
+    _logger.info(
+        "Extracted %s to %s: %s in %s (%s/s)",
+        key,
+        target_dir,
+        pretty_size(size),
+        human_readable_timedelta(datetime.timedelta(seconds=elapsed)),
+        pretty_size(size / elapsed),
+    )
+
 
 def _validate_config(config, backup_info):
     """
@@ -64,6 +117,11 @@ def _validate_config(config, backup_info):
                 "Backup %s is a snapshot backup therefore tablespace relocation rules "
                 "cannot be used." % backup_info.backup_id,
             )
+        if config.include:
+            raise ConfigurationException(
+                "Backup %s is a snapshot backup therefore include patterns "
+                "cannot be used." % backup_info.backup_id,
+            )
 
 
 def main(args=None):
@@ -85,7 +143,9 @@ def main(args=None):
                 cloud_interface.verify_cloud_connectivity_and_bucket_existence()
                 raise SystemExit(0)
 
-            catalog = CloudBackupCatalog(cloud_interface, config.server_name)
+            catalog = CloudBackupCatalog(
+                cloud_interface, config.server_name, cache_dir=config.cache_dir
+            )
             backup_id = None
             if config.backup_id != "auto":
                 backup_id = catalog.parse_backup_id(config.backup_id)
@@ -158,6 +218,8 @@ def main(args=None):
                     backup_info,
                     config.recovery_dir,
                     tablespace_map(config.tablespace),
+                    jobs=config.jobs,
+                    include=config.include,
                 )
 
     except KeyboardInterrupt as exc:
@@ -221,6 +283,23 @@ def parse_arguments(args=None):
         "--azure-resource-group",
         help="Resource group containing the instance and disks for the snapshot recovery",
     )
+    parser.add_argument(
+        "-J",
+        "--jobs",
+        type=check_positive,
+        help="number of subprocesses to download and extract the backup files "
+        "concurrently, large files being also downloaded with parallel ranged "
+        "requests (default: 1)",
+        default=1,
+    )
+    parser.add_argument(
+        "--include",
+        help="restore only the files matching this shell-style pattern, or "
+        "contained in the directories matching it, relative to the data "
+        "directory or tablespace location (can be repeated)",
+        metavar="PATTERN",
+        action="append",
+    )
     parser.add_argument("--target-tli", help="target timeline", type=check_tli)
     target_args = parser.add_mutually_exclusive_group()
     target_args.add_argument("--target-lsn", help="target LSN (Log Sequence Number)")
@@ -229,6 +308,7 @@ def parse_arguments(args=None):
         help="target time. You can use any valid unambiguous representation. "
         'e.g: "YYYY-MM-DD HH:MM:SS.mmm"',
     )
+    add_cache_dir_argument(parser)
     return parser.parse_args(args=args)
 
 
@@ -284,12 +364,20 @@ class CloudBackupDownloaderObjectStore(CloudBackupDownloader):
     Cloud storage download client for an object store backup
     """
 
-    def download_backup(self, backup_info, destination_dir, tablespaces):
+    def download_backup(
+        self, backup_info, destination_dir, tablespaces, jobs=1, include=None
+    ):
         """
         Download a backup from cloud storage
 
         :param BackupInfo backup_info: The backup info for the backup to restore
         :param str destination_dir: Path to the destination directory
+        :param dict[str,str] tablespaces: The locations of the relocated
+          tablespaces, keyed by name
+        :param int jobs: The number of worker processes used to download
+          and extract the backup files
+        :param list[str]|None include: If set, only the files matching these
+          shell-style patterns are restored
         """
         # Validate the destination directory before starting recovery
         if os.path.exists(destination_dir) and os.listdir(destination_dir):
@@ -348,19 +436,17 @@ class CloudBackupDownloaderObjectStore(CloudBackupDownloader):
                 copy_jobs.append([additional_file, target_dir])
 
         # Now it's time to download the files
-        for file_info, target_dir in copy_jobs:
-            # Download the file
-            _logger.debug(
-                "Extracting %s to %s (%s)",
-                file_info.path,
-                target_dir,
-                (
-                    "decompressing " + file_info.compression
-                    if file_info.compression
-                    else "no compression"
-                ),
-            )
-            self.cloud_interface.extract_tar(file_info.path, target_dir)
+        if include:
+            for file_info, target_dir in copy_jobs:
+                self._log_extraction(file_info, target_dir)
+                self._extract_included_files(file_info, target_dir, include, jobs)
+        elif jobs > 1:
+            self._download_files_parallel(copy_jobs, jobs)
+        else:
+            for file_info, target_dir in copy_jobs:
+                # Download the file
+                self._log_extraction(file_info, target_dir)
+                self.cloud_interface.extract_tar(file_info.path, target_dir)
 
         for link, target in link_jobs:
             os.symlink(target, link)
@@ -373,6 +459,90 @@ class CloudBackupDownloaderObjectStore(CloudBackupDownloader):
         if not os.path.exists(wal_path):
             os.mkdir(wal_path)
 
+    @staticmethod
+    def _log_extraction(file_info, target_dir):
+        """
+        Log the extraction of a backup file.
+
+        :param BackupFileInfo file_info: The backup file
+        :param str target_dir: The directory the file is extracted into
+        """
+        _logger.debug(
+            "Extracting %s to %s (%s)",
+            file_info.path,
+            target_dir,
+            (
+                "decompressing " + file_info.compression
+                if file_info.compression
+                else "no compression"
+            ),
+        )
+
+    def _extract_included_files(self, file_info, target_dir, include, jobs):
+        """
+        Extract the files of a backup file matching the *include* patterns.
+
+        Only the parts of the backup file containing the matching files are
+        downloaded when the backup file has a member index. Otherwise the
+        whole backup file is streamed.
+
+        :param BackupFileInfo file_info: The backup file
+        :param str target_dir: The directory the files are extracted into
+        :param list[str] include: The shell-style patterns of the files
+        :param int jobs: The maximum number of parallel ranged requests
+        """
+        if file_info.index_path is None:
+            _logger.warning(
+                "No index found for %s: the whole file is downloaded to restore "
+                "the included files",
+                file_info.path,
+            )
+            self.cloud_interface.extract_tar(
+                file_info.path, target_dir, jobs=jobs, include=include
+            )
+            return
+        index_file = self.cloud_interface.remote_open(file_info.index_path)
+        index = CloudTarIndex.loads(index_file.read())
+        extracted = self.cloud_interface.extract_tar_members(
+            file_info.path, target_dir, index, include, jobs=jobs
+        )
+        _logger.info(
+            "Extracted %s files from %s to %s", extracted, file_info.path, target_dir
+        )
+
+    def _download_files_parallel(self, copy_jobs, jobs):
+        """
+        Download and extract the backup files with a pool of worker processes.
+
+        The available jobs are split among the files being extracted at the
+        same time, so that the files larger than
+        :attr:`CloudInterface.RANGED_DOWNLOAD_PART_SIZE` are downloaded with
+        parallel ranged requests when there are fewer files than jobs.
+
+        :param list copy_jobs: The backup files and their target directories
+        :param int jobs: The number of worker processes
+        """
+        processes = min(jobs, len(copy_jobs))
+        if not processes:
+            return
+        ranged_jobs = max(1, jobs // processes)
+        tasks = []
+        for file_info, target_dir in copy_jobs:
+            self._log_extraction(file_info, target_dir)
+            tasks.append((file_info.path, target_dir, ranged_jobs))
+        pool = multiprocessing.Pool(
+            processes=processes,
+            initializer=_init_download_worker,
+            initargs=(self.cloud_interface,),
+        )
+        try:
+            for _ in pool.imap_unordered(_run_download_worker, tasks):
+                pass
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
 
 class CloudBackupDownloaderSnapshot(CloudBackupDownloader):
     """A minimal downloader for cloud backups which just retrieves the backup label."""
@@ -19,6 +19,10 @@
 import logging
 import os
 import os.path
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import closing
 
 from barman.clients.cloud_cli import (
@@ -32,12 +36,26 @@ from barman.clients.cloud_compression import compress
 from barman.cloud import configure_logging
 from barman.cloud_providers import get_cloud_interface
 from barman.config import parse_compression_level
-from barman.exceptions import BarmanException
-from barman.utils import check_positive, check_size, check_tag, force_str
+from barman.exceptions import (
+    BarmanException,
+    LockFileParsingError,
+    LockFilePermissionDenied,
+)
+from barman.lockfile import CloudWalArchiveDaemonLock
+from barman.utils import (
+    check_non_negative,
+    check_positive,
+    check_size,
+    check_tag,
+    force_str,
+)
 from barman.xlog import hash_dir, is_any_xlog_file, is_history_file
 
 _logger = logging.getLogger(__name__)
 
+#: Seconds between two checks of the spool directory for an archived WAL
+SPOOL_POLL_INTERVAL = 0.1
+
 
 def __is_hook_script():
     """Check the environment and determine if we are running as a hook script"""
@@ -66,8 +84,12 @@ def main(args=None):
     config = parse_arguments(args)
     configure_logging(config)
 
+    if config.watch is not None:
+        if config.wal_path is not None or config.spool_dir is None:
+            _logger.error("--watch requires --spool-dir and no wal_path")
+            raise CLIErrorExit()
     # Read wal_path from environment if we're a hook script
-    if __is_hook_script():
+    elif __is_hook_script():
         if "BARMAN_FILE" not in os.environ:
             raise BarmanException("Expected environment variable BARMAN_FILE not set")
         config.wal_path = os.getenv("BARMAN_FILE")
@@ -76,10 +98,22 @@ def main(args=None):
             raise BarmanException("the following arguments are required: wal_path")
 
     # Validate the WAL file name before uploading it
-    if not is_any_xlog_file(config.wal_path):
+    if config.watch is None and not is_any_xlog_file(config.wal_path):
         _logger.error("%s is an invalid name for a WAL file" % config.wal_path)
         raise CLIErrorExit()
 
+    # If an archiver daemon is running, wait for it to archive the WAL
+    # rather than opening a new connection to the cloud storage
+    if (
+        config.watch is None
+        and config.spool_dir is not None
+        and not config.test
+        and wait_for_archived_wal(
+            config.spool_dir, os.path.basename(config.wal_path), config.spool_timeout
+        )
+    ):
+        return
+
     try:
         cloud_interface = get_cloud_interface(config)
 
@@ -95,6 +129,25 @@ def main(args=None):
                 compression_level=config.compression_level,
             )
 
+            if config.watch is not None:
+                daemon = CloudWalArchiveDaemon(
+                    uploader=uploader,
+                    wal_directory=config.watch,
+                    spool_dir=config.spool_dir,
+                    jobs=config.archive_jobs,
+                    history_tags=config.history_tags,
+                )
+                previous_handlers = dict(
+                    (signum, signal.signal(signum, lambda *_args: daemon.stop()))
+                    for signum in (signal.SIGINT, signal.SIGTERM)
+                )
+                try:
+                    daemon.run()
+                finally:
+                    for signum, handler in previous_handlers.items():
+                        signal.signal(signum, handler)
+                return
+
             upload_kwargs = {}
             if is_history_file(config.wal_path):
                 upload_kwargs["override_tags"] = config.history_tags
@@ -181,6 +234,37 @@ def parse_arguments(args=None):
         type=parse_compression_level,
         default=None,
     )
+    parser.add_argument(
+        "--watch",
+        metavar="WAL_DIRECTORY",
+        help="run as an archiver daemon which uploads the WAL files marked as "
+        "ready in the archive_status directory of the given PostgreSQL WAL "
+        "directory, recording them in the spool directory",
+        default=None,
+    )
+    parser.add_argument(
+        "--spool-dir",
+        help="directory where the archiver daemon records the archived WAL files. "
+        "When archiving a single WAL file, wait for the daemon to archive it, "
+        "if the daemon is running",
+        default=None,
+    )
+    parser.add_argument(
+        "--spool-timeout",
+        help="seconds to wait for a running archiver daemon before uploading the "
+        "WAL file directly (default: %(default)s)",
+        type=check_non_negative,
+        default=60,
+    )
+    parser.add_argument(
+        "-J",
+        "--jobs",
+        help="number of WAL files the archiver daemon uploads concurrently "
+        "(default: %(default)s)",
+        type=check_positive,
+        default=4,
+        dest="archive_jobs",
+    )
 
     tag_arguments = parser.add_mutually_exclusive_group()
     add_tag_argument(
@@ -401,5 +485,247 @@ class CloudWalUploader(object):
             raise ValueError("Unknown compression type: %s" % self.compression)
 
 
+def get_archived_wal_marker(spool_dir, wal_name):
+    """
+    Return the path of the file recording that a WAL file has been archived
+    by the archiver daemon.
+
+    :param str spool_dir: the spool directory of the archiver daemon
+    :param str wal_name: the name of the WAL file
+    :rtype: str
+    """
+    return os.path.join(spool_dir, "%s.done" % wal_name)
+
+
+def is_archiver_daemon_running(spool_dir):
+    """
+    Check whether an archiver daemon holds the lock of the spool directory.
+
+    :param str spool_dir: the spool directory of the archiver daemon
+    :rtype: bool
+    """
+    if not os.path.isdir(spool_dir):
+        return False
+    try:
+        return CloudWalArchiveDaemonLock(spool_dir).get_owner_pid() is not None
+    except LockFileParsingError:
+        # The daemon has just acquired the lock and not written its pid yet
+        return True
+    except LockFilePermissionDenied:
+        # The lock cannot be checked, so rely on the timeout only
+        return True
+
+
+def wait_for_archived_wal(spool_dir, wal_name, timeout):
+    """
+    Wait for the archiver daemon to archive a WAL file.
+
+    The wait stops as soon as no archiver daemon is running on the spool
+    directory.
+
+    :param str spool_dir: the spool directory of the archiver daemon
+    :param str wal_name: the name of the WAL file
+    :param int timeout: the maximum number of seconds to wait
+    :return bool: whether the WAL file has been archived by the daemon
+    """
+    marker = get_archived_wal_marker(spool_dir, wal_name)
+    deadline = time.time() + timeout
+    while not os.path.exists(marker):
+        if not is_archiver_daemon_running(spool_dir):
+            _logger.info(
+                "No archiver daemon running on %s, uploading WAL file %s directly",
+                spool_dir,
+                wal_name,
+            )
+            return False
+        if time.time() >= deadline:
+            _logger.info(
+                "WAL file %s not archived by the archiver daemon, "
+                "uploading it directly",
+                wal_name,
+            )
+            return False
+        time.sleep(SPOOL_POLL_INTERVAL)
+    return True
+
+
+class CloudWalArchiveDaemon(object):
+    """
+    Archiver daemon which uploads the WAL files PostgreSQL marks as ready,
+    ahead of the ``archive_command``.
+
+    The WAL files are uploaded concurrently through a single cloud interface,
+    so that connections are reused. Each archived WAL file is recorded in the
+    spool directory, in WAL order, where ``barman-cloud-wal-archive`` finds it
+    when PostgreSQL calls it as ``archive_command``. The daemon holds the lock
+    of the spool directory while it runs, so that ``barman-cloud-wal-archive``
+    does not wait for a daemon which is not running.
+
+    :cvar POLL_INTERVAL: seconds between two checks of the archive_status
+      directory when there is nothing to archive
+    :cvar BATCH_SIZE: number of WAL files submitted per job at each round
+    :cvar LOCK_ATTEMPTS: number of attempts to acquire the lock of the spool
+      directory
+    """
+
+    POLL_INTERVAL = 1.0
+    BATCH_SIZE = 4
+    LOCK_ATTEMPTS = 10
+
+    def __init__(self, uploader, wal_directory, spool_dir, jobs=4, history_tags=None):
+        """
+        :param CloudWalUploader uploader: the uploader of the WAL files
+        :param str wal_directory: the PostgreSQL WAL directory
+        :param str spool_dir: the directory where archived WAL files are recorded
+        :param int jobs: the number of WAL files uploaded concurrently
+        :param List[tuple] history_tags: tags overriding the default ones for
+          the history files
+        """
+        self.uploader = uploader
+        self.wal_directory = wal_directory
+        self.spool_dir = spool_dir
+        self.jobs = jobs
+        self.history_tags = history_tags
+        # WAL files uploaded but not recorded yet because a previous one failed
+        self.uploaded = set()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Ask the daemon to stop once the running uploads are completed.
+        """
+        self._stop_event.set()
+
+    def get_ready_wals(self):
+        """
+        Return the WAL files PostgreSQL is waiting to archive, in WAL order.
+
+        :rtype: list[str]
+        """
+        status_dir = os.path.join(self.wal_directory, "archive_status")
+        ready_wals = []
+        for name in os.listdir(status_dir):
+            wal_name, suffix = os.path.splitext(name)
+            if suffix == ".ready" and is_any_xlog_file(wal_name):
+                ready_wals.append(wal_name)
+        return sorted(ready_wals)
+
+    def _upload_wal(self, wal_name):
+        """
+        Upload a WAL file from the PostgreSQL WAL directory.
+
+        :param str wal_name: the name of the WAL file
+        """
+        upload_kwargs = {}
+        if is_history_file(wal_name):
+            upload_kwargs["override_tags"] = self.history_tags
+        self.uploader.upload_wal(
+            os.path.join(self.wal_directory, wal_name), **upload_kwargs
+        )
+
+    def _record_archived_wals(self, ready_wals):
+        """
+        Record the uploaded WAL files in the spool directory, stopping at the
+        first one which has not been uploaded yet.
+
+        :param list[str] ready_wals: the WAL files waiting to be archived,
+          in WAL order
+        """
+        for wal_name in ready_wals:
+            marker = get_archived_wal_marker(self.spool_dir, wal_name)
+            if os.path.exists(marker):
+                continue
+            if wal_name not in self.uploaded:
+                break
+            with open(marker, "w"):
+                pass
+            self.uploaded.discard(wal_name)
+
+    def _remove_stale_markers(self, ready_wals):
+        """
+        Remove the records of the WAL files PostgreSQL has finished archiving.
+
+        :param list[str] ready_wals: the WAL files waiting to be archived
+        """
+        ready_wals = set(ready_wals)
+        for name in os.listdir(self.spool_dir):
+            wal_name, suffix = os.path.splitext(name)
+            if suffix == ".done" and wal_name not in ready_wals:
+                try:
+                    os.unlink(os.path.join(self.spool_dir, name))
+                except OSError as exc:
+                    _logger.warning(
+                        "Cannot remove %s from the spool directory: %s",
+                        name,
+                        force_str(exc),
+                    )
+        self.uploaded &= ready_wals
+
+    def archive_ready_wals(self, executor):
+        """
+        Upload a batch of the WAL files PostgreSQL is waiting to archive.
+
+        :param concurrent.futures.Executor executor: the executor running
+          the uploads
+        :return int: the number of WAL files uploaded
+        """
+        ready_wals = self.get_ready_wals()
+        self._remove_stale_markers(ready_wals)
+        pending = [
+            wal_name
+            for wal_name in ready_wals
+            if wal_name not in self.uploaded
+            and not os.path.exists(get_archived_wal_marker(self.spool_dir, wal_name))
+        ][: self.jobs * self.BATCH_SIZE]
+        futures = dict(
+            (executor.submit(self._upload_wal, wal_name), wal_name)
+            for wal_name in pending
+        )
+        uploaded = 0
+        for future in as_completed(futures):
+            wal_name = futures[future]
+            try:
+                future.result()
+            except Exception as exc:
+                _logger.error(
+                    "Barman cloud WAL archiver exception uploading %s: %s",
+                    wal_name,
+                    force_str(exc),
+                )
+                _logger.debug("Exception details:", exc_info=exc)
+                continue
+            uploaded += 1
+            self.uploaded.add(wal_name)
+            self._record_archived_wals(ready_wals)
+        return uploaded
+
+    def run(self):
+        """
+        Archive the WAL files marked as ready until :meth:`stop` is called.
+
+        :raises LockFileBusy: if another daemon is running on the spool
+          directory
+        """
+        if not os.path.isdir(self.spool_dir):
+            os.makedirs(self.spool_dir)
+        lock = CloudWalArchiveDaemonLock(self.spool_dir)
+        # The lock is also briefly taken by barman-cloud-wal-archive to check
+        # whether the daemon is running, so retry before giving up
+        for _ in range(self.LOCK_ATTEMPTS - 1):
+            if lock.acquire(raise_if_fail=False):
+                break
+            time.sleep(SPOOL_POLL_INTERVAL)
+        with lock:
+            _logger.info(
+                "Archiving the WAL files of %s with %s jobs",
+                self.wal_directory,
+                self.jobs,
+            )
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                while not self._stop_event.is_set():
+                    if not self.archive_ready_wals(executor):
+                        self._stop_event.wait(self.POLL_INTERVAL)
+
+
 if __name__ == "__main__":
     main()
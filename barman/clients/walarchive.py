@@ -27,6 +27,7 @@ import argparse
 import copy
 import hashlib
 import os
+import shutil
 import subprocess
 import sys
 import tarfile
@@ -38,9 +39,13 @@ from tempfile import TemporaryDirectory
 import barman
 from barman.compression import get_internal_compressor
 from barman.config import parse_compression_level
+from barman.lockfile import LockFile
+from barman.utils import check_positive, fsync_dir
+from barman.xlog import is_any_xlog_file
 
 DEFAULT_USER = "barman"
 BUFSIZE = 16 * 1024
+SPOOL_TMP_SUFFIX = ".tmp"
 
 
 def main(args=None):
@@ -61,6 +66,12 @@ def main(args=None):
     if os.path.isdir(config.wal_path):
         exit_with_error("WAL_PATH cannot be a directory: %s" % config.wal_path)
 
+    # If a spool directory is used, the WAL file is archived as soon as it is
+    # durably stored there, and sent to Barman by the background flusher
+    if config.spool_dir is not None:
+        spool_wal(config)
+        return
+
     try:
         # Execute barman put-wal through the ssh connection
         ssh_process = RemotePutWal(config, config.wal_path)
@@ -124,6 +135,36 @@ def exit_with_error(message, status=2):
     sys.exit(status)
 
 
+def spool_wal(config):
+    """
+    Store the WAL file in the spool directory and make sure the background
+    flusher is running to send it to the Barman server
+
+    :param argparse.Namespace config: the configuration from command line
+    """
+    flusher = WalSpoolFlusher(config)
+    wal_name = os.path.basename(config.wal_path)
+    try:
+        if not os.path.isdir(config.spool_dir):
+            os.makedirs(config.spool_dir)
+        spooled_wals = flusher.get_spooled_wals()
+        # Stop acknowledging WAL files if they are not sent anymore, so that
+        # the failure is reported by PostgreSQL
+        if len(spooled_wals) >= config.spool_max_files and wal_name not in spooled_wals:
+            flusher.start()
+            exit_with_error(
+                "Too many WAL files waiting in the spool directory '%s', "
+                "see '%s' for the errors of the flusher"
+                % (config.spool_dir, flusher.log_file)
+            )
+        flusher.spool_wal(config.wal_path)
+        flusher.start()
+    except EnvironmentError as exc:
+        exit_with_error(
+            "Cannot store '%s' in the spool directory: %s" % (config.wal_path, exc)
+        )
+
+
 def connectivity_test(config):
     """
     Invoke remote put-wal --test to test the connection with Barman server
@@ -244,6 +285,36 @@ def parse_arguments(args=None):
         type=parse_compression_level,
         default=None,
     )
+    parser.add_argument(
+        "--spool-dir",
+        metavar="SPOOL_DIR",
+        help="Acknowledge the WAL file once it is durably stored in this "
+        "directory, and send the stored WAL files to the Barman server in "
+        "batches through a background flusher.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=check_positive,
+        default=32,
+        help="The maximum number of WAL files sent by the flusher through a "
+        "single ssh connection. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--batch-timeout",
+        metavar="SECONDS",
+        type=check_positive,
+        default=5,
+        help="The maximum number of seconds a WAL file waits in the spool "
+        "directory before the flusher sends it. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--spool-max-files",
+        type=check_positive,
+        default=1024,
+        help="Fail when this number of WAL files are waiting in the spool "
+        "directory, so that PostgreSQL reports a flusher unable to send "
+        "them. Defaults to %(default)s.",
+    )
     parser.add_argument(
         "barman_host",
         metavar="BARMAN_HOST",
@@ -389,7 +460,8 @@ class RemotePutWal(object):
     Spawn a process that sends a WAL to a remote Barman server.
 
     :param argparse.Namespace config: the configuration from command line
-    :param wal_path: The name of WAL to upload
+    :param str|list[str] wal_path: The name of WAL to upload, or a list of
+        WALs to upload in a single tar stream
     """
 
     processes = set()
@@ -414,22 +486,25 @@ class RemotePutWal(object):
         hash_settings = {True: ("md5", "MD5SUMS"), False: ("sha256", "SHA256SUMS")}
         hash_algorithm, HASHSUMS_FILE = hash_settings[config.md5]
 
+        wal_paths = [wal_path] if isinstance(wal_path, str) else wal_path
+
         # Send the data as a tar file (containing checksums)
         with self.ssh_process.stdin as dest_file:
             with closing(ChecksumTarFile.open(mode="w|", fileobj=dest_file)) as tar:
-                filename = os.path.basename(wal_path)
                 tar.hash_algorithm = hash_algorithm
                 tar.HASHSUMS_FILE = HASHSUMS_FILE
-                if config.compression is not None:
-                    with TemporaryDirectory(prefix="barman-wal-archive-") as tmpdir:
-                        compressor = get_internal_compressor(
-                            config.compression, config.compression_level
-                        )
-                        compressed_file_path = os.path.join(tmpdir, filename)
-                        compressor.compress(wal_path, compressed_file_path)
-                        tar.add(compressed_file_path, filename)
-                else:
-                    tar.add(wal_path, filename)
+                for path in wal_paths:
+                    filename = os.path.basename(path)
+                    if config.compression is not None:
+                        with TemporaryDirectory(prefix="barman-wal-archive-") as tmpdir:
+                            compressor = get_internal_compressor(
+                                config.compression, config.compression_level
+                            )
+                            compressed_file_path = os.path.join(tmpdir, filename)
+                            compressor.compress(path, compressed_file_path)
+                            tar.add(compressed_file_path, filename)
+                    else:
+                        tar.add(path, filename)
 
     @classmethod
     def wait_for_all(cls):
@@ -461,5 +536,183 @@ class RemotePutWal(object):
         return 0
 
 
+class WalSpoolFlusher(object):
+    """
+    Send the WAL files stored in the spool directory to the Barman server,
+    in batches of up to ``batch_size`` WAL files through a single ``put-wal``
+    command.
+
+    A batch is sent as soon as ``batch_size`` WAL files are waiting, or when
+    the oldest one has been waiting for ``batch_timeout`` seconds. The flusher
+    runs in a background process, started by the ``archive_command`` when
+    needed, which terminates once the spool directory stays empty for
+    ``batch_timeout`` seconds.
+
+    :cvar POLL_INTERVAL: seconds between two checks of the spool directory
+    :cvar MAX_RETRY_INTERVAL: maximum seconds between two attempts to send
+        a batch which failed
+    """
+
+    POLL_INTERVAL = 0.2
+    MAX_RETRY_INTERVAL = 60
+    LOCK_FILE = ".flusher.lock"
+    LOG_FILE = "flusher.log"
+
+    def __init__(self, config):
+        """
+        :param argparse.Namespace config: the configuration from command line
+        """
+        self.config = config
+        self.spool_dir = config.spool_dir
+        self.log_file = os.path.join(self.spool_dir, self.LOG_FILE)
+        self.lock = LockFile(
+            os.path.join(self.spool_dir, self.LOCK_FILE), raise_if_fail=False
+        )
+
+    def get_spooled_wals(self):
+        """
+        Return the WAL files waiting in the spool directory, in WAL order.
+
+        :rtype: list[str]
+        """
+        return sorted(
+            name for name in os.listdir(self.spool_dir) if is_any_xlog_file(name)
+        )
+
+    def spool_wal(self, wal_path):
+        """
+        Durably copy a WAL file in the spool directory.
+
+        The file is written with a temporary name and renamed once synced to
+        disk, so that the flusher never sends an incomplete WAL file.
+
+        :param str wal_path: the path of the WAL file
+        """
+        spool_path = os.path.join(self.spool_dir, os.path.basename(wal_path))
+        tmp_path = spool_path + SPOOL_TMP_SUFFIX
+        with open(wal_path, "rb") as src, open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, BUFSIZE)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.rename(tmp_path, spool_path)
+        fsync_dir(self.spool_dir)
+
+    def start(self):
+        """
+        Start the flusher in a background process, unless it is running.
+        """
+        if not self.lock.acquire():
+            return
+        # The lock is shared with a forked process, so it must be released
+        # here and acquired again by the background process
+        self.lock.release()
+        if os.fork():
+            return
+        try:
+            os.setsid()
+            # Detach from the archive_command output, logging the errors
+            log_fd = os.open(
+                self.log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+            )
+            null_fd = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(null_fd, 0)
+            os.dup2(log_fd, 1)
+            os.dup2(log_fd, 2)
+            self.run()
+        except Exception as exc:
+            self.log_error("Unexpected error in the flusher: %s" % exc)
+        finally:
+            os._exit(0)
+
+    def log_error(self, message):
+        """
+        Print an error message, with a timestamp, to the flusher log.
+
+        :param str message: the message to print
+        """
+        print(
+            "%s ERROR: %s" % (time.strftime("%Y-%m-%d %H:%M:%S"), message),
+            file=sys.stderr,
+        )
+        sys.stderr.flush()
+
+    def flush(self, wal_names):
+        """
+        Send a batch of spooled WAL files through a single ``put-wal``
+        command, removing them from the spool directory once archived.
+
+        :param list[str] wal_names: the WAL files to send
+        :return bool: whether the WAL files have been archived
+        """
+        try:
+            put_wal = RemotePutWal(
+                self.config,
+                [os.path.join(self.spool_dir, wal_name) for wal_name in wal_names],
+            )
+            RemotePutWal.wait_for_all()
+        except EnvironmentError as exc:
+            self.log_error("Error executing ssh: %s" % exc)
+            return False
+        if put_wal.returncode != 0:
+            self.log_error(
+                "Remote 'barman put-wal' command has failed with exit code %s "
+                "sending %s WAL files from %s"
+                % (put_wal.returncode, len(wal_names), wal_names[0])
+            )
+            return False
+        for wal_name in wal_names:
+            os.unlink(os.path.join(self.spool_dir, wal_name))
+        return True
+
+    def flush_spool(self):
+        """
+        Send the spooled WAL files, until the spool directory stays empty
+        for ``batch_timeout`` seconds.
+        """
+        batch_size = self.config.batch_size
+        batch_timeout = self.config.batch_timeout
+        failures = 0
+        idle_since = time.time()
+        while True:
+            wal_names = self.get_spooled_wals()
+            now = time.time()
+            if not wal_names:
+                if now - idle_since >= batch_timeout:
+                    return
+                time.sleep(self.POLL_INTERVAL)
+                continue
+            oldest = min(
+                os.path.getmtime(os.path.join(self.spool_dir, wal_name))
+                for wal_name in wal_names
+            )
+            if len(wal_names) < batch_size and now - oldest < batch_timeout:
+                time.sleep(self.POLL_INTERVAL)
+                continue
+            if self.flush(wal_names[:batch_size]):
+                failures = 0
+            else:
+                failures += 1
+                time.sleep(
+                    min(self.MAX_RETRY_INTERVAL, self.POLL_INTERVAL * 2**failures)
+                )
+            idle_since = time.time()
+
+    def run(self):
+        """
+        Send the spooled WAL files, holding the flusher lock.
+
+        Once the lock is released, the spool directory is checked again, as
+        an ``archive_command`` could have stored a WAL file while the lock was
+        held, without starting a new flusher.
+        """
+        while self.lock.acquire():
+            try:
+                self.flush_spool()
+            finally:
+                self.lock.release()
+            if not self.get_spooled_wals():
+                break
+
+
 if __name__ == "__main__":
     main()
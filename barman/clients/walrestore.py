@@ -30,16 +30,20 @@ import os
 import shutil
 import subprocess
 import sys
+import tarfile
 import time
+from contextlib import closing
 from io import BytesIO
 from multiprocessing import Process
 
 import barman
+from barman import xlog
 from barman.compression import CompressionManager, get_server_config_minimal
 from barman.utils import force_str
 
 DEFAULT_USER = "barman"
 DEFAULT_SPOOL_DIR = "/var/tmp/walrestore"
+SPOOL_TMP_SUFFIX = ".tmp"
 
 # The string_types list is used to identify strings
 # in a consistent way between python 2 and 3
@@ -86,6 +90,25 @@ def main(args=None):
     # If the file is present in SPOOL_DIR use it and terminate
     try_deliver_from_spool(config, dest_file.name)
 
+    # If requested, fetch the file and the following ones through a single
+    # ssh connection, then deliver it from SPOOL_DIR
+    if config.batch and config.parallel:
+        try:
+            returncode = fetch_wal_batch(config)
+        except EnvironmentError as e:
+            exit_with_error('Error executing "ssh": %s' % e, sleep=config.sleep)
+            return  # never reached
+        except KeyboardInterrupt:
+            exit_with_error("SIGINT received! Terminating.")
+            return  # never reached
+        try_deliver_from_spool(config, dest_file.name)
+        if returncode == 0:
+            exit_with_error(
+                "The required file is not available: %s" % config.wal_name,
+                sleep=config.sleep,
+            )
+        exit_with_get_wal_failure(config, returncode)
+
     # If requested, load the list of files to fetch in parallel
     additional_files = peek_additional_files(config)
 
@@ -118,13 +141,23 @@ def main(args=None):
     if ssh_process.returncode == 0:
         sys.exit(0)
 
+    exit_with_get_wal_failure(config, ssh_process.returncode)
+
+
+def exit_with_get_wal_failure(config, returncode):
+    """
+    Report the failure of a remote get-wal command and terminate the script
+
+    :param argparse.Namespace config: the configuration from command line
+    :param int returncode: the exit code of the ssh command
+    """
     # Report the exit code, remapping ssh failure code (255) to 2
-    if ssh_process.returncode == 255:
+    if returncode == 255:
         exit_with_error("Connection problem with ssh", 2, sleep=config.sleep)
     else:
         exit_with_error(
             "Remote 'barman get-wal' command has failed!",
-            ssh_process.returncode,
+            returncode,
             sleep=config.sleep,
         )
 
@@ -178,12 +211,7 @@ def peek_additional_files(config):
     if not config.parallel:
         return []
 
-    # Make sure the SPOOL_DIR exists
-    try:
-        if not os.path.exists(config.spool_dir):
-            os.mkdir(config.spool_dir)
-    except EnvironmentError as e:
-        exit_with_error("Cannot create '%s' directory: %s" % (config.spool_dir, e))
+    create_spool_dir(config)
 
     # Retrieve the list of files from remote
     additional_files = execute_peek(config)
@@ -198,13 +226,80 @@ def peek_additional_files(config):
     return additional_files
 
 
-def build_ssh_command(config, wal_name, peek=0):
+def create_spool_dir(config):
+    """
+    Make sure the SPOOL_DIR exists
+
+    :param argparse.Namespace config: the configuration from command line
+    """
+    try:
+        if not os.path.exists(config.spool_dir):
+            os.mkdir(config.spool_dir)
+    except EnvironmentError as e:
+        exit_with_error("Cannot create '%s' directory: %s" % (config.spool_dir, e))
+
+
+def fetch_wal_batch(config):
+    """
+    Invoke remote get-wal --batch to receive the requested WAL file and the
+    following ones in a single tar stream, unpacking them in the SPOOL_DIR.
+
+    Every WAL file is written to a temporary file which is renamed once
+    complete, so an interrupted stream never leaves a truncated WAL file
+    in the SPOOL_DIR.
+
+    :param argparse.Namespace config: the configuration from command line
+    :return int: the exit code of the ssh command
+    """
+    create_spool_dir(config)
+
+    ssh_process = subprocess.Popen(
+        build_ssh_command(config, config.wal_name, batch=config.parallel),
+        stdout=subprocess.PIPE,
+    )
+    tmp_file_name = None
+    error = None
+    try:
+        with closing(tarfile.open(mode="r|", fileobj=ssh_process.stdout)) as tar:
+            for member in tar:
+                # Only accept plain WAL files, without any path component
+                if (
+                    not member.isfile()
+                    or os.path.basename(member.name) != member.name
+                    or not xlog.is_any_xlog_file(member.name)
+                ):
+                    raise tarfile.TarError("unexpected member '%s'" % member.name)
+                spool_file_name = os.path.join(config.spool_dir, member.name)
+                tmp_file_name = spool_file_name + SPOOL_TMP_SUFFIX
+                with open(tmp_file_name, "wb+") as tmp_file:
+                    shutil.copyfileobj(tar.extractfile(member), tmp_file)
+                    decompress_wal_file(config, tmp_file)
+                os.rename(tmp_file_name, spool_file_name)
+                tmp_file_name = None
+    except (tarfile.TarError, EnvironmentError) as e:
+        error = e
+    finally:
+        if tmp_file_name is not None and os.path.exists(tmp_file_name):
+            os.unlink(tmp_file_name)
+        ssh_process.stdout.close()
+        ssh_process.wait()
+
+    # If the remote command failed, an invalid stream is expected and the
+    # failure is reported through its exit code
+    if error is not None and ssh_process.returncode == 0:
+        print("ERROR: Invalid WAL batch received: %s" % error, file=sys.stderr)
+
+    return ssh_process.returncode
+
+
+def build_ssh_command(config, wal_name, peek=0, batch=0):
     """
     Prepare an ssh command according to the arguments passed on command line
 
     :param argparse.Namespace config: the configuration from command line
     :param str wal_name: the wal_name get-wal parameter
     :param int peek: in
+    :param int batch: the number of WAL files to receive in a tar stream
     :return list[str]: the ssh command as list of string
     """
     ssh_command = ["ssh"]
@@ -226,6 +321,8 @@ def build_ssh_command(config, wal_name, peek=0):
         options.append("--test")
     if peek:
         options.append("--peek '%s'" % peek)
+    if batch:
+        options.append("--batch '%s'" % batch)
     if config.compression:
         options.append("--%s" % config.compression)
     if config.keep_compression:
@@ -367,6 +464,14 @@ def parse_arguments(args=None):
         "in parallel. "
         "Defaults to 0 (disabled).",
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        action="store_true",
+        help="Used with --parallel, receive the requested WAL file and the "
+        "following ones in a single tar stream through one ssh connection, "
+        "instead of using a connection for each file.",
+    )
     parser.add_argument(
         "--spool-dir",
         default=DEFAULT_SPOOL_DIR,
@@ -443,6 +548,32 @@ def parse_arguments(args=None):
     return parser.parse_args(args=args)
 
 
+def decompress_wal_file(config, dest_file):
+    """
+    Decompress in place a WAL file received from the Barman server, if needed
+
+    :param argparse.Namespace config: the configuration from command line
+    :param dest_file: a readable and writable file object containing the WAL
+    """
+    dest_file.seek(0)
+
+    # Identify the WAL compression, if any
+    server_config = get_server_config_minimal(config.compression, None)
+    compression_manager = CompressionManager(server_config, None)
+    compression = compression_manager.identify_compression(dest_file)
+
+    # If compressed, decompress and overwrite the contents of the destination file
+    # Note: we are able to use decompress_in_mem here because it's sure that
+    # compressor can only be an InternalCompressor
+    if compression is not None:
+        compressor = compression_manager.get_compressor(compression)
+        dec_fileobj = compressor.decompress_in_mem(dest_file)
+        dec_fileobj = BytesIO(dec_fileobj.read())  # avoid lazy-decompressors
+        dest_file.truncate(0)
+        dest_file.seek(0)
+        shutil.copyfileobj(dec_fileobj, dest_file)
+
+
 class RemoteGetWal(object):
     """
     Class responsible for fetching requested WAL file from the
@@ -480,23 +611,7 @@ class RemoteGetWal(object):
             build_ssh_command(config, wal_name), stdout=dest_file
         )
         self.ssh_process.wait()
-        dest_file.seek(0)
-
-        # Identify the WAL compression, if any
-        server_config = get_server_config_minimal(config.compression, None)
-        compression_manager = CompressionManager(server_config, None)
-        compression = compression_manager.identify_compression(dest_file)
-
-        # If compressed, decompress and overwrite the contents of the destination file
-        # Note: we are able to use decompress_in_mem here because it's sure that
-        # compressor can only be an InternalCompressor
-        if compression is not None:
-            compressor = compression_manager.get_compressor(compression)
-            dec_fileobj = compressor.decompress_in_mem(dest_file)
-            dec_fileobj = BytesIO(dec_fileobj.read())  # avoid lazy-decompressors
-            dest_file.truncate(0)
-            dest_file.seek(0)
-            shutil.copyfileobj(dec_fileobj, dest_file)
+        decompress_wal_file(config, dest_file)
 
         # close the opened file
         dest_file.close()
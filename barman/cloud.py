@@ -16,10 +16,16 @@
 # You should have received a copy of the GNU General Public License
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
 
+import base64
+import bz2
 import collections
 import copy
 import datetime
 import errno
+import fnmatch
+import gzip
+import hashlib
+import itertools
 import json
 import logging
 import multiprocessing
@@ -32,7 +38,10 @@ import tarfile
 import threading
 import time
 from abc import ABCMeta, abstractmethod, abstractproperty
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing, nullcontext
 from io import BytesIO, RawIOBase
+from multiprocessing import resource_tracker, shared_memory
 from tempfile import NamedTemporaryFile
 
 from barman import xlog
@@ -47,6 +56,7 @@ from barman.clients.cloud_cli import (
 from barman.exceptions import (
     BackupException,
     BackupPreconditionException,
+    BadXlogPrefix,
     BarmanException,
     ConfigurationException,
 )
@@ -60,9 +70,10 @@ from barman.utils import (
     human_readable_timedelta,
     is_backup_id,
     pretty_size,
-    range_fun,
+    read_json_cache,
     total_seconds,
     with_metaclass,
+    write_json_cache,
 )
 
 _logger = logging.getLogger(__name__)
@@ -132,6 +143,46 @@ def copyfileobj_pad_truncate(src, dst, length=None):
             dst.write(tarfile.NUL * (remainder - len(buf)))
 
 
+class BoundedReader(RawIOBase):
+    """
+    Provide an IOBase interface which reads at most a given number of bytes
+    from a wrapped file-like object.
+    """
+
+    def __init__(self, fileobj, length):
+        """
+        :param IOBase fileobj: the file-like object to read
+        :param int length: the number of bytes which can be read
+        """
+        self.fileobj = fileobj
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        if n < 0 or n > self.remaining:
+            n = self.remaining
+        data = self.fileobj.read(n) if n else b""
+        self.remaining -= len(data)
+        return data
+
+
+def _skip_bytes(fileobj, length):
+    """
+    Read and discard exactly *length* bytes from *fileobj*.
+
+    :param IOBase fileobj: the file-like object to read
+    :param int length: the number of bytes to skip
+    :raises EOFError: if *fileobj* ends before *length* bytes are read
+    """
+    while length > 0:
+        chunk = fileobj.read(min(length, BUFSIZE))
+        if not chunk:
+            raise EOFError("Unexpected end of the tar archive")
+        length -= len(chunk)
+
+
 class CloudProviderError(BarmanException):
     """
     This exception is raised when we get an error in the response from the
@@ -164,8 +215,13 @@ class TarFileIgnoringTruncate(tarfile.TarFile):
         tarinfo = copy.copy(tarinfo)
 
         buf = tarinfo.tobuf(self.format, self.encoding, self.errors)
+        # Record where the member is in the archive, so that it can be indexed
+        # as soon as its header is written
+        tarinfo.offset = self.offset
+        tarinfo.offset_data = self.offset + len(buf)
         self.fileobj.write(buf)
         self.offset += len(buf)
+        self.members.append(tarinfo)
 
         # If there's data to follow, append it.
         if fileobj is not None:
@@ -176,10 +232,181 @@ class TarFileIgnoringTruncate(tarfile.TarFile):
                 blocks += 1
             self.offset += blocks * tarfile.BLOCKSIZE
 
-        self.members.append(tarinfo)
+
+def tar_member_matches(name, patterns):
+    """
+    Check whether a tar member matches any of the *patterns*.
+
+    A member matches a pattern if its name matches the shell-style pattern, or
+    if it is inside a directory matching it.
+
+    :param str name: the name of the tar member
+    :param list[str] patterns: the shell-style patterns
+    :rtype: bool
+    """
+    name = os.path.normpath(name)
+    for pattern in patterns:
+        pattern = os.path.normpath(pattern)
+        if fnmatch.fnmatch(name, pattern):
+            return True
+        # Also match the members of the matching directories
+        for parent in _tar_member_parents(name):
+            if fnmatch.fnmatch(parent, pattern):
+                return True
+    return False
+
+
+def _tar_member_parents(name):
+    """
+    Return the parent directories of a tar member, innermost first.
+
+    :param str name: the normalised name of the tar member
+    :rtype: Iterator[str]
+    """
+    parent = os.path.dirname(name)
+    while parent:
+        yield parent
+        parent = os.path.dirname(parent)
+
+
+class CloudTarIndex(object):
+    """
+    Index of the members of a tar archive uploaded to cloud storage.
+
+    The index is stored next to the archive, in an object with the same key
+    followed by :attr:`SUFFIX`. It is made of a JSON header line describing
+    the archive, followed by one JSON array per member containing the values
+    of :attr:`FIELDS`:
+
+    * ``name``: the name of the member;
+    * ``header_offset``: the offset of its header in the tar stream;
+    * ``data_offset``: the offset of its content in the tar stream;
+    * ``size``: the size of its content;
+    * ``compressed_offset``: the offset in the archive object of the closest
+      point, preceding the header, from which the archive can be decompressed;
+    * ``restart_offset``: the offset in the tar stream of that point;
+    * ``compressed_end``: the offset in the archive object of the closest
+      point, following the content, from which the archive can be
+      decompressed.
+
+    Only the range between ``compressed_offset`` and ``compressed_end`` of
+    the archive is needed to extract a member. When the compression is
+    applied by tar itself the archive can only be decompressed from its
+    beginning, so these offsets cover the whole archive.
+
+    :cvar SUFFIX: The suffix of the key of the index objects
+    :cvar VERSION: The version of the index format
+    :cvar FIELDS: The fields of each index entry
+    """
+
+    SUFFIX = ".index"
+    VERSION = 1
+    FIELDS = (
+        "name",
+        "header_offset",
+        "data_offset",
+        "size",
+        "compressed_offset",
+        "restart_offset",
+        "compressed_end",
+    )
+    Entry = collections.namedtuple("CloudTarIndexEntry", FIELDS)
+
+    def __init__(self, compression=None, stream_header_size=0, entries=None):
+        """
+        :param str|None compression: the compression of the archive, as in
+          :class:`CloudUploadController`
+        :param int stream_header_size: the size of the header of the
+          compressed stream which must precede the data decompressed from
+          a restart point
+        :param list[CloudTarIndex.Entry]|None entries: the members of the
+          archive
+        """
+        self.compression = compression
+        self.stream_header_size = stream_header_size
+        self.entries = entries if entries is not None else []
+
+    def add(self, member, restart_point, compressed_end):
+        """
+        Add a member of the archive to the index.
+
+        :param tarfile.TarInfo member: the tar member, with its offsets set
+        :param tuple[int,int] restart_point: the offsets in the archive object
+          and in the tar stream of the restart point preceding the member
+        :param int compressed_end: the offset in the archive object of the
+          restart point following the member
+        """
+        compressed_offset, restart_offset = restart_point
+        self.entries.append(
+            self.Entry(
+                member.name,
+                member.offset,
+                member.offset_data,
+                member.size,
+                compressed_offset,
+                restart_offset,
+                compressed_end,
+            )
+        )
+
+    def dumps(self):
+        """
+        Serialise the index.
+
+        :rtype: bytes
+        """
+        lines = [
+            json.dumps(
+                {
+                    "version": self.VERSION,
+                    "compression": self.compression,
+                    "stream_header_size": self.stream_header_size,
+                    "fields": self.FIELDS,
+                }
+            )
+        ]
+        lines.extend(json.dumps(list(entry)) for entry in self.entries)
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Load an index serialised by :meth:`dumps`.
+
+        :param bytes data: the serialised index
+        :rtype: CloudTarIndex
+        :raises ValueError: if the index format is not supported
+        """
+        lines = data.decode("utf-8").splitlines()
+        header = json.loads(lines[0])
+        if header.get("version") != cls.VERSION:
+            raise ValueError(
+                "Unsupported tar index version: %s" % header.get("version")
+            )
+        fields = header["fields"]
+        entries = []
+        for line in lines[1:]:
+            values = dict(zip(fields, json.loads(line)))
+            entries.append(cls.Entry(*[values[field] for field in cls.FIELDS]))
+        return cls(header["compression"], header["stream_header_size"], entries)
+
+    def find(self, patterns):
+        """
+        Return the entries of the members matching the *patterns*.
+
+        :param list[str] patterns: the shell-style patterns, see
+          :func:`tar_member_matches`
+        :rtype: list[CloudTarIndex.Entry]
+        """
+        return [
+            entry for entry in self.entries if tar_member_matches(entry.name, patterns)
+        ]
 
 
 class CloudTarUploader(object):
+    # The maximum chunk size for which the parts are kept in memory
+    MAX_MEMORY_PART_SIZE = 64 << 20
+
     def __init__(
         self,
         cloud_interface,
@@ -188,6 +415,7 @@ class CloudTarUploader(object):
         compression=None,
         max_bandwidth=None,
         staging_dir=None,
+        lock=None,
     ):
         """
         A tar archive that resides on cloud storage
@@ -200,8 +428,11 @@ class CloudTarUploader(object):
           should be uploaded by this tar uploader
         :param str|None staging_dir: the temporary directory where part files are
           created before uploaded
+        :param threading.Lock|None lock: the lock serialising the access to
+          the cloud interface, when it is shared with other threads
         """
         self.cloud_interface = cloud_interface
+        self.lock = lock if lock is not None else threading.Lock()
         self.key = key
         self.chunk_size = chunk_size
         self.max_bandwidth = max_bandwidth
@@ -216,6 +447,20 @@ class CloudTarUploader(object):
         # If the compression is supported by tar then it will be added to the filemode
         # passed to tar_mode.
         tar_mode = cloud_compression.get_streaming_tar_mode("w", compression)
+        # The members of the archive are indexed while it is written. Unless the
+        # compression is applied by tar itself, the tar stream is received
+        # uncompressed and the archive can be decompressed from the start of
+        # any write, which is then a restart point for the index.
+        self.index = CloudTarIndex(
+            compression,
+            self.compressor.STREAM_HEADER_SIZE if self.compressor else 0,
+        )
+        self.restartable = tar_mode == "w|"
+        self.restart_points = collections.deque([(0, 0)])
+        self.tar_size = 0
+        self.unindexed_members = collections.deque()
+        self.next_member = 0
+        self.tar = None
         # The value of 65536 for the chunk size is based on comments in the python-snappy
         # library which suggest it should be good for almost every scenario.
         # See: https://github.com/andrix/python-snappy/blob/0.6.0/snappy/snappy.py#L282
@@ -228,7 +473,9 @@ class CloudTarUploader(object):
         self.size_of_last_upload = None
 
     # This is the method we use to create new buffers
-    # We use named temporary files, so we can pass them by name to
+    # Parts up to MAX_MEMORY_PART_SIZE are kept in memory and passed to the
+    # other processes through shared memory by the cloud interface. Larger
+    # parts use named temporary files, so we can pass them by name to
     # other processes
     # 20251223 pvbiesen: partial broke in 3.14, this could fix it with staticmethod :
     # _buffer = staticmethod(partial(
@@ -236,6 +483,8 @@ class CloudTarUploader(object):
     # ))
     # 20251223 pvbiesen: or, just for readability :
     def _buffer(self):
+        if self.chunk_size <= self.MAX_MEMORY_PART_SIZE:
+            return BytesIO()
         return NamedTemporaryFile(
             delete=False,
             prefix="barman-upload-",
@@ -243,7 +492,52 @@ class CloudTarUploader(object):
             dir=self.staging_dir,
         )
 
+    def _index_members(self, tar_offset, compressed_offset):
+        """
+        Add a restart point, indexing the tar members which it delimits.
+
+        The members whose header precedes the new restart point are assigned
+        the last restart point preceding their header, while the members whose
+        content ends before the new restart point are complete and can be
+        added to the index.
+
+        :param int tar_offset: the offset of the restart point in the tar stream
+        :param int compressed_offset: the offset of the restart point in the
+          archive object
+        """
+        members = self.tar.members if self.tar else []
+        while (
+            self.next_member < len(members)
+            and members[self.next_member].offset < tar_offset
+        ):
+            member = members[self.next_member]
+            while (
+                len(self.restart_points) > 1
+                and self.restart_points[1][1] <= member.offset
+            ):
+                self.restart_points.popleft()
+            self.unindexed_members.append((member, self.restart_points[0]))
+            self.next_member += 1
+        while self.unindexed_members:
+            member, restart_point = self.unindexed_members[0]
+            if member.offset_data + member.size > tar_offset:
+                break
+            self.index.add(member, restart_point, compressed_offset)
+            self.unindexed_members.popleft()
+        self.restart_points.append((compressed_offset, tar_offset))
+        # The members still to be indexed start after the current offset of the
+        # tar archive, so only the last restart point preceding it is needed
+        if self.next_member < len(members):
+            next_offset = members[self.next_member].offset
+        else:
+            next_offset = self.tar.offset if self.tar else 0
+        while len(self.restart_points) > 1 and self.restart_points[1][1] <= next_offset:
+            self.restart_points.popleft()
+
     def write(self, buf):
+        if self.restartable:
+            self._index_members(self.tar_size, self.size)
+            self.tar_size += len(buf)
         if self.buffer and self.buffer.tell() > self.chunk_size:
             self.flush()
         if not self.buffer:
@@ -289,9 +583,10 @@ class CloudTarUploader(object):
 
     def flush(self):
         if not self.upload_metadata:
-            self.upload_metadata = self.cloud_interface.create_multipart_upload(
-                self.key
-            )
+            with self.lock:
+                self.upload_metadata = self.cloud_interface.create_multipart_upload(
+                    self.key
+                )
 
         part_size = self.buffer.tell()
         self.buffer.flush()
@@ -301,12 +596,14 @@ class CloudTarUploader(object):
             # Upload throttling is applied just before uploading the next part so that
             # compression and flushing have already happened before we start waiting.
             self._throttle_upload(part_size)
-        self.cloud_interface.async_upload_part(
-            upload_metadata=self.upload_metadata,
-            key=self.key,
-            body=self.buffer,
-            part_number=self.counter,
-        )
+        with self.lock:
+            self.cloud_interface.async_upload_part(
+                upload_metadata=self.upload_metadata,
+                key=self.key,
+                body=self.buffer,
+                part_number=self.counter,
+                staging_dir=self.staging_dir,
+            )
         self.buffer.close()
         self.buffer = None
 
@@ -322,12 +619,23 @@ class CloudTarUploader(object):
                 self.buffer.write(final_bytes)
                 self.size += len(final_bytes)
         self.flush()
+        # The lock is not held while waiting for the workers, so that the
+        # other archives can keep uploading their parts in the meantime
         self.cloud_interface.async_complete_multipart_upload(
             upload_metadata=self.upload_metadata,
             key=self.key,
             parts_count=self.counter,
+            lock=self.lock,
+        )
+        self.stats = self.cloud_interface.wait_for_multipart_upload(
+            self.key, lock=self.lock
         )
-        self.stats = self.cloud_interface.wait_for_multipart_upload(self.key)
+        # All the remaining members end before the end of the archive
+        self._index_members(sys.maxsize, self.size)
+        with self.lock:
+            self.cloud_interface.upload_fileobj(
+                BytesIO(self.index.dumps()), self.key + CloudTarIndex.SUFFIX
+            )
 
 
 class CloudUploadController(object):
@@ -340,6 +648,7 @@ class CloudUploadController(object):
         min_chunk_size=None,
         max_bandwidth=None,
         staging_dir=None,
+        streams=1,
     ):
         """
         Create a new controller that upload the backup in cloud storage
@@ -353,6 +662,8 @@ class CloudUploadController(object):
           should be uploaded during the backup
         :param str|None staging_dir: the temporary directory where part files are
             created before uploaded
+        :param int streams: the number of independently compressed archives
+            each directory is split into, built in parallel by as many threads
         """
 
         self.cloud_interface = cloud_interface
@@ -383,6 +694,9 @@ class CloudUploadController(object):
         self.compression = compression
         self.max_bandwidth = max_bandwidth
         self.staging_dir = staging_dir
+        self.streams = streams
+        # The archives built in parallel share the cloud interface
+        self.lock = threading.Lock()
         self.tar_list = {}
 
         self.upload_stats = {}
@@ -418,6 +732,45 @@ class CloudUploadController(object):
             components.append(".lz4")
         return "".join(components)
 
+    @staticmethod
+    def _build_stream_name(name, stream):
+        """
+        Get the name prefix of an archive built in parallel with the others
+        holding the content of the same directory.
+
+        The suffix starting with ``_`` makes the restore process treat the
+        archive as an additional file of the directory.
+
+        :param str name: the name prefix of the directory
+        :param int stream: the number of the stream, 0 being the main one
+        :rtype: str
+        """
+        if stream == 0:
+            return name
+        return "%s_s%02d" % (name, stream)
+
+    def _create_uploader(self, name, count=0):
+        """
+        Create the uploader of a new archive.
+
+        :param str name: the name prefix
+        :param int count: the part count
+        :rtype: CloudTarUploader
+        """
+        # The bandwidth is shared among the archives built in parallel
+        max_bandwidth = self.max_bandwidth
+        if max_bandwidth and self.streams > 1:
+            max_bandwidth = float(max_bandwidth) / self.streams
+        return CloudTarUploader(
+            cloud_interface=self.cloud_interface,
+            key=os.path.join(self.key_prefix, self._build_dest_name(name, count)),
+            chunk_size=self.chunk_size,
+            compression=self.compression,
+            max_bandwidth=max_bandwidth,
+            staging_dir=self.staging_dir,
+            lock=self.lock,
+        )
+
     def _get_tar(self, name):
         """
         Get a named tar file from cloud storage.
@@ -426,31 +779,13 @@ class CloudUploadController(object):
         :rtype: tarfile.TarFile
         """
         if name not in self.tar_list or not self.tar_list[name]:
-            self.tar_list[name] = [
-                CloudTarUploader(
-                    cloud_interface=self.cloud_interface,
-                    key=os.path.join(self.key_prefix, self._build_dest_name(name)),
-                    chunk_size=self.chunk_size,
-                    compression=self.compression,
-                    max_bandwidth=self.max_bandwidth,
-                    staging_dir=self.staging_dir,
-                )
-            ]
+            self.tar_list[name] = [self._create_uploader(name)]
         # If the current uploading file size is over DEFAULT_MAX_TAR_SIZE
         # Close the current file and open the next part
         uploader = self.tar_list[name][-1]
         if uploader.size > self.max_archive_size:
             uploader.close()
-            uploader = CloudTarUploader(
-                cloud_interface=self.cloud_interface,
-                key=os.path.join(
-                    self.key_prefix,
-                    self._build_dest_name(name, len(self.tar_list[name])),
-                ),
-                chunk_size=self.chunk_size,
-                compression=self.compression,
-                max_bandwidth=self.max_bandwidth,
-            )
+            uploader = self._create_uploader(name, len(self.tar_list[name]))
             self.tar_list[name].append(uploader)
         return uploader.tar
 
@@ -461,35 +796,82 @@ class CloudUploadController(object):
             src,
             self._build_dest_name(dst),
         )
+        if self.streams == 1:
+            self._add_members(dst, self._directory_members(src, exclude, include))
+            return
+
+        # The directories are added to the main archive, while every file is
+        # added to the archive which has been assigned the fewest bytes so far
+        members = [[] for _ in range(self.streams)]
+        sizes = [0] * self.streams
+        for path, arcname, is_dir in self._directory_members(src, exclude, include):
+            stream = 0
+            if not is_dir:
+                stream = sizes.index(min(sizes))
+                try:
+                    sizes[stream] += os.lstat(path).st_size
+                except OSError:
+                    # The file will be skipped if it has disappeared
+                    pass
+            members[stream].append((path, arcname, is_dir))
+        with ThreadPoolExecutor(max_workers=self.streams) as executor:
+            futures = [
+                executor.submit(
+                    self._add_members,
+                    self._build_stream_name(dst, stream),
+                    stream_members,
+                )
+                for stream, stream_members in enumerate(members)
+                if stream_members
+            ]
+            for future in futures:
+                future.result()
+
+    @staticmethod
+    def _directory_members(src, exclude, include):
+        """
+        Walk a directory, returning the members to be added to the archive.
+
+        :param str src: the directory
+        :param list[str]|None exclude: the patterns of the paths to exclude
+        :param list[str]|None include: the patterns of the paths to include
+        :return: the path of each member, its name in the archive and
+          whether it is a directory
+        :rtype: collections.Iterable[tuple[str,str,bool]]
+        """
         for root, dirs, files in os.walk(src):
             tar_root = os.path.relpath(root, src)
             if not path_allowed(exclude, include, tar_root, True):
                 continue
+            yield root, tar_root, True
+
+            for item in files:
+                tar_item = os.path.join(tar_root, item)
+                if not path_allowed(exclude, include, tar_item, False):
+                    continue
+                yield os.path.join(root, item), tar_item, False
+
+    def _add_members(self, name, members):
+        """
+        Add the members of a directory to a named archive.
+
+        :param str name: the name prefix of the archive
+        :param collections.Iterable[tuple[str,str,bool]] members: the path of
+          each member, its name in the archive and whether it is a directory
+        """
+        for path, arcname, is_dir in members:
+            if not is_dir:
+                logging.debug("Uploading %s", arcname)
             try:
-                self._get_tar(dst).add(root, arcname=tar_root, recursive=False)
+                self._get_tar(name).add(path, arcname=arcname, recursive=False)
             except EnvironmentError as e:
                 if e.errno == errno.ENOENT:
-                    # If a directory disappeared just skip it,
+                    # If a file or a directory disappeared just skip it,
                     # WAL reply will take care during recovery.
                     continue
                 else:
                     raise
 
-            for item in files:
-                tar_item = os.path.join(tar_root, item)
-                if not path_allowed(exclude, include, tar_item, False):
-                    continue
-                logging.debug("Uploading %s", tar_item)
-                try:
-                    self._get_tar(dst).add(os.path.join(root, item), arcname=tar_item)
-                except EnvironmentError as e:
-                    if e.errno == errno.ENOENT:
-                        # If a file disappeared just skip it,
-                        # WAL reply will take care during recovery.
-                        continue
-                    else:
-                        raise
-
     def add_file(self, label, src, dst, path, optional=False):
         if optional and not os.path.exists(src):
             return
@@ -706,6 +1088,215 @@ class DecompressingStreamingIO(RawIOBase):
         return return_bytes
 
 
+class RangedStreamingIO(RawIOBase):
+    """
+    Provide an IOBase interface which reads a cloud object through several
+    parallel ranged requests.
+
+    The object is split into parts of ``part_size`` bytes which are downloaded
+    by up to ``jobs`` threads, ahead of the reader. The parts are returned in
+    order by the read method, so the object can be streamed into a single
+    decompression pipeline. No more than ``jobs`` parts are kept in memory
+    besides the one being read.
+    """
+
+    def __init__(self, cloud_interface, key, size, jobs, part_size, offset=0):
+        """
+        Create a new RangedStreamingIO object.
+
+        :param CloudInterface cloud_interface: The interface used to download
+          the parts of the object
+        :param str key: The key identifying the object
+        :param int size: The number of bytes to read, usually the size of
+          the object
+        :param int jobs: The maximum number of parts downloaded in parallel
+        :param int part_size: The size of each part in bytes
+        :param int offset: The offset of the first byte to read
+        """
+        self.cloud_interface = cloud_interface
+        self.key = key
+        self.size = size
+        self.jobs = jobs
+        self.part_size = part_size
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+        self.pending_parts = collections.deque()
+        self.next_offset = offset
+        self.end_offset = offset + size
+        self.buffer = bytes()
+        self.buffer_offset = 0
+
+    def readable(self):
+        return True
+
+    def _schedule_parts(self):
+        """
+        Start the download of the next parts, up to the number of jobs.
+        """
+        while (
+            len(self.pending_parts) < self.jobs and self.next_offset < self.end_offset
+        ):
+            length = min(self.part_size, self.end_offset - self.next_offset)
+            self.pending_parts.append(
+                self.executor.submit(
+                    self.cloud_interface.read_object_range,
+                    self.key,
+                    self.next_offset,
+                    length,
+                )
+            )
+            self.next_offset += length
+
+    def read(self, n=-1):
+        """
+        Read up to n bytes from the object.
+
+        Fewer than n bytes are returned only when the end of the object
+        is reached.
+
+        :param int n: The number of bytes required, all the remaining bytes
+          if negative
+        :return: Up to n bytes from the object
+        :rtype: bytes
+        """
+        chunks = []
+        remaining = self.size if n < 0 else n
+        while remaining > 0:
+            if self.buffer_offset >= len(self.buffer):
+                self._schedule_parts()
+                if not self.pending_parts:
+                    break
+                self.buffer = self.pending_parts.popleft().result()
+                self.buffer_offset = 0
+                # Keep the download of the following parts going while
+                # this one is consumed
+                self._schedule_parts()
+            chunk = self.buffer[self.buffer_offset : self.buffer_offset + remaining]
+            self.buffer_offset += len(chunk)
+            remaining -= len(chunk)
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        """
+        Stop the download of the parts which have not been read.
+        """
+        for future in self.pending_parts:
+            future.cancel()
+        self.pending_parts.clear()
+        self.executor.shutdown(wait=True)
+        super(RangedStreamingIO, self).close()
+
+
+class SharedMemoryPartBuffers(object):
+    """
+    A bounded ring of shared memory segments used to pass the parts of the
+    multipart uploads to the upload worker processes.
+
+    The parent process acquires a free segment for each part and copies the
+    part into it, while the worker uploading the part releases the segment as
+    soon as it has read it. When all the segments are in use the parent waits
+    for one to be released, so no more than :attr:`count` parts are held in
+    shared memory at any time. Segments are reused by the following parts and
+    only recreated when a part does not fit in them.
+    """
+
+    #: Directory backing the POSIX shared memory on Linux
+    SHM_DIR = "/dev/shm"
+
+    def __init__(self, count, free_queue):
+        """
+        :param int count: the number of segments
+        :param Queue free_queue: a queue shared with the worker processes,
+          holding the indexes of the free segments
+        """
+        self.count = count
+        self.free_queue = free_queue
+        self.segments = [None] * count
+        # Start the resource tracker before the workers are created, so that
+        # they share it instead of starting their own, which would destroy
+        # the segments they attached when they exit
+        resource_tracker.ensure_running()
+        for index in range(count):
+            free_queue.put(index)
+
+    def acquire(self, size):
+        """
+        Return a free segment able to hold *size* bytes, waiting for one to
+        be released if they are all in use.
+
+        :param int size: the size of the part
+        :return tuple[int,SharedMemory]|None: the index and the segment, or
+          None if there is no room in shared memory for a segment of that size
+        """
+        index = self.free_queue.get()
+        segment = self.segments[index]
+        if segment is None or segment.size < size:
+            if segment is not None:
+                self.segments[index] = None
+                segment.close()
+                segment.unlink()
+            try:
+                if not self._has_room(size):
+                    raise OSError(errno.ENOSPC, "No room in shared memory")
+                segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            except OSError as exc:
+                _logger.debug("Cannot allocate a shared memory segment: %s", exc)
+                self.free_queue.put(index)
+                return None
+            self.segments[index] = segment
+        return index, segment
+
+    def _has_room(self, size):
+        """
+        Check whether the shared memory can hold *size* more bytes.
+
+        Writing past the space available in a tmpfs backed segment kills the
+        process with SIGBUS, so the free space is checked beforehand.
+
+        :param int size: the size of the new segment
+        :rtype: bool
+        """
+        try:
+            stat = os.statvfs(self.SHM_DIR)
+        except (AttributeError, OSError):
+            # Not a tmpfs backed shared memory
+            return True
+        return stat.f_bavail * stat.f_frsize >= size
+
+    def release(self, index):
+        """
+        Give a segment back to the ring. Called by the worker processes.
+
+        :param int index: the index of the segment
+        """
+        self.free_queue.put(index)
+
+    @staticmethod
+    def read(name, size):
+        """
+        Read the content of a segment. Called by the worker processes.
+
+        :param str name: the name of the segment
+        :param int size: the size of the part held by the segment
+        :rtype: bytes
+        """
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            return bytes(segment.buf[:size])
+        finally:
+            segment.close()
+
+    def close(self):
+        """
+        Destroy all the segments.
+        """
+        for index, segment in enumerate(self.segments):
+            if segment is not None:
+                self.segments[index] = None
+                segment.close()
+                segment.unlink()
+
+
 class CloudInterface(with_metaclass(ABCMeta)):
     """
     Abstract base class which provides the interface between barman and cloud
@@ -722,12 +1313,23 @@ class CloudInterface(with_metaclass(ABCMeta)):
     to this queue. When the worker processes consume the jobs they execute
     the synchronous counterparts to the async_* methods (_upload_part and
     _complete_multipart_upload) which must be implemented in CloudInterface
-    sub-classes.
+    sub-classes. The parts kept in memory are passed to the workers through
+    a bounded ring of shared memory segments, while the parts which do not
+    fit in it are staged in temporary files.
 
     Additional boilerplate for creating buckets and streaming objects as tar
     files is also provided.
+
+    :cvar RANGED_DOWNLOAD_PART_SIZE: Size in bytes of the parts of a tar
+        archive downloaded with parallel ranged requests
+    :cvar RESULT_POLL_INTERVAL: Seconds between two checks of the results of
+        the workers, when waiting for them without holding the lock shared
+        with other threads
     """
 
+    RANGED_DOWNLOAD_PART_SIZE = 32 << 20
+    RESULT_POLL_INTERVAL = 0.1
+
     @abstractproperty
     def MAX_CHUNKS_PER_FILE(self):
         """
@@ -792,12 +1394,13 @@ class CloudInterface(with_metaclass(ABCMeta)):
                 min(delete_batch_size, self.MAX_DELETE_BATCH_SIZE),
             )
 
-        # The worker process and the shared queue are created only when
+        # The worker process and the shared queues are created only when
         # needed
         self.queue = None
         self.result_queue = None
-        self.errors_queue = None
-        self.done_queue = None
+        self.part_buffers = None
+        # The first error received from the workers, and the one reported
+        self.worker_error = None
         self.error = None
         self.abort_requested = False
         self.worker_processes_count = jobs
@@ -820,7 +1423,14 @@ class CloudInterface(with_metaclass(ABCMeta)):
                 self.queue.put(None)
 
             for process in self.worker_processes:
+                # A worker cannot terminate until the results it sent have
+                # been received, so keep receiving them while waiting
+                while process.is_alive():
+                    self._receive_result(timeout=0.1)
                 process.join()
+            self.worker_processes = []
+        if self.part_buffers:
+            self.part_buffers.close()
 
     def _abort(self):
         """
@@ -839,11 +1449,17 @@ class CloudInterface(with_metaclass(ABCMeta)):
         if self.queue:
             return
 
-        manager = multiprocessing.Manager()
-        self.queue = manager.JoinableQueue(maxsize=self.worker_processes_count)
-        self.result_queue = manager.Queue()
-        self.errors_queue = manager.Queue()
-        self.done_queue = manager.Queue()
+        # The workers receive the tasks from a bounded queue, so that the
+        # producer waits when they fall behind, and send back the outcome of
+        # each task through the result queue, which is read without waiting
+        # for the pending tasks
+        self.queue = multiprocessing.Queue(maxsize=self.worker_processes_count)
+        self.result_queue = multiprocessing.Queue()
+        # For each worker a part can be waiting in the queue while another one
+        # is being read, plus the part being passed to the queue
+        self.part_buffers = SharedMemoryPartBuffers(
+            2 * self.worker_processes_count + 1, multiprocessing.Queue()
+        )
         # Delay assigning the worker_processes list to the object until we have
         # finished spawning the workers so they do not get pickled by multiprocessing
         # (pickling the worker process references will fail in Python >= 3.8)
@@ -856,38 +1472,89 @@ class CloudInterface(with_metaclass(ABCMeta)):
             worker_processes.append(process)
         self.worker_processes = worker_processes
 
-    def _retrieve_results(self):
-        """
-        Receive the results from workers and update the local parts DB,
-        making sure that each part list is sorted by part number
+    def _receive_result(self, timeout=None):
         """
+        Receive a single message from the workers and record it in the local
+        parts DB and upload statistics.
 
-        # Wait for all the current jobs to be completed
-        self.queue.join()
+        :param float|None timeout: How many seconds to wait for a message,
+          None to return immediately if there is none
+        :return bool: Whether a message has been received
+        """
+        try:
+            if timeout is None:
+                kind, result = self.result_queue.get_nowait()
+            else:
+                kind, result = self.result_queue.get(timeout=timeout)
+        except EmptyQueue:
+            return False
 
-        touched_keys = []
-        while not self.result_queue.empty():
-            result = self.result_queue.get()
-            touched_keys.append(result["key"])
+        if kind == "part":
             self.parts_db[result["key"]].append(result["part"])
-
             # Save the upload end time of the part
             stats = self.upload_stats[result["key"]]
             stats.set_part_end_time(result["part_number"], result["end_time"])
+        elif kind == "done":
+            self.upload_stats[result["key"]].update(result)
+        elif self.worker_error is None:
+            self.worker_error = result
+        return True
 
-        for key in touched_keys:
-            self.parts_db[key] = sorted(
-                self.parts_db[key], key=operator.itemgetter("PartNumber")
-            )
+    def _retrieve_results(self, block=False):
+        """
+        Receive the results from workers and update the local parts DB
 
-        # Read the results of completed uploads
-        while not self.done_queue.empty():
-            result = self.done_queue.get()
-            self.upload_stats[result["key"]].update(result)
+        The results are received as they are sent by the workers, without
+        waiting for the pending tasks to be completed.
+
+        :param bool block: Whether to wait for at least one result
+        """
+        # Once an error has been reported the workers are gone, so the
+        # threads sharing this interface must not wait for them
+        if self.error:
+            raise CloudUploadingError(self.error)
+        received = False
+        while self._receive_result():
+            received = True
+        while block and not received and self.worker_error is None:
+            received = self._receive_result(timeout=1)
+            if not received:
+                self._check_workers()
 
         # Raise an error if a job failed
         self._handle_async_errors()
 
+    def _check_workers(self):
+        """
+        Report an error if a worker process has terminated unexpectedly
+        """
+        if not all(process.is_alive() for process in self.worker_processes):
+            self.worker_error = "Upload worker terminated unexpectedly"
+
+    def _wait_for_results(self, done, lock=None):
+        """
+        Receive the results from the workers until *done* returns True
+
+        :param callable done: the condition to wait for
+        :param threading.Lock|None lock: the lock serialising the access to
+          this interface, when it is shared with other threads. It is only
+          held while receiving the results, which are then polled every
+          :attr:`RESULT_POLL_INTERVAL` seconds
+        """
+        if lock is None:
+            while not done():
+                self._retrieve_results(block=True)
+            return
+
+        while True:
+            with lock:
+                self._retrieve_results()
+                if done():
+                    return
+                self._check_workers()
+                self._handle_async_errors()
+            time.sleep(self.RESULT_POLL_INTERVAL)
+
     def _handle_async_errors(self):
         """
         If an upload error has been discovered, stop the upload
@@ -897,14 +1564,10 @@ class CloudInterface(with_metaclass(ABCMeta)):
         """
 
         # If an error has already been reported, do nothing
-        if self.error:
-            return
-
-        try:
-            self.error = self.errors_queue.get_nowait()
-        except EmptyQueue:
+        if self.error or self.worker_error is None:
             return
 
+        self.error = self.worker_error
         _logger.error("Error received from upload worker: %s", self.error)
         self._abort()
         raise CloudUploadingError(self.error)
@@ -925,7 +1588,6 @@ class CloudInterface(with_metaclass(ABCMeta)):
         while True:
             task = self.queue.get()
             if not task:
-                self.queue.task_done()
                 break
 
             try:
@@ -935,7 +1597,7 @@ class CloudInterface(with_metaclass(ABCMeta)):
                     "Upload error: %s (worker %s)", force_str(exc), process_number
                 )
                 _logger.debug("Exception details:", exc_info=exc)
-                self.errors_queue.put(force_str(exc))
+                self.result_queue.put(("error", force_str(exc)))
             except KeyboardInterrupt:
                 if not self.abort_requested:
                     _logger.info(
@@ -943,8 +1605,6 @@ class CloudInterface(with_metaclass(ABCMeta)):
                         process_number,
                     )
                     self.abort_requested = True
-            finally:
-                self.queue.task_done()
 
         _logger.info("Upload process stopped (worker %s)", process_number)
 
@@ -961,36 +1621,59 @@ class CloudInterface(with_metaclass(ABCMeta)):
                     "Skipping '%s', part '%s' (worker %s)"
                     % (task["key"], task["part_number"], process_number)
                 )
-                os.unlink(task["body"])
+                if "buffer" in task:
+                    self.part_buffers.release(task["buffer"])
+                else:
+                    os.unlink(task["body"])
                 return
             else:
                 _logger.info(
                     "Uploading '%s', part '%s' (worker %s)"
                     % (task["key"], task["part_number"], process_number)
                 )
-                with open(task["body"], "rb") as fp:
+                if "buffer" in task:
+                    # Release the shared memory as soon as the part is read,
+                    # so that the next part can be passed while uploading
+                    try:
+                        fp = BytesIO(self.part_buffers.read(task["body"], task["size"]))
+                    finally:
+                        self.part_buffers.release(task["buffer"])
                     part = self._upload_part(
                         task["upload_metadata"], task["key"], fp, task["part_number"]
                     )
-                os.unlink(task["body"])
+                else:
+                    with open(task["body"], "rb") as fp:
+                        part = self._upload_part(
+                            task["upload_metadata"],
+                            task["key"],
+                            fp,
+                            task["part_number"],
+                        )
+                    os.unlink(task["body"])
                 self.result_queue.put(
-                    {
-                        "key": task["key"],
-                        "part_number": task["part_number"],
-                        "end_time": datetime.datetime.now(),
-                        "part": part,
-                    }
+                    (
+                        "part",
+                        {
+                            "key": task["key"],
+                            "part_number": task["part_number"],
+                            "end_time": datetime.datetime.now(),
+                            "part": part,
+                        },
+                    )
                 )
         elif task["job_type"] == "complete_multipart_upload":
             if self.abort_requested:
                 _logger.info("Aborting %s (worker %s)" % (task["key"], process_number))
                 self._abort_multipart_upload(task["upload_metadata"], task["key"])
-                self.done_queue.put(
-                    {
-                        "key": task["key"],
-                        "end_time": datetime.datetime.now(),
-                        "status": "aborted",
-                    }
+                self.result_queue.put(
+                    (
+                        "done",
+                        {
+                            "key": task["key"],
+                            "end_time": datetime.datetime.now(),
+                            "status": "aborted",
+                        },
+                    )
                 )
             else:
                 _logger.info(
@@ -999,25 +1682,33 @@ class CloudInterface(with_metaclass(ABCMeta)):
                 self._complete_multipart_upload(
                     task["upload_metadata"], task["key"], task["parts_metadata"]
                 )
-                self.done_queue.put(
-                    {
-                        "key": task["key"],
-                        "end_time": datetime.datetime.now(),
-                        "status": "done",
-                    }
+                self.result_queue.put(
+                    (
+                        "done",
+                        {
+                            "key": task["key"],
+                            "end_time": datetime.datetime.now(),
+                            "status": "done",
+                        },
+                    )
                 )
         else:
             raise ValueError("Unknown task: %s", repr(task))
 
-    def async_upload_part(self, upload_metadata, key, body, part_number):
+    def async_upload_part(
+        self, upload_metadata, key, body, part_number, staging_dir=None
+    ):
         """
         Asynchronously upload a part into a multipart upload
 
         :param dict upload_metadata: Provider-specific metadata for this upload
           e.g. the multipart upload handle in AWS S3
         :param str key: The key to use in the cloud service
-        :param any body: A stream-like object to upload
+        :param any body: A stream-like object to upload, either a named
+          temporary file or an in-memory BytesIO
         :param int part_number: Part number, starting from 1
+        :param str|None staging_dir: The directory where an in-memory part is
+          staged if it cannot be passed through shared memory
         """
 
         # If an error has already been reported, do nothing
@@ -1025,24 +1716,57 @@ class CloudInterface(with_metaclass(ABCMeta)):
             return
 
         self._ensure_async()
-        self._handle_async_errors()
+        # Collect the results received so far, raising any upload error
+        self._retrieve_results()
 
         # Save the upload start time of the part
         stats = self.upload_stats[key]
         stats.set_part_start_time(part_number, datetime.datetime.now())
 
         # Pass the job to the uploader process
-        self.queue.put(
-            {
-                "job_type": "upload_part",
-                "upload_metadata": upload_metadata,
-                "key": key,
-                "body": body.name,
-                "part_number": part_number,
-            }
-        )
+        task = {
+            "job_type": "upload_part",
+            "upload_metadata": upload_metadata,
+            "key": key,
+            "part_number": part_number,
+        }
+        if isinstance(body, BytesIO):
+            task.update(self._pass_part(body, staging_dir))
+        else:
+            task["body"] = body.name
+        self.queue.put(task)
 
-    def async_complete_multipart_upload(self, upload_metadata, key, parts_count):
+    def _pass_part(self, body, staging_dir=None):
+        """
+        Pass an in-memory part to the workers, through a shared memory
+        segment or through a temporary file if there is no room for it.
+
+        :param BytesIO body: The content of the part
+        :param str|None staging_dir: The directory of the temporary file
+        :return dict: The fields of the upload task describing the part
+        """
+        data = body.getbuffer()
+        try:
+            acquired = self.part_buffers.acquire(len(data))
+            if acquired is not None:
+                index, segment = acquired
+                segment.buf[: len(data)] = data
+                return {"buffer": index, "body": segment.name, "size": len(data)}
+            _logger.debug("Staging a part of %s bytes on disk", len(data))
+            with NamedTemporaryFile(
+                delete=False,
+                prefix="barman-upload-",
+                suffix=".part",
+                dir=staging_dir,
+            ) as part_file:
+                part_file.write(data)
+            return {"body": part_file.name}
+        finally:
+            data.release()
+
+    def async_complete_multipart_upload(
+        self, upload_metadata, key, parts_count, lock=None
+    ):
         """
         Asynchronously finish a certain multipart upload. This method grant
         that the final call to the cloud storage will happen after all the
@@ -1052,38 +1776,46 @@ class CloudInterface(with_metaclass(ABCMeta)):
           e.g. the multipart upload handle in AWS S3
         :param str key: The key to use in the cloud service
         :param int parts_count: Number of parts
-        """
-
-        # If an error has already been reported, do nothing
-        if self.error:
-            return
+        :param threading.Lock|None lock: the lock serialising the access to
+          this interface, when it is shared with other threads. It is not
+          held while waiting for the parts to be uploaded
+        """
+        guard = lock if lock is not None else nullcontext()
+        with guard:
+            # If an error has already been reported, do nothing
+            if self.error:
+                return
 
-        self._ensure_async()
-        self._handle_async_errors()
+            self._ensure_async()
+            self._retrieve_results()
 
         # If parts_db has less then expected parts for this upload,
         # wait for the workers to send the missing metadata
-        while len(self.parts_db[key]) < parts_count:
-            # Wait for all the current jobs to be completed and
-            # receive all available updates on worker status
-            self._retrieve_results()
-
-        # Finish the job in the uploader process
-        self.queue.put(
-            {
-                "job_type": "complete_multipart_upload",
-                "upload_metadata": upload_metadata,
-                "key": key,
-                "parts_metadata": self.parts_db[key],
-            }
-        )
-        del self.parts_db[key]
+        self._wait_for_results(lambda: len(self.parts_db[key]) >= parts_count, lock)
+
+        with guard:
+            # Finish the job in the uploader process, with the parts sorted by
+            # part number as they are received in completion order
+            self.queue.put(
+                {
+                    "job_type": "complete_multipart_upload",
+                    "upload_metadata": upload_metadata,
+                    "key": key,
+                    "parts_metadata": sorted(
+                        self.parts_db[key], key=operator.itemgetter("PartNumber")
+                    ),
+                }
+            )
+            del self.parts_db[key]
 
-    def wait_for_multipart_upload(self, key):
+    def wait_for_multipart_upload(self, key, lock=None):
         """
         Wait for a multipart upload to be completed and return the result
 
         :param str key: The key to use in the cloud service
+        :param threading.Lock|None lock: the lock serialising the access to
+          this interface, when it is shared with other threads. It is not
+          held while waiting for the upload to be completed
         """
         # The upload must exist
         assert key in self.upload_stats
@@ -1091,11 +1823,9 @@ class CloudInterface(with_metaclass(ABCMeta)):
         assert key not in self.parts_db
 
         # If status is still uploading the upload has not finished yet
-        while self.upload_stats[key]["status"] == "uploading":
-            # Wait for all the current jobs to be completed and
-            # receive all available updates on worker status
-            self._retrieve_results()
-
+        self._wait_for_results(
+            lambda: self.upload_stats[key]["status"] != "uploading", lock
+        )
         return self.upload_stats[key]
 
     def setup_bucket(self):
@@ -1110,20 +1840,146 @@ class CloudInterface(with_metaclass(ABCMeta)):
             self._create_bucket()
             self.bucket_exists = True
 
-    def extract_tar(self, key, dst):
+    def extract_tar(self, key, dst, jobs=1, size=None, include=None):
         """
         Extract a tar archive from cloud to the local directory
 
+        When more than one job is requested and the tar archive is larger than
+        :attr:`RANGED_DOWNLOAD_PART_SIZE`, the archive is downloaded with
+        parallel ranged requests, which are then decompressed and extracted
+        in order.
+
         :param str key: The key identifying the tar archive
         :param str dst: Path of the directory into which the tar archive should
           be extracted
+        :param int jobs: The maximum number of parallel ranged requests
+        :param int|None size: The size of the tar archive, if already known
+        :param list[str]|None include: If set, only the members matching these
+          shell-style patterns are extracted, see :func:`tar_member_matches`
         """
         extension = os.path.splitext(key)[-1]
         compression = "" if extension == ".tar" else extension[1:]
         tar_mode = cloud_compression.get_streaming_tar_mode("r", compression)
-        fileobj = self.remote_open(key, cloud_compression.get_compressor(compression))
+        decompressor = cloud_compression.get_compressor(compression)
+        if jobs > 1 and size is None:
+            size = self.get_object_size(key)
+        if jobs > 1 and size > self.RANGED_DOWNLOAD_PART_SIZE:
+            with closing(
+                RangedStreamingIO(self, key, size, jobs, self.RANGED_DOWNLOAD_PART_SIZE)
+            ) as fileobj:
+                if decompressor:
+                    fileobj = DecompressingStreamingIO(fileobj, decompressor)
+                self._extract_tar_fileobj(fileobj, tar_mode, dst, include)
+        else:
+            fileobj = self.remote_open(key, decompressor)
+            self._extract_tar_fileobj(fileobj, tar_mode, dst, include)
+
+    @staticmethod
+    def _extract_tar_fileobj(fileobj, tar_mode, dst, include=None):
+        """
+        Extract a streamed tar archive to the local directory
+
+        :param IOBase fileobj: The tar archive
+        :param str tar_mode: The mode used to open the tar archive
+        :param str dst: Path of the directory into which the tar archive should
+          be extracted
+        :param list[str]|None include: If set, only the members matching these
+          shell-style patterns are extracted
+        """
         with tarfile.open(fileobj=fileobj, mode=tar_mode) as tf:
-            tf.extractall(path=dst)
+            if include is None:
+                tf.extractall(path=dst)
+            else:
+                tf.extractall(
+                    path=dst,
+                    members=(
+                        member
+                        for member in tf
+                        if tar_member_matches(member.name, include)
+                    ),
+                )
+
+    def extract_tar_members(self, key, dst, index, include, jobs=1):
+        """
+        Extract the members of a tar archive matching the *include* patterns
+        to the local directory, downloading only the parts of the archive
+        containing them.
+
+        The ranges of the archive needed by the matching members are merged
+        when they overlap, then each range is decompressed from its restart
+        point and the members are extracted in order.
+
+        :param str key: The key identifying the tar archive
+        :param str dst: Path of the directory into which the members should
+          be extracted
+        :param CloudTarIndex index: The index of the tar archive
+        :param list[str] include: The shell-style patterns of the members to
+          extract, see :func:`tar_member_matches`
+        :param int jobs: The maximum number of parallel ranged requests
+        :return: The number of extracted members
+        :rtype: int
+        """
+        entries = index.find(include)
+        ranges = []
+        for entry in entries:
+            if ranges and entry.compressed_offset <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], entry.compressed_end)
+                ranges[-1][2].append(entry)
+            else:
+                ranges.append([entry.compressed_offset, entry.compressed_end, [entry]])
+        stream_header = None
+        for start, end, range_entries in ranges:
+            if start > 0 and index.stream_header_size and stream_header is None:
+                stream_header = self.read_object_range(key, 0, index.stream_header_size)
+            with closing(
+                RangedStreamingIO(
+                    self,
+                    key,
+                    end - start,
+                    jobs,
+                    self.RANGED_DOWNLOAD_PART_SIZE,
+                    offset=start,
+                )
+            ) as fileobj:
+                tar_stream = self._open_tar_stream(
+                    fileobj, index.compression, stream_header if start else None
+                )
+                tar_offset = range_entries[0].restart_offset
+                for entry in range_entries:
+                    _skip_bytes(tar_stream, entry.header_offset - tar_offset)
+                    member_stream = BoundedReader(
+                        tar_stream,
+                        entry.data_offset + entry.size - entry.header_offset,
+                    )
+                    with tarfile.open(fileobj=member_stream, mode="r|") as tf:
+                        tf.extract(tf.next(), path=dst)
+                    _skip_bytes(member_stream, member_stream.remaining)
+                    tar_offset = entry.data_offset + entry.size
+        return len(entries)
+
+    @staticmethod
+    def _open_tar_stream(fileobj, compression, stream_header=None):
+        """
+        Return a file-like object decompressing a tar stream.
+
+        :param RawIOBase fileobj: The compressed data
+        :param str|None compression: The compression of the tar archive, as
+          in :class:`CloudUploadController`
+        :param bytes|None stream_header: The header of the compressed stream,
+          when *fileobj* starts from a restart point
+        :rtype: RawIOBase
+        """
+        if compression == "gz":
+            return gzip.GzipFile(fileobj=fileobj, mode="rb")
+        if compression == "bz2":
+            return bz2.BZ2File(fileobj, mode="rb")
+        decompressor = cloud_compression.get_compressor(compression)
+        if decompressor is None:
+            return fileobj
+        if stream_header:
+            # Let the decompressor parse the stream header first
+            decompressor.decompress(stream_header)
+        return DecompressingStreamingIO(fileobj, decompressor)
 
     @abstractmethod
     def _reinit_session(self):
@@ -1169,6 +2025,16 @@ class CloudInterface(with_metaclass(ABCMeta)):
         :rtype: List[str]
         """
 
+    @abstractmethod
+    def list_object_etags(self, prefix):
+        """
+        List all the objects under a prefix along with their ETag
+
+        :param str prefix: The prefix of the objects
+        :return: The key and the ETag of each object
+        :rtype: Iterable[tuple[str,str]]
+        """
+
     @abstractmethod
     def download_file(self, key, dest_path, decompress):
         """
@@ -1188,6 +2054,44 @@ class CloudInterface(with_metaclass(ABCMeta)):
         :return: ``True`` if the object exists, ``False`` otherwise
         """
 
+    @abstractmethod
+    def get_object_size(self, key):
+        """
+        Get the size of an object in cloud storage
+
+        :param str key: The key identifying the object
+        :return: The size of the object in bytes
+        :rtype: int
+        """
+
+    @abstractmethod
+    def read_object_range(self, key, offset, length):
+        """
+        Read a range of bytes of an object in cloud storage
+
+        This method is called concurrently by several threads, so it must
+        only use thread-safe clients.
+
+        :param str key: The key identifying the object
+        :param int offset: The offset of the first byte to read
+        :param int length: The number of bytes to read
+        :return: The bytes read
+        :rtype: bytes
+        """
+
+    @abstractmethod
+    def read_object(self, key):
+        """
+        Read the whole content of an object in cloud storage
+
+        This method is called concurrently by several threads, so it must
+        only use thread-safe clients.
+
+        :param str key: The key identifying the object
+        :return: The content of the object or None if the key does not exist
+        :rtype: bytes|None
+        """
+
     @abstractmethod
     def remote_open(self, key, decompressor=None):
         """
@@ -1295,27 +2199,51 @@ class CloudInterface(with_metaclass(ABCMeta)):
         if len(paths) > self.MAX_DELETE_BATCH_SIZE:
             raise ValueError("Max batch size exceeded")
 
-    def delete_objects(self, paths, **kwargs):
+    def delete_objects(self, paths, progress=None, **kwargs):
         """
         Delete the objects at the specified paths
 
-        Deletes the objects defined by the supplied list of paths in batches
+        Deletes the objects defined by the supplied paths in batches
         specified by either batch_size or MAX_DELETE_BATCH_SIZE, whichever is
         lowest.
 
-        :param List[str] paths:
+        The paths are consumed as the batches are deleted, so they can be
+        streamed from a listing, and up to ``jobs`` batches are deleted
+        concurrently.
+
+        :param Iterable[str] paths:
+        :param callable|None progress: Called in the calling thread with the
+          list of paths of each batch which has been deleted
         :param dict kwargs: Provider-specific keyword arguments.
         """
         errors = False
-        for i in range_fun(0, len(paths), self.delete_batch_size):
-            try:
-                self._delete_objects_batch(
-                    paths[i : i + self.delete_batch_size], **kwargs
-                )
-            except CloudProviderError:
-                # Don't let one error stop us from trying to delete any remaining
-                # batches.
-                errors = True
+        paths = iter(paths)
+        jobs = max(1, self.worker_processes_count)
+        running = {}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while True:
+                batch = list(itertools.islice(paths, self.delete_batch_size))
+                if batch:
+                    future = executor.submit(
+                        self._delete_objects_batch, batch, **kwargs
+                    )
+                    running[future] = batch
+                    if len(running) < jobs:
+                        continue
+                elif not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = running.pop(future)
+                    try:
+                        future.result()
+                    except CloudProviderError:
+                        # Don't let one error stop us from trying to delete any
+                        # remaining batches.
+                        errors = True
+                        continue
+                    if progress is not None:
+                        progress(batch)
 
         if errors:
             raise CloudProviderError(
@@ -1606,6 +2534,7 @@ class CloudBackupUploader(CloudBackup):
         backup_name=None,
         min_chunk_size=None,
         max_bandwidth=None,
+        tar_streams=1,
     ):
         """
         Base constructor.
@@ -1622,6 +2551,8 @@ class CloudBackupUploader(CloudBackup):
         :param int min_chunk_size: the minimum size of a single upload part
         :param int max_bandwidth: the maximum amount of data per second that should
           be uploaded during the backup
+        :param int tar_streams: the number of archives each directory is split
+          into, built and compressed in parallel
         """
         super(CloudBackupUploader, self).__init__(
             server_name,
@@ -1634,6 +2565,7 @@ class CloudBackupUploader(CloudBackup):
         self.max_archive_size = max_archive_size
         self.min_chunk_size = min_chunk_size
         self.max_bandwidth = max_bandwidth
+        self.tar_streams = tar_streams
 
         # Object properties set at backup time
         self.controller = None
@@ -1675,6 +2607,7 @@ class CloudBackupUploader(CloudBackup):
             self.compression,
             self.min_chunk_size,
             self.max_bandwidth,
+            streams=self.tar_streams,
         )
 
     def _backup_data_files(
@@ -1873,6 +2806,7 @@ class CloudBackupUploaderBarman(CloudBackupUploader):
         compression=None,
         min_chunk_size=None,
         max_bandwidth=None,
+        tar_streams=1,
     ):
         """
         Create the cloud storage upload client for a backup in the specified
@@ -1890,6 +2824,8 @@ class CloudBackupUploaderBarman(CloudBackupUploader):
         :param int min_chunk_size: the minimum size of a single upload part
         :param int max_bandwidth: the maximum amount of data per second that
           should be uploaded during the backup
+        :param int tar_streams: the number of archives each directory is split
+          into, built and compressed in parallel
         """
         super(CloudBackupUploaderBarman, self).__init__(
             server_name,
@@ -1899,6 +2835,7 @@ class CloudBackupUploaderBarman(CloudBackupUploader):
             postgres=None,
             min_chunk_size=min_chunk_size,
             max_bandwidth=max_bandwidth,
+            tar_streams=tar_streams,
         )
         self.backup_dir = backup_dir
         self.backup_id = backup_id
@@ -2156,20 +3093,36 @@ class BackupFileInfo(object):
         self.path = path
         self.compression = compression
         self.additional_files = []
+        self.index_path = None
 
 
 class CloudBackupCatalog(KeepManagerMixinCloud):
     """
     Cloud storage backup catalog
+
+    :cvar BACKUP_INFO_JOBS: The maximum number of ``backup.info`` files
+      downloaded in parallel
+    :cvar BACKUP_INFO_CACHE_VERSION: The version of the format of the
+      ``backup.info`` cache file
+    :cvar WAL_INDEX_VERSION: The version of the format of the WAL index file
+    :cvar WAL_INDEX_MAX_AGE: The number of seconds after which the WAL index
+      is rebuilt with a full listing of the WAL archive
     """
 
-    def __init__(self, cloud_interface, server_name):
+    BACKUP_INFO_JOBS = 8
+    BACKUP_INFO_CACHE_VERSION = 2
+    WAL_INDEX_VERSION = 2
+    WAL_INDEX_MAX_AGE = 86400
+
+    def __init__(self, cloud_interface, server_name, cache_dir=None):
         """
         Object responsible for retrieving backup catalog from cloud storage
 
         :param CloudInterface cloud_interface: The interface to use to
           upload the backup
         :param str server_name: The name of the server as configured in Barman
+        :param str|None cache_dir: The directory where the ``backup.info``
+          files and the WAL index are cached, None to disable the cache
         """
         super(CloudBackupCatalog, self).__init__(
             cloud_interface=cloud_interface, server_name=server_name
@@ -2180,27 +3133,158 @@ class CloudBackupCatalog(KeepManagerMixinCloud):
         self.wal_prefix = os.path.join(
             self.cloud_interface.path, self.server_name, "wals"
         )
+        self.cache_dir = cache_dir
         self._backup_list = None
         self._wal_paths = None
+        self._wal_index_refreshed = None
         self.unreadable_backups = []
 
+    def _get_cache_path(self, kind):
+        """
+        Path of a cache file, None if the cache is disabled.
+
+        The name of the file is derived from the URL of the cloud storage and
+        the server name, so that a cache directory can be shared.
+
+        :param str kind: The kind of content of the cache file
+        :rtype: str|None
+        """
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha256(
+            ("%s\0%s" % (self.cloud_interface.url, self.server_name)).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, "%s-%s.cache" % (kind, digest[:16]))
+
+    @property
+    def backup_info_cache_path(self):
+        """
+        Path of the ``backup.info`` cache file, None if the cache is disabled.
+
+        :rtype: str|None
+        """
+        return self._get_cache_path("backup-info")
+
+    @property
+    def wal_index_path(self):
+        """
+        Path of the WAL index file, None if the cache is disabled.
+
+        :rtype: str|None
+        """
+        return self._get_cache_path("wal-index")
+
+    def _read_backup_info_cache(self):
+        """
+        Read the cached ``backup.info`` files.
+
+        :return: The ETag and the content of each ``backup.info`` file,
+          keyed by backup ID
+        :rtype: dict[str,tuple[str,bytes]]
+        """
+        files = read_json_cache(
+            self.backup_info_cache_path, self.BACKUP_INFO_CACHE_VERSION
+        )
+        if not files:
+            return {}
+        try:
+            return dict(
+                (backup_id, (etag, base64.b64decode(content)))
+                for backup_id, (etag, content) in files.items()
+            )
+        except (TypeError, ValueError) as e:
+            _logger.debug(
+                "Could not read cache at %s: %s", self.backup_info_cache_path, e
+            )
+            return {}
+
+    def _write_backup_info_cache(self, files):
+        """
+        Write the cached ``backup.info`` files.
+
+        :param dict[str,tuple[str,bytes]] files: The ETag and the content of
+          each ``backup.info`` file, keyed by backup ID
+        """
+        write_json_cache(
+            self.backup_info_cache_path,
+            self.BACKUP_INFO_CACHE_VERSION,
+            dict(
+                (backup_id, [etag, base64.b64encode(content).decode("ascii")])
+                for backup_id, (etag, content) in files.items()
+            ),
+        )
+
+    def _list_backup_ids(self):
+        """
+        List the IDs of the backups in cloud storage.
+
+        :rtype: Iterable[str]
+        """
+        for backup_dir in self.cloud_interface.list_bucket(self.prefix + "/"):
+            # We want only the directories
+            if backup_dir[-1] != "/":
+                continue
+            yield os.path.basename(backup_dir.rstrip("/"))
+
+    def _list_backup_info_etags(self):
+        """
+        List the ETag of the ``backup.info`` file of each backup, with a
+        single listing of the backups in cloud storage.
+
+        :return: The ETag of the ``backup.info`` files, keyed by backup ID
+        :rtype: dict[str,str]
+        """
+        etags = {}
+        prefix = self.prefix + "/"
+        for key, etag in self.cloud_interface.list_object_etags(prefix):
+            if not key.startswith(prefix):
+                continue
+            backup_id, _, name = key[len(prefix) :].partition("/")
+            if name == "backup.info":
+                etags[backup_id] = etag
+        return etags
+
     def get_backup_list(self):
         """
         Retrieve the list of available backup from cloud storage
 
+        The ``backup.info`` files are downloaded in parallel. If the cache is
+        enabled, the files whose ETag has not changed since they were cached
+        are not downloaded again.
+
         :rtype: Dict[str,BackupInfo]
         """
         if self._backup_list is None:
-            backup_list = {}
+            if self.cache_dir is None:
+                cache = {}
+                etags = dict.fromkeys(self._list_backup_ids())
+            else:
+                cache = self._read_backup_info_cache()
+                etags = self._list_backup_info_etags()
 
             # get backups metadata
-            for backup_dir in self.cloud_interface.list_bucket(self.prefix + "/"):
-                # We want only the directories
-                if backup_dir[-1] != "/":
-                    continue
-                backup_id = os.path.basename(backup_dir.rstrip("/"))
+            with ThreadPoolExecutor(max_workers=self.BACKUP_INFO_JOBS) as executor:
+                downloads = {
+                    backup_id: executor.submit(
+                        self.cloud_interface.read_object,
+                        os.path.join(self.prefix, backup_id, "backup.info"),
+                    )
+                    for backup_id, etag in etags.items()
+                    if etag is None or cache.get(backup_id, (None,))[0] != etag
+                }
+
+            backup_list = {}
+            new_cache = {}
+            for backup_id, etag in etags.items():
                 try:
-                    backup_info = self.get_backup_info(backup_id)
+                    if backup_id in downloads:
+                        content = downloads[backup_id].result()
+                    else:
+                        content = cache[backup_id][1]
+                    if content is None:
+                        continue
+                    backup_info = BackupInfo(backup_id)
+                    backup_info.load(file_object=BytesIO(content))
                 except Exception as exc:
                     _logger.warning(
                         "Unable to open backup.info file for %s: %s" % (backup_id, exc)
@@ -2208,8 +3292,11 @@ class CloudBackupCatalog(KeepManagerMixinCloud):
                     self.unreadable_backups.append(backup_id)
                     continue
 
-                if backup_info:
-                    backup_list[backup_id] = backup_info
+                backup_list[backup_id] = backup_info
+                if etag is not None:
+                    new_cache[backup_id] = (etag, content)
+            if self.cache_dir is not None:
+                self._write_backup_info_cache(new_cache)
             self._backup_list = backup_list
         return self._backup_list
 
@@ -2228,33 +3315,170 @@ class CloudBackupCatalog(KeepManagerMixinCloud):
         """
         return self.cloud_interface.get_prefixes(self.wal_prefix)
 
+    @staticmethod
+    def _get_wal_name(wal):
+        """
+        Return the name of the WAL file stored at the given path.
+
+        :param str wal: The path of an object in the WAL archive
+        :return: The name of the WAL file, None if the object does not look
+          like a WAL file
+        :rtype: str|None
+        """
+        wal_basename = os.path.basename(wal)
+        if xlog.is_any_xlog_file(wal_basename):
+            # We have an uncompressed xlog of some kind
+            return wal_basename
+        # Allow one suffix for compression and try again
+        wal_name, suffix = os.path.splitext(wal_basename)
+        if suffix in ALLOWED_COMPRESSIONS and xlog.is_any_xlog_file(wal_name):
+            return wal_name
+        # If it still doesn't look like an xlog file, ignore
+        return None
+
+    def _add_wal_paths(self, wal_paths, wals):
+        """
+        Add the WAL files stored at the given paths to a dict of WAL paths.
+
+        :param dict[str,str] wal_paths: The WAL paths keyed by the WAL name
+        :param Iterable[str] wals: The paths of objects in the WAL archive
+        """
+        for wal in wals:
+            wal_name = self._get_wal_name(wal)
+            if wal_name is not None:
+                wal_paths[wal_name] = wal
+
+    def _list_wal_prefix(self):
+        """
+        List the WAL archive without descending into the hash directories.
+
+        :return: The hash directories, sorted, and the objects stored at the
+          root of the WAL archive, such as the history files
+        :rtype: tuple[list[str],list[str]]
+        """
+        hash_dirs = []
+        objects = []
+        for item in self.cloud_interface.list_bucket(self.wal_prefix + "/"):
+            if item.endswith("/"):
+                try:
+                    xlog.decode_hash_dir(item.split("/")[-2])
+                except BadXlogPrefix:
+                    continue
+                hash_dirs.append(item)
+            else:
+                objects.append(item)
+        return sorted(hash_dirs), objects
+
+    def _refresh_wal_index(self, wal_paths):
+        """
+        Bring up to date a WAL index read from the cache.
+
+        Instead of listing the whole WAL archive, only the following are
+        listed:
+
+        * the root of the WAL archive, to find the history files and the
+          hash directories which still exist;
+        * the lowest and the highest indexed hash directory of each timeline,
+          because the oldest WALs are the ones removed by the retention
+          policies and the newest ones can be archived out of order;
+        * the hash directories of each timeline which follow the highest
+          indexed one, where the WALs archived since the last run are.
+
+        Each timeline is handled on its own, so that the WALs archived on a
+        previous timeline after a timeline switch are not missed.
+
+        :param dict[str,str] wal_paths: The WAL paths of the index, keyed by
+          the WAL name
+        :return: The WAL paths in cloud storage, keyed by the WAL name
+        :rtype: dict[str,str]
+        """
+        hash_dirs, objects = self._list_wal_prefix()
+        existing_dirs = set(hash_dirs)
+        # Group the indexed WALs by hash directory, dropping the ones whose
+        # directory has been removed
+        indexed = {}
+        for wal_name, wal in wal_paths.items():
+            wal_dir = wal.rpartition("/")[0] + "/"
+            if wal_dir in existing_dirs:
+                indexed.setdefault(wal_dir, {})[wal_name] = wal
+
+        # The lowest and the highest indexed hash directory of each timeline
+        lowest_dirs = {}
+        highest_dirs = {}
+        for hash_dir in sorted(indexed):
+            timeline = hash_dir.split("/")[-2][0:8]
+            lowest_dirs.setdefault(timeline, hash_dir)
+            highest_dirs[timeline] = hash_dir
+        for hash_dir in hash_dirs:
+            timeline = hash_dir.split("/")[-2][0:8]
+            highest_dir = highest_dirs.get(timeline)
+            if (
+                highest_dir is None
+                or hash_dir >= highest_dir
+                or hash_dir == lowest_dirs[timeline]
+            ):
+                indexed[hash_dir] = {}
+                self._add_wal_paths(
+                    indexed[hash_dir],
+                    self.cloud_interface.list_bucket(hash_dir, delimiter=""),
+                )
+
+        new_wal_paths = {}
+        for dir_wal_paths in indexed.values():
+            new_wal_paths.update(dir_wal_paths)
+        self._add_wal_paths(new_wal_paths, objects)
+        return new_wal_paths
+
     def get_wal_paths(self):
         """
         Retrieve a dict of WAL paths keyed by the WAL name from cloud storage
+
+        If the cache is enabled, the WAL paths are stored in a local index
+        which is refreshed incrementally, with a full listing of the WAL
+        archive at most every :attr:`WAL_INDEX_MAX_AGE` seconds.
         """
         if self._wal_paths is None:
-            wal_paths = {}
-            for wal in self.cloud_interface.list_bucket(
-                self.wal_prefix + "/", delimiter=""
+            index = None
+            if self.cache_dir is not None:
+                index = read_json_cache(self.wal_index_path, self.WAL_INDEX_VERSION)
+            if (
+                index
+                and index["wal_paths"]
+                and time.time() - index["refreshed"] < self.WAL_INDEX_MAX_AGE
             ):
-                wal_basename = os.path.basename(wal)
-                if xlog.is_any_xlog_file(wal_basename):
-                    # We have an uncompressed xlog of some kind
-                    wal_paths[wal_basename] = wal
-                else:
-                    # Allow one suffix for compression and try again
-                    wal_name, suffix = os.path.splitext(wal_basename)
-                    if suffix in ALLOWED_COMPRESSIONS and xlog.is_any_xlog_file(
-                        wal_name
-                    ):
-                        wal_paths[wal_name] = wal
-                    else:
-                        # If it still doesn't look like an xlog file, ignore
-                        continue
-
-            self._wal_paths = wal_paths
+                self._wal_paths = self._refresh_wal_index(index["wal_paths"])
+                self._wal_index_refreshed = index["refreshed"]
+            else:
+                wal_paths = {}
+                self._wal_index_refreshed = time.time()
+                self._add_wal_paths(
+                    wal_paths,
+                    self.cloud_interface.list_bucket(
+                        self.wal_prefix + "/", delimiter=""
+                    ),
+                )
+                self._wal_paths = wal_paths
+            self.save_wal_index()
         return self._wal_paths
 
+    def save_wal_index(self):
+        """
+        Store the WAL paths in the WAL index, if the cache is enabled.
+
+        This is intended to be called after :meth:`remove_wal_from_cache`,
+        so that the next run does not need to find out again which WALs
+        have been removed.
+        """
+        if self.cache_dir is not None and self._wal_paths is not None:
+            write_json_cache(
+                self.wal_index_path,
+                self.WAL_INDEX_VERSION,
+                {
+                    "refreshed": self._wal_index_refreshed,
+                    "wal_paths": self._wal_paths,
+                },
+            )
+
     def remove_wal_from_cache(self, wal_name):
         """
         Remove named wal from the cached list. This is intended for cases where
@@ -2383,7 +3607,12 @@ class CloudBackupCatalog(KeepManagerMixinCloud):
                 base_path = os.path.join(source_dir, "%s" % tblspc.oid)
                 backup_files[tblspc.oid] = BackupFileInfo(tblspc.oid, base_path)
 
+        index_paths = {}
         for item in self.cloud_interface.list_bucket(source_dir + "/"):
+            # The tar member indexes are attached to their archive later
+            if item.endswith(CloudTarIndex.SUFFIX):
+                index_paths[item[: -len(CloudTarIndex.SUFFIX)]] = item
+                continue
             for backup_file in backup_files.values():
                 if item.startswith(backup_file.base):
                     # Automatically detect additional files
@@ -2430,6 +3659,10 @@ class CloudBackupCatalog(KeepManagerMixinCloud):
                     )
                     break
 
+        for backup_file in backup_files.values():
+            for info in [backup_file] + backup_file.additional_files:
+                info.index_path = index_paths.get(info.path)
+
         for backup_file in backup_files.values():
             logging_fun = _logger.warning if allow_missing else _logger.error
             if backup_file.path is None and backup_info.snapshots_info is None:
@@ -2451,11 +3684,23 @@ class CloudBackupCatalog(KeepManagerMixinCloud):
 
         :rtype: dict[str, WalFileInfo]
         """
-        if not self.get_wal_paths():
+        if self._wal_paths is None:
+            # The latest WAL is either a history file or a WAL file in the
+            # highest hash directory, so there is no need to list the others
+            hash_dirs, objects = self._list_wal_prefix()
+            if hash_dirs:
+                objects += self.cloud_interface.list_bucket(hash_dirs[-1], delimiter="")
+            wal_paths = {}
+            self._add_wal_paths(wal_paths, objects)
+            if not wal_paths and hash_dirs:
+                wal_paths = self.get_wal_paths()
+        else:
+            wal_paths = self._wal_paths
+        if not wal_paths:
             return dict()
 
         timelines = {}
-        for name in sorted(self.get_wal_paths(), reverse=True):
+        for name in sorted(wal_paths, reverse=True):
             # Extract the timeline. If it is not valid, skip this directory
             try:
                 timeline = name[0:8]
@@ -2847,6 +4092,7 @@ class CloudWalDownloader(object):
     """
 
     DEFAULT_SPOOL_DIR = "/var/tmp/walrestore"
+    SPOOL_TMP_SUFFIX = ".tmp"
 
     def __init__(self, cloud_interface, server_name, spool_dir=None):
         """
@@ -2886,6 +4132,40 @@ class CloudWalDownloader(object):
                 sys.exit(2)
         return False
 
+    def _remove_stale_spool_files(self, wal_name):
+        """
+        Remove the files left in the spool directory which will not be requested.
+
+        Postgres requests the WAL files in order, so the spooled WAL files which
+        precede the requested one are stale. Temporary files are left only by
+        downloads which have been interrupted, so they are stale as well.
+
+        :param str wal_name: Name of the requested WAL file
+        """
+        if not os.path.isdir(self.spool_dir):
+            return
+        for filename in os.listdir(self.spool_dir):
+            if filename.endswith(self.SPOOL_TMP_SUFFIX):
+                stale = True
+            else:
+                stale = (
+                    xlog.is_any_xlog_file(filename)
+                    and not xlog.is_history_file(filename)
+                    and filename < wal_name
+                )
+            if not stale:
+                continue
+            _logger.debug(
+                "Removing stale file %s for server %s from the spool directory"
+                % (filename, self.server_name)
+            )
+            try:
+                os.unlink(os.path.join(self.spool_dir, filename))
+            except OSError as exc:
+                _logger.warning(
+                    "Cannot remove stale spool file %s: %s" % (filename, exc)
+                )
+
     def _ensure_spool_dir_exists(self):
         """
         Ensure that the spool directory exists, creating it if necessary.
@@ -2916,6 +4196,8 @@ class CloudWalDownloader(object):
         :param bool no_partial: Do not download partial WAL files
         :param int parallel: The number of WAL files to download in parallel
         """
+        self._remove_stale_spool_files(wal_name)
+
         # If the requested WAL is present in the spool, just move it and return
         if self._try_to_deliver_from_spool(wal_name, wal_dest):
             _logger.debug(
@@ -2950,8 +4232,11 @@ class CloudWalDownloader(object):
             filename = self._remove_compression_suffix(filename)
             filename = filename.replace(".partial", "")
             spool_dest = os.path.join(self.spool_dir, filename)
+            # Skip the WALs prefetched by a previous invocation
+            if os.path.exists(spool_dest):
+                continue
             thread = threading.Thread(
-                target=self._download_single_wal, args=(cloud_path, spool_dest)
+                target=self._download_to_spool, args=(cloud_path, spool_dest)
             )
             thread.start()
             threads.append(thread)
@@ -2968,12 +4253,10 @@ class CloudWalDownloader(object):
         Get the list of WAL files to download from cloud storage.
 
         If *parallel* is greater than 1, it searches for the requested WAL file and
-        the next *parallel* - 1 WAL files in the same WAL directory. Otherwise, it
+        the next *parallel* - 1 WAL files in the same WAL directory, continuing in
+        the following WAL directories of the same timeline if needed. Otherwise, it
         returns the requested WAL file only.
 
-        Note that it does not search WALs that are not present in the same directory
-        as the requested WAL.
-
         The returned list is always sorted in ascending order.
 
         :param str wal_name: Name of the requested WAL file
@@ -3017,6 +4300,27 @@ class CloudWalDownloader(object):
                 wals_to_download.append(path)
                 count += 1
 
+        # When the requested WAL is at the end of its directory, the next WALs
+        # are in the directory of the following log of the same timeline
+        if 0 < count < parallel:
+            tli, log, _ = xlog.decode_segment_name(wal_name)
+            while count < parallel:
+                log += 1
+                next_dir = os.path.join(
+                    os.path.dirname(source_dir.rstrip(os.path.sep)),
+                    "%08X%08X" % (tli, log),
+                    "",
+                )
+                found = count
+                for path in sorted(self.cloud_interface.list_bucket(next_dir)):
+                    if count >= parallel:
+                        break
+                    if self._validate_wal_path(path, no_partial):
+                        wals_to_download.append(path)
+                        count += 1
+                if count == found:
+                    break
+
         return wals_to_download
 
     def _validate_wal_path(self, wal_path, no_partial):
@@ -3062,6 +4366,8 @@ class CloudWalDownloader(object):
         :param str wal_path: The path of the WAL file to download from cloud storage
         :param str wal_dest: The full path of the destination WAL file
             (including filename)
+        :return bool: ``True`` if the WAL file has been downloaded, ``False`` if
+            the download failed in a background thread
 
         :raises BarmanException: If the WAL file is compressed but cannot be
             decompressed due to an unsupported compression format or Python version.
@@ -3088,6 +4394,27 @@ class CloudWalDownloader(object):
             # Only reraise if on main thread as to avoid noise from background threads
             if threading.current_thread() is threading.main_thread():
                 raise
+            return False
+        return True
+
+    def _download_to_spool(self, wal_path, spool_dest):
+        """
+        Download a WAL file from cloud storage to the spool directory.
+
+        The WAL file is downloaded to a temporary file which is renamed once the
+        download is complete, so that an interrupted download is never delivered.
+
+        :param str wal_path: The path of the WAL file to download from cloud storage
+        :param str spool_dest: The full path of the WAL file in the spool directory
+        """
+        tmp_dest = spool_dest + self.SPOOL_TMP_SUFFIX
+        try:
+            if self._download_single_wal(wal_path, tmp_dest):
+                os.rename(tmp_dest, spool_dest)
+            elif os.path.exists(tmp_dest):
+                os.unlink(tmp_dest)
+        except OSError as exc:
+            _logger.error("Failure moving %s to %s: %s" % (tmp_dest, spool_dest, exc))
 
     def _identify_cloud_compression(self, wal_path):
         """
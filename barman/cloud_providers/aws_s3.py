@@ -300,6 +300,22 @@ class S3CloudInterface(CloudInterface):
                 for o in objects:
                     yield o.get("Key")
 
+    def list_object_etags(self, prefix):
+        """
+        List all the objects under a prefix along with their ETag
+
+        :param str prefix: The prefix of the objects
+        :return: The key and the ETag of each object
+        :rtype: Iterable[tuple[str,str]]
+        """
+        if prefix.startswith(DEFAULT_DELIMITER):
+            prefix = prefix.lstrip(DEFAULT_DELIMITER)
+
+        paginator = self.s3.meta.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for o in page.get("Contents") or []:
+                yield o["Key"], o["ETag"]
+
     def download_file(self, key, dest_path, decompress):
         """
         Download a file from S3
@@ -321,6 +337,56 @@ class S3CloudInterface(CloudInterface):
 
             decompress_to_file(remote_file, dest_file, decompress)
 
+    def get_object_size(self, key):
+        """
+        Get the size of an S3 object
+
+        :param str key: The key identifying the object
+        :return: The size of the object in bytes
+        :rtype: int
+        """
+        response = self.s3.meta.client.head_object(Bucket=self.bucket_name, Key=key)
+        return response["ContentLength"]
+
+    def read_object_range(self, key, offset, length):
+        """
+        Read a range of bytes of an S3 object
+
+        The boto3 client is used rather than the resource, as only the
+        former is thread-safe.
+
+        :param str key: The key identifying the object
+        :param int offset: The offset of the first byte to read
+        :param int length: The number of bytes to read
+        :return: The bytes read
+        :rtype: bytes
+        """
+        response = self.s3.meta.client.get_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Range="bytes=%d-%d" % (offset, offset + length - 1),
+        )
+        return response["Body"].read()
+
+    def read_object(self, key):
+        """
+        Read the whole content of an S3 object
+
+        The boto3 client is used rather than the resource, as only the
+        former is thread-safe.
+
+        :param str key: The key identifying the object
+        :return: The content of the object or None if the key does not exist
+        :rtype: bytes|None
+        """
+        try:
+            response = self.s3.meta.client.get_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] == "NoSuchKey":
+                return None
+            raise
+        return response["Body"].read()
+
     def remote_open(self, key, decompressor=None):
         """
         Open a remote S3 object and returns a readable stream
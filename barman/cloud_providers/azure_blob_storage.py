@@ -308,6 +308,17 @@ class AzureCloudInterface(CloudInterface):
         for item in res:
             yield item.name
 
+    def list_object_etags(self, prefix):
+        """
+        List all the objects under a prefix along with their ETag
+
+        :param str prefix: The prefix of the objects
+        :return: The key and the ETag of each object
+        :rtype: Iterable[tuple[str,str]]
+        """
+        for blob in self.container_client.list_blobs(name_starts_with=prefix):
+            yield blob.name, blob.etag
+
     def download_file(self, key, dest_path, decompress=None):
         """
         Download a file from Azure Blob Storage
@@ -324,6 +335,43 @@ class AzureCloudInterface(CloudInterface):
             blob = StreamingBlobIO(obj)
             decompress_to_file(blob, dest_file, decompress)
 
+    def get_object_size(self, key):
+        """
+        Get the size of an Azure Blob Storage object
+
+        :param str key: The key identifying the object
+        :return: The size of the object in bytes
+        :rtype: int
+        """
+        return self.container_client.get_blob_client(key).get_blob_properties().size
+
+    def read_object_range(self, key, offset, length):
+        """
+        Read a range of bytes of an Azure Blob Storage object
+
+        :param str key: The key identifying the object
+        :param int offset: The offset of the first byte to read
+        :param int length: The number of bytes to read
+        :return: The bytes read
+        :rtype: bytes
+        """
+        return self.container_client.download_blob(
+            key, offset=offset, length=length
+        ).readall()
+
+    def read_object(self, key):
+        """
+        Read the whole content of an Azure Blob Storage object
+
+        :param str key: The key identifying the object
+        :return: The content of the object or None if the key does not exist
+        :rtype: bytes|None
+        """
+        try:
+            return self.container_client.download_blob(key).readall()
+        except ResourceNotFoundError:
+            return None
+
     def remote_open(self, key, decompressor=None):
         """
         Open a remote Azure Blob Storage object and return a readable stream
@@ -198,6 +198,17 @@ class GoogleCloudInterface(CloudInterface):
         _logger.debug("dirs {}".format(dirs))
         return objects + dirs
 
+    def list_object_etags(self, prefix):
+        """
+        List all the objects under a prefix along with their ETag
+
+        :param str prefix: The prefix of the objects
+        :return: The key and the ETag of each object
+        :rtype: Iterable[tuple[str,str]]
+        """
+        for blob in self.client.list_blobs(self.container_client, prefix=prefix):
+            yield blob.name, blob.etag
+
     def download_file(self, key, dest_path, decompress):
         """
         Download a file from cloud storage
@@ -215,6 +226,45 @@ class GoogleCloudInterface(CloudInterface):
             with blob.open(mode="rb") as blob_reader:
                 decompress_to_file(blob_reader, dest_file, decompress)
 
+    def get_object_size(self, key):
+        """
+        Get the size of an object in cloud storage
+
+        :param str key: The key identifying the object
+        :return: The size of the object in bytes
+        :rtype: int
+        """
+        blob = storage.Blob(key, self.container_client)
+        blob.reload()
+        return blob.size
+
+    def read_object_range(self, key, offset, length):
+        """
+        Read a range of bytes of an object in cloud storage
+
+        :param str key: The key identifying the object
+        :param int offset: The offset of the first byte to read
+        :param int length: The number of bytes to read
+        :return: The bytes read
+        :rtype: bytes
+        """
+        blob = storage.Blob(key, self.container_client)
+        return blob.download_as_bytes(start=offset, end=offset + length - 1)
+
+    def read_object(self, key):
+        """
+        Read the whole content of an object in cloud storage
+
+        :param str key: The key identifying the object
+        :return: The content of the object or None if the key does not exist
+        :rtype: bytes|None
+        """
+        blob = storage.Blob(key, self.container_client)
+        try:
+            return blob.download_as_bytes()
+        except NotFound:
+            return None
+
     def remote_open(self, key, decompressor=None):
         """
         Open a remote object in cloud storage and returns a readable stream
@@ -25,10 +25,13 @@ import bz2
 import gzip
 import logging
 import lzma
+import os
 import shutil
 from abc import ABCMeta, abstractmethod, abstractproperty
 from contextlib import closing
+from glob import glob
 from io import BytesIO
+from tempfile import NamedTemporaryFile
 from types import SimpleNamespace
 
 from barman.command_wrappers import Command
@@ -272,9 +275,11 @@ class InternalCompressor(Compressor):
 
     :cvar EXTENSION: File extension for the compressed output (e.g. ``".gz"``). Must be
         set by each concrete subclass.
+    :cvar dictionary_id: Id of the dictionary used for compression, if any
     """
 
     EXTENSION = None
+    dictionary_id = None
 
     def compress(self, src, dst):
         """
@@ -348,6 +353,40 @@ class InternalCompressor(Compressor):
         :return: a decompressed file-object
         """
 
+    def compress_buffer(self, data):
+        """
+        Compresses the given bytes in memory
+
+        Subclasses override this method to compress the data with a single
+        call to the compression library.
+
+        :param bytes data: the data to be compressed
+        :return bytes: the compressed data
+        """
+        return self.compress_in_mem(BytesIO(data)).read()
+
+    def compress_file_in_mem(self, src, dst):
+        """
+        Compress *src* to *dst*, holding the whole content in memory
+
+        This is meant for small files, such as WAL segments, which are
+        compressed with a single call instead of being streamed block by
+        block.
+
+        :param src: source file to compress
+        :param dst: destination of the compression
+        """
+        try:
+            with open(src, "rb") as istream:
+                data = istream.read()
+            compressed = self.compress_buffer(data)
+            with open(dst, "wb") as ostream:
+                ostream.write(compressed)
+        except Exception as e:
+            # you won't get more information from the compressors anyway
+            raise CommandFailedException(dict(ret=None, err=force_str(e), out=None))
+        return 0
+
     def decompress_to_fileobj(self, src_fileobj, dest_fileobj):
         """
         Decompresses the given file-object on the especified file-object
@@ -396,6 +435,9 @@ class PyGZipCompressor(InternalCompressor):
         in_mem_gzip.seek(0)
         return in_mem_gzip
 
+    def compress_buffer(self, data):
+        return gzip.compress(data, compresslevel=self.level)
+
     def decompress_in_mem(self, fileobj):
         return gzip.GzipFile(fileobj=fileobj, mode="rb")
 
@@ -447,10 +489,13 @@ class PyBZip2Compressor(InternalCompressor):
         return bz2.BZ2File(name, mode="rb")
 
     def compress_in_mem(self, fileobj):
-        in_mem_bz2 = BytesIO(bz2.compress(fileobj.read(), compresslevel=self.level))
+        in_mem_bz2 = BytesIO(self.compress_buffer(fileobj.read()))
         in_mem_bz2.seek(0)
         return in_mem_bz2
 
+    def compress_buffer(self, data):
+        return bz2.compress(data, compresslevel=self.level)
+
     def decompress_in_mem(self, fileobj):
         return bz2.BZ2File(fileobj, "rb")
 
@@ -475,10 +520,13 @@ class XZCompressor(InternalCompressor):
         return lzma.open(src, mode="rb")
 
     def compress_in_mem(self, fileobj):
-        in_mem_xz = BytesIO(lzma.compress(fileobj.read(), preset=self.level))
+        in_mem_xz = BytesIO(self.compress_buffer(fileobj.read()))
         in_mem_xz.seek(0)
         return in_mem_xz
 
+    def compress_buffer(self, data):
+        return lzma.compress(data, preset=self.level)
+
     def decompress_in_mem(self, fileobj):
         return lzma.open(fileobj, "rb")
 
@@ -494,6 +542,20 @@ def _try_import_zstd():
 class ZSTDCompressor(InternalCompressor):
     """
     Predefined compressor with zstd
+
+    When ``zstd_dictionary`` is enabled in the configuration, the files are
+    compressed with the most recent dictionary trained for the server, if
+    any. The dictionaries are stored next to the xlogdb and named after
+    their dictionary id, which zstd records in every frame it compresses.
+    This allows decompressing any file, whichever dictionary was used.
+
+    :cvar DICTIONARY_SIZE: Maximum size of a trained dictionary
+    :cvar DICTIONARY_SAMPLE_SIZE: Size of the samples a dictionary is trained
+        on, matching the size of a WAL page
+    :cvar DICTIONARY_MAX_SAMPLES: Maximum number of samples a dictionary is
+        trained on
+    :cvar DICTIONARY_NAME: Name of the dictionary files
+    :cvar FRAME_HEADER_MAX_SIZE: Maximum size of a zstd frame header
     """
 
     EXTENSION = ".zst"
@@ -503,6 +565,11 @@ class ZSTDCompressor(InternalCompressor):
     LEVEL_LOW = 1
     LEVEL_MEDIUM = 4
     LEVEL_HIGH = 9
+    DICTIONARY_SIZE = 112640
+    DICTIONARY_SAMPLE_SIZE = 8192
+    DICTIONARY_MAX_SAMPLES = 8192
+    DICTIONARY_NAME = "{server}-zstd-{dict_id}.dict"
+    FRAME_HEADER_MAX_SIZE = 18
 
     def __init__(self, config, compression, path=None):
         """
@@ -513,6 +580,9 @@ class ZSTDCompressor(InternalCompressor):
         """
         super(ZSTDCompressor, self).__init__(config, compression, path)
         self._zstd = None
+        self._compression_context = None
+        self._dictionaries = {}
+        self._dictionary_id = None
 
     @property
     def zstd(self):
@@ -520,22 +590,218 @@ class ZSTDCompressor(InternalCompressor):
             self._zstd = _try_import_zstd()
         return self._zstd
 
-    def _compressor(self, dst):
-        return self.zstd.ZstdCompressor(level=self.level).stream_writer(
-            open(dst, mode="wb")
+    @classmethod
+    def get_dictionary_id(cls, server, name):
+        """
+        Return the id of the dictionary stored in the file *name*.
+
+        :param str server: the name of the server
+        :param str name: the name of the file
+        :return int|None: the id of the dictionary, ``None`` if *name* is
+            not a dictionary file of *server*
+        """
+        prefix, suffix = cls.DICTIONARY_NAME.format(server=server, dict_id="*").split(
+            "*"
         )
+        dict_id = name[len(prefix) : -len(suffix)]
+        if name.startswith(prefix) and name.endswith(suffix) and dict_id.isdigit():
+            return int(dict_id)
+        return None
+
+    @property
+    def dictionary_directory(self):
+        """
+        The directory containing the dictionaries of the server, ``None`` if
+        the configuration does not have one.
+        """
+        return getattr(self.config, "xlogdb_directory", None)
+
+    def _dictionary_path(self, dict_id):
+        """
+        Return the path of the dictionary file with the given id.
+
+        :param int dict_id: the id of the dictionary
+        :rtype: str
+        """
+        return os.path.join(
+            self.dictionary_directory,
+            self.DICTIONARY_NAME.format(server=self.config.name, dict_id=dict_id),
+        )
+
+    def get_dictionary(self, dict_id):
+        """
+        Return the dictionary with the given id.
+
+        :param int dict_id: the id of the dictionary
+        :rtype: zstandard.ZstdCompressionDict
+        :raises CompressionException: if the dictionary is not available
+        """
+        if dict_id not in self._dictionaries:
+            if self.dictionary_directory is None:
+                raise CompressionException(
+                    "zstd dictionary %s is required to decompress the file" % dict_id
+                )
+            path = self._dictionary_path(dict_id)
+            try:
+                with open(path, "rb") as dictionary_file:
+                    data = dictionary_file.read()
+            except IOError as e:
+                raise CompressionException(
+                    "Unable to read zstd dictionary %s: %s" % (dict_id, force_str(e))
+                )
+            self._dictionaries[dict_id] = self.zstd.ZstdCompressionDict(data)
+        return self._dictionaries[dict_id]
+
+    @property
+    def dictionary_id(self):
+        """
+        The id of the dictionary used for compression, ``None`` if no
+        dictionary is used.
+
+        This is the most recent dictionary trained for the server, looked up
+        the first time it is needed.
+        """
+        if self._dictionary_id is None:
+            self._dictionary_id = 0
+            if getattr(self.config, "zstd_dictionary", False):
+                paths = sorted(glob(self._dictionary_path("*")), key=os.path.getmtime)
+                if paths:
+                    self._dictionary_id = self.get_dictionary_id(
+                        self.config.name, os.path.basename(paths[-1])
+                    )
+        return self._dictionary_id or None
+
+    @property
+    def compression_context(self):
+        """
+        The zstd compression context, created once and reused for every file
+        compressed by this instance.
+        """
+        if self._compression_context is None:
+            dict_id = self.dictionary_id
+            self._compression_context = self.zstd.ZstdCompressor(
+                level=self.level,
+                dict_data=self.get_dictionary(dict_id) if dict_id else None,
+            )
+        return self._compression_context
+
+    def train_dictionary(self, files):
+        """
+        Train a new dictionary on the content of *files* and store it.
+
+        The files are split in samples of :attr:`DICTIONARY_SAMPLE_SIZE`
+        bytes, evenly picking up to :attr:`DICTIONARY_MAX_SAMPLES` of them.
+        The new dictionary is used for the files compressed afterwards.
+
+        :param list[str] files: the uncompressed files to train on
+        :return int: the id of the new dictionary
+        """
+        total_samples = sum(
+            -(-os.path.getsize(name) // self.DICTIONARY_SAMPLE_SIZE) for name in files
+        )
+        step = -(-total_samples // self.DICTIONARY_MAX_SAMPLES) or 1
+        samples = []
+        for name in files:
+            with open(name, "rb") as sample_file:
+                data = sample_file.read()
+            samples.extend(
+                data[offset : offset + self.DICTIONARY_SAMPLE_SIZE]
+                for offset in range(0, len(data), self.DICTIONARY_SAMPLE_SIZE * step)
+            )
+        dictionary = self.zstd.train_dictionary(
+            self.DICTIONARY_SIZE, samples, level=self.level
+        )
+        dict_id = dictionary.dict_id()
+        path = self._dictionary_path(dict_id)
+        with NamedTemporaryFile(
+            dir=self.dictionary_directory, prefix=".zstd-dict-", delete=False
+        ) as dictionary_file:
+            dictionary_file.write(dictionary.as_bytes())
+            dictionary_file.flush()
+            os.fsync(dictionary_file.fileno())
+        os.rename(dictionary_file.name, path)
+        _logger.info("Trained zstd dictionary %s in %s", dict_id, path)
+        self._dictionaries[dict_id] = dictionary
+        self._dictionary_id = dict_id
+        self._compression_context = None
+        return dict_id
+
+    def disable_dictionary(self):
+        """
+        Compress the files without any dictionary, so that they can be
+        decompressed without the dictionaries of the server.
+        """
+        self._dictionary_id = 0
+        self._compression_context = None
+
+    def _frame_dictionary_id(self, fileobj):
+        """
+        Return the id of the dictionary required by the frame in *fileobj*.
+
+        The dictionary id is read from the frame header, then the position of
+        *fileobj* is restored. Non-seekable file-objects are expected not to
+        require a dictionary.
+
+        :param fileobj: the compressed file-object
+        :return int: the id of the dictionary, ``0`` if none is required
+        """
+        dict_id = 0
+        if fileobj.seekable():
+            position = fileobj.tell()
+            header = fileobj.read(self.FRAME_HEADER_MAX_SIZE)
+            fileobj.seek(position)
+            try:
+                dict_id = self.zstd.get_frame_parameters(header).dict_id
+            except self.zstd.ZstdError:
+                # Let the decompressor report the invalid content
+                pass
+        return dict_id
+
+    def get_file_dictionary_id(self, src):
+        """
+        Return the id of the dictionary required to decompress a file.
+
+        :param str src: the path of the compressed file
+        :return int|None: the id of the dictionary, ``None`` if the file was
+            compressed without a dictionary
+        """
+        with open(src, mode="rb") as fileobj:
+            return self._frame_dictionary_id(fileobj) or None
+
+    def _decompression_context(self, fileobj):
+        """
+        Return a zstd decompression context for the frame in *fileobj*.
+
+        :param fileobj: the compressed file-object
+        :rtype: zstandard.ZstdDecompressor
+        """
+        dict_id = self._frame_dictionary_id(fileobj)
+        if dict_id:
+            return self.zstd.ZstdDecompressor(dict_data=self.get_dictionary(dict_id))
+        return self.zstd.ZstdDecompressor()
+
+    def _compressor(self, dst):
+        return self.compression_context.stream_writer(open(dst, mode="wb"))
 
     def _decompressor(self, src):
-        return self.zstd.ZstdDecompressor().stream_reader(open(src, mode="rb"))
+        fileobj = open(src, mode="rb")
+        try:
+            return self._decompression_context(fileobj).stream_reader(fileobj)
+        except Exception:
+            fileobj.close()
+            raise
 
     def compress_in_mem(self, fileobj):
         in_mem_zstd = BytesIO()
-        self.zstd.ZstdCompressor(level=self.level).copy_stream(fileobj, in_mem_zstd)
+        self.compression_context.copy_stream(fileobj, in_mem_zstd)
         in_mem_zstd.seek(0)
         return in_mem_zstd
 
+    def compress_buffer(self, data):
+        return self.compression_context.compress(data)
+
     def decompress_in_mem(self, fileobj):
-        return self.zstd.ZstdDecompressor().stream_reader(fileobj)
+        return self._decompression_context(fileobj).stream_reader(fileobj)
 
 
 def _try_import_lz4():
@@ -582,12 +848,13 @@ class LZ4Compressor(InternalCompressor):
         return self.lz4.frame.open(src, mode="rb")
 
     def compress_in_mem(self, fileobj):
-        in_mem_lz4 = BytesIO(
-            self.lz4.frame.compress(fileobj.read(), compression_level=self.level)
-        )
+        in_mem_lz4 = BytesIO(self.compress_buffer(fileobj.read()))
         in_mem_lz4.seek(0)
         return in_mem_lz4
 
+    def compress_buffer(self, data):
+        return self.lz4.frame.compress(data, compression_level=self.level)
+
     def decompress_in_mem(self, fileobj):
         return self.lz4.frame.open(fileobj, mode="rb")
 
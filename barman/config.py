@@ -54,6 +54,7 @@ FORBIDDEN_SERVER_NAMES = ["all"]
 
 DEFAULT_USER = "barman"
 DEFAULT_CLEANUP = "true"
+DEFAULT_CRON_PARALLEL_JOBS = "1"
 DEFAULT_LOG_LEVEL = logging.INFO
 DEFAULT_LOG_FORMAT = "%(asctime)s [%(process)s] %(name)s %(levelname)s: %(message)s"
 
@@ -228,6 +229,19 @@ def parse_boolean(value):
     )
 
 
+def parse_positive_integer(value):
+    """
+    Parse a string to a positive integer value
+
+    :param str value: string representing a positive integer
+    :raises ValueError: if the string is not a positive integer
+    """
+    int_value = int(value)
+    if int_value < 1:
+        raise ValueError("Invalid value %s (must be a positive integer)" % value)
+    return int_value
+
+
 def parse_time_interval(value):
     """
     Parse a string, transforming it in a time interval.
@@ -658,6 +672,7 @@ class ServerConfig(BaseConfig):
         "active",
         "archiver",
         "archiver_batch_size",
+        "archiver_parallel_jobs",
         "autogenerate_manifest",
         "aws_check_object_lock",
         "aws_encryption",
@@ -776,11 +791,13 @@ class ServerConfig(BaseConfig):
         "warehousepg_dbid",
         "worm_mode",
         "xlogdb_directory",
+        "zstd_dictionary",
     ]
 
     BARMAN_KEYS = [
         "archiver",
         "archiver_batch_size",
+        "archiver_parallel_jobs",
         "autogenerate_manifest",
         "aws_check_object_lock",
         "aws_encryption",
@@ -878,12 +895,14 @@ class ServerConfig(BaseConfig):
         "warehousepg_dbid",
         "worm_mode",
         "xlogdb_directory",
+        "zstd_dictionary",
     ]
 
     DEFAULTS = {
         "active": "true",
         "archiver": "off",
         "archiver_batch_size": "0",
+        "archiver_parallel_jobs": "1",
         "autogenerate_manifest": "false",
         "aws_check_object_lock": "off",
         "aws_await_snapshots_timeout": "3600",
@@ -935,6 +954,7 @@ class ServerConfig(BaseConfig):
         "wals_directory": "%(backup_directory)s/wals",
         "worm_mode": "off",
         "xlogdb_directory": "%(wals_directory)s",
+        "zstd_dictionary": "false",
     }
 
     FIXED = [
@@ -945,6 +965,7 @@ class ServerConfig(BaseConfig):
         "active": parse_boolean,
         "archiver": parse_boolean,
         "archiver_batch_size": int,
+        "archiver_parallel_jobs": parse_positive_integer,
         "autogenerate_manifest": parse_boolean,
         "aws_check_object_lock": parse_boolean,
         "aws_encryption": parse_aws_encryption,
@@ -1001,6 +1022,7 @@ class ServerConfig(BaseConfig):
         "wals_directory": parse_directory_or_cloud_provider,
         "warehousepg_dbid": int,
         "worm_mode": parse_boolean,
+        "zstd_dictionary": parse_boolean,
     }
 
     def __init__(self, config, name):
@@ -1557,6 +1579,9 @@ class Config(object):
         self.lock_directory_cleanup = parse_boolean(
             self.get("barman", "lock_directory_cleanup") or DEFAULT_CLEANUP
         )
+        self.cron_parallel_jobs = parse_positive_integer(
+            self.get("barman", "cron_parallel_jobs") or DEFAULT_CRON_PARALLEL_JOBS
+        )
         self.user = self.get("barman", "barman_user") or DEFAULT_USER
         self.log_file = self.get("barman", "log_file")
         self.log_format = self.get("barman", "log_format") or DEFAULT_LOG_FORMAT
@@ -1590,6 +1615,7 @@ class Config(object):
             dict(
                 barman_lock_directory=self.barman_lock_directory,
                 lock_directory_cleanup=self.lock_directory_cleanup,
+                cron_parallel_jobs=self.cron_parallel_jobs,
                 config_changes_queue=self.config_changes_queue,
             )
         )
@@ -1919,6 +1945,7 @@ class Config(object):
             "barman_user",
             "lock_directory_cleanup",
             "config_changes_queue",
+            "cron_parallel_jobs",
             "log_file",
             "log_level",
             "configuration_files_directory",
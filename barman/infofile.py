@@ -330,14 +330,8 @@ class FieldListFile(object):
                         "invalid line %s in file %s" % (line.strip(), filename)
                     )
 
-                # use the from_str function to parse the value
-                field = getattr(type(self), name, None)
-                if value == "None":
-                    value = None
-                elif isinstance(field, Field) and callable(field.from_str):
-                    value = field.from_str(value)
                 try:
-                    setattr(self, name, value)
+                    self._load_field(name, value)
                 except AttributeError:
                     output.error(
                         "Unsupported field '%s' found in backup metadata. This "
@@ -347,6 +341,42 @@ class FieldListFile(object):
                     )
                     output.close_and_exit()
 
+    def _load_field(self, name, value):
+        """
+        Set a field from its value as written in the file.
+
+        :param str name: the name of the field
+        :param str value: the value of the field, as dumped to the file
+        :raises: AttributeError if the field does not exist
+        """
+        # use the from_str function to parse the value
+        field = getattr(type(self), name, None)
+        if value == "None":
+            value = None
+        elif isinstance(field, Field) and callable(field.from_str):
+            value = field.from_str(value)
+        setattr(self, name, value)
+
+    def dump_fields(self):
+        """
+        Return the fields of the object as they are written by :meth:`save`.
+
+        :return dict[str,str]: the dumped value of each field
+        """
+        return dict((name, ("%s" % value).strip()) for name, value in self.items())
+
+    def load_fields(self, fields):
+        """
+        Replace the fields of the object with the ones returned by
+        :meth:`dump_fields`, as :meth:`load` does with the content of a file.
+
+        :param dict[str,str] fields: the dumped value of each field
+        :raises: AttributeError if a field does not exist
+        """
+        self._fields = {}
+        for name, value in fields.items():
+            self._load_field(name, value)
+
     def items(self):
         """
         Return a generator returning a list of (key, value) pairs.
@@ -383,6 +413,9 @@ class WalFileInfo(FieldListFile):
     )
     compression = Field("compression", doc="compression type")
     encryption = Field("encryption", doc="encryption type")
+    compression_dictionary = Field(
+        "compression_dictionary", load=int, doc="id of the compression dictionary"
+    )
 
     @classmethod
     def from_file(
@@ -408,10 +441,12 @@ class WalFileInfo(FieldListFile):
         :param str unidentified_compression: the compression to set if
             the current schema is not identifiable
         """
-        stat = os.stat(filename)
+        # The file is not inspected if size and time are already known
+        if "size" not in kwargs or "time" not in kwargs:
+            stat = os.stat(filename)
+            kwargs.setdefault("size", stat.st_size)
+            kwargs.setdefault("time", stat.st_mtime)
         kwargs.setdefault("name", os.path.basename(filename))
-        kwargs.setdefault("size", stat.st_size)
-        kwargs.setdefault("time", stat.st_mtime)
         if "encryption" not in kwargs:
             kwargs["encryption"] = encryption_manager.identify_encryption(filename)
         if "compression" not in kwargs:
@@ -431,14 +466,20 @@ class WalFileInfo(FieldListFile):
     def to_xlogdb_line(self):
         """
         Format the content of this object as a xlogdb line.
+
+        The compression dictionary is only written when one is used, so that
+        the line can be read by older versions of Barman otherwise.
         """
-        return "%s\t%s\t%s\t%s\t%s\n" % (
+        line = "%s\t%s\t%s\t%s\t%s" % (
             self.name,
             self.size,
             self.time,
             self.compression,
             self.encryption,
         )
+        if self.compression_dictionary is not None:
+            line += "\t%s" % self.compression_dictionary
+        return line + "\n"
 
     @classmethod
     def from_xlogdb_line(cls, line):
@@ -449,6 +490,7 @@ class WalFileInfo(FieldListFile):
         :rtype: WalFileInfo
         """
         parts = line.split()
+        compression_dictionary = None
         # Checks length to keep compatibility with old xlog files where
         # compression and/or encryption did not exist yet
         if len(parts) == 3:
@@ -457,6 +499,9 @@ class WalFileInfo(FieldListFile):
             name, size, time, compression, encryption = parts + [None]
         elif len(parts) == 5:
             name, size, time, compression, encryption = parts
+        elif len(parts) == 6:
+            name, size, time, compression, encryption, compression_dictionary = parts
+            compression_dictionary = int(compression_dictionary)
         else:
             raise ValueError("cannot parse line: %r" % (line,))
         # The to_xlogdb_line method writes None values as literal 'None'
@@ -472,13 +517,19 @@ class WalFileInfo(FieldListFile):
             time=time,
             compression=compression,
             encryption=encryption,
+            compression_dictionary=compression_dictionary,
         )
 
     def to_json(self):
         """
         Return an equivalent dictionary that can be encoded in json
+
+        As in the xlogdb, the compression dictionary is only included when set.
         """
-        return dict(self.items())
+        data = dict(self.items())
+        if data.get("compression_dictionary") is None:
+            data.pop("compression_dictionary", None)
+        return data
 
     def relpath(self):
         """
@@ -583,6 +634,9 @@ class BackupInfo(FieldListFile):
 
     encryption = Field("encryption")
 
+    # Last WAL file verified by check_backup while waiting for WAL files
+    last_verified_wal = Field("last_verified_wal")
+
     __slots__ = "backup_id", "backup_version"
     #: "backup_version": Indicates the internal backup directory layout version.
     #:
@@ -594,7 +648,7 @@ class BackupInfo(FieldListFile):
     #: Barman detects the "backup_version" based on directory structure:
     #: ``pgdata`` -> 1, ``data`` -> 2 (default).
 
-    _hide_if_null = ("backup_name", "snapshots_info")
+    _hide_if_null = ("backup_name", "snapshots_info", "last_verified_wal")
 
     def __init__(self, backup_id, **kwargs):
         """
@@ -839,13 +893,18 @@ class BackupInfo(FieldListFile):
 class LocalBackupInfo(BackupInfo):
     __slots__ = "server", "config", "backup_manager"
 
-    def __init__(self, server, info_file=None, backup_id=None, **kwargs):
+    def __init__(
+        self, server, info_file=None, backup_id=None, cached_fields=None, **kwargs
+    ):
         """
         Stores meta information about a single backup
 
         :param Server server:
         :param file,str,None info_file:
         :param str,None backup_id:
+        :param dict|None cached_fields: the fields of the *info_file* path, as
+            returned by :meth:`dump_fields`, used instead of reading the file
+            again
         :raise BackupInfoBadInitialisation: if the info_file content is invalid
             or neither backup_info or
         """
@@ -871,7 +930,12 @@ class LocalBackupInfo(BackupInfo):
             if os.path.exists(self.filename):
                 self.load(filename=self.filename)
         elif info_file:
-            if hasattr(info_file, "read"):
+            if cached_fields is not None:
+                # The content of the file is already known, e.g. from the
+                # backup catalogue cache: skip reading and parsing it
+                self.load_fields(cached_fields)
+                self.filename = os.path.abspath(info_file)
+            elif hasattr(info_file, "read"):
                 # We have been given a file-like object
                 self.load(file_object=info_file)
             else:
@@ -367,6 +367,21 @@ class ServerWalSyncLock(LockFile):
         )
 
 
+class CloudWalArchiveDaemonLock(LockFile):
+    """
+    This lock is held by the barman-cloud-wal-archive daemon while it runs
+
+    Creates a '.archiver-daemon.lock' lock file under the given spool_dir.
+    """
+
+    def __init__(self, spool_dir):
+        super(CloudWalArchiveDaemonLock, self).__init__(
+            os.path.join(spool_dir, ".archiver-daemon.lock"),
+            raise_if_fail=True,
+            wait=False,
+        )
+
+
 class ConfigUpdateLock(LockFile):
     """
     This lock protects barman from multiple executions of config-update command
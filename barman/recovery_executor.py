@@ -27,11 +27,14 @@ import datetime
 import io
 import logging
 import os
+import queue
 import re
 import shutil
 import socket
 import tempfile
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from contextlib import contextmanager
 from io import BytesIO
 
@@ -49,6 +52,7 @@ from barman.command_wrappers import (
     full_command_quote,
 )
 from barman.compression import (
+    CommandCompressor,
     GZipCompression,
     LZ4Compression,
     NoneCompression,
@@ -75,6 +79,7 @@ from barman.utils import LooseVersion as Version
 from barman.utils import (
     force_str,
     get_major_version,
+    human_readable_timedelta,
     is_subdirectory,
     mkpath,
     parse_target_tli,
@@ -93,12 +98,113 @@ PG_CONF_SETTING_RE = re.compile(r"^\s*([^\s=]+)\s*=?\s*(.*)$")
 Assertion = collections.namedtuple("Assertion", "filename line key value")
 
 
+class XlogTransferPool(object):
+    """
+    Transfer directories of WAL files with concurrent rsync commands,
+    collecting the statistics of each worker.
+
+    Each worker owns one of the given rsync commands, as a command cannot be
+    executed twice at the same time. At most one transfer per worker is
+    queued, so that the caller is throttled by the transfers.
+    """
+
+    def __init__(self, rsync_commands):
+        """
+        :param list[RsyncPgData] rsync_commands: the rsync commands, one for
+            each worker
+        """
+        self.workers = len(rsync_commands)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.rsync_commands = queue.Queue()
+        for worker, rsync in enumerate(rsync_commands, 1):
+            self.rsync_commands.put((worker, rsync))
+        self.transfers = set()
+        # Number of directories, WAL files and seconds spent, per worker
+        self.stats = collections.defaultdict(lambda: [0, 0, 0.0])
+
+    def submit(self, transfer, file_list, src_dir, dst_dir):
+        """
+        Queue the transfer of a directory of WAL files, waiting for a worker
+        to be available.
+
+        :param callable transfer: the function executing the transfer, called
+            with an rsync command, the file list, the source and the
+            destination directories
+        :param list[str] file_list: the WAL files to transfer
+        :param str src_dir: the source directory
+        :param str dst_dir: the destination directory
+        """
+        self.wait(self.workers - 1)
+        self.transfers.add(
+            self.executor.submit(self._run, transfer, file_list, src_dir, dst_dir)
+        )
+
+    def _run(self, transfer, file_list, src_dir, dst_dir):
+        """
+        Execute a transfer with the rsync command of an available worker.
+
+        :return tuple[int,int,float]: the worker, the number of WAL files
+            and the seconds spent
+        """
+        worker, rsync = self.rsync_commands.get()
+        try:
+            start = time.time()
+            transfer(rsync, file_list, src_dir, dst_dir)
+            return worker, len(file_list), time.time() - start
+        finally:
+            self.rsync_commands.put((worker, rsync))
+
+    def wait(self, limit=0):
+        """
+        Wait until no more than *limit* transfers are running or queued,
+        raising the error of a failed transfer.
+
+        :param int limit: the number of transfers which can be left running
+        """
+        while len(self.transfers) > limit:
+            done, self.transfers = wait(self.transfers, return_when=FIRST_COMPLETED)
+            for future in done:
+                worker, files, seconds = future.result()
+                self.stats[worker][0] += 1
+                self.stats[worker][1] += files
+                self.stats[worker][2] += seconds
+
+    def close(self):
+        """
+        Cancel the transfers which are not running yet and release the workers.
+        """
+        for future in self.transfers:
+            future.cancel()
+        self.executor.shutdown(wait=True)
+
+    def report(self):
+        """
+        Output the statistics of each worker, if more than one was used.
+        """
+        if len(self.stats) < 2:
+            return
+        output.info("WAL files transferred by %s workers:", len(self.stats))
+        for worker in sorted(self.stats):
+            directories, files, seconds = self.stats[worker]
+            output.info(
+                "  worker %s: %s WAL files in %s directories, %s",
+                worker,
+                files,
+                directories,
+                human_readable_timedelta(datetime.timedelta(seconds=seconds)),
+            )
+
+
 # noinspection PyMethodMayBeStatic
 class RecoveryExecutor(object):
     """
     Class responsible of recovery operations
     """
 
+    #: Minimum number of WAL files fetched ahead by ``barman-wal-restore``
+    #: when the WAL files are delivered lazily
+    LAZY_WAL_READ_AHEAD = 8
+
     def __init__(self, backup_manager):
         """
         Constructor
@@ -131,6 +237,8 @@ class RecoveryExecutor(object):
         recovery_option_port=None,
         custom_restore_command=None,
         copy_partial=False,
+        lazy_wal=False,
+        batch_get_wal=False,
     ):
         """
         Performs a recovery of a backup
@@ -166,6 +274,13 @@ class RecoveryExecutor(object):
         :param bool copy_partial: when ``True``, ``.partial`` WAL files are copied to
             the recovery destination with the ``.partial`` suffix stripped. Defaults
             to ``False``.
+        :param bool lazy_wal: when ``True``, only the WAL files required to reach
+            consistency are copied to the staging WAL directory, and the
+            following ones are fetched by the get-wal ``restore_command`` during
+            recovery. Defaults to ``False``.
+        :param bool batch_get_wal: when ``True``, ``barman-wal-restore`` is
+            invoked with ``--batch`` in the ``restore_command``, which requires
+            a ``barman-cli`` version supporting it. Defaults to ``False``.
         """
 
         # Run the cron to be sure the wal catalog is up to date
@@ -178,6 +293,9 @@ class RecoveryExecutor(object):
             recovery_option_port,
             custom_restore_command,
         )
+        # Lazy WAL delivery relies on the get-wal restore command
+        recovery_info["lazy_wal"] = lazy_wal and recovery_info["get_wal"]
+        recovery_info["batch_get_wal"] = batch_get_wal
 
         output.info(
             "Starting %s restore for server %s using backup %s",
@@ -226,6 +344,10 @@ class RecoveryExecutor(object):
             target_immediate,
             target_action,
         )
+        # The WAL files delivered lazily are staged outside of the WAL
+        # directory, where they are found by the restore command
+        if recovery_info["lazy_wal"] and not recovery_info["is_pitr"]:
+            recovery_info["wal_dest"] = wal_dest or os.path.join(dest, "barman_wal")
 
         # Retrieve the safe_horizon for smart copy
         self._retrieve_safe_horizon(recovery_info, backup_info, dest)
@@ -290,56 +412,15 @@ class RecoveryExecutor(object):
                         "option for recovery"
                     )
 
-            # check WALs destination directory. If doesn't exist create it
-            # we use the value from recovery_info as it contains the final path
-            try:
-                recovery_info["cmd"].create_dir_if_not_exists(
-                    recovery_info["wal_dest"], mode="700"
-                )
-            except FsOperationFailed as e:
-                output.error(
-                    "unable to initialise WAL destination directory '%s': %s",
-                    wal_dest,
-                    e,
-                )
-                output.close_and_exit()
-
-            output.info("Copying required WAL segments.")
-
-            required_xlog_files = ()  # Makes static analysers happy
-            try:
-                # TODO: Stop early if target-immediate
-                # Retrieve a list of required log files
-                required_xlog_files = tuple(
-                    self.server.get_required_xlog_files(
-                        backup_info,
-                        target_tli,
-                        None,
-                        None,
-                        target_lsn,
-                        target_immediate,
-                        include_partial=copy_partial,
-                    )
-                )
-
-                # Restore WAL segments into the wal_dest directory
-                self._xlog_copy(
-                    required_xlog_files,
-                    recovery_info["wal_dest"],
-                    remote_command,
-                )
-            except DataTransferFailure as e:
-                output.error("Failure copying WAL files: %s", e)
-                output.close_and_exit()
-            except BadXlogSegmentName as e:
-                output.error(
-                    "invalid xlog segment name %r\n"
-                    'HINT: Please run "barman rebuild-xlogdb %s" '
-                    "to solve this issue",
-                    force_str(e),
-                    self.config.name,
-                )
-                output.close_and_exit()
+            required_xlog_files = self._copy_required_xlogs(
+                recovery_info,
+                backup_info,
+                remote_command,
+                target_tli,
+                target_lsn,
+                target_immediate,
+                copy_partial,
+            )
 
             # If WAL files are put directly in the pg_xlog directory,
             # avoid shipping of just recovered files
@@ -349,6 +430,19 @@ class RecoveryExecutor(object):
                 self._generate_archive_status(
                     recovery_info, remote_command, required_xlog_files
                 )
+        elif recovery_info["lazy_wal"]:
+            # Copy only the WAL segments required to reach consistency: the
+            # following ones are fetched by the restore command while the
+            # recovery replays them, and only up to the recovery target.
+            self._copy_required_xlogs(
+                recovery_info,
+                backup_info,
+                remote_command,
+                target_tli,
+                None,
+                True,
+                False,
+            )
 
         # At this point, the encryption passphrase is not needed anymore, so
         # we clear the cache to avoid lingering.
@@ -448,6 +542,8 @@ class RecoveryExecutor(object):
             "get_wal": RecoveryOptions.GET_WAL in self.config.recovery_options,
             "recovery_option_port": recovery_option_port,
             "custom_restore_command": custom_restore_command,
+            "lazy_wal": False,
+            "batch_get_wal": False,
         }
         # A map that will keep track of the results of the recovery.
         # Used for output generation
@@ -835,12 +931,87 @@ class RecoveryExecutor(object):
             msg = "data transfer failure"
             raise DataTransferFailure.from_command_error("rsync", e, msg)
 
+    def _copy_required_xlogs(
+        self,
+        recovery_info,
+        backup_info,
+        remote_command,
+        target_tli,
+        target_lsn,
+        target_immediate,
+        copy_partial,
+    ):
+        """
+        Copy the WAL segments required by the recovery to the WAL destination
+        directory.
+
+        :param dict recovery_info: Dictionary containing all the recovery
+            parameters
+        :param barman.infofile.LocalBackupInfo backup_info: the backup to recover
+        :param str|None remote_command: ssh command for remote connection
+        :param str|None target_tli: the target timeline
+        :param str|None target_lsn: the target LSN
+        :param bool|None target_immediate: copy only the WAL segments required
+            to reach consistency
+        :param bool copy_partial: whether ``.partial`` WAL files are copied
+        :return tuple[WalFileInfo]: the WAL segments copied
+        """
+        wal_dest = recovery_info["wal_dest"]
+        # check WALs destination directory. If doesn't exist create it
+        # we use the value from recovery_info as it contains the final path
+        try:
+            recovery_info["cmd"].create_dir_if_not_exists(wal_dest, mode="700")
+        except FsOperationFailed as e:
+            output.error(
+                "unable to initialise WAL destination directory '%s': %s",
+                wal_dest,
+                e,
+            )
+            output.close_and_exit()
+
+        output.info("Copying required WAL segments.")
+
+        required_xlog_files = ()  # Makes static analysers happy
+        try:
+            # TODO: Stop early if target-immediate
+            # Retrieve a list of required log files
+            required_xlog_files = tuple(
+                self.server.get_required_xlog_files(
+                    backup_info,
+                    target_tli,
+                    None,
+                    None,
+                    target_lsn,
+                    target_immediate,
+                    include_partial=copy_partial,
+                )
+            )
+
+            # Restore WAL segments into the wal_dest directory
+            self._xlog_copy(required_xlog_files, wal_dest, remote_command)
+        except DataTransferFailure as e:
+            output.error("Failure copying WAL files: %s", e)
+            output.close_and_exit()
+        except BadXlogSegmentName as e:
+            output.error(
+                "invalid xlog segment name %r\n"
+                'HINT: Please run "barman rebuild-xlogdb %s" '
+                "to solve this issue",
+                force_str(e),
+                self.config.name,
+            )
+            output.close_and_exit()
+        return required_xlog_files
+
     def _xlog_copy(self, required_xlog_files, wal_dest, remote_command):
         """
         Restore WAL segments.
 
         Regular WAL files are grouped by their containing directory and transferred
-        via Rsync.  ``.partial`` WAL files (from either the streaming directory or
+        via Rsync.  When they need to be decrypted and/or decompressed, this is
+        done by ``parallel_jobs`` workers, and each directory is transferred
+        as soon as all its files are processed while the workers move on to the
+        following directory.  ``.partial`` WAL files (from either the streaming directory or
         the main WAL archive) are handled in a separate staging step: each one is
         processed (decompressed and/or decrypted if needed) into a temporary
         directory with its ``.partial`` suffix stripped, then transferred to
@@ -949,12 +1120,7 @@ class RecoveryExecutor(object):
                 )
                 output.close_and_exit()
 
-        rsync = RsyncPgData(
-            path=self.server.path,
-            ssh=remote_command,
-            bwlimit=self.config.bandwidth_limit,
-            network_compression=self.config.network_compression,
-        )
+        rsync = self._build_xlog_rsync(remote_command)
         # If encryption or compression is used during a remote recovery, we
         # need a temporary directory to spool the decrypted and/or decompressed
         # WAL files. Otherwise, we either decompress/decrypt directly in the
@@ -978,61 +1144,111 @@ class RecoveryExecutor(object):
             wal_dest = ":%s" % wal_dest
         total_wals = sum(map(len, xlogs.values()))
         partial_count = 0
-        for prefix in sorted(xlogs):
-            batch_len = len(xlogs[prefix])
-            partial_count += batch_len
-            source_dir = os.path.join(self.config.wals_directory, prefix)
-            _logger.info(
-                "Starting copy of %s WAL files %s/%s from %s to %s",
-                batch_len,
-                partial_count,
-                total_wals,
-                xlogs[prefix][0],
-                xlogs[prefix][-1],
-            )
-            # If WAL is encrypted and compressed: decrypt to 'wal_staging_dest',
-            # then decompress the decrypted file to same location.
-            #
-            # If encrypted only: decrypt directly from source to 'wal_staging_dest'.
-            #
-            # If compressed only: decompress directly from source to 'wal_staging_dest'.
-            #
-            # If neither: simply copy from source to 'wal_staging_dest'.
-            if requires_decryption_or_decompression:
-                for segment in xlogs[prefix]:
-                    src_file = os.path.join(source_dir, segment.name)
-                    dst_file = os.path.join(wal_staging_dest, segment.name)
-                    self._decrypt_decompress_wal(
-                        src_file,
-                        dst_file,
-                        wal_staging_dest,
-                        segment,
-                        encryptions,
-                        compressors,
-                        compression_manager,
-                        passphrase,
-                    )
-
-                if remote_command:
-                    self._rsync_move_files(
-                        rsync,
-                        [segment.name for segment in xlogs[prefix]],
-                        wal_staging_dest,
-                        wal_dest,
-                    )
-            else:
-                try:
-                    rsync.from_file_list(
+        # If WAL is encrypted and compressed: decrypt to 'wal_staging_dest',
+        # then decompress the decrypted file to same location.
+        #
+        # If encrypted only: decrypt directly from source to 'wal_staging_dest'.
+        #
+        # If compressed only: decompress directly from source to 'wal_staging_dest'.
+        #
+        # If neither: simply copy from source to 'wal_staging_dest'.
+        #
+        # The files decrypted by gpg or decompressed by a command-based
+        # compressor are processed by a pool of worker threads, as the work
+        # runs in child processes. The files decompressed in-process are
+        # processed by this thread, after the submission of the others.
+        # Directories are queued in 'pending' with the futures of their files,
+        # and the oldest one is queued for the move to the destination while
+        # the next one is processed.
+        #
+        # The directories are transferred by up to 'parallel_jobs' concurrent
+        # rsync commands, each one with the configured bandwidth limit. During
+        # a remote recovery the staging directory therefore holds up to
+        # 'parallel_jobs' directories being moved, plus the one being processed.
+        workers = self.config.parallel_jobs or 1
+        executor = None
+        pending = collections.deque()
+        if requires_decryption_or_decompression:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        transfer_pool = XlogTransferPool(
+            [rsync]
+            + [self._build_xlog_rsync(remote_command) for _ in range(workers - 1)]
+        )
+        try:
+            for prefix in sorted(xlogs):
+                batch_len = len(xlogs[prefix])
+                partial_count += batch_len
+                source_dir = os.path.join(self.config.wals_directory, prefix)
+                _logger.info(
+                    "Starting copy of %s WAL files %s/%s from %s to %s",
+                    batch_len,
+                    partial_count,
+                    total_wals,
+                    xlogs[prefix][0],
+                    xlogs[prefix][-1],
+                )
+                if requires_decryption_or_decompression:
+                    futures = []
+                    in_process = []
+                    for segment in xlogs[prefix]:
+                        args = (
+                            os.path.join(source_dir, segment.name),
+                            os.path.join(wal_staging_dest, segment.name),
+                            wal_staging_dest,
+                            segment,
+                            encryptions,
+                            compressors,
+                            compression_manager,
+                            passphrase,
+                        )
+                        if self._is_processed_by_child(segment, compressors):
+                            futures.append(
+                                executor.submit(self._decrypt_decompress_wal, *args)
+                            )
+                        else:
+                            in_process.append(args)
+                    pending.append((prefix, futures))
+                    # Keep at most one directory ahead of the transfers, which
+                    # bounds the space used by the staging directory to
+                    # 'parallel_jobs' + 1 directories
+                    while len(pending) > 1:
+                        self._finish_xlog_batch(
+                            transfer_pool,
+                            xlogs,
+                            pending.popleft(),
+                            wal_staging_dest,
+                            wal_dest,
+                            remote_command,
+                        )
+                    for args in in_process:
+                        self._decrypt_decompress_wal(*args)
+                else:
+                    transfer_pool.submit(
+                        self._rsync_copy_files,
                         list(segment.name for segment in xlogs[prefix]),
                         "%s/" % os.path.join(self.config.wals_directory, prefix),
                         wal_dest,
                     )
-                except CommandFailedException as e:
-                    msg = (
-                        "data transfer failure while copying WAL files "
-                        "to directory '%s'" % (wal_dest[1:],)
-                    )
-                    raise DataTransferFailure.from_command_error("rsync", e, msg)
+            while pending:
+                self._finish_xlog_batch(
+                    transfer_pool,
+                    xlogs,
+                    pending.popleft(),
+                    wal_staging_dest,
+                    wal_dest,
+                    remote_command,
+                )
+            transfer_pool.wait()
+        finally:
+            if executor is not None:
+                # Do not process the files of the following directories if
+                # an error occurred
+                for _prefix, futures in pending:
+                    for future in futures:
+                        future.cancel()
+                executor.shutdown(wait=True)
+            transfer_pool.close()
+        transfer_pool.report()
 
         # Now process any .partial files we need to care about.
         # .partial files may originate from two sources:
@@ -1097,6 +1313,74 @@ class RecoveryExecutor(object):
         if wal_staging_dest and wal_staging_dest != wal_dest:
             shutil.rmtree(wal_staging_dest)
 
+    def _build_xlog_rsync(self, remote_command):
+        """
+        Build the rsync command used to transfer WAL files.
+
+        :param remote_command: SSH command string for remote recovery, or
+            ``None`` for a local recovery.
+        :rtype: RsyncPgData
+        """
+        return RsyncPgData(
+            path=self.server.path,
+            ssh=remote_command,
+            bwlimit=self.config.bandwidth_limit,
+            network_compression=self.config.network_compression,
+        )
+
+    @staticmethod
+    def _is_processed_by_child(segment, compressors):
+        """
+        Check whether the decryption or decompression of a WAL file runs
+        in a child process.
+
+        This is the case for the WAL files decrypted by gpg and the ones
+        decompressed by a command-based compressor. The internal compressors
+        run in the Barman process instead.
+
+        :param WalFileInfo segment: the WAL file to restore
+        :param dict compressors: the compressor instances, keyed by name
+        :rtype: bool
+        """
+        return segment.encryption is not None or isinstance(
+            compressors.get(segment.compression), CommandCompressor
+        )
+
+    def _finish_xlog_batch(
+        self, transfer_pool, xlogs, batch, wal_staging_dest, wal_dest, remote_command
+    ):
+        """
+        Wait for the WAL files of a directory to be decrypted and/or
+        decompressed, then queue their move to the destination of a remote
+        recovery.
+
+        The move is not awaited: the transfer pool only waits for a worker to
+        be available, so the staging directory can hold as many directories
+        as the workers, plus the one processed next.
+
+        :param XlogTransferPool transfer_pool: the pool transferring the
+            directories
+        :param dict[str,list[WalFileInfo]] xlogs: the WAL files to restore,
+            keyed by their containing directory
+        :param tuple[str,list[concurrent.futures.Future]] batch: the
+            directory and the futures processing its WAL files
+        :param str wal_staging_dest: the directory of the processed WAL files
+        :param str wal_dest: the destination of the WAL files, prefixed by
+            ``:`` for a remote recovery
+        :param remote_command: SSH command string for remote recovery, or
+            ``None`` for a local recovery.
+        """
+        prefix, futures = batch
+        for future in futures:
+            future.result()
+        if remote_command:
+            transfer_pool.submit(
+                self._rsync_move_files,
+                [segment.name for segment in xlogs[prefix]],
+                wal_staging_dest,
+                wal_dest,
+            )
+
     def _decrypt_decompress_wal(
         self,
         src_file,
@@ -1207,6 +1491,19 @@ class RecoveryExecutor(object):
             == self.config.streaming_wals_directory
         )
 
+    def _rsync_copy_files(self, rsync, file_list, src_dir, dst_dir):
+        """
+        Helper function which copies the given file list from src_dir to dst_dir.
+        """
+        try:
+            rsync.from_file_list(file_list, src_dir, dst_dir)
+        except CommandFailedException as e:
+            msg = (
+                "data transfer failure while copying WAL files "
+                "to directory '%s'" % (dst_dir[1:],)
+            )
+            raise DataTransferFailure.from_command_error("rsync", e, msg)
+
     def _rsync_move_files(self, rsync, file_list, src_dir, dst_dir):
         """
         Helper function which copies the given file list to dst_dir and removes them
@@ -1310,9 +1607,7 @@ class RecoveryExecutor(object):
                 escaped_custom_command = recovery_info[
                     "custom_restore_command"
                 ].replace("'", "''")
-                recovery_conf_lines.append(
-                    f"restore_command = '{escaped_custom_command}'"
-                )
+                restore_command = escaped_custom_command
                 output.info(
                     "Custom restore command override: restore_command = '%s'",
                     escaped_custom_command,
@@ -1321,10 +1616,8 @@ class RecoveryExecutor(object):
             # If WALs are in the cloud, write the 'barman cloud-wal-restore' command
             elif self.server.use_wal_cloud_storage:
                 restore_command = (
-                    "restore_command = 'barman cloud-wal-restore %s %%f %%p'"
-                    % self.config.name
+                    "barman cloud-wal-restore %s %%f %%p" % self.config.name
                 )
-                recovery_conf_lines.append(restore_command)
 
             # Otherwise, generate the default command (get-wal / barman-wal-restore)
             else:
@@ -1351,35 +1644,48 @@ class RecoveryExecutor(object):
                         "# The 'barman-wal-restore' command "
                         "is provided in the 'barman-cli' package"
                     )
-                    restore_command = (
-                        "restore_command = 'barman-wal-restore %s -U %s %s %s %s "
-                        "%%f %%p'"
-                        % (
-                            partial_option,
-                            self.config.config.user,
-                            port_option,
-                            fqdn,
-                            self.config.name,
-                        )
+                    restore_command = "barman-wal-restore %s -U %s %s %s %s %%f %%p" % (
+                        partial_option,
+                        self.config.config.user,
+                        port_option,
+                        fqdn,
+                        self.config.name,
                     )
-                    if self.config.parallel_jobs > 1:
-                        # Remove the last 'tick' if we are appending a `-p jobs'`.
-                        restore_command = (
-                            restore_command[:-1] + " -p %s'" % self.config.parallel_jobs
-                        )
+                    parallel_jobs = self.config.parallel_jobs
+                    if recovery_info["lazy_wal"]:
+                        # Read ahead the following WAL files, receiving them
+                        # in a single stream
+                        parallel_jobs = max(parallel_jobs, self.LAZY_WAL_READ_AHEAD)
+                    if parallel_jobs > 1:
+                        restore_command += " -p %s" % parallel_jobs
+                        # The --batch option is only known by recent versions
+                        # of barman-wal-restore, so it must be requested
+                        if recovery_info["batch_get_wal"]:
+                            restore_command += " -b"
                     # Normalize spaces
                     restore_command = re.sub(r"\s+", " ", restore_command)
-                    recovery_conf_lines.append(restore_command)
                 else:
                     # Local recovery with get_wal
                     recovery_conf_lines.append(
                         "# The 'barman get-wal' command "
                         "must run as '%s' user" % self.config.config.user
                     )
-                    recovery_conf_lines.append(
-                        "restore_command = 'barman get-wal %s %s %%f > %%p'"
-                        % (partial_option, self.config.name)
+                    restore_command = "barman get-wal %s %s %%f > %%p" % (
+                        partial_option,
+                        self.config.name,
                     )
+            if recovery_info["lazy_wal"]:
+                # The WAL files required for consistency have been copied to
+                # wal_dest: use them before fetching the following ones
+                restore_command = "test -f %s/%%f && cp %s/%%f %%p || %s" % (
+                    wal_dest,
+                    wal_dest,
+                    restore_command,
+                )
+                recovery_conf_lines.append(
+                    f"recovery_end_command = 'rm -fr {wal_dest}'"
+                )
+            recovery_conf_lines.append("restore_command = '%s'" % restore_command)
             # Set get_wal result for both custom and default restore commands
             recovery_info["results"]["get_wal"] = True
         elif not standby_mode:
@@ -1895,6 +2201,8 @@ class SnapshotRecoveryExecutor(RemoteConfigRecoveryExecutor):
         recovery_option_port=None,
         custom_restore_command=None,
         recovery_instance=None,
+        lazy_wal=False,
+        batch_get_wal=False,
     ):
         """
         Performs a recovery of a snapshot backup.
@@ -1929,6 +2237,11 @@ class SnapshotRecoveryExecutor(RemoteConfigRecoveryExecutor):
             restore command (only works when get-wal is enabled)
         :param str|None recovery_instance: The name of the recovery node as it
             is known by the cloud provider
+        :param bool lazy_wal: whether only the WAL files required to reach
+            consistency are copied, the following ones being fetched by the
+            get-wal restore command
+        :param bool batch_get_wal: whether ``barman-wal-restore`` is invoked
+            with ``--batch`` in the restore command
         """
         snapshot_interface = get_snapshot_interface_from_backup_info(
             backup_info, self.server.config
@@ -1964,6 +2277,8 @@ class SnapshotRecoveryExecutor(RemoteConfigRecoveryExecutor):
             recovery_conf_filename=recovery_conf_filename,
             recovery_option_port=recovery_option_port,
             custom_restore_command=custom_restore_command,
+            lazy_wal=lazy_wal,
+            batch_get_wal=batch_get_wal,
         )
 
     def _start_backup_copy_message(self):
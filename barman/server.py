@@ -23,11 +23,13 @@ Barman is able to manage multiple servers.
 
 import datetime
 import errno
+import itertools
 import json
 import logging
 import os
 import re
 import shutil
+import signal
 import sys
 import tarfile
 import tempfile
@@ -35,6 +37,7 @@ import time
 from collections import namedtuple
 from contextlib import closing, contextmanager
 from glob import glob
+from multiprocessing import Pool
 from tempfile import NamedTemporaryFile
 
 import dateutil.tz
@@ -50,6 +53,7 @@ from barman.command_wrappers import BarmanSubProcess, Command, Rsync
 from barman.compression import (
     CustomCompressor,
     InternalCompressor,
+    ZSTDCompressor,
     compression_registry,
 )
 from barman.copy_controller import RsyncCopyController
@@ -123,12 +127,52 @@ from barman.wal_archiver import (
     WalArchiver,
 )
 from barman.xlog import PARTIAL_EXTENSION
+from barman.xlogdb import (
+    XLogDBIndex,
+    get_xlogdb_start,
+    replace_xlogdb_content,
+    set_xlogdb_start,
+)
 
 PRIMARY_INFO_FILE = "primary.info"
 SYNC_WALS_INFO_FILE = "sync-wals.info"
 
 _logger = logging.getLogger(__name__)
 
+_xlogdb_rebuild_callable = None
+"""
+Global variable containing the callable used by the processes scanning the
+WAL archive in :meth:`Server.rebuild_xlogdb`. Initialized by
+`_init_xlogdb_rebuild_worker` and used by `_run_xlogdb_rebuild_worker`.
+"""
+
+
+def _init_xlogdb_rebuild_worker(func):
+    """
+    Store the callable used to scan the hash directories of the WAL archive
+
+    :param callable func: the callable to invoke for every hash directory
+    """
+    global _xlogdb_rebuild_callable
+    _xlogdb_rebuild_callable = func
+    # The main process takes care of Ctrl-C, while a SIGTERM from
+    # the pool termination must stop the worker whatever handler has
+    # been inherited from the parent process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _run_xlogdb_rebuild_worker(job):
+    """
+    Scan a hash directory using the callable set by `_init_xlogdb_rebuild_worker`
+
+    :param tuple[str,dict] job: the hash directory and the metadata recorded
+        in the old xlogdb for its files
+    """
+    global _xlogdb_rebuild_callable  # noqa: F824
+    return _xlogdb_rebuild_callable(*job)
+
+
 # NamedTuple for a better readability of SyncWalInfo
 SyncWalInfo = namedtuple("SyncWalInfo", "last_wal last_position")
 
@@ -2610,7 +2654,8 @@ class Server(RemoteStatusMixin):
             )["file_name"]
 
         with self.xlogdb() as fxlogdb:
-            for line in fxlogdb:
+            xlogdb_index = XLogDBIndex(self.xlogdb_file_path)
+            for line in xlogdb_index.scan(fxlogdb, begin):
                 wal_info = WalFileInfo.from_xlogdb_line(line)
                 # Handle .history files: add all of them to the output,
                 # regardless of their age
@@ -2636,10 +2681,8 @@ class Server(RemoteStatusMixin):
                     continue
                 yield wal_info
             # return all the remaining history files
-            for line in fxlogdb:
-                wal_info = WalFileInfo.from_xlogdb_line(line)
-                if xlog.is_history_file(wal_info.name):
-                    yield wal_info
+            for line in xlogdb_index.remaining_history(fxlogdb):
+                yield WalFileInfo.from_xlogdb_line(line)
 
         # Finally, check the `streaming` directory to see if the next expected
         # WAL segment is being received as a .partial file. We skip this entirely
@@ -2710,7 +2753,8 @@ class Server(RemoteStatusMixin):
         backup_tli, _, _ = xlog.decode_segment_name(begin)
 
         with self.xlogdb() as fxlogdb:
-            for line in fxlogdb:
+            xlogdb_index = XLogDBIndex(self.xlogdb_file_path)
+            for line in xlogdb_index.scan(fxlogdb, begin):
                 wal_info = WalFileInfo.from_xlogdb_line(line)
                 # Handle .history files: add all of them to the output,
                 # regardless of their age, if requested (the 'include_history'
@@ -2898,6 +2942,11 @@ class Server(RemoteStatusMixin):
             when invoking ``barman-wal-restore``
         :kwparam str|None custom_restore_command: Custom restore command
             to override Barman's default (only used with get-wal mode)
+        :kwparam bool lazy_wal: copy only the WAL files required to reach
+            consistency, the following ones being fetched by the get-wal
+            restore command during recovery
+        :kwparam bool batch_get_wal: use the ``--batch`` option of
+            ``barman-wal-restore`` in the restore command
         """
         return self.backup_manager.recover(
             backup_info, dest, wal_dest, tablespaces, remote_command, **kwargs
@@ -2911,6 +2960,7 @@ class Server(RemoteStatusMixin):
         output_directory=None,
         peek=None,
         partial=False,
+        batch=None,
     ):
         """
         Retrieve a WAL file from the archive
@@ -2922,6 +2972,8 @@ class Server(RemoteStatusMixin):
             WAL file
         :param int|None peek: if defined list the next N WAL file
         :param bool partial: retrieve also partial WAL files
+        :param int|None batch: if defined send the next N WAL files, starting
+            from the requested one, as a tar stream on standard output
         """
 
         # If used through SSH identify the client to add it to logs
@@ -2945,65 +2997,18 @@ class Server(RemoteStatusMixin):
 
         # If peek is requested we only output a list of files
         if peek:
-            # Get the next ``peek`` files following the provided ``wal_name``.
-            # If ``wal_name`` is not a simple wal file,
-            # we cannot guess the names of the following WAL files.
-            # So ``wal_name`` is the only possible result, if exists.
-            if xlog.is_wal_file(wal_name):
-                # We can't know what was the segment size of PostgreSQL WAL
-                # files at backup time. Because of this, we generate all
-                # the possible names for a WAL segment, and then we check
-                # if the requested one is included.
-                wal_peek_list = xlog.generate_segment_names(wal_name)
-            else:
-                wal_peek_list = iter([wal_name])
-
-            # Output the content of wal_peek_list until we have displayed
-            # enough files or find a missing file
-            count = 0
-            while count < peek:
-                try:
-                    wal_peek_name = next(wal_peek_list)
-                except StopIteration:
-                    # No more item in wal_peek_list
-                    break
-
-                # Get list of possible location. We do not prefetch
-                # partial files
-                wal_peek_paths = self.get_wal_possible_paths(
-                    wal_peek_name, partial=False
-                )
-
-                # If the next WAL file is found, output the name
-                # and continue to the next one
-                if any(os.path.exists(path) for path in wal_peek_paths):
-                    count += 1
-                    output.info(wal_peek_name, log=False)
-                    continue
-
-                # If ``wal_peek_file`` doesn't exist, check if we need to
-                # look in the following segment
-                tli, log, seg = xlog.decode_segment_name(wal_peek_name)
-
-                # If `seg` is not a power of two, it is not possible that we
-                # are at the end of a WAL group, so we are done
-                if not is_power_of_two(seg):
-                    break
-
-                # This is a possible WAL group boundary, let's try the
-                # following group
-                seg = 0
-                log += 1
-
-                # Install a new generator from the start of the next segment.
-                # If the file doesn't exists we will terminate because
-                # zero is not a power of two
-                wal_peek_name = xlog.encode_segment_name(tli, log, seg)
-                wal_peek_list = xlog.generate_segment_names(wal_peek_name)
-
+            for wal_peek_name in self.get_wal_peek_names(wal_name, peek):
+                output.info(wal_peek_name, log=False)
             # Do not output anything else
             return
 
+        # If a batch is requested we send a tar stream on standard output
+        if batch:
+            self.get_wal_batch(
+                wal_name, batch, compression, keep_compression, partial, source_suffix
+            )
+            return
+
         # If an output directory was provided write the file inside it
         # otherwise we use standard output
         if output_directory is not None:
@@ -3034,6 +3039,185 @@ class Server(RemoteStatusMixin):
                 # Python 2.x
                 destination = sys.stdout
 
+        if not self._send_wal(
+            wal_name,
+            partial,
+            compression,
+            keep_compression,
+            destination,
+            logger,
+            destination_description,
+            source_suffix,
+        ):
+            output.error(
+                "WAL file '%s' not found in server '%s'%s",
+                wal_name,
+                self.config.name,
+                source_suffix,
+            )
+
+    def get_wal_peek_names(self, wal_name, peek):
+        """
+        Get the names of up to ``peek`` WAL files in the archive, starting
+        from the requested one and stopping at the first missing file.
+
+        :param str wal_name: id of the first WAL file
+        :param int peek: the maximum number of WAL file names to return
+        :rtype: collections.Iterable[str]
+        """
+        # Get the next ``peek`` files following the provided ``wal_name``.
+        # If ``wal_name`` is not a simple wal file,
+        # we cannot guess the names of the following WAL files.
+        # So ``wal_name`` is the only possible result, if exists.
+        if xlog.is_wal_file(wal_name):
+            # We can't know what was the segment size of PostgreSQL WAL
+            # files at backup time. Because of this, we generate all
+            # the possible names for a WAL segment, and then we check
+            # if the requested one is included.
+            wal_peek_list = xlog.generate_segment_names(wal_name)
+        else:
+            wal_peek_list = iter([wal_name])
+
+        # Return the content of wal_peek_list until we have returned
+        # enough files or find a missing file
+        count = 0
+        while count < peek:
+            try:
+                wal_peek_name = next(wal_peek_list)
+            except StopIteration:
+                # No more item in wal_peek_list
+                break
+
+            # Get list of possible location. We do not prefetch
+            # partial files
+            wal_peek_paths = self.get_wal_possible_paths(wal_peek_name, partial=False)
+
+            # If the next WAL file is found, return the name
+            # and continue to the next one
+            if any(os.path.exists(path) for path in wal_peek_paths):
+                count += 1
+                yield wal_peek_name
+                continue
+
+            # If ``wal_peek_file`` doesn't exist, check if we need to
+            # look in the following segment
+            tli, log, seg = xlog.decode_segment_name(wal_peek_name)
+
+            # If `seg` is not a power of two, it is not possible that we
+            # are at the end of a WAL group, so we are done
+            if not is_power_of_two(seg):
+                break
+
+            # This is a possible WAL group boundary, let's try the
+            # following group
+            seg = 0
+            log += 1
+
+            # Install a new generator from the start of the next segment.
+            # If the file doesn't exists we will terminate because
+            # zero is not a power of two
+            wal_peek_name = xlog.encode_segment_name(tli, log, seg)
+            wal_peek_list = xlog.generate_segment_names(wal_peek_name)
+
+    def get_wal_batch(
+        self, wal_name, batch, compression, keep_compression, partial, source_suffix
+    ):
+        """
+        Send up to ``batch`` WAL files, starting from the requested one,
+        as a tar stream on standard output.
+
+        The WAL files following the requested one are the ones returned by
+        :meth:`get_wal_peek_names`. The stream is stopped at the first file
+        which cannot be sent.
+
+        :param str wal_name: id of the first WAL file
+        :param int batch: the maximum number of WAL files to send
+        :param str|None compression: compression format for the output
+        :param bool keep_compression: if True, do not decompress compressed WAL files
+        :param bool partial: retrieve also the partial requested WAL file
+        :param str source_suffix: the client description added to the logs
+        """
+        try:
+            # Python 3.x
+            destination = sys.stdout.buffer
+        except AttributeError:
+            # Python 2.x
+            destination = sys.stdout
+
+        # The requested WAL file is sent even if only a partial file is
+        # available, in which case no other WAL file can follow it
+        wal_names = [wal_name]
+        peek_names = self.get_wal_peek_names(wal_name, batch)
+        if next(peek_names, None) == wal_name:
+            wal_names = itertools.chain(wal_names, peek_names)
+        tar = None
+        try:
+            for index, batch_wal_name in enumerate(wal_names):
+                # Every WAL file is prepared in a temporary file, as its size
+                # must be known before adding it to the tar stream
+                with NamedTemporaryFile(
+                    dir=self.config.wals_directory,
+                    prefix=".%s." % batch_wal_name,
+                    suffix=".batch",
+                ) as batch_file:
+                    if not self._send_wal(
+                        batch_wal_name,
+                        partial and index == 0,
+                        compression,
+                        keep_compression,
+                        batch_file,
+                        _logger,
+                        "to standard output",
+                        source_suffix,
+                    ):
+                        if index == 0:
+                            output.error(
+                                "WAL file '%s' not found in server '%s'%s",
+                                wal_name,
+                                self.config.name,
+                                source_suffix,
+                            )
+                        break
+                    # Nothing has been written if the WAL file could not be
+                    # decompressed, and the error has already been reported
+                    if not batch_file.tell():
+                        break
+                    if tar is None:
+                        tar = tarfile.open(mode="w|", fileobj=destination)
+                    tar_info = tarfile.TarInfo(batch_wal_name)
+                    tar_info.size = batch_file.tell()
+                    tar_info.mtime = time.time()
+                    tar_info.mode = 0o600
+                    batch_file.seek(0)
+                    tar.addfile(tar_info, batch_file)
+        finally:
+            if tar is not None:
+                tar.close()
+
+    def _send_wal(
+        self,
+        wal_name,
+        partial,
+        compression,
+        keep_compression,
+        destination,
+        logger,
+        destination_description,
+        source_suffix,
+    ):
+        """
+        Send the first available copy of a WAL file to the destination file.
+
+        :param str wal_name: id of the WAL file to find into the WAL archive
+        :param bool partial: retrieve also partial WAL files
+        :param str|None compression: compression format for the output
+        :param bool keep_compression: if True, do not decompress compressed WAL files
+        :param destination: file stream to use to write the data
+        :param logger: the object used to log the transfer
+        :param str destination_description: the destination used in the logs
+        :param str source_suffix: the client description added to the logs
+        :return bool: True if the WAL file has been sent, False if not found
+        """
         # Get the list of WAL file possible paths
         wal_paths = self.get_wal_possible_paths(wal_name, partial)
 
@@ -3056,7 +3240,7 @@ class Server(RemoteStatusMixin):
                     wal_file, compression, keep_compression, destination
                 )
                 # We are done, return to the caller
-                return
+                return True
             except CommandFailedException:
                 # If an external command fails we cannot really know why,
                 # but if the WAL file disappeared, we assume
@@ -3079,12 +3263,7 @@ class Server(RemoteStatusMixin):
 
             logger.info("Skipping vanished WAL file '%s'%s", wal_file, source_suffix)
 
-        output.error(
-            "WAL file '%s' not found in server '%s'%s",
-            wal_name,
-            self.config.name,
-            source_suffix,
-        )
+        return False
 
     def get_wal_sendfile(self, wal_file, compression, keep_compression, destination):
         """
@@ -3155,10 +3334,23 @@ class Server(RemoteStatusMixin):
                 wal_info_compression
             )
 
+            # A WAL file compressed with a zstd dictionary is never sent as
+            # it is, as the client cannot access the dictionaries of the
+            # server: it is decompressed and compressed again without it
+            uses_dictionary = (
+                isinstance(wal_compressor, ZSTDCompressor)
+                and wal_compressor.get_file_dictionary_id(source_file) is not None
+            )
+            if uses_dictionary and keep_compression:
+                keep_compression = False
+                compression = wal_compressor.compression
+
             # Get a compressor for the output (None if not compressed)
             out_compressor = backup_manager.compression_manager.get_compressor(
                 compression
             )
+            if isinstance(out_compressor, ZSTDCompressor):
+                out_compressor.disable_dictionary()
 
             # Ignore compression/decompression when:
             # * It's a partial WAL file; and
@@ -3167,9 +3359,9 @@ class Server(RemoteStatusMixin):
                 # If the required compression is different from the source we
                 # decompress/compress it into the required format (getattr is
                 # used here to gracefully handle None objects)
-                if getattr(wal_compressor, "compression", None) != getattr(
-                    out_compressor, "compression", None
-                ):
+                if uses_dictionary or getattr(
+                    wal_compressor, "compression", None
+                ) != getattr(out_compressor, "compression", None):
                     # If source is compressed, decompress it into a temporary file
                     if wal_compressor is not None:
                         uncompressed_file = NamedTemporaryFile(
@@ -3980,6 +4172,14 @@ class Server(RemoteStatusMixin):
             with server.xlogdb('w') as file:
                 file.write(new_line)
 
+        When the file is opened for reading, it is positioned at its logical
+        start (see :func:`barman.xlogdb.get_xlogdb_start`), skipping the lines
+        already removed by retention. Opening it in ``w`` mode resets the
+        logical start and invalidates the :class:`barman.xlogdb.XLogDBIndex`
+        of the xlogdb. Appended lines are added to the index on its next use,
+        while code rewriting the file in ``r+`` mode must take care of both
+        (e.g. through :func:`barman.xlogdb.replace_xlogdb_content`).
+
         :param str mode: open the file with the required mode
             (default read-only)
         """
@@ -3989,7 +4189,13 @@ class Server(RemoteStatusMixin):
             self.rebuild_xlogdb(silent=True)
 
         with ServerXLOGDBLock(self.config.barman_lock_directory, self.config.name):
+            if "w" in mode:
+                set_xlogdb_start(xlogdb, 0)
             with open(xlogdb, mode) as f:
+                if "r" in mode:
+                    start = get_xlogdb_start(xlogdb)
+                    if start:
+                        f.seek(start)
                 # execute the block nested in the with statement
                 try:
                     yield f
@@ -4002,6 +4208,8 @@ class Server(RemoteStatusMixin):
                     if any((c in "wa+") for c in f.mode):
                         f.flush()
                         os.fsync(f.fileno())
+                    if "w" in f.mode:
+                        XLogDBIndex(xlogdb).invalidate()
 
     def report_backups(self):
         if not self.enforce_retention_policies:
@@ -4009,14 +4217,23 @@ class Server(RemoteStatusMixin):
         else:
             return self.config.retention_policy.report()
 
-    def rebuild_xlogdb(self, silent=False):
+    def rebuild_xlogdb(self, silent=False, jobs=1, reuse=True):
         """
         Rebuild the whole xlog database guessing it from the archive content.
 
+        Unless *reuse* is ``False``, the compression and encryption recorded
+        in the current xlogdb are reused for the files whose size and
+        modification time still match, so that only new or changed files need
+        to be opened and inspected. Nothing is reused if the current xlogdb
+        contains invalid lines, as its content cannot be trusted.
+        With more than one job, the hash directories of the archive are
+        processed in parallel and their results merged in order.
+
         :param bool silent: Supress output logs if ``True``.
+        :param int jobs: number of processes used to scan the archive
+        :param bool reuse: whether the metadata recorded in the current
+            xlogdb can be reused
         """
-        from os.path import isdir, join
-
         if not silent:
             output.info("Rebuilding xlogdb for server %s", self.config.name)
 
@@ -4042,65 +4259,75 @@ class Server(RemoteStatusMixin):
 
         root = self.config.wals_directory
         wal_count = label_count = history_count = 0
+        pool = None
         # lock the xlogdb as we are about replacing it completely
-        with self.xlogdb("w") as fxlogdb:
-            xlogdb_dir = os.path.dirname(fxlogdb.name)
-            with tempfile.TemporaryFile(mode="w+", dir=xlogdb_dir) as fxlogdb_new:
-                for name in sorted(os.listdir(root)):
-                    # ignore the xlogdb and its lockfile
-                    if name.startswith(self.xlogdb_file_name):
-                        continue
-                    fullname = join(root, name)
-                    if isdir(fullname):
-                        # all relevant files are in subdirectories
-                        hash_dir = fullname
-                        for wal_name in sorted(os.listdir(hash_dir)):
-                            fullname = join(hash_dir, wal_name)
-                            if isdir(fullname):
-                                _logger.warning(
-                                    "unexpected directory "
-                                    "rebuilding the wal database: %s",
-                                    fullname,
-                                )
-                            else:
-                                if xlog.is_wal_file(fullname):
-                                    wal_count += 1
-                                elif xlog.is_backup_file(fullname):
-                                    label_count += 1
-                                elif fullname.endswith(".tmp"):
-                                    _logger.warning(
-                                        "temporary file found "
-                                        "rebuilding the wal database: %s",
-                                        fullname,
-                                    )
-                                    continue
-                                else:
-                                    _logger.warning(
-                                        "unexpected file "
-                                        "rebuilding the wal database: %s",
-                                        fullname,
-                                    )
-                                    continue
-                                wal_info = self.backup_manager.get_wal_file_info(
-                                    fullname
-                                )
-                                fxlogdb_new.write(wal_info.to_xlogdb_line())
-                    else:
-                        # only history files are here
-                        if xlog.is_history_file(fullname):
+        with self.xlogdb("r+") as fxlogdb:
+            known_wals = {}
+            if reuse:
+                known_wals = self._read_xlogdb_metadata(fxlogdb)
+                if known_wals is None:
+                    _logger.warning(
+                        "Invalid lines found in the xlogdb of server %s: "
+                        "inspecting every WAL file of the archive",
+                        self.config.name,
+                    )
+                    known_wals = {}
+            with os.scandir(root) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+            # ignore the xlogdb, its lockfile and the compression dictionaries
+            entries = [
+                entry
+                for entry in entries
+                if not entry.name.startswith(self.xlogdb_file_name)
+                and ZSTDCompressor.get_dictionary_id(self.config.name, entry.name)
+                is None
+            ]
+            # all relevant files are in subdirectories, except history files
+            hash_dirs = [
+                (entry.path, known_wals.get(entry.name, {}))
+                for entry in entries
+                if entry.is_dir()
+            ]
+            if jobs > 1 and len(hash_dirs) > 1:
+                pool = Pool(
+                    processes=jobs,
+                    initializer=_init_xlogdb_rebuild_worker,
+                    initargs=(self._rebuild_xlogdb_hash_dir,),
+                )
+                results = pool.imap(_run_xlogdb_rebuild_worker, hash_dirs)
+            else:
+                results = (
+                    self._rebuild_xlogdb_hash_dir(path, known)
+                    for path, known in hash_dirs
+                )
+            try:
+                xlogdb_dir = os.path.dirname(fxlogdb.name)
+                with tempfile.TemporaryFile(mode="w+", dir=xlogdb_dir) as fxlogdb_new:
+                    for entry in entries:
+                        if entry.is_dir():
+                            lines, wals, labels = next(results)
+                            fxlogdb_new.writelines(lines)
+                            wal_count += wals
+                            label_count += labels
+                        elif xlog.is_history_file(entry.path):
                             history_count += 1
-                            wal_info = self.backup_manager.get_wal_file_info(fullname)
+                            wal_info = self._get_rebuilt_wal_file_info(
+                                entry, known_wals.get("", {})
+                            )
                             fxlogdb_new.write(wal_info.to_xlogdb_line())
                         else:
                             _logger.warning(
                                 "unexpected file rebuilding the wal database: %s",
-                                fullname,
+                                entry.path,
                             )
-                fxlogdb_new.flush()
-                fxlogdb_new.seek(0)
-                fxlogdb.seek(0)
-                shutil.copyfileobj(fxlogdb_new, fxlogdb)
-                fxlogdb.truncate()
+                    replace_xlogdb_content(fxlogdb, fxlogdb_new)
+                if pool:
+                    pool.close()
+            finally:
+                if pool:
+                    # Stop any worker left running if the rebuild failed
+                    pool.terminate()
+                    pool.join()
 
         if not silent:
             output.info(
@@ -4112,6 +4339,106 @@ class Server(RemoteStatusMixin):
                 wal_count,
             )
 
+    @staticmethod
+    def _read_xlogdb_metadata(fxlogdb):
+        """
+        Read the metadata recorded in an xlogdb, grouped by hash directory.
+
+        :param fxlogdb: the xlogdb file object
+        :return dict[str, dict[str, tuple]]|None: for every hash directory
+            (``""`` for history files) a map from the name of the file to a
+            ``(size, time, compression, encryption, compression_dictionary)``
+            tuple, ``None`` if the xlogdb contains invalid lines
+        """
+        known_wals = {}
+        for line in fxlogdb:
+            try:
+                wal_info = WalFileInfo.from_xlogdb_line(line)
+            except ValueError:
+                return None
+            if not xlog.is_any_xlog_file(wal_info.name):
+                return None
+            if xlog.is_history_file(wal_info.name):
+                hash_dir = ""
+            else:
+                hash_dir = xlog.hash_dir(wal_info.name)
+            known_wals.setdefault(hash_dir, {})[wal_info.name] = (
+                wal_info.size,
+                wal_info.time,
+                wal_info.compression,
+                wal_info.encryption,
+                wal_info.compression_dictionary,
+            )
+        return known_wals
+
+    def _get_rebuilt_wal_file_info(self, entry, known):
+        """
+        Build the :class:`WalFileInfo` of a file found rebuilding the xlogdb.
+
+        If the size and modification time of the file match the ones
+        recorded in the old xlogdb the recorded metadata is reused,
+        otherwise the file is inspected.
+
+        :param os.DirEntry entry: the file in the archive
+        :param dict[str, tuple] known: the metadata recorded in the old xlogdb
+            for the directory of the file
+        :rtype: WalFileInfo
+        """
+        recorded = known.get(entry.name)
+        if recorded is not None:
+            size, mtime, compression, encryption, compression_dictionary = recorded
+            stat = entry.stat()
+            if stat.st_size == size and stat.st_mtime == mtime:
+                return WalFileInfo(
+                    name=entry.name,
+                    size=size,
+                    time=mtime,
+                    compression=compression,
+                    encryption=encryption,
+                    compression_dictionary=compression_dictionary,
+                )
+        return self.backup_manager.get_wal_file_info(entry.path)
+
+    def _rebuild_xlogdb_hash_dir(self, hash_dir, known):
+        """
+        Build the xlogdb lines for the files contained in a hash directory.
+
+        :param str hash_dir: the path of the hash directory
+        :param dict[str, tuple] known: the metadata recorded in the old xlogdb
+            for this directory
+        :return tuple[list[str], int, int]: the sorted xlogdb lines, the
+            number of WAL files and the number of backup labels found
+        """
+        lines = []
+        wal_count = label_count = 0
+        with os.scandir(hash_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        for entry in entries:
+            if entry.is_dir():
+                _logger.warning(
+                    "unexpected directory rebuilding the wal database: %s",
+                    entry.path,
+                )
+                continue
+            if xlog.is_wal_file(entry.path):
+                wal_count += 1
+            elif xlog.is_backup_file(entry.path):
+                label_count += 1
+            elif entry.name.endswith(".tmp"):
+                _logger.warning(
+                    "temporary file found rebuilding the wal database: %s",
+                    entry.path,
+                )
+                continue
+            else:
+                _logger.warning(
+                    "unexpected file rebuilding the wal database: %s", entry.path
+                )
+                continue
+            wal_info = self._get_rebuilt_wal_file_info(entry, known)
+            lines.append(wal_info.to_xlogdb_line())
+        return lines, wal_count, label_count
+
     def get_backup_ext_info(self, backup_info):
         """
         Return a dictionary containing all available information about a backup
@@ -4530,6 +4857,7 @@ class Server(RemoteStatusMixin):
          * last read position (in xlog.db)
          * last read wal
          * list of archived wal files
+         * list of zstd dictionaries, required to decompress the wal files
 
         If last_wal is provided, the method will discard all the wall files
         older than last_wal.
@@ -4554,10 +4882,11 @@ class Server(RemoteStatusMixin):
             first_useful_wal = backups[sorted(backups.keys())[0]].begin_wal
         # Read xlogdb file.
         with self.xlogdb() as fxlogdb:
+            xlogdb_start = fxlogdb.tell()
             starting_point = self.set_sync_starting_point(
-                fxlogdb, last_wal, last_position
+                fxlogdb, last_wal, last_position, xlogdb_start
             )
-            check_first_wal = starting_point == 0 and last_wal is not None
+            check_first_wal = starting_point == xlogdb_start and last_wal is not None
             # The wal_info and line variables are used after the loop.
             # We initialize them here to avoid errors with an empty xlogdb.
             line = None
@@ -4602,10 +4931,30 @@ class Server(RemoteStatusMixin):
                 sync_status["last_name"] = ""
             sync_status["backups"] = backups
             sync_status["wals"] = wals
+            sync_status["zstd_dictionaries"] = self.get_zstd_dictionaries()
             sync_status["version"] = barman.__version__
             sync_status["config"] = self.config
         json.dump(sync_status, sys.stdout, cls=BarmanEncoder, indent=4)
 
+    def get_zstd_dictionaries(self):
+        """
+        Return the names of the zstd dictionaries trained for the server.
+
+        :rtype: list[str]
+        """
+        pattern = ZSTDCompressor.DICTIONARY_NAME.format(
+            server=self.config.name, dict_id="*"
+        )
+        names = (
+            os.path.basename(path)
+            for path in glob(os.path.join(self.config.xlogdb_directory, pattern))
+        )
+        return sorted(
+            name
+            for name in names
+            if ZSTDCompressor.get_dictionary_id(self.config.name, name) is not None
+        )
+
     def sync_cron(self, keep_descriptors):
         """
         Manage synchronisation operations between passive node and
@@ -5178,7 +5527,8 @@ class Server(RemoteStatusMixin):
 
         Reads the primary.info file and parses it, then obtains the list of
         WAL files that have not yet been synchronised with the master.
-        Rsync is used for file synchronisation with the primary server.
+        Rsync is used for file synchronisation with the primary server,
+        copying the missing zstd dictionaries before the WAL files.
 
         Once the copy is finished, acquires a lock on xlog.db, updates it
         then releases the lock.
@@ -5300,6 +5650,22 @@ class Server(RemoteStatusMixin):
                         network_compression=self.config.network_compression,
                         path=self.path,
                     )
+                    # Copy the zstd dictionaries not available locally,
+                    # as they are needed to decompress the WAL files
+                    dictionaries = [
+                        name
+                        for name in primary_info.get("zstd_dictionaries", [])
+                        if not os.path.exists(
+                            os.path.join(self.config.xlogdb_directory, name)
+                        )
+                    ]
+                    if dictionaries:
+                        rsync.from_file_list(
+                            dictionaries,
+                            ":%s/" % primary_info["config"]["xlogdb_directory"],
+                            "%s/" % self.config.xlogdb_directory,
+                        )
+
                     # Source and destination of the rsync operations
                     src = ":%s/" % primary_info["config"]["wals_directory"]
                     dest = "%s/" % self.config.wals_directory
@@ -5344,7 +5710,7 @@ class Server(RemoteStatusMixin):
             )
 
     @staticmethod
-    def set_sync_starting_point(xlogdb_file, last_wal, last_position):
+    def set_sync_starting_point(xlogdb_file, last_wal, last_position, xlogdb_start=0):
         """
         Check if the xlog.db file has changed between two requests
         from the client and set the start point for reading the file
@@ -5352,22 +5718,26 @@ class Server(RemoteStatusMixin):
         :param file xlogdb_file: an open and readable xlog.db file object
         :param str|None last_wal: last read name
         :param int|None last_position: last read position
+        :param int xlogdb_start: the logical start offset of the xlog.db file
         :return int: the position has been set
         """
         # If last_position is None start reading from the beginning of the file
-        position = int(last_position) if last_position is not None else 0
-        # Seek to required position
-        xlogdb_file.seek(position)
-        # Read 24 char (the size of a wal name)
-        wal_name = xlogdb_file.read(24)
-        # If the WAL name is the requested one start from last_position
-        if wal_name == last_wal:
-            # Return to the line start
+        position = int(last_position) if last_position is not None else xlogdb_start
+        # A position before the logical start refers to lines which have
+        # been removed in the meantime
+        if position >= xlogdb_start:
+            # Seek to required position
             xlogdb_file.seek(position)
-            return position
+            # Read 24 char (the size of a wal name)
+            wal_name = xlogdb_file.read(24)
+            # If the WAL name is the requested one start from last_position
+            if wal_name == last_wal:
+                # Return to the line start
+                xlogdb_file.seek(position)
+                return position
         # If the file has been truncated, start over
-        xlogdb_file.seek(0)
-        return 0
+        xlogdb_file.seek(xlogdb_start)
+        return xlogdb_start
 
     def write_sync_wals_info_file(self, primary_info):
         """
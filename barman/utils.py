@@ -33,6 +33,7 @@ import pwd
 import re
 import signal
 import sys
+import tempfile
 from abc import ABCMeta, abstractmethod
 from argparse import ArgumentTypeError
 from contextlib import contextmanager
@@ -598,6 +599,55 @@ def fsync_file(file_path):
     return file_stat
 
 
+def read_json_cache(path, version):
+    """
+    Read a cache file written by :func:`write_json_cache`.
+
+    A cache is only an optimisation, so any problem reading the file just
+    results in no cache.
+
+    :param str path: the path of the cache file
+    :param int|str version: the expected version of the format of the file
+    :return: the cached data, ``None`` if it cannot be used
+    """
+    try:
+        with open(path, "r") as cache_file:
+            cache = json.load(cache_file)
+        if cache["version"] == version:
+            return cache["data"]
+        _logger.debug("Ignoring cache %s written by a different version", path)
+    except Exception as e:
+        _logger.debug("Could not read cache at %s: %s", path, e)
+    return None
+
+
+def write_json_cache(path, version, data):
+    """
+    Atomically write a JSON cache file.
+
+    A cache is only an optimisation, so failures are logged and ignored.
+
+    :param str path: the path of the cache file
+    :param int|str version: the version of the format of the file
+    :param data: the data to cache, made of JSON serialisable types
+    """
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            mode="w", dir=os.path.dirname(path), delete=False
+        ) as tmp:
+            tmp_path = tmp.name
+            json.dump({"version": version, "data": data}, tmp)
+        os.rename(tmp_path, path)
+    except (OSError, IOError, TypeError, ValueError) as e:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        _logger.debug("Could not write cache at %s: %s", path, e)
+
+
 def simplify_version(version_string):
     """
     Simplify a version number by removing the patch level
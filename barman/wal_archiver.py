@@ -19,10 +19,12 @@
 import collections
 import errno
 import filecmp
+import itertools
 import logging
 import multiprocessing
 import os
 import shutil
+import signal
 import sys
 from abc import ABCMeta, abstractmethod
 from glob import glob
@@ -31,7 +33,11 @@ from tempfile import NamedTemporaryFile
 from barman import output, xlog
 from barman.cloud_providers import ObjectKeyAlreadyExists
 from barman.command_wrappers import CommandFailedException, PgReceiveXlog
-from barman.compression import InternalCompressor, compression_registry
+from barman.compression import (
+    InternalCompressor,
+    ZSTDCompressor,
+    compression_registry,
+)
 from barman.exceptions import (
     AbortedRetryHookScript,
     ArchiverFailure,
@@ -43,14 +49,56 @@ from barman.hooks import HookScriptRunner, RetryHookScriptRunner
 from barman.infofile import WalFileInfo
 from barman.remote_status import RemoteStatusMixin
 from barman.utils import LooseVersion as Version
-from barman.utils import fsync_dir, fsync_file, mkpath, with_metaclass
+from barman.utils import force_str, fsync_dir, fsync_file, mkpath, with_metaclass
 from barman.xlog import is_partial_file
+from barman.xlogdb import XLogDBIndex
 
 _logger = logging.getLogger(__name__)
 
+# Storage strategy, compressor and encryption used by the worker processes
+# of a parallel archive-wal run, set by _init_wal_archive_worker
+_wal_archive_worker_args = None
+
+
+def _init_wal_archive_worker(wal_storage, compressor, encryption):
+    """
+    Initializer for the worker processes of a parallel archive-wal run.
+
+    The worker processes ignore SIGINT, leaving the parent process in charge
+    of handling it, and restore the default SIGTERM handler, so they can be
+    terminated if the parent stops early.
+
+    :param LocalWalStorageStrategy wal_storage: the storage strategy
+    :param compressor: the compressor for the files (if any)
+    :param None|Encryption encryption: the encryptor for the files (if any)
+    """
+    global _wal_archive_worker_args
+    _wal_archive_worker_args = (wal_storage, compressor, encryption)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _run_wal_archive_worker(wal_info):
+    """
+    Compress and encrypt a WAL file in a worker process.
+
+    :param WalFileInfo wal_info: the WAL file to process
+    :return tuple: the result of :meth:`LocalWalStorageStrategy.prepare_file`
+    """
+    wal_storage, compressor, encryption = _wal_archive_worker_args
+    return wal_storage.prepare_file(compressor, encryption, wal_info)
+
 
 class WalArchiverQueue(list):
-    def __init__(self, items, errors=None, skip=None, batch_size=0, total_size=0):
+    def __init__(
+        self,
+        items,
+        errors=None,
+        skip=None,
+        batch_size=0,
+        total_size=0,
+        build_wal_info=None,
+    ):
         """
         A WalArchiverQueue is a list of WalFileInfo which has two extra
         attribute list:
@@ -78,8 +126,12 @@ class WalArchiverQueue(list):
         :param skip: an optional list of skipped files
         :param batch_size: size of the current batch run (0=unlimited)
         :param total_size: the total number of WAL files available for archiving.
+        :param build_wal_info: an optional function building the WalFileInfo of
+            an item. When set, the items are converted lazily by
+            :meth:`wal_infos`, skipping those for which it returns ``None``.
         """
         super(WalArchiverQueue, self).__init__(items)
+        self.build_wal_info = build_wal_info
         self.skip = []
         self.errors = []
         if skip is not None:
@@ -95,6 +147,20 @@ class WalArchiverQueue(list):
         self.total_size = total_size
         self.run_size = len(self)
 
+    def wal_infos(self):
+        """
+        Iterate over the WalFileInfo of the items, building them on the fly
+        if a *build_wal_info* function has been given.
+
+        :rtype: collections.abc.Iterator[WalFileInfo]
+        """
+        for item in self:
+            if self.build_wal_info is not None:
+                item = self.build_wal_info(item)
+                if item is None:
+                    continue
+            yield item
+
 
 class WalStorageStrategy(metaclass=ABCMeta):
     """
@@ -126,6 +192,22 @@ class WalStorageStrategy(metaclass=ABCMeta):
         :param kwargs: additional parameters for the storage strategy, if any
         """
 
+    def get_first_missing_wal(self, wal_names):
+        """
+        Return the first of *wal_names* which is not stored.
+
+        This implementation checks the WAL files one by one. Subclasses
+        override it to check the whole sequence at once.
+
+        :param iterable[str] wal_names: the names of the WAL files, sorted
+        :return str|None: the first missing WAL file, ``None`` if all of
+            them are stored
+        """
+        for wal_name in wal_names:
+            if not self.exists(self.get_full_path(wal_name)):
+                return wal_name
+        return None
+
     @abstractmethod
     def delete(self, wals_to_delete):
         """
@@ -318,7 +400,13 @@ class LocalWalStorageStrategy(WalStorageStrategy):
         :returns: the path to the compressed temporary file
         """
         tmp_file = "%s.compressed" % os.path.join(dst_dir, os.path.basename(src_file))
-        compressor.compress(src_file, tmp_file)
+        if isinstance(compressor, InternalCompressor):
+            # WAL files are small enough to be compressed in memory with a
+            # single call, reusing the compression context of the compressor
+            compressor.compress_file_in_mem(src_file, tmp_file)
+            wal_info.compression_dictionary = compressor.dictionary_id
+        else:
+            compressor.compress(src_file, tmp_file)
         self.files_to_remove.append(src_file)
         wal_info.compression = compressor.compression
         return tmp_file
@@ -369,12 +457,15 @@ class LocalWalStorageStrategy(WalStorageStrategy):
 
         :param str src_file: the source file path
         :param str dst_file: the destination file path
+        :return bool: ``True`` if the file has been copied
         """
         try:
             os.rename(src_file, dst_file)
         except OSError:
             shutil.copy2(src_file, dst_file)
             self.files_to_remove.append(src_file)
+            return True
+        return False
 
     def _remove_intermediary_files(self):
         """Remove any intermediary files created during the archival process"""
@@ -401,6 +492,184 @@ class LocalWalStorageStrategy(WalStorageStrategy):
         # Fsync the target directory to ensure the presence of the new file
         fsync_dir(dst_dir)
 
+    def _transform_file(self, compressor, encryption, src_file, dst_dir, wal_info):
+        """
+        Apply compression and encryption, if requested, to *src_file*.
+
+        :param compressor: the compressor for the file (if any)
+        :param None|Encryption encryption: the encryptor for the file (if any)
+        :param str src_file: the source WAL file path
+        :param str dst_dir: the directory where the resulting file is created
+        :param WalFileInfo wal_info: the WAL file info object
+        :returns: the path of the resulting file, which is *src_file* itself if
+            no compression or encryption was applied
+        """
+        current_file = src_file
+        if compressor and not wal_info.compression:
+            current_file = self._compress_file(
+                compressor, current_file, dst_dir, wal_info
+            )
+        if encryption:
+            current_file = self._encrypt_file(
+                encryption, current_file, dst_dir, wal_info
+            )
+
+        # Update stats, in case compression/encryption changed the current file
+        if src_file != current_file:
+            self._copy_stats(src_file, current_file, wal_info)
+        return current_file
+
+    def prepare_save(self, wal_info):
+        """
+        Run the checks that precede the archival of a WAL file in a group.
+
+        This is the first part of the work performed by :meth:`save`, used
+        together with :meth:`save_group`. The post-archive scripts are run if the
+        WAL file cannot be archived.
+
+        :param WalFileInfo wal_info: the WAL file is being processed
+        :raises DuplicateWalFile: if the destination file exists and is
+            different from the source file
+        :raises MatchingDuplicateWalFile: if the destination file exists and is
+            identical to the source file
+        """
+        src_file = wal_info.orig_filename
+        dst_file = wal_info.fullpath(self.server)
+        try:
+            self._run_pre_archive_scripts(wal_info, src_file)
+            self._check_duplicate(src_file, dst_file, wal_info)
+        except Exception as e:
+            self._run_post_archive_scripts(wal_info, dst_file, e)
+            raise
+
+    def prepare_file(self, compressor, encryption, wal_info):
+        """
+        Compress and encrypt a WAL file ahead of its archival.
+
+        This is executed by the worker processes of :meth:`save_group`, so
+        every change is returned to the caller. The resulting file is also
+        synced to disk, as it is going to be renamed in place.
+
+        :param compressor: the compressor for the file (if any)
+        :param None|Encryption encryption: the encryptor for the file (if any)
+        :param WalFileInfo wal_info: the WAL file is being processed
+        :return tuple: the path of the resulting file, the compression,
+            compression dictionary, encryption and size of the WAL file and the
+            list of intermediary files to remove
+        """
+        src_file = wal_info.orig_filename
+        dst_dir = os.path.dirname(wal_info.fullpath(self.server))
+        current_file = self._transform_file(
+            compressor, encryption, src_file, dst_dir, wal_info
+        )
+        fsync_file(current_file)
+        files_to_remove = list(self.files_to_remove)
+        self.files_to_remove.clear()
+        return (
+            current_file,
+            wal_info.compression,
+            wal_info.compression_dictionary,
+            wal_info.encryption,
+            wal_info.size,
+            files_to_remove,
+        )
+
+    def save_group(self, wal_infos, pool):
+        """
+        Persist a group of WAL files which share the same destination directory.
+
+        Compression and encryption are performed by the workers of *pool*,
+        which run :meth:`prepare_file` on each file. The WAL files are then
+        moved in place in their original order, and the source and destination
+        directories are synced to disk once for the whole group.
+
+        If a WAL file fails, it and the WAL files that follow it are left
+        in place, so that only a contiguous sequence of WAL files is archived.
+        :meth:`prepare_save` must have been called on every WAL file before.
+
+        :param list[WalFileInfo] wal_infos: the WAL files, in archival order
+        :param multiprocessing.pool.Pool pool: the pool of worker processes,
+            initialised by :func:`_init_wal_archive_worker`
+        :return tuple[list[WalFileInfo],Exception|None]: the archived WAL files
+            and the error which stopped the archival, if any
+        """
+        dst_dir = os.path.dirname(wal_infos[0].fullpath(self.server))
+        mkpath(dst_dir)
+        results = pool.imap(_run_wal_archive_worker, wal_infos)
+        saved = []
+        error = None
+        for wal_info in wal_infos:
+            src_file = wal_info.orig_filename
+            try:
+                (
+                    current_file,
+                    compression,
+                    compression_dictionary,
+                    encryption,
+                    size,
+                    files_to_remove,
+                ) = next(results)
+            except Exception as e:
+                error = error or e
+                continue
+            if error is not None:
+                # Discard the result, keeping the source file for a later run
+                self._discard_prepared_file(src_file, current_file, files_to_remove)
+                continue
+            dst_file = wal_info.fullpath(self.server)
+            try:
+                if self._rename_or_copy_file(current_file, dst_file):
+                    fsync_file(dst_file)
+            except Exception as e:
+                error = e
+                self._discard_prepared_file(src_file, current_file, files_to_remove)
+                continue
+            wal_info.compression = compression
+            wal_info.compression_dictionary = compression_dictionary
+            wal_info.encryption = encryption
+            wal_info.size = size
+            self.files_to_remove.extend(files_to_remove)
+            saved.append(wal_info)
+        self._remove_intermediary_files()
+        if saved:
+            # Fsync the source directories to ensure the removal of the original
+            # files, and the target directory to ensure the presence of the new ones
+            for src_dir in sorted(
+                set(os.path.dirname(wal_info.orig_filename) for wal_info in saved)
+            ):
+                fsync_dir(src_dir)
+            fsync_dir(dst_dir)
+        # The archived WAL files are always the first ones of the group
+        for wal_info in saved:
+            # At this point the original file has been removed
+            wal_info.orig_filename = None
+            self._run_post_archive_scripts(
+                wal_info, wal_info.fullpath(self.server), None
+            )
+        for wal_info in wal_infos[len(saved) :]:
+            self._run_post_archive_scripts(
+                wal_info, wal_info.fullpath(self.server), error
+            )
+        return saved, error
+
+    @staticmethod
+    def _discard_prepared_file(src_file, current_file, files_to_remove):
+        """
+        Remove the files produced by :meth:`prepare_file` for a WAL file which
+        is not going to be archived.
+
+        :param str src_file: the source WAL file path, which is kept
+        :param str current_file: the path of the file produced for the WAL
+        :param list[str] files_to_remove: the intermediary files
+        """
+        for file in [current_file] + files_to_remove:
+            if file == src_file:
+                continue
+            try:
+                os.unlink(file)
+            except OSError as e:
+                _logger.warning("Could not remove intermediary file %s: %s", file, e)
+
     def save(self, compressor, encryption, wal_info, **kwargs):
         """
         Effectively persist a WAL file according to the configured destination.
@@ -422,24 +691,14 @@ class LocalWalStorageStrategy(WalStorageStrategy):
         dst_dir = os.path.dirname(dst_file)
         mkpath(dst_dir)
 
-        current_file = src_file
         error = None
         try:
-            self._run_pre_archive_scripts(wal_info, current_file)
-            self._check_duplicate(current_file, dst_file, wal_info)
-
-            if compressor and not wal_info.compression:
-                current_file = self._compress_file(
-                    compressor, current_file, dst_dir, wal_info
-                )
-            if encryption:
-                current_file = self._encrypt_file(
-                    encryption, current_file, dst_dir, wal_info
-                )
+            self._run_pre_archive_scripts(wal_info, src_file)
+            self._check_duplicate(src_file, dst_file, wal_info)
 
-            # Update stats, in case compression/encryption changed the current file
-            if src_file != current_file:
-                self._copy_stats(src_file, current_file, wal_info)
+            current_file = self._transform_file(
+                compressor, encryption, src_file, dst_dir, wal_info
+            )
 
             self._rename_or_copy_file(current_file, dst_file)
             self._remove_intermediary_files()
@@ -517,6 +776,28 @@ class LocalWalStorageStrategy(WalStorageStrategy):
     def exists(self, wal_full_path):
         return os.path.exists(wal_full_path)
 
+    def get_first_missing_wal(self, wal_names):
+        """
+        Return the first of *wal_names* which is not stored.
+
+        The WAL files are looked up in the xlogdb with a single pass,
+        starting from the first one thanks to the xlogdb index.
+
+        :param iterable[str] wal_names: the names of the WAL files, sorted
+        :return str|None: the first missing WAL file, ``None`` if all of
+            them are stored
+        """
+        missing = set(wal_names)
+        if not missing:
+            return None
+        with self.server.xlogdb() as fxlogdb:
+            xlogdb_index = XLogDBIndex(self.server.xlogdb_file_path)
+            for line in xlogdb_index.scan(fxlogdb, min(missing)):
+                missing.discard(line.split(None, 1)[0])
+                if not missing:
+                    return None
+        return min(missing)
+
     def get_full_path(self, wal_name):
         # Build the path which contains the file
         hash_dir = os.path.join(self.config.wals_directory, xlog.hash_dir(wal_name))
@@ -692,6 +973,46 @@ class CloudWalStorageStrategy(WalStorageStrategy):
     def exists(self, wal_full_path):
         return self.cloud_interface.check_object_existence(wal_full_path)
 
+    def get_first_missing_wal(self, wal_names):
+        """
+        Return the first of *wal_names* which is not stored.
+
+        Instead of checking every object, the content of each WAL directory
+        is listed once, whatever the compression of the WAL files.
+
+        :param iterable[str] wal_names: the names of the WAL files, sorted
+        :return str|None: the first missing WAL file, ``None`` if all of
+            them are stored
+        """
+        hash_dir = None
+        stored_wals = set()
+        for wal_name in wal_names:
+            if xlog.hash_dir(wal_name) != hash_dir:
+                hash_dir = xlog.hash_dir(wal_name)
+                stored_wals = self._list_wal_names(hash_dir)
+            if wal_name not in stored_wals:
+                return wal_name
+        return None
+
+    def _list_wal_names(self, hash_dir):
+        """
+        Return the names of the WAL files stored in a WAL directory.
+
+        :param str hash_dir: the name of the WAL directory
+        :return set[str]: the names of the WAL files, without the extension
+            added by the compression
+        """
+        prefix = os.path.join(self.cloud_interface.path, self.config.name, "wals")
+        wal_names = set()
+        for key in self.cloud_interface.list_bucket(
+            "%s/%s/" % (prefix, hash_dir), delimiter=""
+        ):
+            wal_name = os.path.basename(key)
+            if not xlog.is_any_xlog_file(wal_name):
+                wal_name = os.path.splitext(wal_name)[0]
+            wal_names.add(wal_name)
+        return wal_names
+
     def get_full_path(self, wal_name):
         """
         Construct the full cloud object key for a given WAL file name.
@@ -713,8 +1034,16 @@ class CloudWalStorageStrategy(WalStorageStrategy):
 class WalArchiver(with_metaclass(ABCMeta, RemoteStatusMixin)):
     """
     Base class for WAL archiver objects
+
+    :cvar DICTIONARY_MIN_SEGMENTS: Minimum number of WAL segments a zstd
+        dictionary is trained on
+    :cvar DICTIONARY_MAX_SEGMENTS: Maximum number of WAL segments a zstd
+        dictionary is trained on
     """
 
+    DICTIONARY_MIN_SEGMENTS = 4
+    DICTIONARY_MAX_SEGMENTS = 16
+
     def __init__(self, backup_manager, name):
         """
         Base class init method.
@@ -791,51 +1120,35 @@ class WalArchiver(with_metaclass(ABCMeta, RemoteStatusMixin)):
         if verbose:
             output.info(header, log=False)
 
-        # Loop through all available WAL files
-        for wal_info in batch:
-            # Print the header (non verbose mode)
-            if not processed and not verbose:
-                output.info(header, log=False)
+        self._train_compression_dictionary(compressor, batch)
 
-            processed += 1
-
-            # Report to the user the WAL file we are archiving
-            output.info("\t%s", wal_info.name, log=False)
-            _logger.info(
-                "Archiving segment %s of %s from %s: %s/%s",
-                processed,
-                batch.run_size,
-                self.name,
-                self.config.name,
-                wal_info.name,
+        jobs = self._get_parallel_jobs(batch)
+        if jobs > 1:
+            processed = self._archive_in_parallel(
+                batch, compressor, encryption, jobs, header, verbose
             )
-            # Archive the WAL file
-            try:
-                with self.server.xlogdb("a") as fxlogdb:
-                    self.wal_storage.save(compressor, encryption, wal_info)
-                    fxlogdb.write(wal_info.to_xlogdb_line())
-            except MatchingDuplicateWalFile:
-                # We already have this file. Simply unlink the file.
-                os.unlink(wal_info.orig_filename)
-                continue
-            except DuplicateWalFile:
-                self.server.move_wal_file_to_errors_directory(
-                    wal_info.orig_filename, wal_info.name, "duplicate"
-                )
-                output.info(
-                    "\tError: %s is already present in server %s. "
-                    "File moved to errors directory.",
-                    wal_info.name,
-                    self.config.name,
-                )
-                continue
-            except AbortedRetryHookScript as e:
-                _logger.warning(
-                    "Archiving of %s/%s aborted by "
-                    "pre_archive_retry_script."
-                    "Reason: %s" % (self.config.name, wal_info.name, e)
-                )
+            if processed is None:
                 return
+        else:
+            # Loop through all available WAL files
+            for wal_info in batch.wal_infos():
+                processed += 1
+                self._report_archiving(wal_info, processed, batch, header, verbose)
+                # Archive the WAL file
+                try:
+                    with self.server.xlogdb("a") as fxlogdb:
+                        self.wal_storage.save(compressor, encryption, wal_info)
+                        fxlogdb.write(wal_info.to_xlogdb_line())
+                except MatchingDuplicateWalFile:
+                    # We already have this file. Simply unlink the file.
+                    os.unlink(wal_info.orig_filename)
+                    continue
+                except DuplicateWalFile:
+                    self._move_duplicate_to_errors_directory(wal_info)
+                    continue
+                except AbortedRetryHookScript as e:
+                    self._log_aborted_archival(wal_info, e)
+                    return
 
         if processed:
             if batch.total_size > batch.run_size:
@@ -886,6 +1199,248 @@ class WalArchiver(with_metaclass(ABCMeta, RemoteStatusMixin)):
                     error, basename, "unknown"
                 )
 
+    def _train_compression_dictionary(self, compressor, batch):
+        """
+        Train the zstd dictionary of the server, if requested and still missing.
+
+        The dictionary is trained on the uncompressed WAL segments of *batch*
+        before they are archived. If there are not enough of them, the
+        training is attempted again during the next run.
+
+        :param compressor: the compressor for the files (if any)
+        :param WalArchiverQueue batch: the WAL files to archive
+        """
+        if not (
+            self.config.zstd_dictionary
+            and isinstance(compressor, ZSTDCompressor)
+            and isinstance(self.wal_storage, LocalWalStorageStrategy)
+            and compressor.dictionary_id is None
+        ):
+            return
+        wal_files = list(
+            itertools.islice(
+                (
+                    wal_info.orig_filename
+                    for wal_info in batch.wal_infos()
+                    if xlog.is_wal_file(wal_info.name)
+                    and wal_info.compression is None
+                    and wal_info.encryption is None
+                ),
+                self.DICTIONARY_MAX_SEGMENTS,
+            )
+        )
+        if len(wal_files) < self.DICTIONARY_MIN_SEGMENTS:
+            _logger.debug(
+                "Not enough WAL segments to train the zstd dictionary for %s",
+                self.config.name,
+            )
+            return
+        try:
+            dict_id = compressor.train_dictionary(wal_files)
+        except Exception as e:
+            output.warning(
+                "Unable to train the zstd dictionary for %s: %s",
+                self.config.name,
+                force_str(e),
+            )
+            return
+        output.info(
+            "Trained zstd dictionary %s for %s on %s WAL segments",
+            dict_id,
+            self.config.name,
+            len(wal_files),
+        )
+
+    def _get_parallel_jobs(self, batch):
+        """
+        Return the number of worker processes used to archive *batch*.
+
+        Parallel archiving is only available with local WAL storage.
+
+        :param WalArchiverQueue batch: the WAL files to archive
+        :return int: the number of worker processes, ``1`` to archive the WAL
+            files sequentially
+        """
+        if not isinstance(self.wal_storage, LocalWalStorageStrategy):
+            return 1
+        return min(self.config.archiver_parallel_jobs, batch.run_size) or 1
+
+    def _archive_in_parallel(
+        self, batch, compressor, encryption, jobs, header, verbose
+    ):
+        """
+        Archive the WAL files of *batch* using a pool of worker processes.
+
+        The WAL files are processed in groups sharing the same destination
+        directory. The pre-archive scripts and the duplicate checks are run
+        in order by this process, while compression and encryption run in
+        the worker processes. Each group is then moved in place and appended
+        to the xlogdb at once, preserving the order of the WAL files.
+
+        :param WalArchiverQueue batch: the WAL files to archive
+        :param compressor: the compressor for the files (if any)
+        :param None|Encryption encryption: the encryptor for the files (if any)
+        :param int jobs: the number of worker processes
+        :param str header: the header printed before the first WAL file
+        :param bool verbose: whether the header has already been printed
+        :return int|None: the number of processed WAL files, ``None`` if
+            the archival has been aborted by a pre-archive retry script
+        """
+        processed = 0
+        pool = multiprocessing.Pool(
+            processes=jobs,
+            initializer=_init_wal_archive_worker,
+            initargs=(self.wal_storage, compressor, encryption),
+        )
+        try:
+            for _, group in itertools.groupby(
+                batch.wal_infos(),
+                key=lambda wal_info: os.path.dirname(wal_info.fullpath(self.server)),
+            ):
+                wal_infos = []
+                aborted = False
+                for wal_info in group:
+                    processed += 1
+                    self._report_archiving(wal_info, processed, batch, header, verbose)
+                    try:
+                        self.wal_storage.prepare_save(wal_info)
+                    except MatchingDuplicateWalFile:
+                        # We already have this file. Simply unlink the file.
+                        os.unlink(wal_info.orig_filename)
+                        continue
+                    except DuplicateWalFile:
+                        self._move_duplicate_to_errors_directory(wal_info)
+                        continue
+                    except AbortedRetryHookScript as e:
+                        self._log_aborted_archival(wal_info, e)
+                        aborted = True
+                        break
+                    wal_infos.append(wal_info)
+                if wal_infos:
+                    with self.server.xlogdb("a") as fxlogdb:
+                        saved, error = self.wal_storage.save_group(wal_infos, pool)
+                        for wal_info in saved:
+                            fxlogdb.write(wal_info.to_xlogdb_line())
+                    if error is not None:
+                        raise error
+                if aborted:
+                    return None
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+        return processed
+
+    def _report_archiving(self, wal_info, processed, batch, header, verbose):
+        """
+        Report to the user the WAL file being archived.
+
+        :param WalFileInfo wal_info: the WAL file being archived
+        :param int processed: the position of the WAL file in the batch
+        :param WalArchiverQueue batch: the WAL files being archived
+        :param str header: the header printed before the first WAL file
+        :param bool verbose: whether the header has already been printed
+        """
+        # Print the header (non verbose mode)
+        if processed == 1 and not verbose:
+            output.info(header, log=False)
+
+        # Report to the user the WAL file we are archiving
+        output.info("\t%s", wal_info.name, log=False)
+        _logger.info(
+            "Archiving segment %s of %s from %s: %s/%s",
+            processed,
+            batch.run_size,
+            self.name,
+            self.config.name,
+            wal_info.name,
+        )
+
+    def _move_duplicate_to_errors_directory(self, wal_info):
+        """
+        Move a WAL file which is already archived with a different content
+        to the errors directory.
+
+        :param WalFileInfo wal_info: the duplicate WAL file
+        """
+        self.server.move_wal_file_to_errors_directory(
+            wal_info.orig_filename, wal_info.name, "duplicate"
+        )
+        output.info(
+            "\tError: %s is already present in server %s. "
+            "File moved to errors directory.",
+            wal_info.name,
+            self.config.name,
+        )
+
+    def _log_aborted_archival(self, wal_info, error):
+        """
+        Log the archival being aborted by the pre-archive retry script.
+
+        :param WalFileInfo wal_info: the WAL file being archived
+        :param AbortedRetryHookScript error: the abort request
+        """
+        _logger.warning(
+            "Archiving of %s/%s aborted by "
+            "pre_archive_retry_script."
+            "Reason: %s" % (self.config.name, wal_info.name, error)
+        )
+
+    @staticmethod
+    def _scan_directory(directory):
+        """
+        Return the entries of *directory*, sorted by name.
+
+        Hidden files are ignored. The entries carry the file type and cache
+        the stat data, so they can be classified and turned into WalFileInfo
+        objects without further system calls.
+
+        :param str directory: the directory to scan
+        :rtype: list[os.DirEntry]
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = [entry for entry in it if not entry.name.startswith(".")]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.name)
+        return entries
+
+    def _build_wal_info(self, entry, **kwargs):
+        """
+        Build the WalFileInfo of a directory entry returned by
+        :meth:`_scan_directory`.
+
+        The compression is not identified for files which are known to be raw
+        WAL segments, that is files with a WAL segment name and size.
+
+        :param os.DirEntry entry: the directory entry of the WAL file
+        :param kwargs: attributes of the WalFileInfo which are already known
+        :return WalFileInfo|None: the WalFileInfo, or ``None`` if the file
+            has been renamed or removed after scanning the directory
+        """
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            return None
+        compression_manager = self.backup_manager.compression_manager
+        if (
+            "compression" not in kwargs
+            and compression_manager.unidentified_compression is None
+            and xlog.is_wal_file(entry.name)
+            and xlog.is_xlog_segment_size(stat.st_size)
+        ):
+            kwargs["compression"] = None
+        return WalFileInfo.from_file(
+            filename=entry.path,
+            compression_manager=compression_manager,
+            encryption_manager=self.backup_manager.encryption_manager,
+            unidentified_compression=None,
+            size=stat.st_size,
+            time=stat.st_mtime,
+            **kwargs
+        )
+
     @abstractmethod
     def get_next_batch(self):
         """
@@ -985,48 +1540,50 @@ class FileWalArchiver(WalArchiver):
         # IMPORTANT: the list is sorted, and this allows us to know that the
         # WAL stream we have is monotonically increasing. That allows us to
         # verify that a backup has all the WALs required for the restore.
-        file_names = glob(os.path.join(self.config.incoming_wals_directory, "*"))
-        file_names.sort()
-        total_size = len(file_names)
+        entries = self._scan_directory(self.config.incoming_wals_directory)
+        total_size = len(entries)
         # If batch size is set, limit the number of files to the batch size. The idea
         # is to avoid the overhead of creating several unused WalFileInfo objects. See
         # the note in the WalArchiverQueue class.
         if batch_size > 0:
-            file_names = file_names[:batch_size]
+            entries = entries[:batch_size]
 
         # Process anything that looks like a valid WAL file. Anything
         # else is treated like an error/anomaly
         files = []
         errors = []
-        for file_name in file_names:
+        for entry in entries:
             # Ignore temporary files
-            if file_name.endswith(".tmp"):
+            if entry.name.endswith(".tmp"):
                 continue
-            if xlog.is_any_xlog_file(file_name) and os.path.isfile(file_name):
-                files.append(file_name)
+            if xlog.is_any_xlog_file(entry.name) and entry.is_file():
+                files.append(entry)
             else:
-                errors.append(file_name)
-
-        # Build the list of WalFileInfo
-        wal_files = [
-            WalFileInfo.from_file(
-                filename=f,
-                compression_manager=self.backup_manager.compression_manager,
-                unidentified_compression=None,
-                encryption_manager=self.backup_manager.encryption_manager,
-                # We don't try to guess if the WAL is encrypted here. If the user sets
-                # an archive_command which encrypts the WAL file, it's up to the user to
-                # decrypt them later, and Barman won't do anything about it. We still
-                # attempt to guess compression, though, because that's been the behavior
-                # of Barman for a long time.
-                encryption=None,
-            )
-            for f in files
-        ]
+                errors.append(entry.path)
+
+        # The WalFileInfo objects are built while archiving
         return WalArchiverQueue(
-            wal_files, batch_size=batch_size, errors=errors, total_size=total_size
+            files,
+            batch_size=batch_size,
+            errors=errors,
+            total_size=total_size,
+            build_wal_info=self._build_incoming_wal_info,
         )
 
+    def _build_incoming_wal_info(self, entry):
+        """
+        Build the WalFileInfo of a file in the incoming directory.
+
+        :param os.DirEntry entry: the directory entry of the WAL file
+        :rtype: WalFileInfo|None
+        """
+        # We don't try to guess if the WAL is encrypted here. If the user sets
+        # an archive_command which encrypts the WAL file, it's up to the user to
+        # decrypt them later, and Barman won't do anything about it. We still
+        # attempt to guess compression, though, because that's been the behavior
+        # of Barman for a long time.
+        return self._build_wal_info(entry, encryption=None)
+
     def check(self, check_strategy):
         """
         Perform additional checks for FileWalArchiver - invoked
@@ -1428,14 +1985,13 @@ class StreamingWalArchiver(WalArchiver):
         # IMPORTANT: the list is sorted, and this allows us to know that the
         # WAL stream we have is monotonically increasing. That allows us to
         # verify that a backup has all the WALs required for the restore.
-        file_names = glob(os.path.join(self.config.streaming_wals_directory, "*"))
-        file_names.sort()
-        total_size = len(file_names)
+        entries = self._scan_directory(self.config.streaming_wals_directory)
+        total_size = len(entries)
         # If batch size is set, limit the number of files to the batch size. The idea
         # is to avoid the overhead of creating several unused WalFileInfo objects. See
         # the note in the WalArchiverQueue class.
         if batch_size > 0:
-            file_names = file_names[:batch_size]
+            entries = entries[:batch_size]
 
         # Process anything that looks like a valid WAL file,
         # including partial ones and history files.
@@ -1443,29 +1999,28 @@ class StreamingWalArchiver(WalArchiver):
         files = []
         skip = []
         errors = []
-        for file_name in file_names:
+        for entry in entries:
             # Ignore temporary files
-            if file_name.endswith(".tmp"):
-                continue
-            # If the file doesn't exist, it has been renamed/removed while
-            # we were reading the directory. Ignore it.
-            if not os.path.exists(file_name):
+            if entry.name.endswith(".tmp"):
                 continue
-            if not os.path.isfile(file_name):
-                errors.append(file_name)
-            elif xlog.is_partial_file(file_name):
-                skip.append(file_name)
-            elif xlog.is_any_xlog_file(file_name):
-                files.append(file_name)
+            if not entry.is_file():
+                # If the file doesn't exist, it has been renamed/removed while
+                # we were reading the directory. Ignore it.
+                if os.path.lexists(entry.path):
+                    errors.append(entry.path)
+            elif xlog.is_partial_file(entry.name):
+                skip.append(entry)
+            elif xlog.is_any_xlog_file(entry.name):
+                files.append(entry)
             else:
-                errors.append(file_name)
+                errors.append(entry.path)
         # In case of more than a partial file, keep the last
         # and treat the rest as normal files
         if len(skip) > 1:
             partials = skip[:-1]
             _logger.info(
                 "Archiving partial files for server %s: %s"
-                % (self.config.name, ", ".join([os.path.basename(f) for f in partials]))
+                % (self.config.name, ", ".join([entry.name for entry in partials]))
             )
             files.extend(partials)
             skip = skip[-1:]
@@ -1474,29 +2029,28 @@ class StreamingWalArchiver(WalArchiver):
         elif len(skip) == 0 and files:
             skip.append(files.pop())
 
-        # Build the list of WalFileInfo
-        wal_files = [
-            WalFileInfo.from_file(
-                filename=f,
-                compression_manager=self.backup_manager.compression_manager,
-                encryption_manager=self.backup_manager.encryption_manager,
-                unidentified_compression=None,
-                # WAL files received through pg_receivewal are surely not encrypted nor
-                # compressed, so we avoid the overhead of trying to guess such
-                # algorithms.
-                compression=None,
-                encryption=None,
-            )
-            for f in files
-        ]
+        # The WalFileInfo objects are built while archiving
         return WalArchiverQueue(
-            wal_files,
+            files,
             batch_size=batch_size,
             errors=errors,
-            skip=skip,
+            skip=[entry.path for entry in skip],
             total_size=total_size,
+            build_wal_info=self._build_streaming_wal_info,
         )
 
+    def _build_streaming_wal_info(self, entry):
+        """
+        Build the WalFileInfo of a file in the streaming directory.
+
+        :param os.DirEntry entry: the directory entry of the WAL file
+        :rtype: WalFileInfo|None
+        """
+        # WAL files received through pg_receivewal are surely not encrypted nor
+        # compressed, so we avoid the overhead of trying to guess such
+        # algorithms.
+        return self._build_wal_info(entry, compression=None, encryption=None)
+
     def check(self, check_strategy):
         """
         Perform additional checks for StreamingWalArchiver - invoked
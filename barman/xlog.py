@@ -71,6 +71,10 @@ _location_re = re.compile(r"^([\dA-F]+)/([\dA-F]+)$")
 #: XLOG_BLCKSZ).
 DEFAULT_XLOG_SEG_SIZE = 1 << 24
 
+#: Boundaries of the WAL segment size, which must also be a power of 2.
+MIN_XLOG_SEG_SIZE = 1 << 20
+MAX_XLOG_SEG_SIZE = 1 << 30
+
 #: This namedtuple is a container for the information
 #: contained inside history files
 HistoryFileData = collections.namedtuple(
@@ -207,6 +211,20 @@ def encode_history_file_name(tli):
     return "%08X.history" % (tli,)
 
 
+def is_xlog_segment_size(size):
+    """
+    Return True if *size* is a valid WAL segment size, False otherwise.
+
+    A WAL segment size is a power of 2 between 1MB and 1GB. A file with a
+    WAL segment name and such a size is a raw WAL segment, as compressed or
+    encrypted segments never have exactly that size in practice.
+
+    :param int size: the size in bytes
+    :rtype: bool
+    """
+    return MIN_XLOG_SEG_SIZE <= size <= MAX_XLOG_SEG_SIZE and (size & (size - 1)) == 0
+
+
 def xlog_segments_per_file(xlog_segment_size):
     """
     Given that WAL files are named using the following pattern:
@@ -0,0 +1,469 @@
+# -*- coding: utf-8 -*-
+# © Copyright EnterpriseDB UK Limited 2011-2025
+#
+# This file is part of Barman.
+#
+# Barman is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Barman is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Barman.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+This module contains the helpers used to manage the xlogdb (the WAL
+catalogue of a server): its sidecar index and its logical start offset.
+"""
+
+import json
+import logging
+import os
+import shutil
+from bisect import bisect_left
+
+from barman import xlog
+from barman.utils import fsync_dir
+
+_logger = logging.getLogger(__name__)
+
+#: Suffix of the file holding the logical start offset, appended to the
+#: xlogdb path
+START_SUFFIX = ".start"
+
+
+def get_xlogdb_start(xlogdb_path):
+    """
+    Get the logical start offset of an xlogdb.
+
+    Retention removes the oldest entries of the xlogdb by moving its
+    logical start forward instead of rewriting the whole file: every line
+    before this offset is dead and must be ignored by readers.
+
+    If the start file also holds the lines which must be found at the
+    logical start, the move was interrupted while writing them (see
+    :func:`move_xlogdb_start`): they are written again before returning.
+    This must be done while holding the
+    :class:`barman.lockfile.ServerXLOGDBLock` of the server.
+
+    :param str xlogdb_path: the path of the xlogdb file
+    :return int: the offset of the first live line of the xlogdb
+    """
+    try:
+        with open(xlogdb_path + START_SUFFIX, "r") as start_file:
+            start = int(start_file.readline().strip())
+            lines = start_file.read()
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        _logger.warning(
+            "Ignoring invalid xlogdb start file %s: %s", xlogdb_path + START_SUFFIX, e
+        )
+        return 0
+    # A start offset beyond the end of the file cannot be valid
+    try:
+        if start + len(lines) > os.path.getsize(xlogdb_path):
+            return 0
+    except OSError:
+        return 0
+    if lines:
+        _write_xlogdb_lines(xlogdb_path, start, lines)
+        set_xlogdb_start(xlogdb_path, start)
+    return start
+
+
+def set_xlogdb_start(xlogdb_path, offset, lines=None):
+    """
+    Durably record the logical start offset of an xlogdb.
+
+    :param str xlogdb_path: the path of the xlogdb file
+    :param int offset: the offset of the first live line of the xlogdb.
+        ``0`` removes the start file
+    :param list[str]|None lines: the lines which are being written at
+        *offset*, recorded so that an interrupted write can be completed
+    """
+    start_path = xlogdb_path + START_SUFFIX
+    if not offset:
+        try:
+            os.unlink(start_path)
+        except FileNotFoundError:
+            pass
+        return
+    tmp_path = start_path + ".tmp"
+    with open(tmp_path, "w") as start_file:
+        start_file.write("%d\n" % offset)
+        start_file.writelines(lines or [])
+        start_file.flush()
+        os.fsync(start_file.fileno())
+    os.rename(tmp_path, start_path)
+    fsync_dir(os.path.dirname(os.path.abspath(start_path)))
+
+
+def _write_xlogdb_lines(xlogdb_path, offset, lines):
+    """
+    Durably write *lines* in the xlogdb at *offset*, unless already there.
+
+    :param str xlogdb_path: the path of the xlogdb file
+    :param int offset: the offset where the lines must be written
+    :param str lines: the lines to write
+    """
+    data = lines.encode()
+    with open(xlogdb_path, "r+b") as fxlogdb_bin:
+        fxlogdb_bin.seek(offset)
+        if fxlogdb_bin.read(len(data)) == data:
+            return
+        fxlogdb_bin.seek(offset)
+        fxlogdb_bin.write(data)
+        fxlogdb_bin.flush()
+        os.fsync(fxlogdb_bin.fileno())
+
+
+def move_xlogdb_start(xlogdb_path, cut, kept_lines):
+    """
+    Move the logical start of an xlogdb forward, removing the lines before
+    *cut* except for *kept_lines*.
+
+    The kept lines are written right before *cut*, over the removed ones,
+    and the logical start is moved to the first of them. The lines are
+    recorded in the start file before being written, so that
+    :func:`get_xlogdb_start` completes the write if it is interrupted,
+    and only then removed from it.
+
+    :param str xlogdb_path: the path of the xlogdb file
+    :param int cut: the offset of the first line after the removed portion
+    :param list[str] kept_lines: the lines of the removed portion which
+        must be preserved, in order
+    :return int: the new logical start offset of the xlogdb
+    """
+    start = cut - sum(len(line) for line in kept_lines)
+    if kept_lines:
+        set_xlogdb_start(xlogdb_path, start, kept_lines)
+        _write_xlogdb_lines(xlogdb_path, start, "".join(kept_lines))
+    set_xlogdb_start(xlogdb_path, start)
+    return start
+
+
+def replace_xlogdb_content(fxlogdb, fsrc):
+    """
+    Replace the whole content of an xlogdb with the content of another file.
+
+    The logical start offset is reset and the index is invalidated.
+
+    :param fxlogdb: the xlogdb file object, opened in ``r+`` mode
+    :param fsrc: the file object containing the new content of the xlogdb
+    """
+    fsrc.flush()
+    fsrc.seek(0)
+    fxlogdb.seek(0)
+    shutil.copyfileobj(fsrc, fxlogdb)
+    fxlogdb.truncate()
+    fxlogdb.flush()
+    os.fsync(fxlogdb.fileno())
+    set_xlogdb_start(fxlogdb.name, 0)
+    XLogDBIndex(fxlogdb.name).invalidate()
+
+
+class XLogDBIndex(object):
+    """
+    Sparse index of a server's xlogdb file.
+
+    The xlogdb stays a plain text file with one line per archived file. The
+    index lives in a ``.idx`` file next to it and records, every *stride*
+    lines after the logical start of the xlogdb, the name of the WAL and the
+    byte offset of its line. The lines
+    describing ``.history`` files, which consumers usually need regardless of
+    their position, are stored in full.
+
+    Range queries use the index to seek straight to the first line that can
+    possibly match, instead of parsing the whole catalogue. The index is
+    derived data: it is validated against the size of the xlogdb and the
+    content of its last indexed line, extended when new lines have been
+    appended and rebuilt from scratch in any other case. It is only used when
+    the WAL names in the xlogdb are sorted, otherwise readers transparently
+    fall back to a full scan.
+
+    All the methods of this class must be called while holding the
+    :class:`barman.lockfile.ServerXLOGDBLock` of the server.
+    """
+
+    #: Suffix of the index file, appended to the xlogdb path
+    INDEX_SUFFIX = ".idx"
+
+    #: Version of the on-disk index format
+    INDEX_VERSION = 1
+
+    #: Number of xlogdb lines between two index entries
+    DEFAULT_STRIDE = 1024
+
+    def __init__(self, xlogdb_path, stride=DEFAULT_STRIDE):
+        """
+        Constructor
+
+        :param str xlogdb_path: the path of the xlogdb file
+        :param int stride: number of xlogdb lines between two index entries
+        """
+        self.xlogdb_path = xlogdb_path
+        self.stride = stride
+        self.data = None
+        # Offset in the xlogdb right after the last line returned by scan()
+        self.position = 0
+        # Whether the last call to scan() used the index
+        self._seeked = False
+
+    @property
+    def path(self):
+        """
+        The path of the index file
+        """
+        return self.xlogdb_path + self.INDEX_SUFFIX
+
+    def invalidate(self):
+        """
+        Remove the index file, forcing a rebuild on the next access.
+        """
+        self.data = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _new_index(self, start):
+        """
+        Build an empty index structure.
+
+        :param int start: the logical start offset of the xlogdb
+        :rtype: dict
+        """
+        return {
+            "version": self.INDEX_VERSION,
+            "stride": self.stride,
+            "start": start,
+            "size": start,
+            "sorted": True,
+            "last_name": None,
+            "tail": None,
+            "pending": 0,
+            "checkpoints": [],
+            "history": [],
+        }
+
+    def _load(self):
+        """
+        Read the index file from disk.
+
+        :return dict|None: the index content, or ``None`` if it is
+            missing, unreadable or written with a different format
+        """
+        try:
+            with open(self.path, "r") as index_file:
+                data = json.load(index_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            _logger.warning("Ignoring invalid xlogdb index %s: %s", self.path, e)
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != self.INDEX_VERSION
+            or data.get("stride") != self.stride
+        ):
+            return None
+        return data
+
+    def _save(self, data):
+        """
+        Atomically replace the index file with the given content.
+
+        :param dict data: the index content
+        """
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as index_file:
+                json.dump(data, index_file, separators=(",", ":"))
+            os.rename(tmp_path, self.path)
+        except OSError as e:
+            # The index is only an optimisation, don't fail the caller
+            _logger.warning("Unable to write xlogdb index %s: %s", self.path, e)
+
+    def _is_prefix_valid(self, data, fxlogdb_bin, start, size):
+        """
+        Check that the portion of the xlogdb described by *data* is unchanged.
+
+        :param dict data: the index content
+        :param fxlogdb_bin: the xlogdb opened in binary mode
+        :param int start: the current logical start offset of the xlogdb
+        :param int size: the current size of the xlogdb
+        :rtype: bool
+        """
+        if data.get("start") != start or data["size"] > size:
+            return False
+        if data["tail"] is None:
+            return data["size"] == start
+        tail_offset, tail_line = data["tail"]
+        tail_line = tail_line.encode()
+        fxlogdb_bin.seek(tail_offset)
+        return fxlogdb_bin.read(len(tail_line)) == tail_line
+
+    def _extend(self, data, fxlogdb_bin):
+        """
+        Add to the index the lines following the indexed portion of the xlogdb.
+
+        :param dict data: the index content, updated in place
+        :param fxlogdb_bin: the xlogdb opened in binary mode
+        """
+        offset = data["size"]
+        fxlogdb_bin.seek(offset)
+        for line in fxlogdb_bin:
+            line_offset = offset
+            offset += len(line)
+            if not line.endswith(b"\n"):
+                # Incomplete last line, leave it out of the index
+                offset = line_offset
+                break
+            parts = line.split(None, 1)
+            if not parts:
+                continue
+            name = parts[0].decode()
+            data["tail"] = [line_offset, line.decode()]
+            if xlog.is_history_file(name):
+                data["history"].append([line_offset, line.decode()])
+                continue
+            if data["last_name"] is not None and name < data["last_name"]:
+                data["sorted"] = False
+            data["last_name"] = name
+            if data["pending"] == 0:
+                data["checkpoints"].append([name, line_offset])
+            data["pending"] = (data["pending"] + 1) % self.stride
+        data["size"] = offset
+
+    def refresh(self):
+        """
+        Make sure the index reflects the current content of the xlogdb.
+
+        :return bool: ``True`` if the index can be used to seek in the xlogdb
+        """
+        try:
+            with open(self.xlogdb_path, "rb") as fxlogdb_bin:
+                size = os.fstat(fxlogdb_bin.fileno()).st_size
+                start = get_xlogdb_start(self.xlogdb_path)
+                data = self._load()
+                if data is None or not self._is_prefix_valid(
+                    data, fxlogdb_bin, start, size
+                ):
+                    data = self._new_index(start)
+                changed = data["size"] != size
+                if changed:
+                    self._extend(data, fxlogdb_bin)
+        except OSError as e:
+            _logger.warning("Unable to index xlogdb %s: %s", self.xlogdb_path, e)
+            self.data = None
+            return False
+        if changed:
+            self._save(data)
+        self.data = data
+        return data["sorted"]
+
+    def _seek_offset(self, wal_name):
+        """
+        Get the offset of the last indexed line preceding *wal_name*.
+
+        All the non-history lines before the returned offset are
+        guaranteed to refer to WALs older than *wal_name*.
+
+        :param str wal_name: the name of a WAL
+        :rtype: int
+        """
+        checkpoints = self.data["checkpoints"]
+        pos = bisect_left([name for name, _ in checkpoints], wal_name)
+        if pos == 0:
+            return self.data["start"]
+        return checkpoints[pos - 1][1]
+
+    def trim(self, cut, cut_name, kept_lines=()):
+        """
+        Update the index after the lines of the xlogdb before *cut* have
+        been removed by :func:`move_xlogdb_start`.
+
+        Everything from *cut* onwards is unchanged, so only the trimmed
+        portion of the index is updated.
+
+        :param int cut: the offset of the first line after the removed
+            portion
+        :param str cut_name: the name of the WAL at *cut*
+        :param list[str] kept_lines: the lines of the removed portion which
+            have been preserved right before *cut*
+        """
+        data = self.data
+        offset = cut - sum(len(line) for line in kept_lines)
+        data["start"] = offset
+        history = []
+        checkpoints = []
+        for line in kept_lines:
+            name = line.split(None, 1)[0]
+            if xlog.is_history_file(name):
+                history.append([offset, line])
+            elif not checkpoints:
+                checkpoints.append([name, offset])
+            offset += len(line)
+        checkpoints.append([cut_name, cut])
+        checkpoints.extend(cp for cp in data["checkpoints"] if cp[1] > cut)
+        data["checkpoints"] = checkpoints
+        history.extend(h for h in data["history"] if h[0] >= cut)
+        data["history"] = history
+        self._save(data)
+
+    def scan(self, fxlogdb, start_name=None):
+        """
+        Iterate over the lines of the xlogdb starting near *start_name*.
+
+        The history lines located before the seek point are yielded first,
+        so the caller sees every ``.history`` file and every line that is
+        not older than *start_name*, in the same order as a full scan.
+        If the index cannot be used, the whole file is returned.
+
+        :param fxlogdb: the xlogdb file object, as returned by
+            :meth:`barman.server.Server.xlogdb`
+        :param str|None start_name: the first WAL the caller is
+            interested in. If ``None`` the whole file is returned
+        :return: a generator of xlogdb lines
+        """
+        self.position = 0
+        self._seeked = False
+        if (
+            start_name
+            and getattr(fxlogdb, "name", None) == self.xlogdb_path
+            and self.refresh()
+        ):
+            self.position = self._seek_offset(start_name)
+            self._seeked = True
+            for offset, line in self.data["history"]:
+                if offset >= self.position:
+                    break
+                yield line
+            fxlogdb.seek(self.position)
+        for line in fxlogdb:
+            self.position += len(line)
+            yield line
+
+    def remaining_history(self, fxlogdb):
+        """
+        Iterate over the history lines following the last line returned by
+        :meth:`scan`, without reading the rest of the xlogdb when possible.
+
+        :param fxlogdb: the xlogdb file object passed to :meth:`scan`
+        :return: a generator of xlogdb lines
+        """
+        if self._seeked:
+            for offset, line in self.data["history"]:
+                if offset >= self.position:
+                    yield line
+            return
+        for line in fxlogdb:
+            parts = line.split(None, 1)
+            if parts and xlog.is_history_file(parts[0]):
+                yield line
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# © Copyright EnterpriseDB UK Limited 2011-2025
+#
+# This file is part of Barman.
+#
+# Barman is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Barman is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Barman.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from barman.compression import ZSTDCompressor, get_server_config_minimal
+
+
+def get_parser():
+    description = """Compare the zstd compression of WAL segments with and
+without a dictionary trained on them, as done by Barman when the
+``zstd_dictionary`` option is enabled.
+
+The dictionary is trained on the first TRAIN_FILES segments, then every
+segment is compressed and decompressed with both compressors, reporting
+the compression ratio and throughput of each one.
+    """
+    parser = argparse.ArgumentParser(
+        description=description, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "wal_files",
+        nargs="+",
+        metavar="WAL_FILE",
+        help="uncompressed WAL segments to compress",
+    )
+    parser.add_argument(
+        "--level",
+        default="medium",
+        help="compression level, as in the compression_level option "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--train-files",
+        type=int,
+        default=16,
+        help="number of WAL segments the dictionary is trained on "
+        "(default: %(default)s)",
+    )
+    return parser
+
+
+def build_compressor(level, directory, zstd_dictionary):
+    """
+    Build a zstd compressor storing its dictionaries in *directory*.
+
+    :param str|int level: the compression level
+    :param str directory: the directory containing the dictionaries
+    :param bool zstd_dictionary: whether a dictionary is used
+    :rtype: ZSTDCompressor
+    """
+    config = get_server_config_minimal("zstd", level)
+    config.name = "benchmark"
+    config.xlogdb_directory = directory
+    config.zstd_dictionary = zstd_dictionary
+    return ZSTDCompressor(config, "zstd")
+
+
+def benchmark(compressor, segments):
+    """
+    Compress and decompress *segments*, checking the result.
+
+    :param ZSTDCompressor compressor: the compressor to use
+    :param list[bytes] segments: the content of the WAL segments
+    :return tuple[int,float,float]: the total compressed size and the time
+        spent compressing and decompressing
+    """
+    compressed_size = 0
+    compress_time = decompress_time = 0.0
+    for segment in segments:
+        start = time.perf_counter()
+        compressed = compressor.compress_buffer(segment)
+        compress_time += time.perf_counter() - start
+        compressed_size += len(compressed)
+        start = time.perf_counter()
+        decompressed = compressor.decompress_in_mem(BytesIO(compressed)).read()
+        decompress_time += time.perf_counter() - start
+        if decompressed != segment:
+            raise SystemExit("Decompressed content does not match the original")
+    return compressed_size, compress_time, decompress_time
+
+
+def main(args=None):
+    config = get_parser().parse_args(args)
+    if config.level.lstrip("-").isdigit():
+        config.level = int(config.level)
+    segments = []
+    for name in config.wal_files:
+        with open(name, "rb") as wal_file:
+            segments.append(wal_file.read())
+    total_size = sum(len(segment) for segment in segments)
+    if not total_size:
+        raise SystemExit("The WAL segments are empty")
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain = build_compressor(config.level, directory, False)
+        with_dictionary = build_compressor(config.level, directory, True)
+        start = time.perf_counter()
+        dict_id = with_dictionary.train_dictionary(
+            config.wal_files[: config.train_files]
+        )
+        train_time = time.perf_counter() - start
+        print(
+            "Trained dictionary %s on %s segments in %.2fs"
+            % (dict_id, min(config.train_files, len(segments)), train_time)
+        )
+        print(
+            "%-12s %10s %16s %18s"
+            % ("compressor", "ratio", "compress MB/s", "decompress MB/s")
+        )
+        for label, compressor in (
+            ("plain", plain),
+            ("dictionary", with_dictionary),
+        ):
+            compressed_size, compress_time, decompress_time = benchmark(
+                compressor, segments
+            )
+            print(
+                "%-12s %10.2f %16.1f %18.1f"
+                % (
+                    label,
+                    float(total_size) / compressed_size,
+                    total_size / compress_time / 2**20,
+                    total_size / decompress_time / 2**20,
+                )
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -902,9 +902,98 @@ class TestBackup(object):
         # Should not check for cloud backups in this test
         mock_load_backups_from_cloud.assert_not_called()
 
+    @patch("barman.backup.BackupManager.BACKUP_CATALOGUE_CACHE_RACY_NS", 0)
+    def test_load_backup_cache_uses_catalogue_cache(self, tmpdir):
+        """
+        Check that unchanged backup.info files are loaded from the backup
+        catalogue cache without being parsed again
+        """
+        # GIVEN a server with two backups
+        backup_manager = build_backup_manager(
+            name="TestServer", global_conf={"barman_home": tmpdir.strpath}
+        )
+        os.makedirs(backup_manager.config.backup_directory)
+        b_info_1 = build_test_backup_info(
+            backup_id="20240101T000000", server=backup_manager.server
+        )
+        b_info_1.save()
+        b_info_2 = build_test_backup_info(
+            backup_id="20240102T000000", server=backup_manager.server
+        )
+        b_info_2.save()
+
+        # WHEN the backup cache is loaded for the first time
+        backup_manager._load_backup_cache()
+
+        # THEN the backup catalogue cache is written as JSON
+        with open(backup_manager.backup_catalogue_cache_path) as cache_file:
+            assert json.load(cache_file)["data"]["files"]
+
+        # AND the next load does not parse any backup.info file
+        with patch("barman.infofile.FieldListFile.load") as mock_load:
+            backup_manager._load_backup_cache()
+        mock_load.assert_not_called()
+        backups = backup_manager._backup_cache
+        assert sorted(backups) == ["20240101T000000", "20240102T000000"]
+        for b_info in (b_info_1, b_info_2):
+            assert backups[b_info.backup_id].to_dict() == b_info.to_dict()
+            assert backups[b_info.backup_id].filename == b_info.filename
+
+        # WHEN a backup is modified and another one is added
+        b_info_1.status = BackupInfo.FAILED
+        b_info_1.save()
+        b_info_3 = build_test_backup_info(
+            backup_id="20240103T000000", server=backup_manager.server
+        )
+        b_info_3.save()
+        backup_manager._load_backup_cache()
+
+        # THEN the changes are picked up
+        backups = backup_manager._backup_cache
+        assert sorted(backups) == [
+            "20240101T000000",
+            "20240102T000000",
+            "20240103T000000",
+        ]
+        assert backups["20240101T000000"].status == BackupInfo.FAILED
+
+        # WHEN a backup.info file is removed
+        os.unlink(b_info_2.filename)
+        backup_manager._load_backup_cache()
+
+        # THEN the backup is no longer in the cache
+        assert sorted(backup_manager._backup_cache) == [
+            "20240101T000000",
+            "20240103T000000",
+        ]
+
+    def test_load_backup_cache_ignores_invalid_catalogue_cache(self, tmpdir):
+        """
+        Check that an unreadable backup catalogue cache is ignored
+        """
+        # GIVEN a server with a backup and a corrupted backup catalogue cache
+        backup_manager = build_backup_manager(
+            name="TestServer", global_conf={"barman_home": tmpdir.strpath}
+        )
+        os.makedirs(backup_manager.config.backup_directory)
+        b_info = build_test_backup_info(
+            backup_id="20240101T000000", server=backup_manager.server
+        )
+        b_info.save()
+        with open(backup_manager.backup_catalogue_cache_path, "wb") as cache_file:
+            cache_file.write(b"garbage")
+
+        # WHEN the backup cache is loaded
+        backup_manager._load_backup_cache()
+
+        # THEN the backup is read from its backup.info file
+        assert (
+            backup_manager._backup_cache[b_info.backup_id].to_dict() == b_info.to_dict()
+        )
+
     @patch("barman.backup.BackupManager._load_backups_from_cloud")
     def test_load_backup_cache_loads_from_cloud_when_server_is_disabled(
-        self, mock_load_backups_from_cloud
+        self, mock_load_backups_from_cloud, tmpdir
     ):
         """
         Test that when loading the backup cache, if the server is inactive and has
@@ -913,6 +1002,8 @@ class TestBackup(object):
         # GIVEN a BackupManager with a server with cloud storage and inactive
         server = mock.Mock(use_backup_cloud_storage=True)
         server.config.active = False
+        server.config.backup_directory = tmpdir.strpath
+        server.meta_directory = tmpdir.join("meta").strpath
         backup_manager = build_backup_manager(server)
 
         # WHEN _load_backup_cache is called
@@ -960,6 +1051,7 @@ class TestBackup(object):
         mock_cloud_catalog_cls.assert_called_once_with(
             cloud_interface=mock_cloud_interface,
             server_name=backup_manager.config.name,
+            cache_dir=backup_manager.config.backup_directory,
         )
 
         # AND a CloudLocalBackupInfo is created for each backup returned by CloudBackupCatalog
@@ -3690,6 +3782,64 @@ class TestExportBackup(object):
             assert "backup.info" in members
             assert "barman.json" in members
 
+    def test_export_backup_zstd_dictionaries(self, tmpdir):
+        """
+        Test that the zstd dictionaries used by the exported WAL files, and
+        only those, are added to the tarball.
+        """
+        # GIVEN a backup manager with a valid backup
+        backup_manager = build_backup_manager(
+            name="TestServer", global_conf={"barman_home": tmpdir.strpath}
+        )
+        backup_info = build_test_backup_info(
+            backup_id="20240101T120000",
+            server=backup_manager.server,
+        )
+        build_backup_directories(backup_info)
+        backup_info.save()
+
+        # AND WAL files compressed with zstd dictionary 42
+        wals_dir = tmpdir.mkdir("wals")
+        hash_dir = wals_dir.mkdir("0000000100000000")
+        wal_files = [
+            "000000010000000000000001",
+            "000000010000000000000002",
+        ]
+        xlog_db_content = ""
+        for wal in wal_files:
+            hash_dir.join(wal).write_binary(os.urandom(16))
+            xlog_db_content += f"{wal}\t16\t1712994000.0\tzstd\tNone\t42\n"
+        wals_dir.join("xlog.db").write(xlog_db_content)
+        # AND the server has that dictionary and another one
+        wals_dir.join("TestServer-zstd-42.dict").write_binary(b"dict42")
+        wals_dir.join("TestServer-zstd-43.dict").write_binary(b"dict43")
+
+        backup_manager.server.config.wals_directory = wals_dir.strpath
+        backup_manager.server.config.xlogdb_directory = wals_dir.strpath
+        backup_manager.server.xlogdb = Mock(
+            side_effect=lambda mode: open(wals_dir.join("xlog.db").strpath, mode)
+        )
+        output_filepath = os.path.join(tmpdir.strpath, "export.tar")
+
+        # WHEN export_backup is called
+        with patch.object(
+            type(backup_info),
+            "get_required_wal_segments",
+            return_value=iter(wal_files),
+        ):
+            backup_manager.export_backup(
+                backup_info, output_filepath, {"systemid": "1234567890"}, {}
+            )
+
+        # THEN only the dictionary used by the WAL files is exported, without
+        # the name of the server
+        with tarfile.open(output_filepath, "r") as tar:
+            members = tar.getnames()
+            assert [name for name in members if name.endswith(".dict")] == [
+                "zstd_dictionaries/42.dict"
+            ]
+            assert tar.extractfile("zstd_dictionaries/42.dict").read() == b"dict42"
+
     def test_export_backup_metadata_first_ordering(self, tmpdir):
         """
         Test that metadata entries are written at the expected positions
@@ -5887,6 +6037,84 @@ class TestImportBackup(object):
         assert server_idempotent_path.read_binary() == idempotent_content
         assert not os.path.exists(server_new_path)
 
+    def test_import_backup_wals_installs_zstd_dictionaries(self, import_env):
+        """
+        Test that _import_backup_wals installs the zstd dictionaries of the
+        tarball under the name of the target server, and that the rollback
+        removes them.
+        """
+        # GIVEN a staging dir with a WAL compressed with zstd dictionary 42
+        tmpdir = import_env["tmpdir"]
+        backup_manager = import_env["backup_manager"]
+        wals_dir = import_env["wals_dir"]
+        backup_manager.config.xlogdb_directory = wals_dir.strpath
+
+        wal_name = "000000010000000000000001"
+        staging_dir = tmpdir.mkdir("staging_dictionary_import")
+        staging_dir.mkdir("wals").mkdir("0000000100000000").join(wal_name).write_binary(
+            b"wal1"
+        )
+        staging_dir.join("xlog.db").write(
+            "%s\t4\t1712994000.0\tzstd\tNone\t42\n" % wal_name
+        )
+        # AND the dictionary is in the zstd_dictionaries/ directory
+        staging_dir.mkdir("zstd_dictionaries").join("42.dict").write_binary(b"dict")
+
+        # WHEN the staged dictionaries are verified and the WALs imported
+        backup_manager._verify_staged_dictionaries(staging_dir.strpath)
+        rollback = backup_manager._import_backup_wals(staging_dir.strpath)
+
+        # THEN the dictionary is installed with the name of the target server
+        dict_path = wals_dir.join("TestServer-zstd-42.dict")
+        assert dict_path.read_binary() == b"dict"
+
+        # AND the rollback removes it
+        rollback()
+        assert not dict_path.exists()
+
+    @pytest.mark.parametrize(
+        ("staged", "local", "error"),
+        [
+            # The dictionary is only in the tarball
+            (b"dict", None, None),
+            # The dictionary is only in the target server
+            (None, b"dict", None),
+            # The same dictionary is in both
+            (b"dict", b"dict", None),
+            # The dictionary is nowhere
+            (None, None, "not found in tarball"),
+            # Two different dictionaries with the same id
+            (b"dict", b"other", "conflicting content"),
+        ],
+    )
+    def test_verify_staged_dictionaries(self, import_env, staged, local, error):
+        """
+        Test that _verify_staged_dictionaries requires the dictionaries used
+        by the staged WALs to be available and not conflicting.
+        """
+        # GIVEN a staged xlog.db referencing zstd dictionary 42
+        tmpdir = import_env["tmpdir"]
+        backup_manager = import_env["backup_manager"]
+        wals_dir = import_env["wals_dir"]
+        backup_manager.config.xlogdb_directory = wals_dir.strpath
+        staging_dir = tmpdir.mkdir("staging_dictionary_verify")
+        staging_dir.join("xlog.db").write(
+            "000000010000000000000001\t4\t1712994000.0\tzstd\tNone\t42\n"
+        )
+        staging_dir.mkdir("zstd_dictionaries")
+        if staged is not None:
+            staging_dir.join("zstd_dictionaries", "42.dict").write_binary(staged)
+        if local is not None:
+            wals_dir.join("TestServer-zstd-42.dict").write_binary(local)
+
+        # WHEN _verify_staged_dictionaries is called
+        # THEN it fails only if the dictionary is missing or conflicting
+        if error is None:
+            backup_manager._verify_staged_dictionaries(staging_dir.strpath)
+        else:
+            with pytest.raises(ImportBackupException, match=error):
+                backup_manager._verify_staged_dictionaries(staging_dir.strpath)
+
     def test_import_backup_wals_into_empty_xlogdb(self, import_env):
         """
         Test that _import_backup_wals works when the server's xlog.db
@@ -42,18 +42,20 @@ class TestCloudBackup(object):
             "expected_max_archive_size",
             "expected_min_chunk_size",
             "expected_max_bandwidth",
+            "expected_tar_streams",
         ),
         (
-            ([], 100 << 30, None, None),
-            (["--max-archive-size=10GB"], 10 << 30, None, None),
-            (["--min-chunk-size=50MB"], 100 << 30, 50 << 20, None),
+            ([], 100 << 30, None, None, 1),
+            (["--max-archive-size=10GB"], 10 << 30, None, None, 1),
+            (["--min-chunk-size=50MB"], 100 << 30, 50 << 20, None, 1),
             (
                 ["--max-archive-size=10GB", "--min-chunk-size=50MB"],
                 10 << 30,
                 50 << 20,
                 None,
+                1,
             ),
-            (["--max-bandwidth=80MB"], 100 << 30, None, 80 << 20),
+            (["--max-bandwidth=80MB"], 100 << 30, None, 80 << 20, 1),
             (
                 [
                     "--max-archive-size=10GB",
@@ -63,7 +65,9 @@ class TestCloudBackup(object):
                 10 << 30,
                 50 << 20,
                 80 << 20,
+                1,
             ),
+            (["--tar-streams=4"], 100 << 30, None, None, 4),
         ),
     )
     @mock.patch.dict(
@@ -83,6 +87,7 @@ class TestCloudBackup(object):
         expected_max_archive_size,
         expected_min_chunk_size,
         expected_max_bandwidth,
+        expected_tar_streams,
     ):
         uploader = uploader_mock.return_value
         cloud_backup.main(["cloud_storage_url", "test_server"] + barman_cloud_args)
@@ -96,6 +101,7 @@ class TestCloudBackup(object):
             max_archive_size=expected_max_archive_size,
             min_chunk_size=expected_min_chunk_size,
             max_bandwidth=expected_max_bandwidth,
+            tar_streams=expected_tar_streams,
             cloud_interface=cloud_interface_mock.return_value,
         )
         uploader.backup.assert_called_once()
@@ -525,18 +531,20 @@ class TestCloudBackupHookScript(object):
             "expected_max_archive_size",
             "expected_min_chunk_size",
             "expected_max_bandwidth",
+            "expected_tar_streams",
         ),
         (
-            ([], 100 << 30, None, None),
-            (["--max-archive-size=10GB"], 10 << 30, None, None),
-            (["--min-chunk-size=50MB"], 100 << 30, 50 << 20, None),
+            ([], 100 << 30, None, None, 1),
+            (["--max-archive-size=10GB"], 10 << 30, None, None, 1),
+            (["--min-chunk-size=50MB"], 100 << 30, 50 << 20, None, 1),
             (
                 ["--max-archive-size=10GB", "--min-chunk-size=50MB"],
                 10 << 30,
                 50 << 20,
                 None,
+                1,
             ),
-            (["--max-bandwidth=80MB"], 100 << 30, None, 80 << 20),
+            (["--max-bandwidth=80MB"], 100 << 30, None, 80 << 20, 1),
             (
                 [
                     "--max-archive-size=10GB",
@@ -546,7 +554,9 @@ class TestCloudBackupHookScript(object):
                 10 << 30,
                 50 << 20,
                 80 << 20,
+                1,
             ),
+            (["--tar-streams=4"], 100 << 30, None, None, 4),
         ),
     )
     @mock.patch.dict(
@@ -575,6 +585,7 @@ class TestCloudBackupHookScript(object):
         expected_max_archive_size,
         expected_min_chunk_size,
         expected_max_bandwidth,
+        expected_tar_streams,
     ):
         # GIVEN a backup without compression
         backup_info_instance = backup_info_mock.return_value
@@ -589,6 +600,7 @@ class TestCloudBackupHookScript(object):
             max_archive_size=expected_max_archive_size,
             min_chunk_size=expected_min_chunk_size,
             max_bandwidth=expected_max_bandwidth,
+            tar_streams=expected_tar_streams,
             cloud_interface=cloud_interface_mock.return_value,
             backup_dir=EXAMPLE_BACKUP_DIR,
             backup_id=EXAMPLE_BACKUP_ID,
@@ -632,6 +644,7 @@ class TestCloudBackupHookScript(object):
             max_archive_size=107374182400,
             min_chunk_size=None,
             max_bandwidth=None,
+            tar_streams=1,
             cloud_interface=cloud_interface_mock.return_value,
             backup_dir=EXAMPLE_BACKUP_DIR,
             backup_id=EXAMPLE_BACKUP_ID,
@@ -62,9 +62,10 @@ class TestCloudBackupDeleteArguments(object):
 class TestCloudBackupDelete(object):
     """Test the interaction of barman-cloud-backup-delete with the cloud provider."""
 
-    def _create_mock_file_info(self, path):
+    def _create_mock_file_info(self, path, index_path=None):
         file_info = mock.MagicMock()
         file_info.path = path
+        file_info.index_path = index_path
         file_info.additional_files = []
         return file_info
 
@@ -185,10 +186,14 @@ class TestCloudBackupDelete(object):
             # the tests are not expecting the main file to have been deleted.
             if backup_file.path:
                 files_for_backup.append(backup_file.path)
-            additional_files = [
-                additional_file.path for additional_file in backup_file.additional_files
-            ]
-            files_for_backup += sorted(additional_files)
+            if backup_file.index_path:
+                files_for_backup.append(backup_file.index_path)
+            for additional_file in sorted(
+                backup_file.additional_files, key=lambda x: x.path
+            ):
+                files_for_backup.append(additional_file.path)
+                if additional_file.index_path:
+                    files_for_backup.append(additional_file.index_path)
         return files_for_backup
 
     def _create_catalog(self, backup_metadata, wals=None):
@@ -765,6 +770,50 @@ class TestCloudBackupDelete(object):
             get_cloud_interface_mock, backup_metadata, [backup_id]
         )
 
+    @mock.patch("barman.clients.cloud_backup_delete.CloudBackupCatalog")
+    @mock.patch("barman.clients.cloud_backup_delete.get_cloud_interface")
+    def test_delete_member_indexes(
+        self, get_cloud_interface_mock, cloud_backup_catalog_mock
+    ):
+        """
+        Tests that the member indexes of the archives are deleted along with
+        the archives they describe.
+        """
+        # GIVEN a backup catalog with one backup and no WALs
+        backup_id = "20210723T095432"
+        backup_metadata = self._create_backup_metadata([backup_id])
+
+        # AND the PGDATA archive and its additional file have an index
+        pgdata = backup_metadata[backup_id]["files"][None]
+        pgdata.index_path = "%s/data.tar.index" % backup_id
+        pgdata.additional_files = [
+            self._create_mock_file_info(
+                "%s/data_0001.tar" % backup_id,
+                "%s/data_0001.tar.index" % backup_id,
+            ),
+        ]
+
+        # AND a CloudBackupCatalog which returns the backup_info for only that backup
+        cloud_backup_catalog_mock.return_value = self._create_catalog(backup_metadata)
+
+        # WHEN barman-cloud-backup-delete runs
+        cloud_backup_delete.main(
+            ["cloud_storage_url", "test_server", "--backup-id", backup_id]
+        )
+
+        # THEN each index was deleted right after its archive
+        self._verify_only_these_backups_deleted(
+            get_cloud_interface_mock, backup_metadata, [backup_id]
+        )
+        cloud_interface_mock = get_cloud_interface_mock.return_value
+        deleted_files = cloud_interface_mock.delete_objects.call_args_list[0][0][0]
+        assert deleted_files[:4] == [
+            "%s/data.tar" % backup_id,
+            "%s/data.tar.index" % backup_id,
+            "%s/data_0001.tar" % backup_id,
+            "%s/data_0001.tar.index" % backup_id,
+        ]
+
     @pytest.mark.parametrize("backup_id_arg", ("20210723T095432", "backup name"))
     @mock.patch("barman.clients.cloud_backup_delete.CloudBackupCatalog")
     @mock.patch("barman.clients.cloud_backup_delete.get_cloud_interface")
@@ -2278,6 +2327,10 @@ class TestCloudBackupDelete(object):
             "'wals/0000000100000000/000000010000000000000077.gz'], Reason: Something went wrong on "
             "delete" in caplog.text
         )
+        assert (
+            "The WALs of backup 20210722T095432 which could not be deleted will be "
+            "deleted when the next oldest backup is deleted" in caplog.text
+        )
 
         # AND the cloud interface was only used to delete the files associated with
         # the out-of-policy backups
@@ -2926,7 +2979,7 @@ class TestCloudBackupDelete(object):
         # Check for the WAL deletion call
         expected_wal_paths = ["wals/0000000100000000/000000010000000000000001.gz"]
         assert (
-            mock.call(expected_wal_paths)
+            mock.call(expected_wal_paths, progress=mock.ANY)
             in cloud_interface_mock.delete_objects.call_args_list
         )
 
@@ -3009,7 +3062,7 @@ class TestCloudBackupDelete(object):
         # Verify WAL deletion has no check_locks
         expected_wal_paths = ["wals/0000000100000000/000000010000000000000001.gz"]
         assert (
-            mock.call(expected_wal_paths)
+            mock.call(expected_wal_paths, progress=mock.ANY)
             in cloud_interface_mock.delete_objects.call_args_list
         )
 
@@ -62,6 +62,27 @@ class TestCloudCheckWalArchive(object):
             timeline=None,
         )
 
+    @mock.patch("barman.clients.cloud_check_wal_archive.check_archive_usable")
+    @mock.patch("barman.clients.cloud_check_wal_archive.CloudBackupCatalog")
+    @mock.patch("barman.clients.cloud_check_wal_archive.get_cloud_interface")
+    def test_check_wal_archive_cache_dir(
+        self,
+        mock_cloud_interface,
+        mock_cloud_backup_catalog,
+        _mock_check_archive_usable,
+        cloud_backup_catalog,
+    ):
+        """Verify the catalog uses the cache directory passed with --cache-dir."""
+        mock_cloud_backup_catalog.return_value = cloud_backup_catalog
+        cloud_check_wal_archive.main(
+            ["cloud_storage_url", "test_server", "--cache-dir", "/path/to/cache"]
+        )
+        mock_cloud_backup_catalog.assert_called_once_with(
+            mock_cloud_interface.return_value,
+            "test_server",
+            cache_dir="/path/to/cache",
+        )
+
     @mock.patch("barman.clients.cloud_check_wal_archive.check_archive_usable")
     @mock.patch("barman.clients.cloud_check_wal_archive.CloudBackupCatalog")
     @mock.patch("barman.clients.cloud_check_wal_archive.get_cloud_interface")
@@ -16,6 +16,9 @@
 # You should have received a copy of the GNU General Public License
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
 
+import logging
+from io import BytesIO
+
 import mock
 import pytest
 from testing_helpers import build_test_backup_info
@@ -26,7 +29,7 @@ from barman.clients.cloud_restore import (
     CloudBackupDownloaderObjectStore,
     CloudBackupDownloaderSnapshot,
 )
-from barman.cloud import BackupFileInfo
+from barman.cloud import BackupFileInfo, CloudTarIndex
 from barman.exceptions import RecoveryPreconditionException
 from barman.infofile import load_datetime_tz
 
@@ -92,7 +95,37 @@ class TestCloudRestore(object):
 
         # THEN the backup downloader is called with the expected mock backup_info
         mock_downloader.return_value.download_backup.assert_called_once_with(
-            mock_backup_info, recovery_dir, {}
+            mock_backup_info, recovery_dir, {}, jobs=1, include=None
+        )
+
+    @mock.patch("barman.clients.cloud_restore.CloudBackupDownloaderObjectStore")
+    @mock.patch("barman.clients.cloud_restore.CloudBackupCatalog")
+    @mock.patch("barman.clients.cloud_restore.get_cloud_interface")
+    def test_restore_with_jobs(
+        self, _mock_cloud_interface_factory, mock_catalog, mock_downloader
+    ):
+        """Verify that the number of jobs is passed to the backup downloader."""
+        # GIVEN a mock backup catalog returning a backup
+        mock_catalog.return_value.parse_backup_id.return_value = "20201110T120000"
+        mock_backup_info = mock.Mock(backup_id="20201110T120000", snapshots_info=None)
+        mock_catalog.return_value.get_backup_info.return_value = mock_backup_info
+
+        # WHEN barman-cloud-restore is called with --jobs
+        recovery_dir = "/some/recovery/dir"
+        cloud_restore.main(
+            [
+                "cloud_storage_url",
+                "test_server",
+                "20201110T120000",
+                recovery_dir,
+                "--jobs",
+                "4",
+            ]
+        )
+
+        # THEN the backup downloader is called with the requested jobs
+        mock_downloader.return_value.download_backup.assert_called_once_with(
+            mock_backup_info, recovery_dir, {}, jobs=4, include=None
         )
 
     @pytest.mark.parametrize(
@@ -204,6 +237,21 @@ class TestCloudRestore(object):
                     "relocation rules cannot be used."
                 ),
             ],
+            [
+                "gcp",
+                [
+                    "--snapshot-recovery-instance",
+                    "test_instance",
+                    "--gcp-zone",
+                    "test_zone",
+                    "--include",
+                    "global/*",
+                ],
+                (
+                    "Backup {backup_id} is a snapshot backup therefore include "
+                    "patterns cannot be used."
+                ),
+            ],
         ),
     )
     @mock.patch("barman.clients.cloud_restore.CloudBackupCatalog")
@@ -728,6 +776,146 @@ class TestCloudBackupDownloaderObjectStore(TestCloudBackupDownloader):
             backup_file_path, recovery_dir
         )
 
+    @pytest.mark.parametrize(
+        ("jobs", "expected_processes", "expected_ranged_jobs"),
+        (
+            # More jobs than files: each file is downloaded with ranged requests
+            (8, 2, 4),
+            # Fewer jobs than files: each file is downloaded with a single stream
+            (2, 2, 1),
+        ),
+    )
+    @mock.patch("barman.clients.cloud_restore.multiprocessing.Pool")
+    @mock.patch("barman.clients.cloud_restore.os.path.exists")
+    def test_download_backup_parallel(
+        self,
+        mock_os_path_exists,
+        mock_pool,
+        jobs,
+        expected_processes,
+        expected_ranged_jobs,
+        backup_info,
+        mock_cloud_interface,
+        mock_catalog,
+        caplog,
+    ):
+        """Verify that the tar files are extracted by a pool of processes."""
+        # GIVEN a backup catalog with a backup made of a data.tar and a
+        # tablespace tar file
+        data_path = "mock_catalog.prefix/{}/data".format(self.backup_id)
+        tbs_path = "mock_catalog.prefix/{}/16384".format(self.backup_id)
+        mock_catalog.get_backup_files.return_value = {
+            None: BackupFileInfo(oid=None, path=data_path),
+            16384: BackupFileInfo(oid=16384, path=tbs_path),
+        }
+        tablespace = mock.Mock(oid=16384, location="/path/to/tbs")
+        tablespace.name = "tbs"
+        backup_info.tablespaces = [tablespace]
+        # AND a CloudBackupObjectStoreDownloader
+        downloader = CloudBackupDownloaderObjectStore(
+            mock_cloud_interface, mock_catalog
+        )
+        # AND a pool which runs the jobs in the current process
+        mock_pool.return_value.imap_unordered.side_effect = map
+        mock_cloud_interface.get_object_size.return_value = 1 << 30
+        # AND the destination directories do not exist
+        recovery_dir = "/path/to/restore_dir"
+        mock_os_path_exists.return_value = False
+        caplog.set_level(logging.INFO)
+
+        # WHEN download_backup is called with several jobs
+        with mock.patch(
+            "barman.clients.cloud_restore._download_worker_cloud_interface",
+            mock_cloud_interface,
+        ), mock.patch("barman.clients.cloud_restore.os.symlink"), mock.patch(
+            "barman.clients.cloud_restore.os.mkdir"
+        ):
+            downloader.download_backup(backup_info, recovery_dir, {}, jobs=jobs)
+
+        # THEN a pool with a process per file is created
+        mock_pool.assert_called_once_with(
+            processes=expected_processes,
+            initializer=cloud_restore._init_download_worker,
+            initargs=(mock_cloud_interface,),
+        )
+        # AND each file is extracted with the remaining jobs split among them
+        mock_cloud_interface.extract_tar.assert_has_calls(
+            [
+                mock.call(
+                    data_path, recovery_dir, jobs=expected_ranged_jobs, size=1 << 30
+                ),
+                mock.call(
+                    tbs_path,
+                    "/path/to/tbs",
+                    jobs=expected_ranged_jobs,
+                    size=1 << 30,
+                ),
+            ],
+            any_order=True,
+        )
+        # AND the throughput of each file is logged
+        assert "Extracted %s to %s: 1.0 GiB in" % (data_path, recovery_dir) in (
+            caplog.text
+        )
+        # AND the pool is shut down
+        mock_pool.return_value.close.assert_called_once_with()
+        mock_pool.return_value.join.assert_called_once_with()
+
+    @pytest.mark.parametrize("has_index", (True, False))
+    @mock.patch("barman.clients.cloud_restore.os.path.exists")
+    def test_download_backup_include(
+        self,
+        mock_os_path_exists,
+        has_index,
+        backup_info,
+        mock_cloud_interface,
+        mock_catalog,
+        caplog,
+    ):
+        """Verify that only the included files are extracted."""
+        # GIVEN a backup catalog with a single backup with a data.tar file
+        backup_file_path = "mock_catalog.prefix/{}/data.tar".format(self.backup_id)
+        backup_file = BackupFileInfo(oid=None, path=backup_file_path)
+        # AND the data.tar file has an index, or not
+        index = CloudTarIndex()
+        if has_index:
+            backup_file.index_path = backup_file_path + CloudTarIndex.SUFFIX
+            mock_cloud_interface.remote_open.return_value = BytesIO(index.dumps())
+        mock_catalog.get_backup_files.return_value = {None: backup_file}
+        mock_cloud_interface.extract_tar_members.return_value = 1
+        # AND a CloudBackupObjectStoreDownloader
+        downloader = CloudBackupDownloaderObjectStore(
+            mock_cloud_interface, mock_catalog
+        )
+        # AND the recovery_dir does not exist
+        recovery_dir = "/path/to/restore_dir"
+        mock_os_path_exists.side_effect = lambda x: x != recovery_dir
+        include = ["global/pg_control"]
+
+        # WHEN download_backup is called with an include pattern
+        downloader.download_backup(
+            backup_info, recovery_dir, None, jobs=4, include=include
+        )
+
+        if has_index:
+            # THEN the index is read
+            mock_cloud_interface.remote_open.assert_called_once_with(
+                backup_file.index_path
+            )
+            # AND only the matching members are extracted
+            mock_cloud_interface.extract_tar_members.assert_called_once_with(
+                backup_file_path, recovery_dir, mock.ANY, include, jobs=4
+            )
+            mock_cloud_interface.extract_tar.assert_not_called()
+        else:
+            # THEN the whole file is streamed, extracting the matching members
+            mock_cloud_interface.extract_tar.assert_called_once_with(
+                backup_file_path, recovery_dir, jobs=4, include=include
+            )
+            mock_cloud_interface.extract_tar_members.assert_not_called()
+            # AND a warning is logged
+            assert "No index found for %s" % backup_file_path in caplog.text
+
     @mock.patch("barman.clients.cloud_restore.os.listdir")
     @mock.patch("barman.clients.cloud_restore.os.path.exists")
     def test_download_backup_recovery_dir_exists(
@@ -21,6 +21,7 @@ import gzip
 import logging
 import lzma
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import lz4.frame
 import mock
@@ -33,7 +34,8 @@ from barman.clients.cloud_cli import NetworkErrorExit
 from barman.clients.cloud_walarchive import CloudWalUploader
 from barman.cloud_providers.aws_s3 import S3CloudInterface
 from barman.cloud_providers.azure_blob_storage import AzureCloudInterface
-from barman.exceptions import BarmanException
+from barman.exceptions import BarmanException, LockFileBusy
+from barman.lockfile import CloudWalArchiveDaemonLock
 from barman.xlog import hash_dir
 
 EXAMPLE_WAL_PATH = "wal_dir/000000080000ABFF000000C1"
@@ -1062,3 +1064,242 @@ class TestWalUploaderHookScript(object):
         )
         uploader_mock.assert_not_called()
         cloud_interface_mock.assert_not_called()
+
+
+class TestWalArchiveDaemon(object):
+    """
+    Test the archiver daemon and its interactions with the archive_command
+    """
+
+    @pytest.fixture
+    def wal_directory(self, tmpdir):
+        """A PostgreSQL WAL directory with three WAL files ready to archive"""
+        wal_directory = tmpdir.mkdir("pg_wal")
+        status_dir = wal_directory.mkdir("archive_status")
+        for wal_name in (
+            "000000010000000000000001",
+            "000000010000000000000002",
+            "000000010000000000000003",
+            "00000002.history",
+        ):
+            wal_directory.join(wal_name).write("")
+            status_dir.join(wal_name + ".ready").write("")
+        status_dir.join("000000010000000000000000.done").write("")
+        return wal_directory
+
+    def test_archive_ready_wals(self, wal_directory, tmpdir):
+        """Verify the uploaded WAL files are recorded in WAL order."""
+        # GIVEN an archiver daemon whose uploads fail for one WAL file
+        spool_dir = tmpdir.mkdir("spool")
+        uploader = mock.Mock()
+
+        def upload_wal(wal_path, **kwargs):
+            if wal_path.endswith("000000010000000000000002"):
+                raise Exception("upload failed")
+
+        uploader.upload_wal.side_effect = upload_wal
+        daemon = cloud_walarchive.CloudWalArchiveDaemon(
+            uploader,
+            str(wal_directory),
+            str(spool_dir),
+            jobs=2,
+            history_tags=[("history", "true")],
+        )
+        executor = ThreadPoolExecutor(max_workers=2)
+
+        # WHEN the ready WAL files are archived
+        assert daemon.archive_ready_wals(executor) == 3
+
+        # THEN all the ready WAL files are uploaded
+        assert sorted(
+            call.args[0] for call in uploader.upload_wal.call_args_list
+        ) == sorted(
+            str(wal_directory.join(wal_name))
+            for wal_name in (
+                "000000010000000000000001",
+                "000000010000000000000002",
+                "000000010000000000000003",
+                "00000002.history",
+            )
+        )
+        uploader.upload_wal.assert_any_call(
+            str(wal_directory.join("00000002.history")),
+            override_tags=[("history", "true")],
+        )
+        # AND only the ones preceding the failed upload are recorded
+        assert sorted(spool_dir.listdir()) == [
+            spool_dir.join("000000010000000000000001.done")
+        ]
+
+        # WHEN the failed upload succeeds at the next round
+        uploader.upload_wal.side_effect = None
+        uploader.upload_wal.reset_mock()
+        assert daemon.archive_ready_wals(executor) == 1
+
+        # THEN only the failed WAL file is uploaded again
+        uploader.upload_wal.assert_called_once_with(
+            str(wal_directory.join("000000010000000000000002"))
+        )
+        # AND all the WAL files are recorded
+        assert len(spool_dir.listdir()) == 4
+
+        # WHEN PostgreSQL completes the archiving of a WAL file
+        wal_directory.join("archive_status", "000000010000000000000001.ready").rename(
+            wal_directory.join("archive_status", "000000010000000000000001.done")
+        )
+        uploader.upload_wal.reset_mock()
+        assert daemon.archive_ready_wals(executor) == 0
+
+        # THEN its record is removed from the spool directory
+        assert not spool_dir.join("000000010000000000000001.done").exists()
+        assert len(spool_dir.listdir()) == 3
+        # AND nothing is uploaded
+        uploader.upload_wal.assert_not_called()
+        executor.shutdown()
+
+    @mock.patch("barman.clients.cloud_walarchive.CloudWalArchiveDaemon")
+    @mock.patch("barman.clients.cloud_walarchive.get_cloud_interface")
+    @mock.patch("barman.clients.cloud_walarchive.CloudWalUploader")
+    def test_watch(self, uploader_mock, cloud_interface_mock, daemon_mock):
+        """Verify --watch runs the archiver daemon."""
+        # WHEN barman-cloud-wal-archive is run with --watch
+        cloud_walarchive.main(
+            [
+                "cloud_storage_url",
+                "test_server",
+                "--watch",
+                "/pgdata/pg_wal",
+                "--spool-dir",
+                "/spool",
+                "--jobs",
+                "8",
+            ]
+        )
+
+        # THEN the archiver daemon runs with the uploader
+        daemon_mock.assert_called_once_with(
+            uploader=uploader_mock.return_value,
+            wal_directory="/pgdata/pg_wal",
+            spool_dir="/spool",
+            jobs=8,
+            history_tags=None,
+        )
+        daemon_mock.return_value.run.assert_called_once_with()
+        uploader_mock.return_value.upload_wal.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "args",
+        (
+            ["--watch", "/pgdata/pg_wal"],
+            [EXAMPLE_WAL_PATH, "--watch", "/pgdata/pg_wal", "--spool-dir", "/spool"],
+        ),
+    )
+    @mock.patch("barman.clients.cloud_walarchive.get_cloud_interface")
+    def test_watch_bad_arguments(self, cloud_interface_mock, args):
+        """Verify --watch requires a spool directory and no WAL file."""
+        with pytest.raises(SystemExit) as exc:
+            cloud_walarchive.main(["cloud_storage_url", "test_server"] + args)
+        assert exc.value.code == 3
+        cloud_interface_mock.assert_not_called()
+
+    @mock.patch("barman.clients.cloud_walarchive.get_cloud_interface")
+    @mock.patch("barman.clients.cloud_walarchive.CloudWalUploader")
+    def test_spool_dir_archived_wal(self, uploader_mock, cloud_interface_mock, tmpdir):
+        """Verify a WAL file archived by the daemon is not uploaded again."""
+        # GIVEN a WAL file recorded in the spool directory
+        tmpdir.join(os.path.basename(EXAMPLE_WAL_PATH) + ".done").write("")
+
+        # WHEN barman-cloud-wal-archive is run with the spool directory
+        cloud_walarchive.main(
+            [
+                "cloud_storage_url",
+                "test_server",
+                EXAMPLE_WAL_PATH,
+                "--spool-dir",
+                str(tmpdir),
+            ]
+        )
+
+        # THEN no connection to the cloud storage is made
+        cloud_interface_mock.assert_not_called()
+        uploader_mock.assert_not_called()
+
+    @mock.patch("barman.clients.cloud_walarchive.get_cloud_interface")
+    @mock.patch("barman.clients.cloud_walarchive.CloudWalUploader")
+    def test_spool_dir_timeout(self, uploader_mock, cloud_interface_mock, tmpdir):
+        """Verify a WAL file not archived by the daemon is uploaded directly."""
+        # GIVEN an archiver daemon running on the spool directory
+        with CloudWalArchiveDaemonLock(str(tmpdir)):
+            # WHEN barman-cloud-wal-archive is run with an empty spool directory
+            cloud_walarchive.main(
+                [
+                    "cloud_storage_url",
+                    "test_server",
+                    EXAMPLE_WAL_PATH,
+                    "--spool-dir",
+                    str(tmpdir),
+                    "--spool-timeout",
+                    "0",
+                ]
+            )
+
+        # THEN the WAL file is uploaded
+        uploader_mock.return_value.upload_wal.assert_called_once_with(EXAMPLE_WAL_PATH)
+
+    @pytest.mark.parametrize("create_spool_dir", (True, False))
+    @mock.patch("barman.clients.cloud_walarchive.time.sleep")
+    @mock.patch("barman.clients.cloud_walarchive.get_cloud_interface")
+    @mock.patch("barman.clients.cloud_walarchive.CloudWalUploader")
+    def test_spool_dir_no_daemon(
+        self, uploader_mock, cloud_interface_mock, sleep_mock, create_spool_dir, tmpdir
+    ):
+        """Verify the WAL file is uploaded without waiting if no daemon runs."""
+        # GIVEN a spool directory without any archiver daemon running
+        spool_dir = tmpdir.join("spool")
+        if create_spool_dir:
+            spool_dir.mkdir()
+
+        # WHEN barman-cloud-wal-archive is run with the spool directory
+        cloud_walarchive.main(
+            [
+                "cloud_storage_url",
+                "test_server",
+                EXAMPLE_WAL_PATH,
+                "--spool-dir",
+                str(spool_dir),
+            ]
+        )
+
+        # THEN the WAL file is uploaded without waiting for the timeout
+        sleep_mock.assert_not_called()
+        uploader_mock.return_value.upload_wal.assert_called_once_with(EXAMPLE_WAL_PATH)
+
+    @mock.patch("barman.clients.cloud_walarchive.time.sleep")
+    def test_run_locks_spool_dir(self, sleep_mock, wal_directory, tmpdir):
+        """Verify the daemon holds the lock of the spool directory while it runs."""
+        # GIVEN an archiver daemon
+        spool_dir = tmpdir.mkdir("spool")
+        daemon = cloud_walarchive.CloudWalArchiveDaemon(
+            mock.Mock(), str(wal_directory), str(spool_dir)
+        )
+        running = []
+
+        def archive_ready_wals(_executor):
+            running.append(cloud_walarchive.is_archiver_daemon_running(str(spool_dir)))
+            daemon.stop()
+            return 0
+
+        daemon.archive_ready_wals = archive_ready_wals
+
+        # WHEN the daemon runs
+        daemon.run()
+
+        # THEN it is seen as running until it stops
+        assert running == [True]
+        assert not cloud_walarchive.is_archiver_daemon_running(str(spool_dir))
+
+        # AND a second daemon cannot run on the same spool directory
+        with CloudWalArchiveDaemonLock(str(spool_dir)):
+            with pytest.raises(LockFileBusy):
+                daemon.run()
+        assert sleep_mock.call_count == daemon.LOCK_ATTEMPTS - 1
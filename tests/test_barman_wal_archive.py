@@ -17,10 +17,12 @@
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
 
 import hashlib
+import os
 import random
 import re
 import subprocess
 import tarfile
+import time
 from contextlib import closing
 from io import BytesIO
 
@@ -244,6 +246,57 @@ class TestMain(object):
             "exit status 255"
         ) in err
 
+    @mock.patch("barman.clients.walarchive.WalSpoolFlusher.start")
+    @mock.patch("barman.clients.walarchive.subprocess.Popen")
+    def test_spool(self, popen_mock, start_mock, tmpdir):
+        # GIVEN a WAL file on disk
+        source = tmpdir.join("wal_dir/000000080000ABFF000000C1")
+        source.write("something", ensure=True)
+        spool_dir = tmpdir.join("spool")
+
+        # WHEN barman-wal-archive is called with a spool directory
+        walarchive.main(
+            ["--spool-dir", spool_dir.strpath, "a.host", "a-server", source.strpath]
+        )
+
+        # THEN the WAL file is stored in the spool directory
+        assert spool_dir.listdir() == [spool_dir.join("000000080000ABFF000000C1")]
+        assert spool_dir.join("000000080000ABFF000000C1").read() == "something"
+        # AND the flusher is started instead of sending the WAL file
+        start_mock.assert_called_once_with()
+        assert not popen_mock.called
+
+    @mock.patch("barman.clients.walarchive.WalSpoolFlusher.start")
+    def test_spool_full(self, start_mock, tmpdir, capsys):
+        # GIVEN a WAL file on disk
+        source = tmpdir.join("wal_dir/000000080000ABFF000000C1")
+        source.write("something", ensure=True)
+        # AND a spool directory which already holds the maximum number of WALs
+        spool_dir = tmpdir.join("spool")
+        spool_dir.join("000000080000ABFF000000C0").write("previous", ensure=True)
+
+        # WHEN barman-wal-archive is called
+        with pytest.raises(SystemExit) as exc:
+            walarchive.main(
+                [
+                    "--spool-dir",
+                    spool_dir.strpath,
+                    "--spool-max-files",
+                    "1",
+                    "a.host",
+                    "a-server",
+                    source.strpath,
+                ]
+            )
+
+        # THEN it fails without storing the WAL file
+        assert exc.value.code == 2
+        _out, err = capsys.readouterr()
+        assert "Too many WAL files waiting in the spool directory" in err
+        assert not spool_dir.join("000000080000ABFF000000C1").exists()
+        # AND the flusher is started to send the waiting WAL files
+        start_mock.assert_called_once_with()
+
 
 # noinspection PyMethodMayBeStatic
 class TestRemotePutWal(object):
@@ -432,6 +485,219 @@ class TestRemotePutWal(object):
 
         assert rwa.returncode == 5
 
+    @mock.patch("barman.clients.walarchive.subprocess.Popen")
+    def test_multiple_files(self, popen_mock, tmpdir):
+        input_mock, output_mock = pipe_helper()
+        popen_mock.return_value.stdin = input_mock
+        popen_mock.return_value.returncode = 0
+        config = mock.Mock(
+            user="barman",
+            barman_host="remote.barman.host",
+            config=None,
+            server_name="this-server",
+            test=False,
+            port=None,
+            md5=False,
+            compression=None,
+            compression_level=None,
+        )
+        # GIVEN two WAL files on disk
+        sources = []
+        for name in ("000000010000000000000001", "000000010000000000000002"):
+            source_file = tmpdir.join("test-source", name)
+            source_file.write(name, ensure=True)
+            sources.append(source_file)
+
+        # WHEN RemotePutWal is called with both of them
+        walarchive.RemotePutWal(config, [source.strpath for source in sources])
+
+        # THEN a single put-wal command is executed
+        assert popen_mock.call_count == 1
+        # AND both WAL files are sent, followed by their checksums
+        tar = tarfile.open(mode="r|", fileobj=output_mock)
+        content = dict(
+            (member.name, tar.extractfile(member).read().decode()) for member in tar
+        )
+        assert content == {
+            "000000010000000000000001": "000000010000000000000001",
+            "000000010000000000000002": "000000010000000000000002",
+            "SHA256SUMS": "".join(
+                "%s *%s\n" % (source.computehash("sha256"), source.basename)
+                for source in sources
+            ),
+        }
+
+
+# noinspection PyMethodMayBeStatic
+class TestWalSpoolFlusher(object):
+    def _build_flusher(self, tmpdir, wal_names=(), age=0, **kwargs):
+        """
+        Build a flusher for a spool directory holding the given WAL files.
+
+        :param tmpdir: the temporary directory of the test
+        :param wal_names: the WAL files in the spool directory
+        :param int age: how many seconds ago the WAL files have been spooled
+        :rtype: walarchive.WalSpoolFlusher
+        """
+        spool_dir = tmpdir.mkdir("spool")
+        for wal_name in wal_names:
+            spool_file = spool_dir.join(wal_name)
+            spool_file.write(wal_name)
+            spool_file.setmtime(time.time() - age)
+        config = walarchive.parse_arguments(
+            ["--spool-dir", spool_dir.strpath, "a.host", "a-server", "dummy_wal"]
+        )
+        for key, value in kwargs.items():
+            setattr(config, key, value)
+        return walarchive.WalSpoolFlusher(config)
+
+    def test_spool_wal(self, tmpdir):
+        # GIVEN a flusher and a WAL file
+        flusher = self._build_flusher(tmpdir)
+        source = tmpdir.join("wal_dir/000000010000000000000001")
+        source.write("something", ensure=True)
+
+        # WHEN the WAL file is stored in the spool directory
+        flusher.spool_wal(source.strpath)
+
+        # THEN the WAL file is in the spool directory, without temporary files
+        assert flusher.get_spooled_wals() == ["000000010000000000000001"]
+        assert os.listdir(flusher.spool_dir) == ["000000010000000000000001"]
+
+    @pytest.mark.parametrize(("returncode", "archived"), [(0, True), (1, False)])
+    @mock.patch("barman.clients.walarchive.RemotePutWal")
+    def test_flush(self, rpw_mock, returncode, archived, tmpdir, capsys):
+        # GIVEN a flusher with two spooled WAL files
+        wal_names = ["000000010000000000000001", "000000010000000000000002"]
+        flusher = self._build_flusher(tmpdir, wal_names)
+        rpw_mock.return_value.returncode = returncode
+
+        # WHEN the WAL files are flushed
+        assert flusher.flush(wal_names) is archived
+
+        # THEN they are sent through a single put-wal command
+        rpw_mock.assert_called_once_with(
+            flusher.config,
+            [os.path.join(flusher.spool_dir, wal_name) for wal_name in wal_names],
+        )
+        # AND they are removed from the spool directory only once archived
+        if archived:
+            assert flusher.get_spooled_wals() == []
+        else:
+            assert flusher.get_spooled_wals() == wal_names
+            _out, err = capsys.readouterr()
+            assert "Remote 'barman put-wal' command has failed" in err
+
+    @pytest.mark.parametrize(
+        ("batch_size", "age", "expected_batches"),
+        [
+            # The WAL files waited long enough, they are sent together
+            (10, 60, [[0, 1, 2]]),
+            # Enough WAL files are waiting to fill a batch, which is sent at
+            # once, while the remaining one waits for the batch timeout
+            (2, 0, [[0, 1], [2]]),
+        ],
+    )
+    @mock.patch.object(walarchive.WalSpoolFlusher, "POLL_INTERVAL", 0.01)
+    def test_flush_spool(self, batch_size, age, expected_batches, tmpdir):
+        # GIVEN a flusher with three spooled WAL files
+        wal_names = [
+            "000000010000000000000001",
+            "000000010000000000000002",
+            "000000010000000000000003",
+        ]
+        flusher = self._build_flusher(
+            tmpdir, wal_names, age=age, batch_size=batch_size, batch_timeout=0.2
+        )
+        batches = []
+
+        def flush(batch):
+            batches.append(batch)
+            for wal_name in batch:
+                os.unlink(os.path.join(flusher.spool_dir, wal_name))
+            return True
+
+        # WHEN the spool directory is flushed
+        with mock.patch.object(flusher, "flush", side_effect=flush):
+            flusher.flush_spool()
+
+        # THEN the WAL files are sent in the expected batches
+        assert batches == [
+            [wal_names[index] for index in batch] for batch in expected_batches
+        ]
+
+    @mock.patch.object(walarchive.WalSpoolFlusher, "POLL_INTERVAL", 0.01)
+    def test_flush_spool_retry(self, tmpdir):
+        # GIVEN a flusher with a spooled WAL file
+        flusher = self._build_flusher(
+            tmpdir, ["000000010000000000000001"], age=60, batch_timeout=0.1
+        )
+        # AND a Barman server which fails the first put-wal command
+        results = [False, True]
+
+        def flush(batch):
+            result = results.pop(0)
+            if result:
+                os.unlink(os.path.join(flusher.spool_dir, batch[0]))
+            return result
+
+        # WHEN the spool directory is flushed
+        with mock.patch.object(flusher, "flush", side_effect=flush) as flush_mock:
+            flusher.flush_spool()
+
+        # THEN the WAL file is sent again after the failure
+        assert flush_mock.call_count == 2
+        assert flusher.get_spooled_wals() == []
+
+    @mock.patch("barman.clients.walarchive.os.fork", return_value=1234)
+    def test_start(self, fork_mock, tmpdir):
+        # GIVEN a flusher
+        flusher = self._build_flusher(tmpdir)
+
+        # WHEN the flusher is started
+        flusher.start()
+
+        # THEN a background process is forked
+        fork_mock.assert_called_once_with()
+        # AND the lock is left to the background process
+        assert flusher.lock.acquire()
+        flusher.lock.release()
+
+    @mock.patch("barman.clients.walarchive.os.fork", return_value=1234)
+    def test_start_running(self, fork_mock, tmpdir):
+        # GIVEN a flusher running in another process
+        flusher = self._build_flusher(tmpdir)
+        running = walarchive.WalSpoolFlusher(flusher.config)
+        assert running.lock.acquire()
+
+        # WHEN the flusher is started
+        flusher.start()
+
+        # THEN no other background process is forked
+        assert not fork_mock.called
+        running.lock.release()
+
+    def test_run(self, tmpdir):
+        # GIVEN a flusher
+        flusher = self._build_flusher(tmpdir)
+        # AND a WAL file spooled while the lock is released
+        spooled = [["000000010000000000000001"], []]
+
+        def flush_spool():
+            # The lock is held while flushing
+            assert not walarchive.WalSpoolFlusher(flusher.config).lock.acquire()
+
+        # WHEN the flusher runs
+        with mock.patch.object(
+            flusher, "flush_spool", side_effect=flush_spool
+        ) as flush_spool_mock, mock.patch.object(
+            flusher, "get_spooled_wals", side_effect=spooled
+        ):
+            flusher.run()
+
+        # THEN the spool directory is flushed again for the late WAL file
+        assert flush_spool_mock.call_count == 2
+
 
 # noinspection PyMethodMayBeStatic
 class TestChecksumTarFile(object):
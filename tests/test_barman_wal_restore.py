@@ -15,8 +15,10 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
+import gzip
 import os
 import subprocess
+import tarfile
 from io import BytesIO
 
 import mock
@@ -550,6 +552,193 @@ def test_build_ssh_command(config, wal_name, peek, expected_command):
     assert command == expected_command
 
 
+def test_build_ssh_command_batch():
+    """Test the build_ssh_command function when a batch of WAL files is requested"""
+    config = mock.Mock(
+        barman_host="my.barman.host",
+        server_name="test_server",
+        user="barman",
+        port=None,
+        config=None,
+        test=None,
+        compression=None,
+        keep_compression=True,
+        partial=False,
+    )
+    command = walrestore.build_ssh_command(config, "000000010000000000000001", batch=4)
+    assert command[-1] == (
+        "get-wal --batch '4' --keep-compression "
+        "'test_server' '000000010000000000000001'"
+    )
+
+
+def _build_tar_stream(files):
+    """
+    Build a tar stream containing the given files.
+
+    :param list[tuple[str,bytes]] files: the name and content of the files
+    :rtype: BytesIO
+    """
+    stream = BytesIO()
+    with tarfile.open(mode="w|", fileobj=stream) as tar:
+        for name, content in files:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = len(content)
+            tar.addfile(tar_info, BytesIO(content))
+    stream.seek(0)
+    return stream
+
+
+@mock.patch("barman.clients.walrestore.subprocess.Popen")
+def test_fetch_wal_batch(mock_popen, tmpdir):
+    """
+    Test that :func:`fetch_wal_batch` unpacks the WAL files received from a
+    single ``get-wal --batch`` command in the spool directory, decompressing
+    them if needed.
+    """
+    # GIVEN a configuration requesting a batch of three WAL files
+    spool_dir = tmpdir.join("spool")
+    config = walrestore.parse_arguments(
+        [
+            "--parallel",
+            "3",
+            "--batch",
+            "--spool-dir",
+            spool_dir.strpath,
+            "a.host",
+            "a-server",
+            "000000010000000000000001",
+            "dest",
+        ]
+    )
+    # AND a get-wal command sending an uncompressed and a compressed WAL file
+    mock_popen.return_value.stdout = _build_tar_stream(
+        [
+            ("000000010000000000000001", b"first"),
+            ("000000010000000000000002", gzip.compress(b"second")),
+        ]
+    )
+    mock_popen.return_value.returncode = 0
+
+    # WHEN fetch_wal_batch is called
+    returncode = walrestore.fetch_wal_batch(config)
+
+    # THEN a single get-wal command is executed
+    mock_popen.assert_called_once_with(
+        walrestore.build_ssh_command(config, config.wal_name, batch=3),
+        stdout=subprocess.PIPE,
+    )
+    assert returncode == 0
+    # AND the WAL files are unpacked and decompressed in the spool directory
+    assert sorted(os.listdir(spool_dir.strpath)) == [
+        "000000010000000000000001",
+        "000000010000000000000002",
+    ]
+    assert spool_dir.join("000000010000000000000001").read_binary() == b"first"
+    assert spool_dir.join("000000010000000000000002").read_binary() == b"second"
+
+
+@mock.patch("barman.clients.walrestore.subprocess.Popen")
+def test_fetch_wal_batch_invalid_member(mock_popen, tmpdir, capsys):
+    """
+    Test that :func:`fetch_wal_batch` stops at the first file which is not
+    a WAL file, keeping the WAL files already received.
+    """
+    # GIVEN a configuration requesting a batch of WAL files
+    spool_dir = tmpdir.join("spool")
+    config = walrestore.parse_arguments(
+        [
+            "-p",
+            "3",
+            "-b",
+            "--spool-dir",
+            spool_dir.strpath,
+            "a.host",
+            "a-server",
+            "000000010000000000000001",
+            "dest",
+        ]
+    )
+    # AND a get-wal command sending a file with a path after a WAL file
+    mock_popen.return_value.stdout = _build_tar_stream(
+        [
+            ("000000010000000000000001", b"first"),
+            ("../000000010000000000000002", b"second"),
+        ]
+    )
+    mock_popen.return_value.returncode = 0
+
+    # WHEN fetch_wal_batch is called
+    walrestore.fetch_wal_batch(config)
+
+    # THEN an error is reported
+    _out, err = capsys.readouterr()
+    assert (
+        "ERROR: Invalid WAL batch received: "
+        "unexpected member '../000000010000000000000002'"
+    ) in err
+    # AND only the first WAL file is in the spool directory
+    assert os.listdir(spool_dir.strpath) == ["000000010000000000000001"]
+    assert not tmpdir.join("000000010000000000000002").exists()
+
+
+@pytest.mark.parametrize(
+    ("received", "returncode", "expected_code", "expected_error"),
+    [
+        (True, 0, 0, None),
+        (True, 255, 0, None),
+        (False, 0, 2, "The required file is not available"),
+        (False, 255, 2, "Connection problem with ssh"),
+        (False, 1, 1, "Remote 'barman get-wal' command has failed!"),
+    ],
+)
+@mock.patch("barman.clients.walrestore.fetch_wal_batch")
+def test_main_batch(
+    mock_fetch, received, returncode, expected_code, expected_error, tmpdir, capsys
+):
+    """
+    Test that the requested WAL file is delivered from the spool directory
+    after receiving a batch, whatever the exit code of the get-wal command.
+    """
+    # GIVEN a get-wal --batch command which may have received the WAL file
+    spool_dir = tmpdir.mkdir("spool")
+    wal_name = "000000010000000000000001"
+    dest = tmpdir.join("dest")
+
+    def fetch(config):
+        if received:
+            spool_dir.join(wal_name).write_binary(b"content")
+        return returncode
+
+    mock_fetch.side_effect = fetch
+
+    # WHEN barman-wal-restore is executed in batch mode
+    with pytest.raises(SystemExit) as exc:
+        walrestore.main(
+            [
+                "-p",
+                "3",
+                "-b",
+                "--spool-dir",
+                spool_dir.strpath,
+                "a.host",
+                "a-server",
+                wal_name,
+                dest.strpath,
+            ]
+        )
+
+    # THEN the exit code is the expected one
+    assert exc.value.code == expected_code
+    _out, err = capsys.readouterr()
+    if expected_error:
+        assert expected_error in err
+    else:
+        # AND the WAL file is delivered from the spool directory
+        assert dest.read_binary() == b"content"
+        assert not spool_dir.join(wal_name).exists()
+
+
 @mock.patch("barman.clients.walrestore.subprocess.Popen")
 @mock.patch("barman.clients.walrestore.build_ssh_command")
 def test_execute_peek(mock_build_ssh_command, mock_popen):
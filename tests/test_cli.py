@@ -46,6 +46,7 @@ from barman.cli import (
     cloud_wal_restore,
     command,
     config_switch,
+    cron,
     export_backup,
     generate_manifest,
     get_model,
@@ -653,6 +654,8 @@ class TestCli(object):
         args.local_staging_path = None
         args.staging_path = None
         args.staging_location = None
+        args.lazy_wal = False
+        args.batch_get_wal = False
         return args
 
     @patch("barman.cli.parse_backup_id")
@@ -860,6 +863,109 @@ class TestCli(object):
         _out, err = capsys.readouterr()
         assert "" == err
 
+    @pytest.mark.parametrize(
+        ("recovery_options", "get_wal_arg"),
+        [("", None), ("", True), ("get-wal", None)],
+    )
+    @patch("barman.cli.parse_backup_id")
+    @patch("barman.cli.get_server")
+    def test_restore_lazy_wal(
+        self,
+        get_server_mock,
+        parse_backup_id_mock,
+        mock_backup_info,
+        mock_restore_args,
+        recovery_options,
+        get_wal_arg,
+        monkeypatch,
+        capsys,
+    ):
+        """
+        Test that --lazy-wal enables the get-wal option and is passed to the
+        recovery.
+        """
+        # GIVEN a backup
+        parse_backup_id_mock.return_value = mock_backup_info
+        mock_backup_info.is_incremental = False
+        mock_backup_info.encryption = None
+        # AND a configuration with the specified recovery options
+        config = build_config_from_dicts(
+            global_conf={"recovery_options": recovery_options}
+        )
+        server = config.get_server("main")
+        get_server_mock.return_value.config = server
+        monkeypatch.setattr(barman, "__config__", (config,))
+        get_server_mock.return_value.use_backup_cloud_storage = False
+        get_server_mock.return_value.use_wal_cloud_storage = False
+        # AND --lazy-wal is used, with or without --get-wal
+        mock_restore_args.lazy_wal = True
+        if get_wal_arg is None:
+            del mock_restore_args.get_wal
+        else:
+            mock_restore_args.get_wal = get_wal_arg
+
+        # WHEN the restore command is run
+        with pytest.raises(SystemExit):
+            restore(mock_restore_args)
+
+        # THEN the get_wal recovery option is set
+        assert barman.config.RecoveryOptions.GET_WAL in server.recovery_options
+        # AND the lazy WAL delivery is requested to the recovery
+        recover_mock = get_server_mock.return_value.recover
+        assert recover_mock.call_args[1]["lazy_wal"] is True
+        # AND the batch mode of barman-wal-restore is not requested
+        assert recover_mock.call_args[1]["batch_get_wal"] is False
+        # AND there are no errors
+        _out, err = capsys.readouterr()
+        assert "" == err
+
+    @pytest.mark.parametrize(
+        ("use_wal_cloud_storage", "expected_error"),
+        [
+            (False, "The --lazy-wal option cannot be used with --no-get-wal"),
+            (
+                True,
+                "The --lazy-wal option is not supported for servers with WALs "
+                "stored in cloud storage",
+            ),
+        ],
+    )
+    @patch("barman.cli.parse_backup_id")
+    @patch("barman.cli.get_server")
+    def test_restore_lazy_wal_errors(
+        self,
+        get_server_mock,
+        parse_backup_id_mock,
+        mock_backup_info,
+        mock_restore_args,
+        use_wal_cloud_storage,
+        expected_error,
+        capsys,
+    ):
+        """
+        Test that --lazy-wal is rejected when the get-wal restore command
+        cannot deliver the WAL files.
+        """
+        # GIVEN a backup
+        parse_backup_id_mock.return_value = mock_backup_info
+        mock_backup_info.is_incremental = False
+        mock_backup_info.encryption = None
+        get_server_mock.return_value.use_backup_cloud_storage = False
+        get_server_mock.return_value.use_wal_cloud_storage = use_wal_cloud_storage
+        # AND --lazy-wal is used with --no-get-wal
+        mock_restore_args.lazy_wal = True
+        mock_restore_args.get_wal = False
+
+        # WHEN the restore command is run
+        with pytest.raises(SystemExit):
+            restore(mock_restore_args)
+
+        # THEN an error is returned
+        _out, err = capsys.readouterr()
+        assert expected_error in err
+        # AND no recovery is performed
+        get_server_mock.return_value.recover.assert_not_called()
+
     @patch("barman.cli.parse_backup_id")
     @patch("barman.cli.get_server")
     def test_restore_no_get_wal_cloud_storage_fallback(
@@ -2226,6 +2332,106 @@ class TestCli(object):
         dummy_server.kill.assert_called_once_with(args.task)
         mock_output.close_and_exit.assert_called_once()
 
+    @pytest.mark.parametrize(
+        ("arg_jobs", "config_jobs", "parallel"),
+        [(None, "1", False), (None, "3", True), (1, "3", False), (2, "1", True)],
+    )
+    @patch("barman.cli._parallel_cron")
+    @patch("barman.cli.barman.utils.lock_files_cleanup")
+    @patch("barman.cli.ConfigUpdateLock")
+    @patch("barman.cli.output")
+    @patch("barman.cli.get_server_list")
+    def test_cron_jobs(
+        self,
+        mock_get_server_list,
+        _mock_output,
+        _mock_config_update_lock,
+        _mock_lock_files_cleanup,
+        mock_parallel_cron,
+        arg_jobs,
+        config_jobs,
+        parallel,
+        monkeypatch,
+    ):
+        """
+        Verify the --jobs argument overrides the cron_parallel_jobs option
+        """
+        # GIVEN two servers and a configured cron concurrency
+        monkeypatch.setattr(
+            barman,
+            "__config__",
+            build_config_from_dicts(global_conf={"cron_parallel_jobs": config_jobs}),
+        )
+        servers = {"main": Mock(), "web": Mock()}
+        mock_get_server_list.return_value = servers
+        args = Mock(jobs=arg_jobs, keep_descriptors=False)
+
+        # WHEN cron is executed
+        cron(args)
+
+        # THEN the servers are processed in parallel only if more than one
+        # job is allowed
+        if parallel:
+            mock_parallel_cron.assert_called_once_with(
+                servers, arg_jobs or int(config_jobs), False
+            )
+            servers["main"].cron.assert_not_called()
+        else:
+            mock_parallel_cron.assert_not_called()
+            for server in servers.values():
+                server.cron.assert_called_once_with(keep_descriptors=False)
+
+    @patch("barman.cli.barman.utils.lock_files_cleanup")
+    @patch("barman.cli.ConfigUpdateLock")
+    @patch("barman.output.close_and_exit")
+    @patch("barman.cli.get_server_list")
+    def test_cron_parallel(
+        self,
+        mock_get_server_list,
+        _mock_close_and_exit,
+        _mock_config_update_lock,
+        _mock_lock_files_cleanup,
+        monkeypatch,
+        tmpdir,
+    ):
+        """
+        Verify cron processes servers in separate processes and collects
+        the errors they report
+        """
+        monkeypatch.setattr(barman.output, "error_occurred", False)
+        monkeypatch.setattr(barman, "__config__", build_config_from_dicts())
+
+        # GIVEN some servers, one of which reports an error during cron
+        def fake_cron(name, fail):
+            def _cron(keep_descriptors):
+                tmpdir.join(name).write(str(os.getpid()))
+                if fail:
+                    barman.output.error("cron failed for %s", name)
+
+            return _cron
+
+        servers = {}
+        for name in ("alpha", "beta", "gamma", "delta"):
+            server = Mock()
+            server.config.name = name
+            server.cron.side_effect = fake_cron(name, name == "gamma")
+            servers[name] = server
+        mock_get_server_list.return_value = servers
+
+        # WHEN cron is executed with two jobs
+        cron(Mock(jobs=2, keep_descriptors=False))
+
+        # THEN every server has been processed in a child process
+        pids = set()
+        for name in servers:
+            pid = int(tmpdir.join(name).read())
+            assert pid != os.getpid()
+            pids.add(pid)
+        assert len(pids) == len(servers)
+
+        # AND the error reported by the child process is propagated
+        assert barman.output.error_occurred
+
     @pytest.mark.parametrize(
         "arg_timeout, config_timeout, expected_timeout",
         [(None, None, 30), (None, 300, 300), (600, 300, 600)],
@@ -19,12 +19,15 @@
 import bz2
 import datetime
 import gzip
+import json
 import logging
 import os
 import shutil
 import sys
 import threading
+import time
 from argparse import Namespace
+from contextlib import closing
 from functools import partial
 from io import BytesIO
 from tarfile import TarFile, TarInfo
@@ -45,7 +48,7 @@ from azure.identity import (
 from azure.storage.blob import PartialBatchErrorException
 from boto3.exceptions import Boto3Error
 from botocore.exceptions import ClientError, EndpointConnectionError
-from google.api_core.exceptions import Conflict, GoogleAPIError
+from google.api_core.exceptions import Conflict, GoogleAPIError, NotFound
 from mock.mock import MagicMock
 
 from barman.annotations import KeepManager
@@ -57,11 +60,15 @@ from barman.cloud import (
     CloudBackupUploader,
     CloudBackupUploaderBarman,
     CloudProviderError,
+    CloudTarIndex,
     CloudTarUploader,
     CloudUploadController,
     CloudUploadingError,
     CloudWalDownloader,
     FileUploadStatistics,
+    RangedStreamingIO,
+    SharedMemoryPartBuffers,
+    tar_member_matches,
 )
 from barman.cloud_providers import (
     CloudProviderOptionUnsupported,
@@ -89,8 +96,10 @@ if sys.version_info.major > 2:
 
 
 try:
+    from queue import Empty as EmptyQueue
     from queue import Queue
 except ImportError:
+    from Queue import Empty as EmptyQueue
     from Queue import Queue
 
 
@@ -154,7 +163,7 @@ class TestCloudInterface(object):
         # a new instance is created
         assert cloud_interface.queue is None
         assert cloud_interface.result_queue is None
-        assert cloud_interface.errors_queue is None
+        assert cloud_interface.part_buffers is None
         assert len(cloud_interface.parts_db) == 0
         assert len(cloud_interface.worker_processes) == 0
 
@@ -170,13 +179,16 @@ class TestCloudInterface(object):
         interface._ensure_async()
         assert interface.queue is not None
         assert interface.result_queue is not None
-        assert interface.errors_queue is not None
         assert len(interface.worker_processes) == jobs_count
-        manager = mp.Manager.return_value
-        assert mp.Manager.call_count == 1
-        assert manager.JoinableQueue.call_count == 1
-        assert manager.Queue.call_count == 3
+        # No manager process is started, the workers use plain queues
+        assert not mp.Manager.called
+        mp.Queue.assert_has_calls(
+            [mock.call(maxsize=jobs_count), mock.call(), mock.call()]
+        )
         assert mp.Process.call_count == jobs_count
+        # AND a ring of shared memory buffers is created for the parts
+        assert interface.part_buffers.count == 2 * jobs_count + 1
+        assert mp.Queue.return_value.put.call_count == 2 * jobs_count + 1
         mp.reset_mock()
 
         # Now that the infrastructure is ready, a new _ensure_async must
@@ -189,9 +201,7 @@ class TestCloudInterface(object):
     def test_retrieve_results(self):
         interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
         interface.queue = Queue()
-        interface.done_queue = Queue()
         interface.result_queue = Queue()
-        interface.errors_queue = Queue()
 
         # With an empty queue, the parts DB is empty
         interface._retrieve_results()
@@ -206,45 +216,69 @@ class TestCloudInterface(object):
 
         # Fill the result queue with mock results, and assert that after
         # the refresh the result queue is empty and the parts_db full with
-        # ordered results
+        # the results in the order they were received
         interface.result_queue.put(
-            {
-                "key": "test/file",
-                "part_number": 2,
-                "end_time": datetime.datetime(2016, 3, 30, 17, 2, 20),
-                "part": {"ETag": "becb2f30c11b6a2b5c069f3c8a5b798c", "PartNumber": "2"},
-            }
+            (
+                "part",
+                {
+                    "key": "test/file",
+                    "part_number": 2,
+                    "end_time": datetime.datetime(2016, 3, 30, 17, 2, 20),
+                    "part": {
+                        "ETag": "becb2f30c11b6a2b5c069f3c8a5b798c",
+                        "PartNumber": "2",
+                    },
+                },
+            )
         )
         interface.result_queue.put(
-            {
-                "key": "test/file",
-                "part_number": 1,
-                "end_time": datetime.datetime(2016, 3, 30, 17, 1, 20),
-                "part": {"ETag": "27960aa8b7b851eb0277f0f3f5d15d68", "PartNumber": "1"},
-            }
+            (
+                "part",
+                {
+                    "key": "test/file",
+                    "part_number": 1,
+                    "end_time": datetime.datetime(2016, 3, 30, 17, 1, 20),
+                    "part": {
+                        "ETag": "27960aa8b7b851eb0277f0f3f5d15d68",
+                        "PartNumber": "1",
+                    },
+                },
+            )
         )
         interface.result_queue.put(
-            {
-                "key": "test/file",
-                "part_number": 3,
-                "end_time": datetime.datetime(2016, 3, 30, 17, 3, 20),
-                "part": {"ETag": "724a0685c99b457d4ddd93814c2d3e2b", "PartNumber": "3"},
-            }
+            (
+                "part",
+                {
+                    "key": "test/file",
+                    "part_number": 3,
+                    "end_time": datetime.datetime(2016, 3, 30, 17, 3, 20),
+                    "part": {
+                        "ETag": "724a0685c99b457d4ddd93814c2d3e2b",
+                        "PartNumber": "3",
+                    },
+                },
+            )
         )
         interface.result_queue.put(
-            {
-                "key": "test/another_file",
-                "part_number": 1,
-                "end_time": datetime.datetime(2016, 3, 30, 17, 5, 20),
-                "part": {"ETag": "89d4f0341d9091aa21ddf67d3b32c34a", "PartNumber": "1"},
-            }
+            (
+                "part",
+                {
+                    "key": "test/another_file",
+                    "part_number": 1,
+                    "end_time": datetime.datetime(2016, 3, 30, 17, 5, 20),
+                    "part": {
+                        "ETag": "89d4f0341d9091aa21ddf67d3b32c34a",
+                        "PartNumber": "1",
+                    },
+                },
+            )
         )
         interface._retrieve_results()
         assert interface.result_queue.empty()
         assert interface.parts_db == {
             "test/file": [
-                {"ETag": "27960aa8b7b851eb0277f0f3f5d15d68", "PartNumber": "1"},
                 {"ETag": "becb2f30c11b6a2b5c069f3c8a5b798c", "PartNumber": "2"},
+                {"ETag": "27960aa8b7b851eb0277f0f3f5d15d68", "PartNumber": "1"},
                 {"ETag": "724a0685c99b457d4ddd93814c2d3e2b", "PartNumber": "3"},
             ],
             "test/another_file": [
@@ -293,18 +327,16 @@ class TestCloudInterface(object):
 
         interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
         interface.queue = mock.MagicMock()
-        interface.errors_queue = Queue()
+        interface.result_queue = Queue()
         interface.queue.get.side_effect = job_collection
         interface._worker_process_main(0)
 
-        # Jobs are been grabbed from queue, and the queue itself has been
-        # notified of tasks being done
+        # Jobs are been grabbed from queue
         assert interface.queue.get.call_count == 4
         # worker_process_execute_job is executed only 3 times, because it's
         # not called for the process stop marker
         assert worker_process_execute_job_mock.call_count == 3
-        assert interface.queue.task_done.call_count == 4
-        assert interface.errors_queue.empty()
+        assert interface.result_queue.empty()
 
         # If during an execution a job an exception is raised, the worker
         # process must put the error in the appropriate queue.
@@ -321,9 +353,8 @@ class TestCloudInterface(object):
         # worker_process_execute_job is executed only 3 times, because it's
         # not called for the process stop marker
         assert worker_process_execute_job_mock.call_count == 3
-        assert interface.queue.task_done.call_count == 4
-        assert interface.errors_queue.get() == "Something is gone wrong"
-        assert interface.errors_queue.empty()
+        assert interface.result_queue.get() == ("error", "Something is gone wrong")
+        assert interface.result_queue.empty()
 
     @mock.patch("barman.cloud.os.unlink")
     @mock.patch("barman.cloud.open")
@@ -344,7 +375,6 @@ class TestCloudInterface(object):
         # an exception is being raised
         interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
         interface.result_queue = Queue()
-        interface.done_queue = Queue()
         with pytest.raises(ValueError):
             interface._worker_process_execute_job({"job_type": "error"}, 1)
         assert upload_part_mock.call_count == 0
@@ -372,12 +402,15 @@ class TestCloudInterface(object):
             10,
         )
         assert not interface.result_queue.empty()
-        assert interface.result_queue.get() == {
-            "end_time": datetime_mock.now.return_value,
-            "key": "this/key",
-            "part": part_result,
-            "part_number": 10,
-        }
+        assert interface.result_queue.get() == (
+            "part",
+            {
+                "end_time": datetime_mock.now.return_value,
+                "key": "this/key",
+                "part": part_result,
+                "part_number": 10,
+            },
+        )
         assert unlink_mock.call_count == 1
 
         # complete_multipart_upload, an S3 call to create a key in the bucket
@@ -394,36 +427,60 @@ class TestCloudInterface(object):
         complete_multipart_upload_mock.assert_called_once_with(
             {"UploadId": "upload_id"}, "this/key", ["parts", "list"]
         )
-        assert not interface.done_queue.empty()
-        assert interface.done_queue.get() == {
-            "end_time": datetime_mock.now.return_value,
-            "key": "this/key",
-            "status": "done",
-        }
+        assert not interface.result_queue.empty()
+        assert interface.result_queue.get() == (
+            "done",
+            {
+                "end_time": datetime_mock.now.return_value,
+                "key": "this/key",
+                "status": "done",
+            },
+        )
 
     def test_handle_async_errors(self):
         # If we the upload process has already raised an error, we immediately
         # exit without doing anything
         interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
         interface.error = "test"
-        interface.errors_queue = None  # If get called raises AttributeError
+        interface.worker_error = "another error"
         interface._handle_async_errors()
 
         # There is no error and the process haven't already errored out
         interface.error = None
-        interface.errors_queue = Queue()
+        interface.worker_error = None
         interface._handle_async_errors()
         assert interface.error is None
 
-        # There is an error in the queue
-        interface.error = None
-        interface.errors_queue.put("Test error")
+        # An error has been received from a worker
+        interface.result_queue = Queue()
+        interface.result_queue.put(("error", "Test error"))
         with pytest.raises(CloudUploadingError):
-            interface._handle_async_errors()
+            interface._retrieve_results()
+        assert interface.error == "Test error"
+        # AND later attempts to wait for the workers fail as well
+        with pytest.raises(CloudUploadingError):
+            interface._retrieve_results(block=True)
+
+    @mock.patch("barman.cloud.CloudInterface._abort")
+    def test_retrieve_results_block(self, abort_mock):
+        """Verify blocking waits stop when a worker terminates unexpectedly."""
+        # GIVEN a cloud interface whose only worker is not running
+        interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
+        interface.result_queue = mock.Mock()
+        interface.result_queue.get_nowait.side_effect = EmptyQueue
+        interface.result_queue.get.side_effect = EmptyQueue
+        interface.worker_processes = [mock.Mock(**{"is_alive.return_value": False})]
 
-    @mock.patch("barman.cloud.CloudInterface._handle_async_errors")
+        # WHEN results are awaited
+        # THEN an error is raised instead of waiting forever
+        with pytest.raises(CloudUploadingError):
+            interface._retrieve_results(block=True)
+        interface.result_queue.get.assert_called_once_with(timeout=1)
+        abort_mock.assert_called_once_with()
+
+    @mock.patch("barman.cloud.CloudInterface._retrieve_results")
     @mock.patch("barman.cloud.CloudInterface._ensure_async")
-    def test_async_upload_part(self, ensure_async_mock, handle_async_errors_mock):
+    def test_async_upload_part(self, ensure_async_mock, retrieve_results_mock):
         tmp_file = NamedTemporaryFile(
             delete=False, prefix="barman-upload-", suffix=".part"
         )
@@ -431,7 +488,8 @@ class TestCloudInterface(object):
         interface.queue = Queue()
         interface.async_upload_part({"UploadId": "upload_id"}, "test/key", tmp_file, 1)
         ensure_async_mock.assert_called_once_with()
-        handle_async_errors_mock.assert_called_once_with()
+        # The results are collected without waiting for the workers
+        retrieve_results_mock.assert_called_once_with()
         assert not interface.queue.empty()
         assert interface.queue.get() == {
             "job_type": "upload_part",
@@ -442,31 +500,190 @@ class TestCloudInterface(object):
         }
 
     @mock.patch("barman.cloud.CloudInterface._retrieve_results")
-    @mock.patch("barman.cloud.CloudInterface._handle_async_errors")
+    @mock.patch("barman.cloud.CloudInterface._ensure_async")
+    def test_async_upload_part_in_memory(
+        self, _ensure_async_mock, _retrieve_results_mock
+    ):
+        """Verify in-memory parts are passed to the workers in shared memory."""
+        # GIVEN a cloud interface with a ring of two shared memory buffers
+        interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
+        interface.queue = Queue()
+        interface.part_buffers = SharedMemoryPartBuffers(2, Queue())
+        try:
+            # WHEN an in-memory part is uploaded
+            interface.async_upload_part(
+                {"UploadId": "upload_id"}, "test/key", BytesIO(b"part content"), 1
+            )
+
+            # THEN the part is copied to a shared memory buffer
+            task = interface.queue.get()
+            assert task["buffer"] == 0
+            assert task["size"] == len(b"part content")
+            # AND the worker can read it from there
+            assert (
+                SharedMemoryPartBuffers.read(task["body"], task["size"])
+                == b"part content"
+            )
+        finally:
+            interface.part_buffers.close()
+
+    @mock.patch("barman.cloud.CloudInterface._retrieve_results")
+    @mock.patch("barman.cloud.CloudInterface._ensure_async")
+    def test_async_upload_part_in_memory_staged(
+        self, _ensure_async_mock, _retrieve_results_mock, tmpdir
+    ):
+        """Verify in-memory parts are staged on disk without shared memory room."""
+        # GIVEN a cloud interface whose shared memory buffers cannot be allocated
+        interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
+        interface.queue = Queue()
+        interface.part_buffers = SharedMemoryPartBuffers(2, Queue())
+
+        # WHEN an in-memory part is uploaded
+        with mock.patch.object(interface.part_buffers, "_has_room", return_value=False):
+            interface.async_upload_part(
+                {"UploadId": "upload_id"},
+                "test/key",
+                BytesIO(b"part content"),
+                1,
+                staging_dir=str(tmpdir),
+            )
+
+        # THEN the part is written to a file in the staging directory
+        task = interface.queue.get()
+        assert "buffer" not in task
+        assert os.path.dirname(task["body"]) == str(tmpdir)
+        with open(task["body"], "rb") as part_file:
+            assert part_file.read() == b"part content"
+        # AND the shared memory buffer is given back to the ring
+        assert interface.part_buffers.free_queue.qsize() == 2
+
+    @mock.patch("barman.cloud.os.unlink")
+    @mock.patch("barman.cloud_providers.aws_s3.S3CloudInterface._upload_part")
+    def test_worker_process_execute_job_in_memory(self, upload_part_mock, unlink_mock):
+        """Verify workers upload the parts read from shared memory."""
+        # GIVEN a cloud interface with a part in a shared memory buffer
+        interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
+        interface.result_queue = Queue()
+        interface.part_buffers = SharedMemoryPartBuffers(1, Queue())
+        upload_part_mock.side_effect = lambda metadata, key, body, number: {
+            "PartNumber": number,
+            "Body": body.read(),
+        }
+        try:
+            index, segment = interface.part_buffers.acquire(4)
+            segment.buf[:4] = b"part"
+
+            # WHEN a worker executes the upload of the part
+            interface._worker_process_execute_job(
+                {
+                    "job_type": "upload_part",
+                    "upload_metadata": {"UploadId": "upload_id"},
+                    "part_number": 1,
+                    "key": "this/key",
+                    "buffer": index,
+                    "body": segment.name,
+                    "size": 4,
+                },
+                0,
+            )
+
+            # THEN the content of the buffer is uploaded
+            kind, result = interface.result_queue.get()
+            assert kind == "part"
+            assert result["part"] == {"PartNumber": 1, "Body": b"part"}
+            # AND the buffer is given back to the ring
+            assert interface.part_buffers.free_queue.get_nowait() == index
+            # AND no file is deleted
+            unlink_mock.assert_not_called()
+        finally:
+            interface.part_buffers.close()
+
+    @mock.patch("barman.cloud.CloudInterface._retrieve_results")
     @mock.patch("barman.cloud.CloudInterface._ensure_async")
     def test_async_complete_multipart_upload(
-        self, ensure_async_mock, handle_async_errors_mock, retrieve_results_mock
+        self, ensure_async_mock, retrieve_results_mock
     ):
         interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
         interface.queue = mock.MagicMock()
-        interface.parts_db = {"key": ["part", "list"]}
+        interface.parts_db = {"key": [{"PartNumber": 2}, {"PartNumber": 1}]}
 
-        def retrieve_results_effect():
-            interface.parts_db["key"].append("complete")
+        def retrieve_results_effect(block=False):
+            if block:
+                interface.parts_db["key"].append({"PartNumber": 3})
 
         retrieve_results_mock.side_effect = retrieve_results_effect
 
         interface.async_complete_multipart_upload({"UploadId": "upload_id"}, "key", 3)
         ensure_async_mock.assert_called_once_with()
-        handle_async_errors_mock.assert_called_once_with()
-        retrieve_results_mock.assert_called_once_with()
+        # The missing parts are awaited
+        retrieve_results_mock.assert_has_calls([mock.call(), mock.call(block=True)])
+
+        # The parts are sorted by part number
+        interface.queue.put.assert_called_once_with(
+            {
+                "job_type": "complete_multipart_upload",
+                "upload_metadata": {"UploadId": "upload_id"},
+                "key": "key",
+                "parts_metadata": [
+                    {"PartNumber": 1},
+                    {"PartNumber": 2},
+                    {"PartNumber": 3},
+                ],
+            }
+        )
+
+    @mock.patch("barman.cloud.time.sleep")
+    @mock.patch("barman.cloud.CloudInterface._ensure_async")
+    def test_multipart_upload_lock(self, _ensure_async_mock, sleep_mock):
+        """
+        Verify the lock shared with other threads is not held while waiting
+        for a multipart upload to be completed.
+        """
+        # GIVEN a cloud interface shared through a lock
+        interface = S3CloudInterface(url="s3://bucket/path/to/dir", encryption=None)
+        interface.queue = mock.MagicMock()
+        interface.result_queue = Queue()
+        interface.worker_processes = [mock.Mock(**{"is_alive.return_value": True})]
+        interface.upload_stats["key"].set_part_start_time(1, None)
+        lock = threading.Lock()
+        # AND workers sending their results while the lock is released
+        results = [
+            (
+                "part",
+                {
+                    "key": "key",
+                    "part_number": 1,
+                    "part": {"PartNumber": 1},
+                    "end_time": None,
+                },
+            ),
+            ("done", {"key": "key", "status": "done"}),
+        ]
+
+        def sleep_effect(_interval):
+            assert not lock.locked()
+            interface.result_queue.put(results.pop(0))
+
+        sleep_mock.side_effect = sleep_effect
+        # AND one of the two parts of the upload still to be uploaded
+        interface.parts_db["key"].append({"PartNumber": 2})
 
+        # WHEN the upload is completed
+        interface.async_complete_multipart_upload(
+            {"UploadId": "upload_id"}, "key", 2, lock=lock
+        )
+        stats = interface.wait_for_multipart_upload("key", lock=lock)
+
+        # THEN the results have been awaited without holding the lock
+        assert sleep_mock.call_count == 2
+        assert stats["status"] == "done"
+        # AND the upload has been completed with all its parts
         interface.queue.put.assert_called_once_with(
             {
                 "job_type": "complete_multipart_upload",
                 "upload_metadata": {"UploadId": "upload_id"},
                 "key": "key",
-                "parts_metadata": ["part", "list", "complete"],
+                "parts_metadata": [{"PartNumber": 1}, {"PartNumber": 2}],
             }
         )
 
@@ -504,6 +721,273 @@ class TestCloudInterface(object):
         interface.test_connectivity.assert_called_once_with()
 
 
+class TestRangedStreamingIO(object):
+    """Tests for the RangedStreamingIO class."""
+
+    @pytest.fixture
+    def cloud_interface(self):
+        content = bytes(range(256)) * 40
+
+        def read_object_range(key, offset, length):
+            return content[offset : offset + length]
+
+        cloud_interface = mock.Mock(content=content)
+        cloud_interface.read_object_range.side_effect = read_object_range
+        yield cloud_interface
+
+    @pytest.mark.parametrize("read_size", (1, 100, 1000, 4096, 100000, -1))
+    def test_read(self, cloud_interface, read_size):
+        """Verify that the parts are returned in order whatever the read size."""
+        # GIVEN a RangedStreamingIO over an object of 10240 bytes
+        content = cloud_interface.content
+        with closing(
+            RangedStreamingIO(cloud_interface, "key", len(content), 3, 1000)
+        ) as reader:
+            # WHEN the object is read
+            chunks = []
+            while True:
+                chunk = reader.read(read_size)
+                if not chunk:
+                    break
+                # THEN every read except the last returns the requested size
+                if read_size > 0 and len(chunk) < read_size:
+                    assert sum(map(len, chunks)) + len(chunk) == len(content)
+                chunks.append(chunk)
+
+        # AND the content matches the object
+        assert b"".join(chunks) == content
+        # AND each part is downloaded once
+        assert cloud_interface.read_object_range.call_count == 11
+        cloud_interface.read_object_range.assert_any_call("key", 10000, 240)
+
+    def test_close(self, cloud_interface):
+        """Verify that closing the reader stops downloading the parts."""
+        # GIVEN a RangedStreamingIO over an object of 10240 bytes
+        content = cloud_interface.content
+        reader = RangedStreamingIO(cloud_interface, "key", len(content), 2, 1000)
+        # AND only the first bytes are read
+        assert reader.read(10) == content[:10]
+
+        # WHEN the reader is closed
+        reader.close()
+
+        # THEN the parts which were not scheduled are never downloaded
+        assert cloud_interface.read_object_range.call_count <= 3
+        assert reader.closed
+
+    def test_read_error(self, cloud_interface):
+        """Verify that a failed part download is raised by read."""
+        # GIVEN a RangedStreamingIO whose first part cannot be downloaded
+        cloud_interface.read_object_range.side_effect = CloudProviderError("boom")
+        with closing(
+            RangedStreamingIO(cloud_interface, "key", 10240, 2, 1000)
+        ) as reader:
+            # WHEN the object is read
+            # THEN the error is raised
+            with pytest.raises(CloudProviderError):
+                reader.read(10)
+
+
+class TestCloudTarIndex(object):
+    """Tests for the index of the members of the uploaded tar archives."""
+
+    @pytest.mark.parametrize(
+        ("name", "patterns", "expected"),
+        (
+            ("global/pg_control", ["global/pg_control"], True),
+            ("./global/pg_control", ["global/pg_control"], True),
+            ("global/pg_control", ["global/*"], True),
+            ("global/pg_control", ["global"], True),
+            ("base/1/1234", ["base"], True),
+            ("base/1/1234", ["base/1"], True),
+            ("base/1/1234", ["base/2", "base/*/12*"], True),
+            ("base/1/1234", ["global"], False),
+            ("base/1/1234", ["base/2"], False),
+            ("global_extra/file", ["global"], False),
+        ),
+    )
+    def test_tar_member_matches(self, name, patterns, expected):
+        """Verify members match their own patterns and their parents' ones."""
+        assert tar_member_matches(name, patterns) is expected
+
+    def test_dumps_loads(self):
+        """Verify an index is loaded as it was dumped."""
+        # GIVEN an index with two entries
+        index = CloudTarIndex("snappy", 10)
+        for name, offset, size, restart_point, end in (
+            ("base", 0, 0, (0, 0), 100),
+            ("base/1", 512, 1000, (100, 10240), 900),
+        ):
+            member = TarInfo(name)
+            member.size = size
+            member.offset = offset
+            member.offset_data = offset + 512
+            index.add(member, restart_point, end)
+
+        # WHEN it is dumped and loaded
+        loaded = CloudTarIndex.loads(index.dumps())
+
+        # THEN the loaded index matches the original
+        assert loaded.compression == "snappy"
+        assert loaded.stream_header_size == 10
+        assert loaded.entries == [
+            CloudTarIndex.Entry("base", 0, 512, 0, 0, 0, 100),
+            CloudTarIndex.Entry("base/1", 512, 1024, 1000, 100, 10240, 900),
+        ]
+        # AND the entries can be looked up by pattern
+        assert loaded.find(["base/*"]) == loaded.entries[1:]
+
+    def test_loads_unsupported_version(self):
+        """Verify an index with an unknown format is rejected."""
+        with pytest.raises(ValueError):
+            CloudTarIndex.loads(b'{"version": 999}\n')
+
+    @pytest.mark.parametrize("compression", (None, "bz2", "gz", "snappy", "lz4"))
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_upload_and_extract_members(self, _boto_mock, compression, tmpdir):
+        """
+        Verifies that the index written by CloudTarUploader allows the members
+        of the archive to be extracted from the parts containing them only.
+        """
+        # GIVEN a source directory containing several files larger than the
+        # blocks written by tar, which are 64KB long
+        src_dir = tmpdir.mkdir("src")
+        contents = {}
+        for i in range(20):
+            name = "dir/file_%02d" % i if i < 15 else "dir/sub/file_%02d" % i
+            contents[name] = os.urandom(70000 + i * 1000)
+            src_dir.join(name).write_binary(contents[name], ensure=True)
+        # AND a cloud interface which keeps the uploaded parts and objects
+        uploaded_parts = []
+        uploaded_objects = {}
+
+        def async_upload_part(upload_metadata, key, body, part_number, staging_dir):
+            uploaded_parts.append(body.read())
+
+        def upload_fileobj(fileobj, key):
+            uploaded_objects[key] = fileobj.read()
+
+        mock_cloud_interface = mock.Mock()
+        mock_cloud_interface.async_upload_part.side_effect = async_upload_part
+        mock_cloud_interface.upload_fileobj.side_effect = upload_fileobj
+
+        # WHEN the directory is uploaded by a CloudTarUploader
+        uploader = CloudTarUploader(
+            mock_cloud_interface,
+            "data.tar",
+            chunk_size=1 << 16,
+            compression=compression,
+        )
+        for name in sorted(contents):
+            uploader.tar.add(str(src_dir.join(name)), arcname=name, recursive=False)
+        uploader.close()
+
+        # THEN the index of the archive is uploaded next to it
+        archive = b"".join(uploaded_parts)
+        index = CloudTarIndex.loads(uploaded_objects["data.tar.index"])
+        assert [entry.name for entry in index.entries] == sorted(contents)
+
+        # AND the members can be extracted from their ranges of the archive
+        cloud_interface = S3CloudInterface(
+            url="s3://bucket/path/to/dir", encryption=None
+        )
+        dest_dir = tmpdir.mkdir("dest")
+        with mock.patch.object(
+            cloud_interface,
+            "read_object_range",
+            side_effect=lambda key, offset, length: archive[offset : offset + length],
+        ) as read_object_range:
+            count = cloud_interface.extract_tar_members(
+                "data.tar", str(dest_dir), index, ["dir/file_07", "dir/sub/*8"], jobs=2
+            )
+        assert count == 2
+        extracted = sorted(
+            os.path.relpath(os.path.join(root, name), str(dest_dir))
+            for root, _dirs, files in os.walk(str(dest_dir))
+            for name in files
+        )
+        assert extracted == ["dir/file_07", "dir/sub/file_18"]
+        for name in extracted:
+            assert dest_dir.join(name).read_binary() == contents[name]
+        # AND only part of the archive is downloaded unless tar compressed it
+        downloaded = sum(call[0][2] for call in read_object_range.call_args_list)
+        if compression in ("bz2", "gz"):
+            assert downloaded == len(archive)
+        else:
+            assert downloaded < len(archive) / 4
+
+
+class TestSharedMemoryPartBuffers(object):
+    """Tests for the ring of shared memory buffers used by the uploads."""
+
+    @pytest.fixture
+    def part_buffers(self):
+        part_buffers = SharedMemoryPartBuffers(2, Queue())
+        yield part_buffers
+        part_buffers.close()
+
+    def test_acquire_reuses_segments(self, part_buffers):
+        """Verify released segments are reused when large enough."""
+        # GIVEN two acquired segments
+        index_a, segment_a = part_buffers.acquire(100)
+        index_b, segment_b = part_buffers.acquire(100)
+        assert index_a != index_b
+        # AND no free segments left
+        assert part_buffers.free_queue.empty()
+
+        # WHEN one is released and a smaller part is passed
+        part_buffers.release(index_a)
+        index, segment = part_buffers.acquire(50)
+
+        # THEN the same segment is reused
+        assert index == index_a
+        assert segment is segment_a
+
+        # WHEN it is released and a larger part is passed
+        part_buffers.release(index)
+        index, segment = part_buffers.acquire(1000)
+
+        # THEN the segment is recreated with the larger size
+        assert index == index_a
+        assert segment is not segment_a
+        assert segment.size >= 1000
+
+    def test_acquire_no_room(self, part_buffers):
+        """Verify no segment is returned when shared memory is full."""
+        # GIVEN shared memory without room for the part
+        with mock.patch("barman.cloud.os.statvfs") as statvfs_mock:
+            statvfs_mock.return_value.f_bavail = 1
+            statvfs_mock.return_value.f_frsize = 4096
+
+            # WHEN a segment is acquired
+            # THEN nothing is returned
+            assert part_buffers.acquire(1 << 20) is None
+        # AND the segment is still free
+        assert part_buffers.free_queue.qsize() == 2
+
+    def test_read(self, part_buffers):
+        """Verify the content of a segment can be read by name."""
+        # GIVEN a segment holding a part
+        _index, segment = part_buffers.acquire(10)
+        segment.buf[:4] = b"part"
+
+        # WHEN the segment is read by name
+        # THEN only the content of the part is returned
+        assert SharedMemoryPartBuffers.read(segment.name, 4) == b"part"
+
+    def test_close(self, part_buffers):
+        """Verify closing the ring destroys the segments."""
+        # GIVEN an acquired segment
+        _index, segment = part_buffers.acquire(10)
+
+        # WHEN the ring is closed
+        part_buffers.close()
+
+        # THEN the segment cannot be attached anymore
+        with pytest.raises(FileNotFoundError):
+            SharedMemoryPartBuffers.read(segment.name, 10)
+
+
 class TestS3CloudInterface(object):
     """
     Tests which verify backend-specific behaviour of S3CloudInterface.
@@ -1324,9 +1808,11 @@ class TestS3CloudInterface(object):
         provider (1000 for AWS S3).
         """
         # GIVEN an S3CloudInterface with the requested delete_batch_size
+        # deleting one batch at a time
         cloud_interface = S3CloudInterface(
             "s3://bucket/path/to/dir",
             encryption=None,
+            jobs=1,
             delete_batch_size=requested_batch_size,
         )
         session_mock = boto_mock.Session.return_value
@@ -1360,6 +1846,53 @@ class TestS3CloudInterface(object):
                 },
             )
 
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_delete_objects_concurrent_batches(self, boto_mock):
+        """
+        Tests that batches are deleted concurrently from a stream of keys and
+        that the progress callback only receives the batches which were deleted.
+        """
+        # GIVEN an S3CloudInterface deleting up to three batches concurrently
+        cloud_interface = S3CloudInterface(
+            "s3://bucket/path/to/dir", encryption=None, jobs=3, delete_batch_size=2
+        )
+        s3_client = boto_mock.Session.return_value.resource.return_value.meta.client
+        running = set()
+        max_running = [0]
+        lock = threading.Lock()
+
+        def delete_objects(Bucket, Delete):
+            keys = [o["Key"] for o in Delete["Objects"]]
+            with lock:
+                running.add(keys[0])
+                max_running[0] = max(max_running[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.discard(keys[0])
+            if "key/2" in keys:
+                return {
+                    "Errors": [{"Key": "key/2", "Code": "Error", "Message": "Failed"}]
+                }
+            return {}
+
+        s3_client.delete_objects.side_effect = delete_objects
+        progress = []
+
+        # WHEN the keys are deleted from a generator
+        with pytest.raises(CloudProviderError):
+            cloud_interface.delete_objects(
+                ("key/%s" % i for i in range(10)), progress=progress.extend
+            )
+
+        # THEN every batch was sent
+        assert s3_client.delete_objects.call_count == 5
+        # AND the batches were deleted concurrently, within the jobs limit
+        assert 1 < max_running[0] <= 3
+        # AND only the batches deleted successfully were reported
+        assert sorted(progress) == sorted(
+            "key/%s" % i for i in range(10) if i not in (2, 3)
+        )
+
     @mock.patch("barman.cloud_providers.aws_s3.boto3")
     def test_delete_objects_partial_failure(self, boto_mock, caplog):
         """
@@ -1827,6 +2360,165 @@ class TestS3CloudInterface(object):
         with open(os.path.join(str(tmpdir), content_filename), "r") as f:
             assert f.read() == content
 
+    @pytest.mark.parametrize(
+        ("compression", "file_ext"),
+        (
+            (None, ""),
+            ("bzip2", ".bz2"),
+            ("gzip", ".gz"),
+            ("snappy", ".snappy"),
+            ("lz4", ".lz4"),
+        ),
+    )
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_extract_tar_ranged(self, boto_mock, compression, file_ext, tmpdir):
+        """
+        Verifies that cloud_interface.extract_tar reassembles the ranged
+        downloads in order before decompressing them.
+        """
+        # GIVEN a tar file containing a single file with random content
+        content = os.urandom(1 << 16).hex()
+        tar_fileobj = _tar_helper(content=content, content_filename="a_file")
+        # WHICH is compressed with the specified compression
+        compressed = _compression_helper(tar_fileobj, compression).read()
+        object_key = "/arbitrary/object/key.tar" + file_ext
+        # AND is returned by a cloud interface which serves ranged requests
+        cloud_interface = S3CloudInterface(
+            "s3://bucket/%s" % object_key, encryption=None
+        )
+        cloud_interface.RANGED_DOWNLOAD_PART_SIZE = 1000
+        s3_client = boto_mock.Session.return_value.resource.return_value.meta.client
+
+        def get_object(Bucket, Key, Range):
+            start, end = Range[len("bytes=") :].split("-")
+            return {"Body": BytesIO(compressed[int(start) : int(end) + 1])}
+
+        s3_client.get_object.side_effect = get_object
+
+        # WHEN the tar is extracted with several jobs
+        cloud_interface.extract_tar(
+            object_key, str(tmpdir), jobs=4, size=len(compressed)
+        )
+
+        # THEN the object is downloaded in parts
+        assert s3_client.get_object.call_count == -(-len(compressed) // 1000)
+        # AND the content of the downloaded file matches the original content
+        with open(os.path.join(str(tmpdir), "a_file"), "r") as f:
+            assert f.read() == content
+
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_extract_tar_small_file_not_ranged(self, boto_mock, tmpdir):
+        """
+        Verifies that cloud_interface.extract_tar streams the objects smaller
+        than a part even when several jobs are requested.
+        """
+        # GIVEN a small tar file returned by a cloud interface
+        tar_fileobj = _tar_helper(content="some content", content_filename="a_file")
+        cloud_interface = S3CloudInterface("s3://bucket/path/to/dir", encryption=None)
+        s3_mock = boto_mock.Session.return_value.resource.return_value
+        s3_mock.Object.return_value.get.return_value = {"Body": tar_fileobj}
+        s3_mock.meta.client.head_object.return_value = {"ContentLength": 10240}
+
+        # WHEN the tar is extracted with several jobs
+        cloud_interface.extract_tar("path/to/dir/key.tar", str(tmpdir), jobs=4)
+
+        # THEN the size of the object is retrieved
+        s3_mock.meta.client.head_object.assert_called_once_with(
+            Bucket="bucket", Key="path/to/dir/key.tar"
+        )
+        # AND the object is streamed with a single request
+        s3_mock.meta.client.get_object.assert_not_called()
+        with open(os.path.join(str(tmpdir), "a_file"), "r") as f:
+            assert f.read() == "some content"
+
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_extract_tar_include(self, boto_mock, tmpdir):
+        """
+        Verifies that cloud_interface.extract_tar only extracts the members
+        matching the include patterns.
+        """
+        # GIVEN a tar file containing two directories
+        tar_fileobj = BytesIO()
+        with TarFile.open(mode="w|", fileobj=tar_fileobj) as tf:
+            for name in ("base/1/1234", "global/pg_control"):
+                ti = TarInfo(name=name)
+                ti.size = len(name)
+                tf.addfile(ti, BytesIO(name.encode("utf-8")))
+        tar_fileobj.seek(0)
+        # AND it is returned by a cloud interface
+        cloud_interface = S3CloudInterface("s3://bucket/path/to/dir", encryption=None)
+        s3_mock = boto_mock.Session.return_value.resource.return_value
+        s3_mock.Object.return_value.get.return_value = {"Body": tar_fileobj}
+
+        # WHEN the tar is extracted with an include pattern
+        cloud_interface.extract_tar(
+            "path/to/dir/key.tar", str(tmpdir), include=["global"]
+        )
+
+        # THEN only the members of the matching directory are extracted
+        assert tmpdir.join("global", "pg_control").read() == "global/pg_control"
+        assert not tmpdir.join("base").exists()
+
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_read_object_range(self, boto_mock):
+        """Verifies that read_object_range requests the expected range."""
+        # GIVEN an S3CloudInterface
+        cloud_interface = S3CloudInterface("s3://bucket/path/to/dir", encryption=None)
+        s3_client = boto_mock.Session.return_value.resource.return_value.meta.client
+        s3_client.get_object.return_value = {"Body": BytesIO(b"some bytes")}
+
+        # WHEN read_object_range is called
+        result = cloud_interface.read_object_range("path/to/key", 100, 10)
+
+        # THEN the range is requested with the thread-safe client
+        s3_client.get_object.assert_called_once_with(
+            Bucket="bucket", Key="path/to/key", Range="bytes=100-109"
+        )
+        # AND the bytes are returned
+        assert result == b"some bytes"
+
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_read_object(self, boto_mock):
+        """Verifies that read_object reads the whole object, if it exists."""
+        # GIVEN an S3CloudInterface
+        cloud_interface = S3CloudInterface("s3://bucket/path/to/dir", encryption=None)
+        s3_client = boto_mock.Session.return_value.resource.return_value.meta.client
+        s3_client.get_object.return_value = {"Body": BytesIO(b"some bytes")}
+
+        # WHEN read_object is called
+        # THEN the object is read with the thread-safe client
+        assert cloud_interface.read_object("path/to/key") == b"some bytes"
+        s3_client.get_object.assert_called_once_with(Bucket="bucket", Key="path/to/key")
+
+        # WHEN the object does not exist
+        s3_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey"}}, "GetObject"
+        )
+        # THEN None is returned
+        assert cloud_interface.read_object("path/to/key") is None
+
+    @mock.patch("barman.cloud_providers.aws_s3.boto3")
+    def test_list_object_etags(self, boto_mock):
+        """Verifies that list_object_etags returns the ETag of every object."""
+        # GIVEN an S3CloudInterface returning two pages of objects
+        cloud_interface = S3CloudInterface("s3://bucket/path/to/dir", encryption=None)
+        s3_client = boto_mock.Session.return_value.resource.return_value.meta.client
+        s3_client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "prefix/a", "ETag": '"1"'}]},
+            {"Contents": [{"Key": "prefix/b/c", "ETag": '"2"'}]},
+            {},
+        ]
+
+        # WHEN list_object_etags is called
+        result = list(cloud_interface.list_object_etags("/prefix/"))
+
+        # THEN the objects are listed without a delimiter
+        s3_client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket="bucket", Prefix="prefix/"
+        )
+        # AND the key and ETag of each object are returned
+        assert result == [("prefix/a", '"1"'), ("prefix/b/c", '"2"')]
+
     @pytest.mark.parametrize(
         # mock_page_data is a list of tuples of (CommonPrefixes, Contents) values
         # where CommonPrefixes and Contents are lists of the prefixes and keys to
@@ -2733,8 +3425,10 @@ class TestAzureCloudInterface(object):
         provider (256 for Azure Blob Storage).
         """
         # GIVEN an AzureCloudInterface with the requested delete_batch_size
+        # deleting one batch at a time
         cloud_interface = AzureCloudInterface(
             "https://storageaccount.blob.core.windows.net/container/path/to/blob",
+            jobs=1,
             delete_batch_size=requested_batch_size,
         )
         container_client = container_client_mock.from_connection_string.return_value
@@ -2970,6 +3664,95 @@ class TestAzureCloudInterface(object):
         with open(os.path.join(str(tmpdir), content_filename), "r") as f:
             assert f.read() == content
 
+    @mock.patch.dict(
+        os.environ, {"AZURE_STORAGE_CONNECTION_STRING": "connection_string"}
+    )
+    @mock.patch("barman.cloud_providers.azure_blob_storage.ContainerClient")
+    def test_get_object_size(self, container_client_mock):
+        """Verifies that get_object_size returns the size of the blob."""
+        # GIVEN an AzureCloudInterface
+        cloud_interface = AzureCloudInterface(
+            "https://storageaccount.blob.core.windows.net/container/path/to/blob"
+        )
+        container_client = container_client_mock.from_connection_string.return_value
+        blob_client = container_client.get_blob_client.return_value
+        blob_client.get_blob_properties.return_value.size = 42
+
+        # WHEN get_object_size is called
+        # THEN the size of the blob is returned
+        assert cloud_interface.get_object_size("path/to/key") == 42
+        container_client.get_blob_client.assert_called_once_with("path/to/key")
+
+    @mock.patch.dict(
+        os.environ, {"AZURE_STORAGE_CONNECTION_STRING": "connection_string"}
+    )
+    @mock.patch("barman.cloud_providers.azure_blob_storage.ContainerClient")
+    def test_read_object_range(self, container_client_mock):
+        """Verifies that read_object_range downloads the expected range."""
+        # GIVEN an AzureCloudInterface
+        cloud_interface = AzureCloudInterface(
+            "https://storageaccount.blob.core.windows.net/container/path/to/blob"
+        )
+        container_client = container_client_mock.from_connection_string.return_value
+        container_client.download_blob.return_value.readall.return_value = b"bytes"
+
+        # WHEN read_object_range is called
+        result = cloud_interface.read_object_range("path/to/key", 100, 10)
+
+        # THEN the range is downloaded
+        container_client.download_blob.assert_called_once_with(
+            "path/to/key", offset=100, length=10
+        )
+        assert result == b"bytes"
+
+    @mock.patch.dict(
+        os.environ, {"AZURE_STORAGE_CONNECTION_STRING": "connection_string"}
+    )
+    @mock.patch("barman.cloud_providers.azure_blob_storage.ContainerClient")
+    def test_read_object(self, container_client_mock):
+        """Verifies that read_object reads the whole blob, if it exists."""
+        # GIVEN an AzureCloudInterface
+        cloud_interface = AzureCloudInterface(
+            "https://storageaccount.blob.core.windows.net/container/path/to/blob"
+        )
+        container_client = container_client_mock.from_connection_string.return_value
+        container_client.download_blob.return_value.readall.return_value = b"bytes"
+
+        # WHEN read_object is called
+        # THEN the whole blob is downloaded
+        assert cloud_interface.read_object("path/to/key") == b"bytes"
+        container_client.download_blob.assert_called_once_with("path/to/key")
+
+        # WHEN the blob does not exist
+        container_client.download_blob.side_effect = ResourceNotFoundError()
+        # THEN None is returned
+        assert cloud_interface.read_object("path/to/key") is None
+
+    @mock.patch.dict(
+        os.environ, {"AZURE_STORAGE_CONNECTION_STRING": "connection_string"}
+    )
+    @mock.patch("barman.cloud_providers.azure_blob_storage.ContainerClient")
+    def test_list_object_etags(self, container_client_mock):
+        """Verifies that list_object_etags returns the ETag of every blob."""
+        # GIVEN an AzureCloudInterface listing two blobs
+        cloud_interface = AzureCloudInterface(
+            "https://storageaccount.blob.core.windows.net/container/path/to/blob"
+        )
+        container_client = container_client_mock.from_connection_string.return_value
+        container_client.list_blobs.return_value = [
+            mock.Mock(etag="1"),
+            mock.Mock(etag="2"),
+        ]
+        container_client.list_blobs.return_value[0].name = "prefix/a"
+        container_client.list_blobs.return_value[1].name = "prefix/b/c"
+
+        # WHEN list_object_etags is called
+        result = list(cloud_interface.list_object_etags("prefix/"))
+
+        # THEN the key and ETag of every blob under the prefix are returned
+        container_client.list_blobs.assert_called_once_with(name_starts_with="prefix/")
+        assert result == [("prefix/a", "1"), ("prefix/b/c", "2")]
+
     @mock.patch("barman.cloud_providers.azure_blob_storage.ContainerClient")
     def test_get_prefixes(self, _container_client_mock):
         """Verify that get_prefixes raises a NotImplementedError"""
@@ -3498,6 +4281,81 @@ class TestGoogleCloudInterface(TestCase):
                             test_case["compression"],
                         )
 
+    @mock.patch("barman.cloud_providers.google_cloud_storage.storage")
+    def test_get_object_size(self, gcs_storage_mock):
+        """Verifies that get_object_size returns the size of the blob."""
+        # GIVEN a GoogleCloudInterface
+        cloud_interface = GoogleCloudInterface(
+            "https://console.cloud.google.com/storage/browser/barman-test/path/to/object/"
+        )
+        blob_mock = gcs_storage_mock.Blob.return_value
+        blob_mock.size = 42
+
+        # WHEN get_object_size is called
+        result = cloud_interface.get_object_size("path/to/key")
+
+        # THEN the blob metadata is loaded and its size returned
+        blob_mock.reload.assert_called_once_with()
+        assert result == 42
+
+    @mock.patch("barman.cloud_providers.google_cloud_storage.storage")
+    def test_read_object_range(self, gcs_storage_mock):
+        """Verifies that read_object_range downloads the expected range."""
+        # GIVEN a GoogleCloudInterface
+        cloud_interface = GoogleCloudInterface(
+            "https://console.cloud.google.com/storage/browser/barman-test/path/to/object/"
+        )
+        blob_mock = gcs_storage_mock.Blob.return_value
+        blob_mock.download_as_bytes.return_value = b"bytes"
+
+        # WHEN read_object_range is called
+        result = cloud_interface.read_object_range("path/to/key", 100, 10)
+
+        # THEN the range is downloaded, the end being inclusive
+        blob_mock.download_as_bytes.assert_called_once_with(start=100, end=109)
+        assert result == b"bytes"
+
+    @mock.patch("barman.cloud_providers.google_cloud_storage.storage")
+    def test_read_object(self, gcs_storage_mock):
+        """Verifies that read_object reads the whole object, if it exists."""
+        # GIVEN a GoogleCloudInterface
+        cloud_interface = GoogleCloudInterface(
+            "https://console.cloud.google.com/storage/browser/barman-test/path/to/object/"
+        )
+        blob_mock = gcs_storage_mock.Blob.return_value
+        blob_mock.download_as_bytes.return_value = b"bytes"
+
+        # WHEN read_object is called
+        # THEN the whole object is downloaded
+        assert cloud_interface.read_object("path/to/key") == b"bytes"
+        blob_mock.download_as_bytes.assert_called_once_with()
+
+        # WHEN the object does not exist
+        blob_mock.download_as_bytes.side_effect = NotFound("not found")
+        # THEN None is returned
+        assert cloud_interface.read_object("path/to/key") is None
+
+    @mock.patch("barman.cloud_providers.google_cloud_storage.storage")
+    def test_list_object_etags(self, gcs_storage_mock):
+        """Verifies that list_object_etags returns the ETag of every object."""
+        # GIVEN a GoogleCloudInterface listing two objects
+        cloud_interface = GoogleCloudInterface(
+            "https://console.cloud.google.com/storage/browser/barman-test/path/to/object/"
+        )
+        blobs = [mock.Mock(etag="1"), mock.Mock(etag="2")]
+        blobs[0].name = "prefix/a"
+        blobs[1].name = "prefix/b/c"
+        cloud_interface.client.list_blobs.return_value = blobs
+
+        # WHEN list_object_etags is called
+        result = list(cloud_interface.list_object_etags("prefix/"))
+
+        # THEN the key and ETag of every object under the prefix are returned
+        cloud_interface.client.list_blobs.assert_called_once_with(
+            cloud_interface.container_client, prefix="prefix/"
+        )
+        assert result == [("prefix/a", "1"), ("prefix/b/c", "2")]
+
     @mock.patch("barman.cloud_providers.google_cloud_storage.storage")
     def test_get_prefixes(self, _gcs_storage_mock):
         """Verify that get_prefixes raises a NotImplementedError"""
@@ -3905,26 +4763,22 @@ class TestCloudBackupCatalog(object):
     def raise_exception(self):
         raise Exception("something went wrong reading backup.info")
 
-    def mock_remote_open(self, _):
+    def mock_read_object(self, key):
         """
-        Helper function which alternates between successful and unsuccessful
-        remote_open responses.
+        Helper function which fails reading the backup.info files of the
+        backups listed in ``self.unreadable``.
         """
-        try:
-            if self.remote_open_should_succeed:
-                return self.get_backup_info_file_object()
-            else:
-                raise Exception("something went wrong reading backup.info")
-        finally:
-            self.remote_open_should_succeed = not self.remote_open_should_succeed
+        if key.split("/")[-2] in self.unreadable:
+            raise Exception("something went wrong reading backup.info")
+        return self.get_backup_info_file_object().read()
 
     def test_can_list_single_backup(self):
         mock_cloud_interface = MagicMock()
         mock_cloud_interface.list_bucket.return_value = [
             "mt-backups/test-server/base/20210723T133818/",
         ]
-        mock_cloud_interface.remote_open.return_value = (
-            self.get_backup_info_file_object()
+        mock_cloud_interface.read_object.return_value = (
+            self.get_backup_info_file_object().read()
         )
         catalog = CloudBackupCatalog(mock_cloud_interface, "test-server")
         backups = catalog.get_backup_list()
@@ -3932,14 +4786,14 @@ class TestCloudBackupCatalog(object):
         assert "20210723T133818" in backups
 
     def test_backups_can_be_listed_if_one_is_unreadable(self):
-        self.remote_open_should_succeed = True
+        self.unreadable = ["20210723T154445"]
         mock_cloud_interface = MagicMock()
         mock_cloud_interface.list_bucket.return_value = [
             "mt-backups/test-server/base/20210723T133818/",
             "mt-backups/test-server/base/20210723T154445/",
             "mt-backups/test-server/base/20210723T154554/",
         ]
-        mock_cloud_interface.remote_open.side_effect = self.mock_remote_open
+        mock_cloud_interface.read_object.side_effect = self.mock_read_object
         catalog = CloudBackupCatalog(mock_cloud_interface, "test-server")
         backups = catalog.get_backup_list()
         assert len(backups) == 2
@@ -3949,17 +4803,98 @@ class TestCloudBackupCatalog(object):
 
     def test_unreadable_backup_ids_are_stored(self):
         """Test we can retrieve IDs of backups which could not be read"""
-        self.remote_open_should_succeed = False
+        self.unreadable = ["20210723T133818"]
         mock_cloud_interface = MagicMock()
         mock_cloud_interface.list_bucket.return_value = [
             "mt-backups/test-server/base/20210723T133818/",
         ]
-        mock_cloud_interface.remote_open.side_effect = self.mock_remote_open
+        mock_cloud_interface.read_object.side_effect = self.mock_read_object
         catalog = CloudBackupCatalog(mock_cloud_interface, "test-server")
         catalog.get_backup_list()
         assert len(catalog.unreadable_backups) == 1
         assert "20210723T133818" in catalog.unreadable_backups
 
+    def test_backup_list_cache(self, tmpdir):
+        """Verify the cached backup.info files are revalidated by their ETag."""
+        # GIVEN a cloud interface listing two backups and their tar files
+        mock_cloud_interface = MagicMock(
+            url="s3://bucket/mt-backups", path="mt-backups"
+        )
+        etags = {
+            "mt-backups/test-server/base/20210723T133818/backup.info": "1",
+            "mt-backups/test-server/base/20210723T133818/data.tar": "2",
+            "mt-backups/test-server/base/20210723T154445/backup.info": "3",
+        }
+        mock_cloud_interface.list_object_etags.side_effect = lambda prefix: (
+            list(etags.items())
+        )
+        mock_cloud_interface.read_object.side_effect = (
+            lambda key: self.get_backup_info_file_object().read()
+        )
+
+        # WHEN the backups are listed by a catalog using a cache directory
+        catalog = CloudBackupCatalog(
+            mock_cloud_interface, "test-server", cache_dir=str(tmpdir)
+        )
+        backups = catalog.get_backup_list()
+
+        # THEN the backups are found with a single listing
+        assert sorted(backups) == ["20210723T133818", "20210723T154445"]
+        mock_cloud_interface.list_object_etags.assert_called_once_with(
+            "mt-backups/test-server/base/"
+        )
+        mock_cloud_interface.list_bucket.assert_not_called()
+        # AND only the backup.info files are downloaded
+        assert mock_cloud_interface.read_object.call_count == 2
+        # AND they are cached in a JSON file
+        with open(catalog.backup_info_cache_path) as cache_file:
+            cached = json.load(cache_file)["data"]
+        assert sorted(cached) == ["20210723T133818", "20210723T154445"]
+
+        # WHEN one of the backup.info files changes
+        etags["mt-backups/test-server/base/20210723T154445/backup.info"] = "4"
+        mock_cloud_interface.read_object.reset_mock()
+        # AND the backups are listed again by a new catalog
+        catalog = CloudBackupCatalog(
+            mock_cloud_interface, "test-server", cache_dir=str(tmpdir)
+        )
+        backups = catalog.get_backup_list()
+
+        # THEN both backups are found
+        assert sorted(backups) == ["20210723T133818", "20210723T154445"]
+        assert backups["20210723T133818"].end_time is not None
+        # AND only the changed backup.info file is downloaded
+        mock_cloud_interface.read_object.assert_called_once_with(
+            "mt-backups/test-server/base/20210723T154445/backup.info"
+        )
+
+    def test_backup_list_unreadable_cache(self, tmpdir):
+        """Verify an unreadable cache file is ignored."""
+        # GIVEN a corrupted cache file
+        mock_cloud_interface = MagicMock(
+            url="s3://bucket/mt-backups", path="mt-backups"
+        )
+        catalog = CloudBackupCatalog(
+            mock_cloud_interface, "test-server", cache_dir=str(tmpdir)
+        )
+        with open(catalog.backup_info_cache_path, "wb") as cache_file:
+            cache_file.write(b"not a cache")
+        mock_cloud_interface.list_object_etags.return_value = [
+            ("mt-backups/test-server/base/20210723T133818/backup.info", "1"),
+        ]
+        mock_cloud_interface.read_object.return_value = (
+            self.get_backup_info_file_object().read()
+        )
+
+        # WHEN the backups are listed
+        backups = catalog.get_backup_list()
+
+        # THEN the backup.info file is downloaded
+        assert list(backups) == ["20210723T133818"]
+        mock_cloud_interface.read_object.assert_called_once_with(
+            "mt-backups/test-server/base/20210723T133818/backup.info"
+        )
+
     def test_can_remove_a_backup_from_cache(self):
         """Test we can remove a backup from the cached list"""
         mock_cloud_interface = MagicMock()
@@ -3967,8 +4902,8 @@ class TestCloudBackupCatalog(object):
             "mt-backups/test-server/base/20210723T133818/",
             "mt-backups/test-server/base/20210723T154445/",
         ]
-        mock_cloud_interface.remote_open.side_effect = (
-            lambda x: self.get_backup_info_file_object()
+        mock_cloud_interface.read_object.side_effect = (
+            lambda x: self.get_backup_info_file_object().read()
         )
         catalog = CloudBackupCatalog(mock_cloud_interface, "test-server")
         backups = catalog.get_backup_list()
@@ -4061,6 +4996,109 @@ class TestCloudBackupCatalog(object):
         assert "000000010000000000000075" not in wals
         assert "000000010000000000000076" in wals
 
+    @staticmethod
+    def _list_bucket(keys):
+        """
+        Return a function emulating CloudInterface.list_bucket on the given keys.
+        """
+
+        def list_bucket(prefix="", delimiter="/"):
+            items = []
+            for key in sorted(keys):
+                if not key.startswith(prefix):
+                    continue
+                if delimiter:
+                    head, sep, _ = key[len(prefix) :].partition(delimiter)
+                    if sep:
+                        key = prefix + head + delimiter
+                if key not in items:
+                    items.append(key)
+            return items
+
+        return list_bucket
+
+    def test_wal_index(self, tmpdir):
+        """Verify the WAL index is refreshed without listing the whole archive."""
+        # GIVEN a WAL archive spread over timelines and WAL prefixes
+        prefix = "mt-backups/test-server/wals/"
+        keys = set(
+            prefix + key
+            for key in (
+                "0000000100000000/000000010000000000000001.gz",
+                "0000000100000000/000000010000000000000002.gz",
+                "0000000100000001/000000010000000100000001.gz",
+                "0000000100000001/000000010000000100000002.gz",
+                "0000000100000002/000000010000000200000001.gz",
+                "0000000100000003/000000010000000300000001.gz",
+                "00000002.history.gz",
+                "0000000200000003/000000020000000300000002.gz",
+            )
+        )
+        mock_cloud_interface = MagicMock(
+            url="s3://bucket/mt-backups", path="mt-backups"
+        )
+        mock_cloud_interface.list_bucket.side_effect = self._list_bucket(keys)
+
+        def get_wal_paths():
+            catalog = CloudBackupCatalog(
+                mock_cloud_interface, "test-server", cache_dir=str(tmpdir)
+            )
+            mock_cloud_interface.list_bucket.reset_mock()
+            return catalog, catalog.get_wal_paths()
+
+        def expected_wal_paths():
+            return dict((os.path.basename(key).replace(".gz", ""), key) for key in keys)
+
+        # WHEN the WAL paths are retrieved for the first time
+        catalog, wal_paths = get_wal_paths()
+        # THEN the whole archive is listed
+        assert wal_paths == expected_wal_paths()
+        mock_cloud_interface.list_bucket.assert_called_once_with(prefix, delimiter="")
+        # AND the WAL index is written to the cache directory, as JSON
+        with open(catalog.wal_index_path) as index_file:
+            assert json.load(index_file)["data"]["wal_paths"] == wal_paths
+
+        # WHEN a WAL is removed through the catalog and the index is saved
+        keys.remove(prefix + "0000000100000001/000000010000000100000002.gz")
+        catalog.remove_wal_from_cache("000000010000000100000002")
+        catalog.save_wal_index()
+        # AND the oldest WAL and a whole WAL prefix are removed
+        keys.remove(prefix + "0000000100000000/000000010000000000000001.gz")
+        keys.remove(prefix + "0000000100000002/000000010000000200000001.gz")
+        # AND WALs are archived at the end of both timelines, in new WAL
+        # prefixes too, including the timeline preceding the timeline switch
+        keys.add(prefix + "0000000100000003/000000010000000300000002.gz")
+        keys.add(prefix + "0000000100000004/000000010000000400000001.gz")
+        keys.add(prefix + "0000000200000003/000000020000000300000003.gz")
+        keys.add(prefix + "0000000200000004/000000020000000400000001.gz")
+        catalog, wal_paths = get_wal_paths()
+
+        # THEN the WAL paths match the content of the archive
+        assert wal_paths == expected_wal_paths()
+        # AND only the root, the lowest and the highest indexed WAL prefix
+        # of each timeline and the new WAL prefixes have been listed
+        assert sorted(mock_cloud_interface.list_bucket.call_args_list) == sorted(
+            [mock.call(prefix)]
+            + [
+                mock.call(prefix + hash_dir + "/", delimiter="")
+                for hash_dir in (
+                    "0000000100000000",
+                    "0000000100000003",
+                    "0000000100000004",
+                    "0000000200000003",
+                    "0000000200000004",
+                )
+            ]
+        )
+
+        # WHEN the WAL index is older than the maximum age
+        with mock.patch.object(CloudBackupCatalog, "WAL_INDEX_MAX_AGE", 0):
+            catalog, wal_paths = get_wal_paths()
+
+        # THEN the whole archive is listed
+        assert wal_paths == expected_wal_paths()
+        mock_cloud_interface.list_bucket.assert_called_once_with(prefix, delimiter="")
+
     def _get_backup_files(
         self, backup_id, list_bucket_response=[], tablespaces=[], allow_missing=False
     ):
@@ -4124,6 +5162,38 @@ class TestCloudBackupCatalog(object):
         # AND it has no additional files
         assert len(backup_files[16388].additional_files) == 0
 
+    def test_get_backup_files_with_indexes(self):
+        """Test the tar member indexes are attached to their archives."""
+        # GIVEN a backup with one tablespace
+        backup_files = self._get_backup_files(
+            "20210723T133818",
+            # AND the cloud provider returns the archives along with the index of
+            # data.tar.gz and of its additional file
+            list_bucket_response=[
+                "mt-backups/test-server/base/20210723T133818/",
+                "mt-backups/test-server/base/20210723T133818/data.tar.gz",
+                "mt-backups/test-server/base/20210723T133818/data.tar.gz.index",
+                "mt-backups/test-server/base/20210723T133818/data_0000.tar.gz",
+                "mt-backups/test-server/base/20210723T133818/data_0000.tar.gz.index",
+                "mt-backups/test-server/base/20210723T133818/16388.tar.gz",
+            ],
+            tablespaces=[16388],
+        )
+        # THEN the indexes are not mistaken for archives
+        assert backup_files[None].compression == "gzip"
+        assert len(backup_files[None].additional_files) == 1
+        # AND each index is attached to its archive
+        assert (
+            backup_files[None].index_path
+            == "mt-backups/test-server/base/20210723T133818/data.tar.gz.index"
+        )
+        assert (
+            backup_files[None].additional_files[0].index_path
+            == "mt-backups/test-server/base/20210723T133818/data_0000.tar.gz.index"
+        )
+        # AND archives without an index have no index path
+        assert backup_files[16388].index_path is None
+
     def test_get_backup_files_fails_if_missing(self):
         """Test we fail if any backup files are missing."""
         with pytest.raises(SystemExit) as exc:
@@ -4220,6 +5290,9 @@ class TestCloudBackupCatalog(object):
             except KeyError:
                 return None
 
+        def read_object(key):
+            return in_memory_object_store.get(key)
+
         def delete_objects(object_list):
             for key in object_list:
                 try:
@@ -4238,6 +5311,7 @@ class TestCloudBackupCatalog(object):
 
         cloud_interface_mock.upload_fileobj.side_effect = upload_fileobj
         cloud_interface_mock.remote_open.side_effect = remote_open
+        cloud_interface_mock.read_object.side_effect = read_object
         cloud_interface_mock.delete_objects.side_effect = delete_objects
         cloud_interface_mock.list_bucket.side_effect = list_bucket
 
@@ -4417,13 +5491,12 @@ class TestCloudBackupCatalog(object):
             ),
         ),
     )
-    @mock.patch("barman.cloud.CloudBackupCatalog.get_wal_paths")
-    def test_get_latest_archived_wals_info(
-        self, mock_get_wal_paths, wal_paths, expected_result
-    ):
-        mock_cloud_interface = mock.Mock(path="namespace")
+    def test_get_latest_archived_wals_info(self, wal_paths, expected_result):
+        mock_cloud_interface = mock.Mock(path="")
+        mock_cloud_interface.list_bucket.side_effect = self._list_bucket(
+            wal_paths.values()
+        )
         catalog = CloudBackupCatalog(mock_cloud_interface, "server_name")
-        mock_get_wal_paths.return_value = wal_paths
 
         timelines = catalog.get_latest_archived_wals_info()
 
@@ -4437,6 +5510,11 @@ class TestCloudBackupCatalog(object):
                 timelines["00000005"].compression
                 == expected_result["00000005"].compression
             )
+            # AND only the highest WAL prefix was listed
+            assert mock_cloud_interface.list_bucket.call_args_list == [
+                mock.call("server_name/wals/"),
+                mock.call("server_name/wals/0000000500000003/", delimiter=""),
+            ]
 
 
 class TestCloudTarUploader(object):
@@ -4448,13 +5526,19 @@ class TestCloudTarUploader(object):
         # cloud_backup argument parser
         (None, "bz2", "gz", "snappy", "lz4"),
     )
+    # Parts are kept in memory up to 64MB and staged in temporary files otherwise
+    @pytest.mark.parametrize("chunk_size", (5 << 20, 128 << 20))
     @mock.patch("barman.cloud.CloudInterface")
-    def test_add(self, mock_cloud_interface, compression, tmpdir):
+    def test_add(self, mock_cloud_interface, compression, chunk_size, tmpdir):
         """
         Verifies that when files are added to the CloudTarUploader tar file
         the bytes passed to async_upload_part represent a valid tar file.
         """
-        # GIVEN a cloud interface
+        # GIVEN a cloud interface which keeps the uploaded parts
+        uploaded_parts = []
+        mock_cloud_interface.async_upload_part.side_effect = (
+            lambda **kwargs: uploaded_parts.append(kwargs["body"].read())
+        )
         # AND a source directory containing one file
         src_file = "arbitrary_file_name"
         content = "arbitrary strong representing file content"
@@ -4462,7 +5546,6 @@ class TestCloudTarUploader(object):
         with open(os.path.join(str(tmpdir), src_file), "w") as f:
             f.write(content)
         # AND a CloudTarUploader using the configured compression
-        chunk_size = 5 << 20
         uploader = CloudTarUploader(
             mock_cloud_interface, key, chunk_size=chunk_size, compression=compression
         )
@@ -4479,10 +5562,7 @@ class TestCloudTarUploader(object):
         mock_cloud_interface.async_upload_part.assert_called_once()
         # AND the body argument of the async_upload_part call contains the source
         # file with the specified compression
-        uploaded_tar = mock_cloud_interface.async_upload_part.call_args_list[0][1][
-            "body"
-        ]
-        with open(uploaded_tar.name, "rb") as uploaded_data:
+        with BytesIO(uploaded_parts[0]) as uploaded_data:
             tar_fileobj = uploaded_data
             if compression is None:
                 tar_mode = "r|"
@@ -4517,11 +5597,12 @@ class TestCloudTarUploader(object):
         expected properties. This test ensures Python 3.14 compatibility after
         the change from staticmethod(partial(...)) to instance method.
         """
-        # GIVEN a CloudTarUploader instance
+        # GIVEN a CloudTarUploader instance with chunks too large to be kept
+        # in memory
         uploader = CloudTarUploader(
             mock_cloud_interface,
             key="test/key",
-            chunk_size=1024,
+            chunk_size=CloudTarUploader.MAX_MEMORY_PART_SIZE + 1,
             compression=None,
         )
 
@@ -4542,6 +5623,26 @@ class TestCloudTarUploader(object):
         buffer_file.close()
         os.unlink(buffer_file.name)
 
+    @mock.patch("barman.cloud.CloudInterface")
+    def test_buffer_method_in_memory(self, mock_cloud_interface):
+        """
+        Verifies that the _buffer method returns an in-memory buffer for the
+        chunks which can be kept in memory.
+        """
+        # GIVEN a CloudTarUploader instance with small chunks
+        uploader = CloudTarUploader(
+            mock_cloud_interface,
+            key="test/key",
+            chunk_size=5 << 20,
+            compression=None,
+        )
+
+        # WHEN _buffer is called
+        buffer_file = uploader._buffer()
+
+        # THEN it returns a BytesIO
+        assert isinstance(buffer_file, BytesIO)
+
     @pytest.mark.parametrize(
         (
             "max_bandwidth",
@@ -4802,6 +5903,60 @@ class TestCloudUploadController(object):
         # THEN the chunk_size is set to the expected value
         assert controller.chunk_size == expected_chunk_size
 
+    @pytest.mark.parametrize(
+        ("streams", "expected_keys"),
+        (
+            (1, ["prefix/data.tar"]),
+            (2, ["prefix/data.tar", "prefix/data_s01.tar"]),
+        ),
+    )
+    @mock.patch("barman.cloud.CloudInterface")
+    def test_upload_directory_streams(
+        self, mock_cloud_interface, streams, expected_keys, tmpdir
+    ):
+        """Verify the files of a directory are split among the streams."""
+        # GIVEN a cloud interface which keeps the uploaded parts of each key
+        mock_cloud_interface.MIN_CHUNK_SIZE = 5 << 20
+        mock_cloud_interface.MAX_ARCHIVE_SIZE = 1 << 40
+        mock_cloud_interface.MAX_CHUNKS_PER_FILE = 10000
+        uploaded_parts = {}
+        mock_cloud_interface.async_upload_part.side_effect = lambda **kwargs: (
+            uploaded_parts.setdefault(kwargs["key"], []).append(kwargs["body"].read())
+        )
+        # AND a source directory containing files of different sizes
+        src = tmpdir.mkdir("pgdata")
+        files = {"base/1/1": 3000, "base/1/2": 2000, "base/1/3": 1000}
+        for name, size in files.items():
+            src.join(name).write(b"x" * size, mode="wb", ensure=True)
+        # AND an upload controller building the requested number of streams
+        controller = CloudUploadController(
+            mock_cloud_interface, "prefix", 1 << 30, None, streams=streams
+        )
+
+        # WHEN the directory is uploaded
+        controller.upload_directory("pgdata", str(src), "data")
+        controller.close()
+
+        # THEN an archive is uploaded for each stream
+        assert sorted(uploaded_parts) == expected_keys
+        members = {}
+        for key, parts in uploaded_parts.items():
+            with open_tar(fileobj=BytesIO(b"".join(parts)), mode="r|") as tf:
+                members[key] = {member.name: member.isdir() for member in tf}
+        # AND the directories are in the main archive
+        assert {"base", "base/1"} <= set(members["prefix/data.tar"])
+        # AND every file is in exactly one archive
+        uploaded_files = [
+            name
+            for key in members
+            for name, is_dir in members[key].items()
+            if not is_dir
+        ]
+        assert sorted(uploaded_files) == sorted(files)
+        # AND every archive contains some files
+        for key in members:
+            assert not all(members[key].values())
+
 
 class TestCloudBackupUploader(object):
     """Tests for the CloudBackupUploader class."""
@@ -4896,6 +6051,7 @@ class TestCloudBackupUploader(object):
             None,
             expected_min_chunk_size,
             expected_max_bandwidth,
+            streams=1,
         )
 
     @pytest.mark.parametrize("backup_should_fail", (False, True))
@@ -5056,6 +6212,7 @@ class TestCloudBackupUploaderBarman(object):
             None,
             expected_min_chunk_size,
             expected_max_bandwidth,
+            streams=1,
         )
 
 
@@ -5801,7 +6958,7 @@ class TestCloudWalDownloader:
         mock_thread_class.assert_has_calls(
             [
                 mock.call(
-                    target=downloader._download_single_wal,
+                    target=downloader._download_to_spool,
                     args=(
                         source_dir + extra_wal_1,
                         "/path/to/spool/{}".format(extra_wal_1),
@@ -5809,7 +6966,7 @@ class TestCloudWalDownloader:
                 ),
                 mock.call().start(),
                 mock.call(
-                    target=downloader._download_single_wal,
+                    target=downloader._download_to_spool,
                     args=(
                         source_dir + extra_wal_2,
                         "/path/to/spool/{}".format(extra_wal_2),
@@ -5882,7 +7039,7 @@ class TestCloudWalDownloader:
         mock_thread_class.assert_has_calls(
             [
                 mock.call(
-                    target=downloader._download_single_wal,
+                    target=downloader._download_to_spool,
                     args=(
                         source_dir + extra_wal_1,
                         "/path/to/spool/000000010000000100000002",
@@ -5890,7 +7047,7 @@ class TestCloudWalDownloader:
                 ),
                 mock.call().start(),
                 mock.call(
-                    target=downloader._download_single_wal,
+                    target=downloader._download_to_spool,
                     args=(
                         source_dir + extra_wal_2,
                         "/path/to/spool/000000010000000100000003",
@@ -6018,7 +7175,9 @@ class TestCloudWalDownloader:
         source_dir = "bucket/barman/test_server/wals/{}/".format(wal_dir)
         valid_wal = source_dir + requested_wal_name
         invalid_file = source_dir + "invalid_file.txt"
-        mock_cloud_interface.list_bucket.return_value = [valid_wal, invalid_file]
+        mock_cloud_interface.list_bucket.side_effect = lambda prefix: (
+            [valid_wal, invalid_file] if prefix == source_dir else []
+        )
         # Mock _validate_wal_path to return True for the valid and False for the invalid
         mock_validate_wal_path.side_effect = [True, False]
 
@@ -6189,7 +7348,7 @@ class TestCloudWalDownloader:
         mock_cloud_interface.path = "bucket/barman"
         wal_dir = "0000000100000002"
         source_dir = "bucket/barman/test_server/wals/{}/".format(wal_dir)
-        mock_cloud_interface.list_bucket.return_value = [
+        wal_paths = [
             source_dir + "0000000100000002000000D1.gz",
             source_dir + "0000000100000002000000D2",
             source_dir + "0000000100000002000000D3.00000028.backup.zst",
@@ -6201,6 +7360,9 @@ class TestCloudWalDownloader:
             source_dir + "0000000100000002000000D7.partial",
             source_dir + "0000000100000002000000D8.partial.zst",
         ]
+        mock_cloud_interface.list_bucket.side_effect = lambda prefix: (
+            wal_paths if prefix == source_dir else []
+        )
 
         # GIVEN a CloudWalDownloader with the mocked cloud interface
         downloader = CloudWalDownloader(mock_cloud_interface, "test_server")
@@ -6222,6 +7384,136 @@ class TestCloudWalDownloader:
             source_dir + "0000000100000002000000D8.partial.zst",
         ]
 
+    def test_get_wals_to_download_next_directory(self):
+        """
+        Test that _get_wals_to_download continues in the following WAL directory
+        of the same timeline when the requested WAL is at the end of its directory.
+        """
+        # GIVEN a bucket where the requested WAL is the last of its directory
+        mock_cloud_interface = MagicMock()
+        mock_cloud_interface.path = "bucket/barman"
+        wals_dir = "bucket/barman/test_server/wals/"
+        wal_paths = {
+            wals_dir
+            + "0000000100000002/": [
+                wals_dir + "0000000100000002/0000000100000002000000FE",
+                wals_dir + "0000000100000002/0000000100000002000000FF.gz",
+            ],
+            wals_dir
+            + "0000000100000003/": [
+                wals_dir + "0000000100000003/000000010000000300000001.gz",
+                wals_dir + "0000000100000003/000000010000000300000000.gz",
+                wals_dir + "0000000100000003/000000010000000300000002.gz",
+            ],
+        }
+        mock_cloud_interface.list_bucket.side_effect = lambda prefix: wal_paths.get(
+            prefix, []
+        )
+        downloader = CloudWalDownloader(mock_cloud_interface, "test_server")
+
+        # WHEN _get_wals_to_download is called with parallel=3
+        result = downloader._get_wals_to_download(
+            "0000000100000002000000FF", no_partial=False, parallel=3
+        )
+
+        # THEN the next WALs are found in the following directory
+        assert result == [
+            wals_dir + "0000000100000002/0000000100000002000000FF.gz",
+            wals_dir + "0000000100000003/000000010000000300000000.gz",
+            wals_dir + "0000000100000003/000000010000000300000001.gz",
+        ]
+
+        # WHEN more WALs are requested than the following directories contain
+        mock_cloud_interface.list_bucket.reset_mock()
+        result = downloader._get_wals_to_download(
+            "0000000100000002000000FF", no_partial=False, parallel=10
+        )
+
+        # THEN the search stops at the first empty directory
+        assert len(result) == 4
+        assert mock_cloud_interface.list_bucket.call_args_list == [
+            mock.call(wals_dir + "0000000100000002/"),
+            mock.call(wals_dir + "0000000100000003/"),
+            mock.call(wals_dir + "0000000100000004/"),
+        ]
+
+    def test_download_wal_spool(self, tmpdir):
+        """
+        Test that download_wal removes stale spool files, does not download
+        again the WALs already in the spool and spools WALs atomically.
+        """
+        # GIVEN a spool directory with a stale WAL, an interrupted download and
+        # a WAL prefetched by a previous invocation
+        spool_dir = tmpdir.mkdir("spool")
+        spool_dir.join("000000010000000100000001").write("stale")
+        spool_dir.join("000000010000000100000004.tmp").write("partial")
+        spool_dir.join("000000010000000100000003").write("prefetched")
+        spool_dir.join("00000001.history").write("history")
+        source_dir = "bucket/barman/test_server/wals/0000000100000001/"
+        mock_cloud_interface = MagicMock(path="bucket/barman")
+        mock_cloud_interface.list_bucket.side_effect = lambda prefix: (
+            [
+                source_dir + "000000010000000100000002",
+                source_dir + "000000010000000100000003",
+                source_dir + "000000010000000100000004",
+            ]
+            if prefix == source_dir
+            else []
+        )
+
+        def download_file(wal_path, wal_dest, compression):
+            with open(wal_dest, "w") as wal_file:
+                wal_file.write(os.path.basename(wal_path))
+
+        mock_cloud_interface.download_file.side_effect = download_file
+        downloader = CloudWalDownloader(
+            mock_cloud_interface, "test_server", str(spool_dir)
+        )
+
+        # WHEN download_wal is called with parallel=3
+        wal_dest = str(tmpdir.join("RECOVERYXLOG"))
+        downloader.download_wal(
+            "000000010000000100000002", wal_dest, no_partial=False, parallel=3
+        )
+
+        # THEN the requested WAL is downloaded
+        assert tmpdir.join("RECOVERYXLOG").read() == "000000010000000100000002"
+        # AND the prefetched WAL is not downloaded again
+        assert mock_cloud_interface.download_file.call_count == 2
+        assert spool_dir.join("000000010000000100000003").read() == "prefetched"
+        # AND the missing WAL is spooled without leaving a temporary file
+        assert spool_dir.join("000000010000000100000004").read() == (
+            "000000010000000100000004"
+        )
+        # AND the stale spool files are removed
+        assert sorted(f.basename for f in spool_dir.listdir()) == [
+            "00000001.history",
+            "000000010000000100000003",
+            "000000010000000100000004",
+        ]
+
+    @mock.patch("barman.cloud.CloudWalDownloader._download_single_wal")
+    def test_download_to_spool_failure(self, mock_download_single_wal, tmpdir):
+        """
+        Test that a failed download to the spool does not leave any file behind.
+        """
+        # GIVEN a download which fails in a background thread
+        spool_dest = tmpdir.join("000000010000000100000002")
+
+        def download_single_wal(wal_path, wal_dest):
+            with open(wal_dest, "w") as wal_file:
+                wal_file.write("partial")
+            return False
+
+        mock_download_single_wal.side_effect = download_single_wal
+        downloader = CloudWalDownloader(mock.Mock(), "test_server", str(tmpdir))
+
+        # WHEN the WAL is downloaded to the spool
+        downloader._download_to_spool("path/to/wal", str(spool_dest))
+
+        # THEN neither the WAL nor the temporary file are in the spool
+        assert tmpdir.listdir() == []
+
     def test_get_wals_to_download_history_file_disables_prefetch(self):
         """
         Test that _get_wals_to_download disables prefetching when the requested
@@ -429,7 +429,7 @@ class TestInternalCompressors(object):
         assert f == "content"
 
     def test_zstd(self, tmpdir):
-        config_mock = mock.Mock()
+        config_mock = mock.Mock(zstd_dictionary=False)
 
         compression_manager = CompressionManager(config_mock, tmpdir.strpath)
 
@@ -494,7 +494,7 @@ class TestInternalCompressors(object):
         Test the ``compress_in_mem`` method of the compression classes
         """
         # GIVEN a compressor instance
-        config_mock = mock.Mock(compression=compression)
+        config_mock = mock.Mock(compression=compression, zstd_dictionary=False)
         compressor = compression_class(config=config_mock, compression=compression)
         # AND some data to compress
         uncompressed = io.BytesIO(b"I'm a big file. Compress me!")
@@ -504,6 +504,154 @@ class TestInternalCompressors(object):
         # compressed successfully
         assert compressed.read().startswith(compression_class.MAGIC)
 
+    @pytest.mark.parametrize(
+        "compression, compression_class",
+        [
+            ("pygzip", PyGZipCompressor),
+            ("pybzip2", PyBZip2Compressor),
+            ("xz", XZCompressor),
+            ("zstd", ZSTDCompressor),
+            ("lz4", LZ4Compressor),
+            ("snappy", SnappyCompressor),
+        ],
+    )
+    def test_compress_file_in_mem(self, compression, compression_class, tmpdir):
+        """
+        Test the ``compress_file_in_mem`` method of the compression classes
+        """
+        # GIVEN a compressor instance
+        config_mock = mock.Mock(compression=compression, zstd_dictionary=False)
+        compressor = compression_class(config=config_mock, compression=compression)
+        # AND some files to compress
+        for content in (b"I'm a WAL file. Compress me!", b"I'm another WAL file"):
+            src = tmpdir.join("sourcefile")
+            src.write_binary(content)
+            dst = tmpdir.join("sourcefile.compressed")
+            # WHEN compress_file_in_mem is called
+            assert compressor.compress_file_in_mem(src.strpath, dst.strpath) == 0
+            # THEN the destination file can be decompressed to the original content
+            assert dst.read_binary().startswith(compression_class.MAGIC)
+            with open(dst.strpath, "rb") as compressed:
+                decompressed = io.BytesIO()
+                compressor.decompress_to_fileobj(compressed, decompressed)
+            assert decompressed.getvalue() == content
+
+    def test_compress_file_in_mem_failure(self, tmpdir):
+        """
+        Test that ``compress_file_in_mem`` raises a CommandFailedException
+        when the compression fails
+        """
+        config_mock = mock.Mock(compression="pygzip")
+        compressor = PyGZipCompressor(config=config_mock, compression="pygzip")
+        with pytest.raises(CommandFailedException):
+            compressor.compress_file_in_mem(
+                tmpdir.join("missing").strpath, tmpdir.join("dst").strpath
+            )
+
+    def test_zstd_compression_context(self, tmpdir):
+        """
+        Test that the zstd compression context is reused across files
+        """
+        # GIVEN a zstd compressor
+        config_mock = mock.Mock(
+            compression="zstd", compression_level=3, zstd_dictionary=False
+        )
+        compressor = ZSTDCompressor(config=config_mock, compression="zstd")
+        src = tmpdir.join("sourcefile")
+        src.write("content")
+        # WHEN several files are compressed
+        context = compressor.compression_context
+        compressor.compress(src.strpath, ZSTD_FILE % tmpdir.strpath)
+        compressor.compress_in_mem(io.BytesIO(b"content"))
+        compressor.compress_buffer(b"content")
+        # THEN the same context is used for all of them
+        assert compressor.compression_context is context
+        assert zstandard.ZstdDecompressor().decompress(
+            compressor.compress_buffer(b"content")
+        ) == (b"content")
+
+    @staticmethod
+    def _build_zstd_compressor(tmpdir, zstd_dictionary):
+        config_mock = mock.Mock(
+            compression="zstd",
+            compression_level=3,
+            zstd_dictionary=zstd_dictionary,
+            xlogdb_directory=tmpdir.strpath,
+        )
+        config_mock.name = "main"
+        return ZSTDCompressor(config=config_mock, compression="zstd")
+
+    def test_zstd_dictionary(self, tmpdir):
+        """
+        Test training a zstd dictionary and compressing files with it
+        """
+        # GIVEN a zstd compressor with the dictionary mode enabled
+        compressor = self._build_zstd_compressor(tmpdir, True)
+        assert compressor.dictionary_id is None
+        # AND some WAL-like files to train the dictionary on
+        wal_files = []
+        for i in range(4):
+            wal_file = tmpdir.join("wal%s" % i)
+            pages = [
+                b"\xd1\x00\x02\x00" + bytes([i, page]) + b"header" * 100 + bytes(7586)
+                for page in range(64)
+            ]
+            wal_file.write_binary(b"".join(pages))
+            wal_files.append(wal_file.strpath)
+
+        # WHEN a dictionary is trained
+        dict_id = compressor.train_dictionary(wal_files)
+
+        # THEN it is stored next to the xlogdb, named after its id
+        assert tmpdir.join("main-zstd-%s.dict" % dict_id).exists()
+        assert compressor.dictionary_id == dict_id
+        # AND it is used to compress the files
+        compressed = compressor.compress_buffer(b"header" * 100)
+        assert zstandard.get_frame_parameters(compressed).dict_id == dict_id
+        compressor.compress(wal_files[0], ZSTD_FILE % tmpdir.strpath)
+        with open(ZSTD_FILE % tmpdir.strpath, "rb") as compressed_file:
+            header = compressed_file.read(18)
+        assert zstandard.get_frame_parameters(header).dict_id == dict_id
+
+        # AND a new compressor uses the same dictionary
+        assert self._build_zstd_compressor(tmpdir, True).dictionary_id == dict_id
+        # AND the files can be decompressed even if the dictionary mode is
+        # not enabled anymore
+        decompressor = self._build_zstd_compressor(tmpdir, False)
+        assert decompressor.dictionary_id is None
+        assert (
+            decompressor.decompress_in_mem(io.BytesIO(compressed)).read()
+            == b"header" * 100
+        )
+        decompressor.decompress(
+            ZSTD_FILE % tmpdir.strpath, ZSTD_FILE_UNCOMPRESSED % tmpdir.strpath
+        )
+        with open(wal_files[0], "rb") as src:
+            with open(ZSTD_FILE_UNCOMPRESSED % tmpdir.strpath, "rb") as dst:
+                assert dst.read() == src.read()
+
+        # AND the decompression fails if the dictionary is missing
+        tmpdir.join("main-zstd-%s.dict" % dict_id).remove()
+        decompressor = self._build_zstd_compressor(tmpdir, False)
+        with pytest.raises(CompressionException):
+            decompressor.decompress_in_mem(io.BytesIO(compressed))
+
+    @pytest.mark.parametrize(
+        ("name", "expected"),
+        [
+            ("main-zstd-1234.dict", 1234),
+            ("main-zstd-.dict", None),
+            ("main-zstd-12a4.dict", None),
+            ("other-zstd-1234.dict", None),
+            ("main-xlog.db", None),
+        ],
+    )
+    def test_zstd_get_dictionary_id(self, name, expected):
+        """
+        Test the identification of the zstd dictionary files
+        """
+        assert ZSTDCompressor.get_dictionary_id("main", name) == expected
+
     @pytest.mark.parametrize(
         "compression, compression_class, compressed_fileobj",
         [
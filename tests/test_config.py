@@ -41,6 +41,7 @@ from barman.config import (
     parse_backup_compression,
     parse_backup_compression_format,
     parse_backup_compression_location,
+    parse_positive_integer,
     parse_si_suffix,
     parse_slot_name,
     parse_snapshot_disks,
@@ -805,6 +806,32 @@ class TestConfig(object):
             with pytest.raises(ValueError):
                 parse_aws_encryption(encryption)
 
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        (("1", 1), ("16", 16), ("0", None), ("-2", None), ("many", None)),
+    )
+    def test_parse_positive_integer(self, value, expected):
+        """
+        Test allowed and disallowed positive integer values
+        """
+        if expected is not None:
+            assert parse_positive_integer(value) == expected
+        else:
+            with pytest.raises(ValueError):
+                parse_positive_integer(value)
+
+    def test_cron_parallel_jobs(self):
+        """
+        Check the cron_parallel_jobs global option and its default
+        """
+        c = testing_helpers.build_config_from_dicts()
+        assert c.cron_parallel_jobs == 1
+
+        c = testing_helpers.build_config_from_dicts(
+            global_conf={"cron_parallel_jobs": "8"}
+        )
+        assert c.cron_parallel_jobs == 8
+
     def test_global_config_to_json(self):
         """Check :meth:`Config.global_config_to_json` returns expected results.
 
@@ -823,6 +850,7 @@ class TestConfig(object):
             "barman_lock_directory": "/some/barman/home",
             "config_changes_queue": "/some/barman/home/cfg_changes.queue",
             "lock_directory_cleanup": "true",
+            "cron_parallel_jobs": "4",
         }
         c = testing_helpers.build_config_from_dicts(global_conf=global_conf)
 
@@ -840,6 +868,7 @@ class TestConfig(object):
             "barman_lock_directory": "/some/barman/home",
             "config_changes_queue": "/some/barman/home/cfg_changes.queue",
             "lock_directory_cleanup": True,
+            "cron_parallel_jobs": 4,
         }
         assert c.global_config_to_json(False) == expected
 
@@ -1436,7 +1465,9 @@ class TestModelConfig:
             "archiver": None,
             "aws_check_object_lock": None,
             "worm_mode": None,
+            "zstd_dictionary": None,
             "archiver_batch_size": None,
+            "archiver_parallel_jobs": None,
             "autogenerate_manifest": None,
             "aws_await_snapshots_timeout": None,
             "aws_encryption": None,
@@ -1549,7 +1580,9 @@ class TestModelConfig:
             "archiver": {"source": "SOME_SOURCE", "value": None},
             "aws_check_object_lock": {"source": "SOME_SOURCE", "value": None},
             "worm_mode": {"source": "SOME_SOURCE", "value": None},
+            "zstd_dictionary": {"source": "SOME_SOURCE", "value": None},
             "archiver_batch_size": {"source": "SOME_SOURCE", "value": None},
+            "archiver_parallel_jobs": {"source": "SOME_SOURCE", "value": None},
             "autogenerate_manifest": {"source": "SOME_SOURCE", "value": None},
             "aws_await_snapshots_timeout": {"source": "SOME_SOURCE", "value": None},
             "aws_encryption": {"source": "SOME_SOURCE", "value": None},
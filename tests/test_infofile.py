@@ -422,6 +422,22 @@ class TestWalFileInfo(object):
         assert wfile_info.encryption is None
         assert wfile_info.relpath() == ("0000000000000000/000000000000000000000001")
 
+        # The file is not inspected when both size and time are provided
+        with mock.patch("os.stat") as stat_mock:
+            wfile_info = WalFileInfo.from_file(
+                filename=tmp_file.strpath,
+                compression_manager=compression_manager,
+                size=42,
+                time=43,
+                encryption_manager=mock_encryption_manager,
+                compression=None,
+                encryption=None,
+            )
+        stat_mock.assert_not_called()
+        assert wfile_info.name == tmp_file.basename
+        assert wfile_info.size == 42
+        assert wfile_info.time == 43
+
     @mock.patch("barman.encryption.EncryptionManager")
     def test_from_file_encryption(self, mock_encryption_manager, tmpdir):
         # prepare
@@ -498,6 +514,29 @@ class TestWalFileInfo(object):
 
         assert list(wfile_info.items()) == list(info_file.items())
 
+    def test_xlogdb_line_compression_dictionary(self):
+        """
+        Test that the compression dictionary is stored in the xlogdb line
+        only when set
+        """
+        wfile_info = WalFileInfo(
+            name="000000000000000000000001",
+            size=42,
+            time=43,
+            compression="zstd",
+            compression_dictionary=1234,
+        )
+        line = "000000000000000000000001\t42\t43\tzstd\tNone\t1234\n"
+        assert wfile_info.to_xlogdb_line() == line
+        info_file = WalFileInfo.from_xlogdb_line(line)
+        assert info_file.compression_dictionary == 1234
+        assert list(wfile_info.items()) == list(info_file.items())
+
+        wfile_info.compression_dictionary = None
+        assert wfile_info.to_xlogdb_line() == (
+            "000000000000000000000001\t42\t43\tzstd\tNone\n"
+        )
+
     def test_timezone_aware_parser(self):
         """
         Test the timezone_aware_parser method with different string
@@ -18,6 +18,8 @@
 
 import os
 import shutil
+import threading
+import time
 from contextlib import closing
 from datetime import datetime
 from functools import partial
@@ -769,6 +771,8 @@ class TestRecoveryExecutor(object):
             "target_datetime": "2015-06-03 16:11:03.71038+02",
             "wal_dest": wal_dest,
             "custom_restore_command": None,
+            "lazy_wal": False,
+            "batch_get_wal": False,
         }
         backup_info = testing_helpers.build_test_backup_info()
 
@@ -966,6 +970,90 @@ class TestRecoveryExecutor(object):
             == "'barman-wal-restore -P -U {USER} BARMAN_SERVER main %f %p -p 2'"
         )
 
+    @pytest.mark.parametrize(
+        ("remote_command", "parallel_jobs", "batch_get_wal", "expected_fetch_command"),
+        [
+            (None, 1, False, "barman get-wal -P main %f > %p"),
+            (
+                "remote@command",
+                1,
+                False,
+                "barman-wal-restore -P -U {USER} BARMAN_SERVER main %f %p -p 8",
+            ),
+            (
+                "remote@command",
+                16,
+                True,
+                "barman-wal-restore -P -U {USER} BARMAN_SERVER main %f %p -p 16 -b",
+            ),
+        ],
+    )
+    @mock.patch("barman.recovery_executor.socket.getfqdn")
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_generate_recovery_conf_lazy_wal(
+        self,
+        _rsync_pg_mock,
+        mock_get_fqdn,
+        remote_command,
+        parallel_jobs,
+        batch_get_wal,
+        expected_fetch_command,
+        tmpdir,
+    ):
+        """
+        Test that with lazy WAL delivery the restore command uses the staged
+        WAL files, and fetches the following ones with read-ahead, in batch
+        mode only if requested.
+        """
+        mock_get_fqdn.return_value = "BARMAN_SERVER"
+        # GIVEN a recovery with lazy WAL delivery
+        dest = tmpdir.mkdir("destination")
+        wal_dest = os.path.join(dest, "barman_wal")
+        recovery_info = {
+            "configuration_files": ["postgresql.conf", "postgresql.auto.conf"],
+            "tempdir": tmpdir.strpath,
+            "results": {"changes": [], "warnings": []},
+            "get_wal": True,
+            "recovery_option_port": None,
+            "target_datetime": None,
+            "wal_dest": wal_dest,
+            "custom_restore_command": None,
+            "lazy_wal": True,
+            "batch_get_wal": batch_get_wal,
+        }
+        backup_info = testing_helpers.build_test_backup_info()
+        server = testing_helpers.build_real_server(
+            main_conf={"parallel_jobs": parallel_jobs}
+        )
+        executor = RecoveryExecutor(server.backup_manager)
+
+        # WHEN the recovery configuration is generated
+        executor._generate_recovery_conf(
+            recovery_info,
+            backup_info,
+            dest.strpath,
+            None,
+            True,
+            remote_command,
+            "",
+            "",
+            "",
+            "",
+            "",
+            None,
+        )
+
+        # THEN the restore command copies the staged WAL files, and fetches
+        # the missing ones
+        recovery_conf_file = (tmpdir if remote_command else dest).join("recovery.conf")
+        recovery_conf = testing_helpers.parse_recovery_conf(recovery_conf_file)
+        assert recovery_conf["restore_command"] == (
+            "'test -f %s/%%f && cp %s/%%f %%p || %s'"
+            % (wal_dest, wal_dest, expected_fetch_command)
+        )
+        # AND the staging directory is removed at the end of the recovery
+        assert recovery_conf["recovery_end_command"] == "'rm -fr %s'" % wal_dest
+
     @mock.patch("barman.recovery_executor.RsyncPgData")
     def test_generate_recovery_conf(self, rsync_pg_mock, tmpdir):
         """
@@ -983,6 +1071,8 @@ class TestRecoveryExecutor(object):
             "target_datetime": "2015-06-03 16:11:03.71038+02",
             "wal_dest": wal_dest,
             "custom_restore_command": None,
+            "lazy_wal": False,
+            "batch_get_wal": False,
         }
         backup_info = testing_helpers.build_test_backup_info(
             version=120000,
@@ -1188,6 +1278,8 @@ class TestRecoveryExecutor(object):
             "get_wal": True,
             "wal_dest": None,
             "custom_restore_command": None,
+            "lazy_wal": False,
+            "batch_get_wal": False,
             "results": {},
         }
         mock_backup_info = mock.Mock(version=180000)
@@ -1450,6 +1542,220 @@ class TestRecoveryExecutor(object):
             ]
         )
 
+    def _build_parallel_xlog_copy(self, tmpdir, parallel_jobs, compression="gzip"):
+        """
+        Build a recovery executor for compressed WAL files spread over
+        two directories of the archive.
+
+        :param tmpdir: the temporary directory of the test
+        :param int parallel_jobs: the number of workers of the recovery
+        :param str compression: the compression of the WAL files
+        :return tuple[RecoveryExecutor,list[WalFileInfo]]: the executor
+            and the WAL files to restore
+        """
+        wals = tmpdir.mkdir("wals")
+        required_wals = []
+        for log in (0, 1):
+            for seg in (1, 2, 3):
+                name = xlog.encode_segment_name(1, log, seg)
+                wals.join(xlog.hash_dir(name), name).write("content", ensure=True)
+                required_wals.append(
+                    WalFileInfo.from_xlogdb_line(
+                        "%s\t42\t43\t%s\tNone\n" % (name, compression)
+                    )
+                )
+        server = testing_helpers.build_real_server(
+            main_conf={
+                "wals_directory": wals.strpath,
+                "parallel_jobs": str(parallel_jobs),
+            }
+        )
+        return RecoveryExecutor(server.backup_manager), required_wals
+
+    @mock.patch("barman.recovery_executor.RecoveryExecutor._rsync_move_files")
+    @mock.patch("barman.recovery_executor.RecoveryExecutor._decrypt_decompress_wal")
+    @mock.patch("tempfile.mkdtemp")
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_recover_xlog_parallel(
+        self, _rsync_pg_mock, mock_tmp_file, mock_decompress, mock_move, tmpdir
+    ):
+        """
+        Test that WAL files are decompressed by parallel workers when a
+        command-based compressor is used, and that each directory is moved to
+        the destination once all its WAL files have been processed.
+        """
+        # GIVEN pigz compressed WAL files in two directories and two workers
+        executor, required_wals = self._build_parallel_xlog_copy(tmpdir, 2, "pigz")
+        mock_tmp_file.return_value = tmpdir.mkdir("staging").strpath
+        dest = tmpdir.mkdir("destination")
+        lock = threading.Lock()
+        running = set()
+        max_running = [0]
+        processed = set()
+
+        def decompress(src_file, dst_file, *args):
+            with lock:
+                running.add(src_file)
+                max_running[0] = max(max_running[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.discard(src_file)
+                processed.add(os.path.basename(dst_file))
+
+        mock_decompress.side_effect = decompress
+        moved = []
+
+        def move(rsync, file_list, src, dst):
+            # THEN each directory is moved once all its files are processed
+            assert set(file_list) <= processed
+            moved.append(file_list)
+
+        mock_move.side_effect = move
+
+        # WHEN the WAL files are restored remotely
+        executor._xlog_copy(required_wals, dest.strpath, "remote_command")
+
+        # THEN every WAL file is processed, using both workers
+        assert mock_decompress.call_count == 6
+        assert max_running[0] == 2
+        # AND both directories are moved
+        assert sorted(moved) == [
+            [wal.name for wal in required_wals[:3]],
+            [wal.name for wal in required_wals[3:]],
+        ]
+
+    @mock.patch("barman.recovery_executor.RecoveryExecutor._rsync_move_files")
+    @mock.patch("barman.recovery_executor.RecoveryExecutor._decrypt_decompress_wal")
+    @mock.patch("tempfile.mkdtemp")
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_recover_xlog_parallel_internal_compressor(
+        self, _rsync_pg_mock, mock_tmp_file, mock_decompress, mock_move, tmpdir
+    ):
+        """
+        Test that the WAL files decompressed in-process are not processed by
+        the worker threads.
+        """
+        # GIVEN gzip compressed WAL files in two directories and two workers
+        executor, required_wals = self._build_parallel_xlog_copy(tmpdir, 2)
+        mock_tmp_file.return_value = tmpdir.mkdir("staging").strpath
+        dest = tmpdir.mkdir("destination")
+        threads = set()
+        mock_decompress.side_effect = lambda *args: threads.add(
+            threading.current_thread()
+        )
+
+        # WHEN the WAL files are restored remotely
+        executor._xlog_copy(required_wals, dest.strpath, "remote_command")
+
+        # THEN every WAL file is processed by the current thread
+        assert mock_decompress.call_count == 6
+        assert threads == {threading.current_thread()}
+        # AND both directories are moved
+        assert mock_move.call_count == 2
+
+    @mock.patch("barman.recovery_executor.RecoveryExecutor._rsync_move_files")
+    @mock.patch("barman.recovery_executor.RecoveryExecutor._decrypt_decompress_wal")
+    @mock.patch("tempfile.mkdtemp")
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_recover_xlog_parallel_failure(
+        self, _rsync_pg_mock, mock_tmp_file, mock_decompress, mock_move, tmpdir
+    ):
+        """
+        Test that a failure decompressing a WAL file is raised, without
+        moving the directory to the destination.
+        """
+        # GIVEN compressed WAL files in two directories and two workers
+        executor, required_wals = self._build_parallel_xlog_copy(tmpdir, 2)
+        mock_tmp_file.return_value = tmpdir.mkdir("staging").strpath
+        dest = tmpdir.mkdir("destination")
+        # AND the decompression of the first WAL file fails
+        failing_wal = required_wals[0].name
+
+        def decompress(src_file, dst_file, *args):
+            if os.path.basename(src_file) == failing_wal:
+                raise CommandFailedException("decompression failed")
+
+        mock_decompress.side_effect = decompress
+
+        # WHEN the WAL files are restored remotely
+        # THEN the failure is raised
+        with pytest.raises(CommandFailedException):
+            executor._xlog_copy(required_wals, dest.strpath, "remote_command")
+
+        # AND no directory is moved to the destination
+        assert not mock_move.called
+
+    @mock.patch("barman.recovery_executor.output")
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_recover_xlog_concurrent_transfers(
+        self, rsync_pg_mock, mock_output, tmpdir
+    ):
+        """
+        Test that the directories of plain WAL files are transferred by
+        concurrent rsync commands, reporting the statistics of each worker.
+        """
+        # GIVEN plain WAL files in two directories and two workers
+        executor, required_wals = self._build_parallel_xlog_copy(tmpdir, 2)
+        for wal in required_wals:
+            wal.compression = None
+        dest = tmpdir.mkdir("destination")
+        # AND every rsync command is a distinct object
+        rsync_pg_mock.side_effect = lambda **kwargs: mock.Mock(**kwargs)
+        lock = threading.Lock()
+        running = set()
+        max_running = [0]
+        copied = []
+
+        def copy(rsync, file_list, src, dst):
+            with lock:
+                # THEN an rsync command is never used by two transfers at once
+                assert rsync not in running
+                running.add(rsync)
+                max_running[0] = max(max_running[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.discard(rsync)
+                copied.append(file_list)
+
+        # WHEN the WAL files are restored
+        with mock.patch.object(executor, "_rsync_copy_files", side_effect=copy):
+            executor._xlog_copy(required_wals, dest.strpath, None)
+
+        # THEN a rsync command is built for each worker, with the bandwidth limit
+        assert rsync_pg_mock.call_count == 2
+        for call_args in rsync_pg_mock.call_args_list:
+            assert call_args[1]["bwlimit"] == executor.config.bandwidth_limit
+        # AND the directories are transferred concurrently
+        assert max_running[0] == 2
+        assert sorted(copied) == [
+            [wal.name for wal in required_wals[:3]],
+            [wal.name for wal in required_wals[3:]],
+        ]
+        # AND the statistics of each worker are reported
+        messages = [c[0][0] % c[0][1:] for c in mock_output.info.call_args_list]
+        assert "WAL files transferred by 2 workers:" in messages
+        assert len([m for m in messages if "3 WAL files in 1 directories" in m]) == 2
+
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_recover_xlog_concurrent_transfers_failure(self, rsync_pg_mock, tmpdir):
+        """
+        Test that the failure of a concurrent transfer is raised.
+        """
+        # GIVEN plain WAL files in two directories and two workers
+        executor, required_wals = self._build_parallel_xlog_copy(tmpdir, 2)
+        for wal in required_wals:
+            wal.compression = None
+        dest = tmpdir.mkdir("destination")
+        # AND rsync fails
+        rsync_pg_mock.return_value.from_file_list.side_effect = CommandFailedException(
+            "rsync failed"
+        )
+
+        # WHEN the WAL files are restored
+        # THEN a data transfer failure is raised
+        with pytest.raises(DataTransferFailure):
+            executor._xlog_copy(required_wals, dest.strpath, None)
+
     @mock.patch("barman.recovery_executor.get_passphrase_from_command")
     @mock.patch("shutil.move")
     @mock.patch("tempfile.mkdtemp")
@@ -2107,6 +2413,65 @@ class TestRecoveryExecutor(object):
             "with --target-immediate."
         )
 
+    @mock.patch.object(RecoveryExecutor, "_xlog_copy")
+    @mock.patch("barman.recovery_executor.RsyncCopyController")
+    @mock.patch("barman.recovery_executor.RsyncPgData")
+    def test_recovery_lazy_wal(
+        self, _rsync_pg_mock, _copy_controller_mock, mock_xlog_copy, tmpdir
+    ):
+        """
+        Test that a recovery with lazy WAL delivery only copies the WAL files
+        required to reach consistency.
+        """
+        # GIVEN a backup
+        dest = tmpdir.mkdir("destination")
+        base = tmpdir.mkdir("base")
+        wals = tmpdir.mkdir("wals")
+        backup_info = testing_helpers.build_test_backup_info(tablespaces=[])
+        backup_info.config.basebackups_directory = base.strpath
+        backup_info.config.wals_directory = wals.strpath
+        backup_info.version = 90400
+        datadir = base.mkdir(backup_info.backup_id).mkdir("data")
+        backup_info.pgdata = datadir.strpath
+        datadir.join("postgresql.conf").write("archive_command = something\n")
+        shutil.copy2(datadir.join("postgresql.conf").strpath, dest.strpath)
+        datadir.ensure("pg_hba.conf")
+        datadir.ensure("pg_ident.conf")
+        # AND a server with get-wal enabled
+        server = testing_helpers.build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals.strpath, "recovery_options": "get-wal"},
+        )
+        executor = RecoveryExecutor(server.backup_manager)
+        required_wals = [mock.Mock(name="wal")]
+
+        # WHEN the backup is recovered with lazy WAL delivery
+        with mock.patch.object(
+            server, "get_required_xlog_files", return_value=iter(required_wals)
+        ) as mock_required:
+            with closing(executor):
+                rec_info = executor.recover(
+                    backup_info,
+                    dest.strpath,
+                    exclusive=True,
+                    lazy_wal=True,
+                )
+
+        # THEN only the WAL files required for consistency are requested
+        mock_required.assert_called_once_with(
+            backup_info, None, None, None, None, True, include_partial=False
+        )
+        # AND they are copied to a staging WAL directory, outside of pg_xlog
+        wal_dest = dest.join("barman_wal").strpath
+        mock_xlog_copy.assert_called_once_with(tuple(required_wals), wal_dest, None)
+        assert rec_info["lazy_wal"]
+        # AND the restore command fetches the following ones with get-wal
+        recovery_conf = testing_helpers.parse_recovery_conf(dest.join("recovery.conf"))
+        assert recovery_conf["restore_command"] == (
+            "'test -f %s/%%f && cp %s/%%f %%p || barman get-wal -P main %%f > %%p'"
+            % (wal_dest, wal_dest)
+        )
+
     @mock.patch("barman.recovery_executor.RsyncCopyController")
     @mock.patch("barman.recovery_executor.RsyncPgData")
     @mock.patch("barman.recovery_executor.fs.unix_command_factory")
@@ -2188,6 +2553,8 @@ class TestRecoveryExecutor(object):
             "get_wal": False,
             "recovery_option_port": None,
             "custom_restore_command": None,
+            "lazy_wal": False,
+            "batch_get_wal": False,
         }
         # test remote recovery
         with closing(executor):
@@ -2237,6 +2604,8 @@ class TestRecoveryExecutor(object):
             "get_wal": False,
             "recovery_option_port": None,
             "custom_restore_command": None,
+            "lazy_wal": False,
+            "batch_get_wal": False,
         }
         # test failed rsync
         rsync_pg_mock.side_effect = CommandFailedException()
@@ -2476,6 +2845,8 @@ class TestRecoveryExecutor(object):
             "target_datetime": "2015-06-03 16:11:03.71038+02",
             "wal_dest": wal_dest,
             "custom_restore_command": custom_command,
+            "lazy_wal": False,
+            "batch_get_wal": False,
             "is_pitr": True,  # Enable PITR for file generation
             "safe_horizon": None,
         }
@@ -2525,6 +2896,8 @@ class TestRecoveryExecutor(object):
             "target_datetime": "2015-06-03 16:11:03.71038+02",
             "wal_dest": wal_dest,
             "custom_restore_command": custom_command,
+            "lazy_wal": False,
+            "batch_get_wal": False,
             "is_pitr": True,  # Enable PITR for file generation
             "safe_horizon": None,
         }
@@ -2575,6 +2948,8 @@ class TestRecoveryExecutor(object):
             "target_datetime": "2015-06-03 16:11:03.71038+02",
             "wal_dest": wal_dest,
             "custom_restore_command": None,
+            "lazy_wal": False,
+            "batch_get_wal": False,
             "is_pitr": True,  # Enable PITR for file generation
             "safe_horizon": None,
             # No custom_restore_command
@@ -2740,6 +3115,8 @@ class TestSnapshotRecoveryExecutor(object):
             recovery_conf_filename=None,
             recovery_option_port=None,
             custom_restore_command=None,
+            lazy_wal=False,
+            batch_get_wal=False,
         )
 
     @pytest.mark.parametrize(
@@ -461,6 +461,145 @@ class TestServer(object):
             assert xlogdb_file.readline() == expected_line
             assert xlogdb_file.readline() == ""
 
+    def test_rebuild_xlogdb_reuses_recorded_metadata(self, tmpdir):
+        """
+        Test rebuilding the xlogdb reuses the compression and encryption already
+        recorded for unchanged files
+        """
+        # GIVEN a server with some WALs in the archive
+        wals_dir = tmpdir.mkdir("wals")
+        server = build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals_dir.strpath},
+        )
+        hash_dir = wals_dir.join("0000000100000000")
+        w1 = hash_dir.join("000000010000000000000001").ensure()
+        w2 = hash_dir.join("000000010000000000000002").ensure()
+        # AND an xlogdb recording the compression of the first WAL with its
+        # current size and mtime, and a stale entry for the second WAL
+        stat = os.stat(w1.strpath)
+        wals_dir.join(server.xlogdb_file_name).write(
+            "%s\t0\t%s\tgzip\tNone\n%s\t0\t1.0\tgzip\tNone\n"
+            % (w1.basename, stat.st_mtime, w2.basename)
+        )
+        server.backup_manager.get_wal_file_info = Mock(
+            wraps=server.backup_manager.get_wal_file_info
+        )
+
+        # WHEN the xlogdb is rebuilt
+        server.rebuild_xlogdb()
+
+        # THEN only the changed WAL has been inspected
+        server.backup_manager.get_wal_file_info.assert_called_once_with(w2.strpath)
+        # AND the recorded metadata of the unchanged WAL has been kept
+        with open(server.xlogdb_file_path, mode="r") as xlogdb_file:
+            lines = xlogdb_file.readlines()
+        assert lines[0] == "%s\t0\t%s\tgzip\tNone\n" % (w1.basename, stat.st_mtime)
+        assert re.match(rf"^{w2.basename}\t0\t[0-9.]+\tNone\tNone$", lines[1])
+        assert len(lines) == 2
+
+    @pytest.mark.parametrize(
+        ("extra_lines", "reuse"),
+        [
+            # The metadata is not reused on request
+            ("", False),
+            # The xlogdb contains a line which cannot be parsed
+            ("garbage\n", True),
+            # The xlogdb contains an invalid WAL name
+            ("invalid_name\t0\t1.0\tNone\tNone\n", True),
+        ],
+    )
+    def test_rebuild_xlogdb_no_reuse(self, extra_lines, reuse, tmpdir):
+        """
+        Test rebuilding the xlogdb inspects every file when the recorded
+        metadata must not be reused
+        """
+        # GIVEN a server with a WAL in the archive
+        wals_dir = tmpdir.mkdir("wals")
+        server = build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals_dir.strpath},
+        )
+        wal = wals_dir.join("0000000100000000", "000000010000000000000001").ensure()
+        # AND an xlogdb recording a wrong compression for it, with its current
+        # size and mtime
+        stat = os.stat(wal.strpath)
+        wals_dir.join(server.xlogdb_file_name).write(
+            "%s\t0\t%s\tgzip\tNone\n%s" % (wal.basename, stat.st_mtime, extra_lines)
+        )
+        server.backup_manager.get_wal_file_info = Mock(
+            wraps=server.backup_manager.get_wal_file_info
+        )
+
+        # WHEN the xlogdb is rebuilt
+        server.rebuild_xlogdb(reuse=reuse)
+
+        # THEN the WAL has been inspected
+        server.backup_manager.get_wal_file_info.assert_called_once_with(wal.strpath)
+        # AND its compression has been fixed
+        with open(server.xlogdb_file_path, mode="r") as xlogdb_file:
+            lines = xlogdb_file.readlines()
+        assert len(lines) == 1
+        assert re.match(rf"^{wal.basename}\t0\t[0-9.]+\tNone\tNone$", lines[0])
+
+    def test_rebuild_xlogdb_compression_dictionary(self, tmpdir, caplog):
+        """
+        Test rebuilding the xlogdb keeps the recorded compression dictionary
+        and ignores the dictionary files
+        """
+        # GIVEN a server with a WAL compressed with a zstd dictionary
+        wals_dir = tmpdir.mkdir("wals")
+        server = build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals_dir.strpath},
+        )
+        w1 = wals_dir.join("0000000100000000").join("000000010000000000000001")
+        w1.ensure()
+        wals_dir.join("%s-zstd-1234.dict" % server.config.name).ensure()
+        # AND an xlogdb recording the dictionary of the WAL
+        line = "%s\t0\t%s\tzstd\tNone\t1234\n" % (
+            w1.basename,
+            os.stat(w1.strpath).st_mtime,
+        )
+        wals_dir.join(server.xlogdb_file_name).write(line)
+
+        # WHEN the xlogdb is rebuilt
+        server.rebuild_xlogdb()
+
+        # THEN the recorded dictionary has been kept
+        with open(server.xlogdb_file_path, mode="r") as xlogdb_file:
+            assert xlogdb_file.readlines() == [line]
+        # AND the dictionary file has not been reported as unexpected
+        assert "unexpected file" not in caplog.text
+
+    def test_rebuild_xlogdb_parallel(self, tmpdir):
+        """Test rebuilding the xlogdb with several processes"""
+        # GIVEN a server with WALs spread over several hash directories
+        wals_dir = tmpdir.mkdir("wals")
+        server = build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals_dir.strpath},
+        )
+        expected = []
+        for tli in (1, 2):
+            if tli > 1:
+                wals_dir.join("%08X.history" % tli).ensure()
+                expected.append("%08X.history" % tli)
+            for log in range(3):
+                for seg in range(4):
+                    name = "%08X%08X%08X" % (tli, log, seg)
+                    wals_dir.join(name[:16]).join(name).ensure()
+                    expected.append(name)
+        wals_dir.join("0000000100000001").join("unexpected").ensure()
+
+        # WHEN the xlogdb is rebuilt using several jobs
+        server.rebuild_xlogdb(jobs=3)
+
+        # THEN all the files have been registered in order
+        with open(server.xlogdb_file_path, mode="r") as xlogdb_file:
+            names = [line.split()[0] for line in xlogdb_file]
+        assert names == expected
+
     @patch("barman.server.os.path.exists", return_value=True)
     @patch("barman.server.output")
     @patch("barman.server.Server.use_wal_cloud_storage", new_callable=lambda: True)
@@ -3211,22 +3350,14 @@ class TestServer(object):
             mock_receive_wal.assert_not_called()
 
     @patch("barman.infofile.BackupInfo.save")
-    @patch("os.path.exists")
-    def test_check_backup(
-        self, mock_exists, backup_info_save, tmpdir, capsys, orig_exists=os.path.exists
-    ):
+    def test_check_backup(self, backup_info_save, tmpdir, capsys):
         """
         Test the check_backup method
         """
 
-        # Prepare a mock implementation of os.path.exists
+        # The archived WAL files are the ones listed in the xlogdb
         available_wals = []
 
-        def mock_os_path_exist(file_name):
-            return orig_exists(file_name) or file_name in available_wals
-
-        mock_exists.side_effect = mock_os_path_exist
-
         timeline_info = {}
         server = build_real_server(
             global_conf={
@@ -3236,13 +3367,21 @@ class TestServer(object):
         server.backup_manager.get_latest_archived_wals_info = MagicMock()
         server.backup_manager.get_latest_archived_wals_info.return_value = timeline_info
 
+        def check_backup(backup_info):
+            with server.xlogdb("w") as fxlogdb:
+                for wal_name in available_wals:
+                    fxlogdb.write(
+                        WalFileInfo(name=wal_name, size=42, time=43).to_xlogdb_line()
+                    )
+            server.check_backup(backup_info)
+
         # Case 0: backup in progress
         backup_info = build_test_backup_info(
             server=server,
             begin_wal="000000010000000000000002",
             end_wal=None,
         )
-        server.check_backup(backup_info)
+        check_backup(backup_info)
         assert not backup_info_save.called
 
         # Case 1: timeline not present in the archived WALs
@@ -3252,7 +3391,7 @@ class TestServer(object):
             begin_wal="000000010000000000000002",
             end_wal="000000010000000000000008",
         )
-        server.check_backup(backup_info)
+        check_backup(backup_info)
         assert backup_info_save.called
         assert backup_info.status == BackupInfo.WAITING_FOR_WALS
 
@@ -3260,7 +3399,7 @@ class TestServer(object):
         # the backup. Nothing should happen
         timeline_info["00000001"] = MagicMock()
         timeline_info["00000001"].name = "000000010000000000000001"
-        server.check_backup(backup_info)
+        check_backup(backup_info)
         assert backup_info_save.called
         assert backup_info.status == BackupInfo.WAITING_FOR_WALS
 
@@ -3271,25 +3410,19 @@ class TestServer(object):
 
         # Case 3.1: we have all the files until this moment, nothing should
         # happen
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000002")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000003")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000004")
-        )
-        server.check_backup(backup_info)
+        available_wals.append("000000010000000000000002")
+        available_wals.append("000000010000000000000003")
+        available_wals.append("000000010000000000000004")
+        check_backup(backup_info)
         assert backup_info_save.called
         assert backup_info.status == BackupInfo.WAITING_FOR_WALS
+        assert backup_info.last_verified_wal == "000000010000000000000004"
 
         # Case 3.2: we miss two WAL files
+        backup_info.last_verified_wal = None
         del available_wals[:]
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000002")
-        )
-        server.check_backup(backup_info)
+        available_wals.append("000000010000000000000002")
+        check_backup(backup_info)
         assert backup_info_save.called
         assert backup_info.status == BackupInfo.FAILED
         assert (
@@ -3308,55 +3441,29 @@ class TestServer(object):
         # Case 4.1: we have all the files, so the backup should be marked as
         # done
         del available_wals[:]
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000002")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000003")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000004")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000005")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000006")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000007")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000008")
-        )
+        available_wals.append("000000010000000000000002")
+        available_wals.append("000000010000000000000003")
+        available_wals.append("000000010000000000000004")
+        available_wals.append("000000010000000000000005")
+        available_wals.append("000000010000000000000006")
+        available_wals.append("000000010000000000000007")
+        available_wals.append("000000010000000000000008")
         backup_info.status = BackupInfo.WAITING_FOR_WALS
-        server.check_backup(backup_info)
+        check_backup(backup_info)
         assert backup_info_save.called
         assert backup_info.status == BackupInfo.DONE
         backup_info_save.reset_mock()
 
         # Case 4.2: a WAL file is missing
         del available_wals[:]
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000002")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000003")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000005")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000006")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000007")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000008")
-        )
+        available_wals.append("000000010000000000000002")
+        available_wals.append("000000010000000000000003")
+        available_wals.append("000000010000000000000005")
+        available_wals.append("000000010000000000000006")
+        available_wals.append("000000010000000000000007")
+        available_wals.append("000000010000000000000008")
         backup_info.status = BackupInfo.WAITING_FOR_WALS
-        server.check_backup(backup_info)
+        check_backup(backup_info)
         assert backup_info_save.called
         assert backup_info.status == BackupInfo.FAILED
         assert (
@@ -3372,32 +3479,79 @@ class TestServer(object):
         # FAILED (i.e. the rsync copy failed). The backup should still be
         # kept as failed
         del available_wals[:]
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000002")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000003")
-        )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000004")
+        available_wals.append("000000010000000000000002")
+        available_wals.append("000000010000000000000003")
+        available_wals.append("000000010000000000000004")
+        available_wals.append("000000010000000000000005")
+        available_wals.append("000000010000000000000006")
+        available_wals.append("000000010000000000000007")
+        available_wals.append("000000010000000000000008")
+        backup_info.status = BackupInfo.FAILED
+        check_backup(backup_info)
+        assert not backup_info_save.called
+        assert backup_info.status == BackupInfo.FAILED
+        backup_info_save.reset_mock()
+
+    @patch("barman.infofile.BackupInfo.save")
+    def test_check_backup_last_verified_wal(self, _backup_info_save, tmpdir):
+        """
+        Test that check_backup only verifies the WAL files archived since
+        the previous check
+        """
+        # GIVEN a server whose most recent archived WAL file precedes the
+        # end of the backup
+        server = build_real_server(
+            global_conf={
+                "barman_home": tmpdir.mkdir("home").strpath,
+            },
         )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000005")
+        last_archived_wal = MagicMock()
+        last_archived_wal.name = "000000010000000000000004"
+        server.backup_manager.get_latest_archived_wals_info = MagicMock(
+            return_value={"00000001": last_archived_wal}
         )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000006")
+        server.wal_storage.get_first_missing_wal = MagicMock(return_value=None)
+        backup_info = build_test_backup_info(
+            server=server,
+            begin_wal="000000010000000000000002",
+            end_wal="000000010000000000000008",
         )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000007")
+
+        # WHEN the backup is checked
+        server.check_backup(backup_info)
+        # THEN all the archived WAL files required by the backup are verified
+        server.wal_storage.get_first_missing_wal.assert_called_once_with(
+            [
+                "000000010000000000000002",
+                "000000010000000000000003",
+                "000000010000000000000004",
+            ]
         )
-        available_wals.append(
-            server.wal_storage.get_full_path("000000010000000000000008")
+        # AND the backup remembers the last verified WAL file
+        assert backup_info.status == BackupInfo.WAITING_FOR_WALS
+        assert backup_info.last_verified_wal == "000000010000000000000004"
+
+        # WHEN more WAL files are archived and the backup is checked again
+        last_archived_wal.name = "000000010000000000000006"
+        server.wal_storage.get_first_missing_wal.reset_mock()
+        server.check_backup(backup_info)
+        # THEN only the newly archived WAL files are verified
+        server.wal_storage.get_first_missing_wal.assert_called_once_with(
+            ["000000010000000000000005", "000000010000000000000006"]
         )
-        backup_info.status = BackupInfo.FAILED
+        assert backup_info.last_verified_wal == "000000010000000000000006"
+
+        # WHEN the end of the backup is archived and the backup is checked
+        last_archived_wal.name = "000000010000000000000009"
+        server.wal_storage.get_first_missing_wal.reset_mock()
         server.check_backup(backup_info)
-        assert not backup_info_save.called
-        assert backup_info.status == BackupInfo.FAILED
-        backup_info_save.reset_mock()
+        # THEN the remaining WAL files are verified
+        server.wal_storage.get_first_missing_wal.assert_called_once_with(
+            ["000000010000000000000007", "000000010000000000000008"]
+        )
+        # AND the backup is done and no longer tracks the verified WAL files
+        assert backup_info.status == BackupInfo.DONE
+        assert backup_info.last_verified_wal is None
 
     def test_wait_for_wal(self, tmpdir):
         # Waiting for a new WAL without archive_timeout without any WAL
@@ -3515,6 +3669,123 @@ class TestServer(object):
         # THEN decompression should occur
         mock_compressor.decompress.assert_called_once()
 
+    def _build_wal_archive(self, tmpdir, wal_names):
+        """
+        Build a server with the given WAL files in its archive.
+
+        :param tmpdir: the barman home directory
+        :param list[str] wal_names: the WAL files in the archive
+        :rtype: barman.server.Server
+        """
+        server = build_real_server(global_conf={"barman_home": tmpdir.strpath})
+        os.makedirs(server.config.wals_directory)
+        for wal_name in wal_names:
+            wal_path = os.path.join(
+                server.config.wals_directory, wal_name[:16], wal_name
+            )
+            if not os.path.isdir(os.path.dirname(wal_path)):
+                os.mkdir(os.path.dirname(wal_path))
+            with open(wal_path, "wb") as wal_file:
+                wal_file.write(wal_name.encode())
+        return server
+
+    def test_get_wal_peek_names(self, tmpdir):
+        """
+        Test that the names of the WAL files following the requested one are
+        returned up to the first missing file, also across WAL groups.
+        """
+        # GIVEN a server with a WAL archive spanning two WAL groups
+        server = self._build_wal_archive(
+            tmpdir,
+            [
+                "0000000100000000000000FE",
+                "0000000100000000000000FF",
+                "000000010000000100000000",
+                "000000010000000100000002",
+            ],
+        )
+
+        # WHEN the WAL files following the first one are peeked
+        names = list(server.get_wal_peek_names("0000000100000000000000FE", 10))
+
+        # THEN the WAL files up to the first missing one are returned
+        assert names == [
+            "0000000100000000000000FE",
+            "0000000100000000000000FF",
+            "000000010000000100000000",
+        ]
+        # AND no more than the requested number of WAL files are returned
+        assert list(server.get_wal_peek_names("0000000100000000000000FE", 1)) == [
+            "0000000100000000000000FE"
+        ]
+
+    @patch("barman.server.Server.get_wal_sendfile")
+    def test_get_wal_batch(self, mock_sendfile, tmpdir):
+        """
+        Test that a batch of WAL files is sent as a tar stream on standard
+        output, starting from the requested WAL file.
+        """
+        # GIVEN a server with three consecutive WAL files in its archive
+        wal_names = [
+            "000000010000000000000001",
+            "000000010000000000000002",
+            "000000010000000000000003",
+        ]
+        server = self._build_wal_archive(tmpdir, wal_names)
+
+        # AND get_wal_sendfile copies the content of the WAL file
+        def sendfile(wal_file, compression, keep_compression, destination):
+            with open(wal_file, "rb") as source:
+                destination.write(source.read())
+
+        mock_sendfile.side_effect = sendfile
+
+        # WHEN a batch of two WAL files is requested
+        stdout = Mock(buffer=BytesIO())
+        with patch("barman.server.sys.stdout", stdout):
+            server.get_wal(wal_names[0], batch=2)
+
+        # THEN the requested WAL file and the following one are sent in a tar
+        stdout.buffer.seek(0)
+        with tarfile.open(mode="r|", fileobj=stdout.buffer) as tar:
+            content = dict(
+                (member.name, tar.extractfile(member).read()) for member in tar
+            )
+        assert content == {
+            wal_names[0]: wal_names[0].encode(),
+            wal_names[1]: wal_names[1].encode(),
+        }
+        # AND no temporary file is left in the archive
+        assert not [
+            name
+            for name in os.listdir(server.config.wals_directory)
+            if name.endswith(".batch")
+        ]
+
+    @patch("barman.server.output")
+    def test_get_wal_batch_not_found(self, mock_output, tmpdir):
+        """
+        Test that nothing is written on standard output when the requested
+        WAL file of a batch does not exist.
+        """
+        # GIVEN a server with an empty WAL archive
+        server = self._build_wal_archive(tmpdir, [])
+
+        # WHEN a batch starting from a missing WAL file is requested
+        stdout = Mock(buffer=BytesIO())
+        with patch("barman.server.sys.stdout", stdout):
+            server.get_wal("000000010000000000000001", batch=2)
+
+        # THEN an error is reported
+        mock_output.error.assert_called_once_with(
+            "WAL file '%s' not found in server '%s'%s",
+            "000000010000000000000001",
+            server.config.name,
+            "",
+        )
+        # AND nothing is written on standard output
+        assert stdout.buffer.getvalue() == b""
+
     @patch("tempfile.mkdtemp")
     @patch("barman.server.open")
     @patch("barman.server.shutil")
@@ -3568,6 +3839,60 @@ class TestServer(object):
         # THEN decompression should not occur
         mock_compressor.decompress.assert_not_called()
 
+    @pytest.mark.parametrize(
+        ("stored_compression", "compression", "keep_compression"),
+        [("zstd", None, True), ("zstd", "zstd", False), ("gzip", "zstd", False)],
+    )
+    def test_get_wal_sendfile_zstd_dictionary(
+        self, stored_compression, compression, keep_compression, tmpdir
+    ):
+        """
+        Verify the WAL files are never sent compressed with a zstd dictionary,
+        as the client cannot access the dictionaries of the server
+        """
+        zstandard = pytest.importorskip("zstandard")
+        # GIVEN a server compressing the WAL files with a zstd dictionary
+        server = build_real_server(
+            main_conf={
+                "wals_directory": tmpdir.strpath,
+                "compression": "zstd",
+                "zstd_dictionary": True,
+            }
+        )
+        compression_manager = server.backup_manager.compression_manager
+        content = b"".join(
+            b"\xd1\x00\x02\x00" + bytes([page]) + b"header" * 100 + bytes(7587)
+            for page in range(64)
+        )
+        wal = tmpdir.join("000000010000000000000001")
+        wal.write_binary(content)
+        dict_id = compression_manager.get_compressor("zstd").train_dictionary(
+            [wal.strpath]
+        )
+        # AND a stored WAL file
+        stored_wal = tmpdir.join("0000000100000000", "000000010000000000000001")
+        stored_wal.dirpath().ensure(dir=True)
+        stored_compressor = compression_manager.get_compressor(stored_compression)
+        stored_compressor.compress(wal.strpath, stored_wal.strpath)
+        if stored_compression == "zstd":
+            assert stored_compressor.get_file_dictionary_id(stored_wal.strpath) == (
+                dict_id
+            )
+
+        # WHEN the WAL file is sent
+        destination = BytesIO()
+        server.get_wal_sendfile(
+            stored_wal.strpath, compression, keep_compression, destination
+        )
+
+        # THEN it is compressed with zstd without any dictionary
+        data = destination.getvalue()
+        assert zstandard.get_frame_parameters(data).dict_id == 0
+        # AND it can be decompressed without the dictionaries of the server
+        assert zstandard.ZstdDecompressor().stream_reader(BytesIO(data)).read() == (
+            content
+        )
+
     @patch("tempfile.mkdtemp")
     @patch("barman.server.open")
     @patch("barman.server.shutil")
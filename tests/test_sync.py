@@ -17,6 +17,8 @@
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
 
 import json
+import os
+import shutil
 from datetime import datetime, timedelta
 
 import dateutil
@@ -31,6 +33,7 @@ from testing_helpers import (
 )
 
 import barman.server
+from barman.compression import ZSTDCompressor
 from barman.exceptions import (
     CommandFailedException,
     SyncError,
@@ -39,6 +42,7 @@ from barman.exceptions import (
 )
 from barman.infofile import BackupInfo, LocalBackupInfo
 from barman.lockfile import LockFileBusy
+from barman.utils import mkpath
 
 # expected result of the sync --status command
 EXPECTED_MINIMAL = {
@@ -122,6 +126,7 @@ EXPECTED_MINIMAL = {
             "encryption": None,
         },
     ],
+    "zstd_dictionaries": [],
     "version": barman.__version__,
 }
 
@@ -697,6 +702,102 @@ class TestSync(object):
             xlog = fxlogdb.readlines()
             assert xlog == exp_xlog
 
+    @mock.patch("barman.server.Rsync")
+    def test_sync_wals_zstd_dictionary(self, rsync_mock, tmpdir):
+        """
+        Test the WAL synchronisation copies the zstd dictionaries needed to
+        decompress the WAL files
+
+        :param MagicMock rsync_mock: MagicMock replacing Rsync class
+        :param py.local.path tmpdir: py.test temporary directory
+        """
+        pytest.importorskip("zstandard")
+        # GIVEN a primary node with a WAL compressed using a zstd dictionary
+        primary_wals_dir = tmpdir.mkdir("primary_wals")
+        primary_config = mock.Mock(
+            compression="zstd",
+            compression_level=3,
+            zstd_dictionary=True,
+            xlogdb_directory=primary_wals_dir.strpath,
+        )
+        primary_config.name = "main"
+        compressor = ZSTDCompressor(config=primary_config, compression="zstd")
+        content = b"".join(
+            b"\xd1\x00\x02\x00" + bytes([page]) + b"header" * 100 + bytes(7587)
+            for page in range(64)
+        )
+        sample = tmpdir.join("sample")
+        sample.write_binary(content)
+        dict_id = compressor.train_dictionary([sample.strpath])
+        wal_name = "000000010000000000000002"
+        wal_file = primary_wals_dir.mkdir(wal_name[:16]).join(wal_name)
+        compressor.compress(sample.strpath, wal_file.strpath)
+        # AND a dictionary already available on the passive node
+        barman_home = tmpdir.mkdir("barman_home")
+        wals_dir = barman_home.mkdir("main").mkdir("wals")
+        primary_wals_dir.join("main-zstd-1.dict").write("old")
+        wals_dir.join("main-zstd-1.dict").write("old")
+        primary_info_content = dict(EXPECTED_MINIMAL)
+        primary_info_content.update(
+            config=dict(
+                compression="zstd",
+                wals_directory=primary_wals_dir.strpath,
+                xlogdb_directory=primary_wals_dir.strpath,
+            ),
+            wals=[
+                dict(
+                    name=wal_name,
+                    size=wal_file.size(),
+                    time=1406019026.0,
+                    compression="zstd",
+                    encryption=None,
+                    compression_dictionary=dict_id,
+                )
+            ],
+            zstd_dictionaries=["main-zstd-1.dict", "main-zstd-%s.dict" % dict_id],
+        )
+        server = build_real_server(
+            global_conf=dict(barman_home=barman_home.strpath),
+            main_conf=dict(
+                compression="zstd",
+                wals_directory=wals_dir.strpath,
+                primary_ssh_command="ssh fakeuser@fakehost",
+            ),
+        )
+        barman_home.join("main").join(barman.server.PRIMARY_INFO_FILE).write(
+            json.dumps(primary_info_content)
+        )
+        server.get_first_backup_id = lambda: "1234567890"
+        server.get_backup = lambda x: build_test_backup_info(
+            server=server, begin_wal=wal_name
+        )
+
+        # AND an rsync copying the files locally
+        def from_file_list(file_list, src, dst):
+            for name in file_list:
+                target = os.path.join(dst, name)
+                mkpath(os.path.dirname(target))
+                shutil.copy2(os.path.join(src[1:], name), target)
+
+        rsync_mock.return_value.from_file_list.side_effect = from_file_list
+
+        # WHEN the WAL files are synchronised
+        server.sync_wals()
+
+        # THEN only the missing dictionary has been copied
+        rsync_mock.return_value.from_file_list.assert_any_call(
+            ["main-zstd-%s.dict" % dict_id],
+            ":%s/" % primary_wals_dir.strpath,
+            "%s/" % wals_dir.strpath,
+        )
+        # AND the WAL file can be decompressed on the passive node
+        local_compressor = ZSTDCompressor(config=server.config, compression="zstd")
+        output_file = tmpdir.join("output")
+        local_compressor.decompress(
+            wals_dir.join(wal_name[:16], wal_name).strpath, output_file.strpath
+        )
+        assert output_file.read_binary() == content
+
     def _create_mock_config(self, tmpdir):
         """Helper for passive node tests which returns a mock config object"""
         barman_home = tmpdir.mkdir("barman_home")
@@ -906,6 +906,41 @@ class TestBarmanEncoderV2(object):
         assert json_dump == '"9.5.3"'
 
 
+class TestJsonCache(object):
+    def test_write_read(self, tmpdir):
+        # GIVEN a cache file written with some data
+        path = tmpdir.join("test.cache").strpath
+        data = {"files": {"a": [[1, 2], {"key": "value"}]}}
+        barman.utils.write_json_cache(path, "1-x", data)
+
+        # THEN the file is plain JSON
+        with open(path) as cache_file:
+            assert json.load(cache_file) == {"version": "1-x", "data": data}
+        # AND the data is read back with the same version
+        assert barman.utils.read_json_cache(path, "1-x") == data
+        # AND it is ignored with a different version
+        assert barman.utils.read_json_cache(path, "2-x") is None
+        # AND no temporary file is left
+        assert tmpdir.listdir() == [tmpdir.join("test.cache")]
+
+    def test_read_invalid(self, tmpdir):
+        # GIVEN a cache file which does not contain JSON
+        path = tmpdir.join("test.cache")
+        path.write_binary(b"\x80\x04garbage")
+        # THEN it is ignored
+        assert barman.utils.read_json_cache(path.strpath, 1) is None
+        # AND so is a missing file
+        assert barman.utils.read_json_cache(tmpdir.join("x").strpath, 1) is None
+
+    def test_write_failure(self, tmpdir):
+        # GIVEN data which cannot be serialised
+        path = tmpdir.join("test.cache").strpath
+        # WHEN it is written
+        barman.utils.write_json_cache(path, 1, {"data": object()})
+        # THEN no file is left
+        assert tmpdir.listdir() == []
+
+
 # noinspection PyMethodMayBeStatic
 @mock.patch("barman.utils.signal.signal")
 @mock.patch("barman.utils.signal.alarm")
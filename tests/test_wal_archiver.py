@@ -15,6 +15,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with Barman.  If not, see <http://www.gnu.org/licenses/>.
+import gzip
 import io
 import os
 
@@ -24,7 +25,7 @@ from testing_helpers import build_backup_manager, build_test_backup_info, caplog
 
 import barman.xlog
 from barman.cloud_providers import ObjectKeyAlreadyExists
-from barman.compression import InternalCompressor
+from barman.compression import InternalCompressor, PyGZipCompressor, ZSTDCompressor
 from barman.exceptions import (
     AbortedRetryHookScript,
     ArchiverFailure,
@@ -347,6 +348,198 @@ class TestFileWalArchiver(object):
         # Check that the wal file have been archived to the expected location
         assert os.path.exists(wal_path)
 
+    def _build_parallel_archiver(self, tmpdir, wal_names):
+        """
+        Build a FileWalArchiver with parallel archiving enabled and the given
+        WAL files in the incoming directory
+        """
+        backup_manager = build_backup_manager(
+            name="TestServer", global_conf={"barman_home": tmpdir.strpath}
+        )
+        backup_manager.config.archiver_parallel_jobs = 3
+        backup_manager.server.get_backup.return_value = None
+        backup_manager.server.use_wal_cloud_storage = False
+        compressor = PyGZipCompressor(backup_manager.config, "pygzip")
+        compression_manager = backup_manager.compression_manager
+        compression_manager.get_default_compressor.return_value = compressor
+        compression_manager.get_compressor.return_value = None
+        incoming_dir = tmpdir.join("main").join("incoming")
+        for wal_name in wal_names:
+            incoming_dir.join(wal_name).write(wal_name * 1000, ensure=True)
+        xlog_db = tmpdir.join("main").join("wals").join("xlog.db")
+        xlog_db.ensure()
+        xlog_db_fileobj = xlog_db.open(mode="a")
+        backup_manager.server.xlogdb.return_value.__enter__.return_value = (
+            xlog_db_fileobj
+        )
+        archiver = FileWalArchiver(backup_manager)
+        wal_infos = []
+        for wal_name in wal_names:
+            wal_info = WalFileInfo(name=wal_name, size=16 * 1000, time=0)
+            wal_info.orig_filename = incoming_dir.join(wal_name).strpath
+            wal_infos.append(wal_info)
+        batch = WalArchiverQueue(wal_infos, total_size=len(wal_names))
+        archiver.get_next_batch = MagicMock(return_value=batch)
+        return archiver, xlog_db, xlog_db_fileobj
+
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_archive_zstd_dictionary(self, jobs, tmpdir):
+        """
+        Test archiving WAL files with a trained zstd dictionary
+        """
+        # GIVEN WAL files to archive with zstd and the dictionary mode enabled
+        wal_names = ["00000001000000000000000%s" % i for i in range(1, 6)]
+        archiver, xlog_db, xlog_db_fileobj = self._build_parallel_archiver(
+            tmpdir, wal_names
+        )
+        config = archiver.config
+        config.archiver_parallel_jobs = jobs
+        config.zstd_dictionary = True
+        config.xlogdb_directory = tmpdir.join("main", "wals").strpath
+        compressor = ZSTDCompressor(config, "zstd")
+        compression_manager = archiver.backup_manager.compression_manager
+        compression_manager.get_default_compressor.return_value = compressor
+
+        # WHEN the WAL files are archived
+        with patch.object(
+            compressor, "train_dictionary", wraps=compressor.train_dictionary
+        ) as train_mock:
+            archiver.archive()
+
+        # THEN the dictionary has been trained on the WAL files and stored
+        train_mock.assert_called_once_with(
+            [tmpdir.join("main", "incoming", name).strpath for name in wal_names]
+        )
+        dict_id = compressor.dictionary_id
+        assert dict_id is not None
+        dictionary_name = "%s-zstd-%s.dict" % (config.name, dict_id)
+        assert tmpdir.join("main", "wals", dictionary_name).exists()
+        # AND the dictionary id is recorded in the xlogdb
+        xlog_db_fileobj.flush()
+        lines = xlog_db.readlines()
+        assert [line.split()[0] for line in lines] == wal_names
+        assert all(line.split()[3:] == ["zstd", "None", str(dict_id)] for line in lines)
+        # AND the WAL files can be decompressed by a new compressor
+        for wal_name in wal_names:
+            wal_path = tmpdir.join(
+                "main", "wals", barman.xlog.hash_dir(wal_name), wal_name
+            )
+            decompressed = tmpdir.join("decompressed")
+            ZSTDCompressor(config, "zstd").decompress(
+                wal_path.strpath, decompressed.strpath
+            )
+            assert decompressed.read() == wal_name * 1000
+
+    def test_archive_zstd_dictionary_not_enough_segments(self, tmpdir):
+        """
+        Test that no dictionary is trained without enough WAL segments
+        """
+        # GIVEN fewer WAL files than needed to train a dictionary
+        wal_names = ["000000010000000000000001", "000000010000000000000002"]
+        archiver, xlog_db, xlog_db_fileobj = self._build_parallel_archiver(
+            tmpdir, wal_names
+        )
+        config = archiver.config
+        config.zstd_dictionary = True
+        config.xlogdb_directory = tmpdir.join("main", "wals").strpath
+        compressor = ZSTDCompressor(config, "zstd")
+        compression_manager = archiver.backup_manager.compression_manager
+        compression_manager.get_default_compressor.return_value = compressor
+
+        # WHEN the WAL files are archived
+        archiver.archive()
+
+        # THEN no dictionary is used
+        assert compressor.dictionary_id is None
+        xlog_db_fileobj.flush()
+        assert all(len(line.split()) == 5 for line in xlog_db.readlines())
+
+    def test_archive_parallel(self, tmpdir, capsys):
+        """
+        Test archiving WAL files using a pool of worker processes
+        """
+        # GIVEN WAL files spanning two hash directories
+        wal_names = [
+            "0000000100000000000000FE",
+            "0000000100000000000000FF",
+            "000000010000000100000000",
+            "000000010000000100000001",
+            "000000010000000100000002",
+        ]
+        archiver, xlog_db, xlog_db_fileobj = self._build_parallel_archiver(
+            tmpdir, wal_names
+        )
+
+        # WHEN the WAL files are archived with parallel jobs
+        archiver.archive()
+
+        # THEN every WAL file has been compressed and moved in place
+        for wal_name in wal_names:
+            assert not tmpdir.join("main", "incoming", wal_name).exists()
+            wal_path = os.path.join(
+                tmpdir.strpath,
+                "main",
+                "wals",
+                barman.xlog.hash_dir(wal_name),
+                wal_name,
+            )
+            with gzip.open(wal_path, "rb") as wal_file:
+                assert wal_file.read() == (wal_name * 1000).encode()
+        # AND the xlogdb contains the WAL files in the original order
+        xlog_db_fileobj.flush()
+        lines = xlog_db.readlines()
+        assert [line.split()[0] for line in lines] == wal_names
+        assert all(line.split()[3] == "pygzip" for line in lines)
+        # AND the xlogdb has been opened once per hash directory
+        assert archiver.server.xlogdb.call_count == 2
+        # AND every WAL file has been reported
+        out, _ = capsys.readouterr()
+        for wal_name in wal_names:
+            assert ("\t%s\n" % wal_name) in out
+        # AND no temporary files are left behind
+        for root, _, files in os.walk(tmpdir.join("main", "wals").strpath):
+            assert not [name for name in files if name.endswith(".compressed")]
+
+    def test_archive_parallel_failure(self, tmpdir):
+        """
+        Test a failure while archiving WAL files in parallel only archives
+        the WAL files preceding the failed one
+        """
+        # GIVEN WAL files, one of which cannot be compressed
+        wal_names = [
+            "000000010000000000000001",
+            "000000010000000000000002",
+            "000000010000000000000003",
+            "000000010000000000000004",
+        ]
+        archiver, xlog_db, xlog_db_fileobj = self._build_parallel_archiver(
+            tmpdir, wal_names
+        )
+        compressor = archiver.backup_manager.compression_manager
+        compressor = compressor.get_default_compressor.return_value
+        compress = compressor.compress_file_in_mem
+
+        def failing_compress(src, dst):
+            if src.endswith(wal_names[2]):
+                raise CommandFailedException("compression failed")
+            return compress(src, dst)
+
+        compressor.compress_file_in_mem = failing_compress
+
+        # WHEN the WAL files are archived with parallel jobs
+        # THEN the failure is raised
+        with pytest.raises(CommandFailedException):
+            archiver.archive()
+
+        # AND only the WAL files preceding the failed one have been archived
+        xlog_db_fileobj.flush()
+        assert [line.split()[0] for line in xlog_db.readlines()] == wal_names[:2]
+        incoming_dir = tmpdir.join("main", "incoming")
+        assert sorted(os.listdir(incoming_dir.strpath)) == wal_names[2:]
+        # AND no temporary files are left behind
+        hash_dir = tmpdir.join("main", "wals", "0000000100000000")
+        assert sorted(os.listdir(hash_dir.strpath)) == wal_names[:2]
+
     @pytest.fixture
     def mock_compression_registry(self):
         """
@@ -520,37 +713,115 @@ class TestFileWalArchiver(object):
         out, err = capsys.readouterr()
         assert ("\t%s\n" % wal_name) in out
 
-    @patch("barman.wal_archiver.glob")
-    @patch("os.path.isfile")
     @patch("barman.wal_archiver.WalFileInfo.from_file")
-    def test_get_next_batch(self, from_file_mock, isfile_mock, glob_mock):
+    def test_get_next_batch(self, from_file_mock, tmpdir):
         """
         Test the FileWalArchiver.get_next_batch method
         """
-
-        # WAL batch no errors
-        glob_mock.return_value = ["000000010000000000000001"]
-        isfile_mock.return_value = True
+        incoming_dir = tmpdir.mkdir("incoming")
         # This is an hack, instead of a WalFileInfo we use a simple string to
         # ease all the comparisons. The resulting string is the name enclosed
         # in colons. e.g. ":000000010000000000000001:"
         from_file_mock.side_effect = (
             lambda filename, compression_manager, unidentified_compression, encryption_manager, *args, **kwargs: ":%s:"
-            % filename
+            % os.path.basename(filename)
         )
 
         backup_manager = build_backup_manager(name="TestServer")
+        backup_manager.server.config.incoming_wals_directory = incoming_dir.strpath
         archiver = FileWalArchiver(backup_manager)
         backup_manager.server.archivers = [archiver]
 
+        # WAL batch no errors, ignoring temporary and hidden files
+        incoming_dir.join("000000010000000000000001").write("")
+        incoming_dir.join("000000010000000000000002.tmp").write("")
+        incoming_dir.join(".hidden").write("")
         batch = archiver.get_next_batch()
-        assert [":000000010000000000000001:"] == batch
+        # The WalFileInfo objects are built only when iterating over the batch
+        from_file_mock.assert_not_called()
+        assert batch.run_size == 1
+        assert [":000000010000000000000001:"] == list(batch.wal_infos())
 
         # WAL batch with errors
-        wrong_file_name = "test_wrong_wal_file.2"
-        glob_mock.return_value = ["test_wrong_wal_file.2"]
+        wrong_file = incoming_dir.join("test_wrong_wal_file.2")
+        wrong_file.write("")
+        incoming_dir.mkdir("000000010000000000000003")
+        batch = archiver.get_next_batch()
+        assert [":000000010000000000000001:"] == list(batch.wal_infos())
+        assert [
+            incoming_dir.join("000000010000000000000003").strpath,
+            wrong_file.strpath,
+        ] == batch.errors
+
+        # A WAL file removed after reading the directory is skipped
         batch = archiver.get_next_batch()
-        assert [wrong_file_name] == batch.errors
+        incoming_dir.join("000000010000000000000001").remove()
+        assert batch.run_size == 1
+        assert [] == list(batch.wal_infos())
+        # AND the batch itself still holds the directory entry
+        assert len(batch) == len(list(batch)) == 1
+        assert batch[0].name == "000000010000000000000001"
+
+    def test_get_next_batch_missing_directory(self, tmpdir):
+        """
+        Test the FileWalArchiver.get_next_batch method when the incoming
+        directory does not exist
+        """
+        backup_manager = build_backup_manager(name="TestServer")
+        backup_manager.server.config.incoming_wals_directory = tmpdir.join(
+            "missing"
+        ).strpath
+        archiver = FileWalArchiver(backup_manager)
+
+        batch = archiver.get_next_batch()
+        assert batch.total_size == 0
+        assert [] == list(batch.wal_infos())
+
+    @pytest.mark.parametrize(
+        ("name", "size", "compression_identified"),
+        [
+            # A full WAL segment, known to be uncompressed
+            ("000000010000000000000001", 16 << 20, False),
+            ("000000010000000000000001", 1 << 30, False),
+            # The size is not a valid WAL segment size
+            ("000000010000000000000001", 1024, True),
+            ("000000010000000000000001", 3 << 20, True),
+            # Not a full WAL segment
+            ("00000001.history", 16 << 20, True),
+            ("000000010000000000000001.00000028.backup", 16 << 20, True),
+        ],
+    )
+    def test_get_next_batch_raw_wal_compression(
+        self, name, size, compression_identified, tmpdir
+    ):
+        """
+        Test that the compression is not identified for files of the incoming
+        directory which are known to be raw WAL segments
+        """
+        # GIVEN an incoming directory with a WAL file of the given size
+        incoming_dir = tmpdir.mkdir("incoming")
+        wal_file = incoming_dir.join(name)
+        with open(wal_file.strpath, "wb") as f:
+            f.truncate(size)
+        backup_manager = build_backup_manager(name="TestServer")
+        backup_manager.server.config.incoming_wals_directory = incoming_dir.strpath
+        compression_manager = backup_manager.compression_manager
+        compression_manager.identify_compression.return_value = None
+        archiver = FileWalArchiver(backup_manager)
+
+        # WHEN the WalFileInfo of the batch are built
+        wal_files = list(archiver.get_next_batch().wal_infos())
+
+        # THEN the compression is identified only when needed
+        assert len(wal_files) == 1
+        assert wal_files[0].name == name
+        assert wal_files[0].size == size
+        assert wal_files[0].orig_filename == wal_file.strpath
+        assert wal_files[0].compression is None
+        assert wal_files[0].encryption is None
+        assert compression_manager.identify_compression.called is (
+            compression_identified
+        )
 
 
 # noinspection PyMethodMayBeStatic
@@ -925,61 +1196,62 @@ class TestStreamingWalArchiver(object):
             "\treceive-wal running: OK\n"
         )
 
-    @patch("barman.wal_archiver.glob")
-    @patch("os.path.exists")
-    @patch("os.path.isfile")
     @patch("barman.wal_archiver.WalFileInfo.from_file")
-    def test_get_next_batch(
-        self, from_file_mock, isfile_mock, exists_mock, glob_mock, caplog
-    ):
+    def test_get_next_batch(self, from_file_mock, caplog, tmpdir):
         """
         Test the FileWalArchiver.get_next_batch method
         """
         # See all logs
         caplog.set_level(0)
 
-        # WAL batch, with 000000010000000000000001 that is currently being
-        # written
-        glob_mock.return_value = ["000000010000000000000001"]
-        isfile_mock.return_value = True
+        streaming_dir = tmpdir.mkdir("streaming")
         # This is an hack, instead of a WalFileInfo we use a simple string to
         # ease all the comparisons. The resulting string is the name enclosed
         # in colons. e.g. ":000000010000000000000001:"
         from_file_mock.side_effect = (
             lambda filename, compression_manager, unidentified_compression, encryption_manager, *args, **kwargs: ":%s:"
-            % filename
+            % os.path.basename(filename)
         )
 
         backup_manager = build_backup_manager(name="TestServer")
+        backup_manager.server.config.streaming_wals_directory = streaming_dir.strpath
         archiver = StreamingWalArchiver(backup_manager)
         backup_manager.server.archivers = [archiver]
 
+        def set_files(*names):
+            for path in streaming_dir.listdir():
+                path.remove()
+            for name in names:
+                streaming_dir.join(name).write("")
+
+        # WAL batch, with 000000010000000000000001 that is currently being
+        # written
         caplog_reset(caplog)
+        set_files("000000010000000000000001")
         batch = archiver.get_next_batch()
-        assert ["000000010000000000000001"] == batch.skip
+        assert [streaming_dir.join("000000010000000000000001").strpath] == batch.skip
         assert "" == caplog.text
 
         # WAL batch, with 000000010000000000000002 that is currently being
         # written and 000000010000000000000001 can be archived
         caplog_reset(caplog)
-        glob_mock.return_value = [
-            "000000010000000000000001",
-            "000000010000000000000002",
-        ]
+        set_files("000000010000000000000001", "000000010000000000000002")
         batch = archiver.get_next_batch()
-        assert [":000000010000000000000001:"] == batch
-        assert ["000000010000000000000002"] == batch.skip
+        assert [":000000010000000000000001:"] == list(batch.wal_infos())
+        assert [streaming_dir.join("000000010000000000000002").strpath] == batch.skip
         assert "" == caplog.text
 
         # WAL batch, with two partial files.
         caplog_reset(caplog)
-        glob_mock.return_value = [
+        set_files(
             "000000010000000000000001.partial",
             "000000010000000000000002.partial",
-        ]
+        )
         batch = archiver.get_next_batch()
-        assert [":000000010000000000000001.partial:"] == batch
-        assert ["000000010000000000000002.partial"] == batch.skip
+        assert [":000000010000000000000001.partial:"] == list(batch.wal_infos())
+        assert [
+            streaming_dir.join("000000010000000000000002.partial").strpath
+        ] == batch.skip
         assert (
             "Archiving partial files for server %s: "
             "000000010000000000000001.partial" % archiver.config.name
@@ -987,32 +1259,36 @@ class TestStreamingWalArchiver(object):
 
         # WAL batch, with history files.
         caplog_reset(caplog)
-        glob_mock.return_value = [
-            "00000001.history",
-            "000000010000000000000002.partial",
-        ]
+        set_files("00000001.history", "000000010000000000000002.partial")
         batch = archiver.get_next_batch()
-        assert [":00000001.history:"] == batch
-        assert ["000000010000000000000002.partial"] == batch.skip
+        assert [":00000001.history:"] == list(batch.wal_infos())
+        assert [
+            streaming_dir.join("000000010000000000000002.partial").strpath
+        ] == batch.skip
         assert "" == caplog.text
 
         # WAL batch with errors
-        wrong_file_name = "test_wrong_wal_file.2"
-        glob_mock.return_value = ["test_wrong_wal_file.2"]
+        set_files("test_wrong_wal_file.2")
         batch = archiver.get_next_batch()
-        assert [wrong_file_name] == batch.errors
+        assert [streaming_dir.join("test_wrong_wal_file.2").strpath] == batch.errors
 
         # WAL batch, with two partial files, but one has been just renamed.
         caplog_reset(caplog)
-        exists_mock.side_effect = [False, True]
-        glob_mock.return_value = [
+        set_files(
             "000000010000000000000001.partial",
             "000000010000000000000002.partial",
-        ]
+        )
         batch = archiver.get_next_batch()
-        assert len(batch) == 0
-        assert ["000000010000000000000002.partial"] == batch.skip
-        assert "" in caplog.text
+        streaming_dir.join("000000010000000000000001.partial").remove()
+        assert [] == list(batch.wal_infos())
+        assert [
+            streaming_dir.join("000000010000000000000002.partial").strpath
+        ] == batch.skip
+
+        # The compression of the streamed WAL files is never identified
+        for kwargs in [c[1] for c in from_file_mock.call_args_list]:
+            assert kwargs["compression"] is None
+            assert kwargs["encryption"] is None
 
     def test_is_synchronous(self):
         backup_manager = build_backup_manager(name="TestServer")
@@ -1058,6 +1334,41 @@ class TestWalStorageStrategy:
         instantiate it.
     """
 
+    @patch(
+        "barman.wal_archiver.WalStorageStrategy.__abstractmethods__", new_callable=set
+    )
+    def test_get_first_missing_wal(self, _):
+        """Test that the default implementation checks the WAL files in order"""
+        backup_manager = build_backup_manager(name="TestServer")
+        wal_storage = WalStorageStrategy(backup_manager, backup_manager.server)
+        wal_storage.get_full_path = lambda wal_name: "/wals/" + wal_name
+        wal_storage.exists = MagicMock(side_effect=[True, False, True])
+
+        # WHEN get_first_missing_wal is called
+        result = wal_storage.get_first_missing_wal(
+            [
+                "000000010000000000000001",
+                "000000010000000000000002",
+                "000000010000000000000003",
+            ]
+        )
+
+        # THEN the first missing WAL file is returned
+        assert result == "000000010000000000000002"
+        # AND the check stops at the first missing WAL file
+        wal_storage.exists.assert_has_calls(
+            [
+                call("/wals/000000010000000000000001"),
+                call("/wals/000000010000000000000002"),
+            ]
+        )
+        assert wal_storage.exists.call_count == 2
+
+        # WHEN all the WAL files exist
+        wal_storage.exists = MagicMock(return_value=True)
+        # THEN no WAL file is missing
+        assert wal_storage.get_first_missing_wal(["000000010000000000000001"]) is None
+
     @patch("barman.wal_archiver.RetryHookScriptRunner")
     @patch("barman.wal_archiver.HookScriptRunner")
     @patch(
@@ -1471,6 +1782,31 @@ class TestLocalWalStorageStrategy:
         # AND the correct compressed file path is returned
         assert result == "/dest/dir/000000010000000000000001.compressed"
 
+    def test_compress_file_internal_compressor(self):
+        """
+        Test that :meth:`compress_file` compresses WAL files in memory when
+        using an internal compressor.
+        """
+        wal_storage = LocalWalStorageStrategy(
+            build_backup_manager(name="TestServer"), None
+        )
+        mock_compressor = MagicMock(spec=PyGZipCompressor, compression="pygzip")
+        mock_wal_info = MagicMock()
+
+        # WHEN _compress_file is called
+        result = wal_storage._compress_file(
+            mock_compressor, "/src/000000010000000000000001", "/dest/dir", mock_wal_info
+        )
+        # THEN the file is compressed in memory
+        mock_compressor.compress_file_in_mem.assert_called_once_with(
+            "/src/000000010000000000000001",
+            "/dest/dir/000000010000000000000001.compressed",
+        )
+        mock_compressor.compress.assert_not_called()
+        # AND the compression method is set in the wal_info object
+        assert mock_wal_info.compression == "pygzip"
+        assert result == "/dest/dir/000000010000000000000001.compressed"
+
     def test_encrypt_file(self):
         """
         Test that :meth:`encrypt_file` correctly encrypts and returns a file.
@@ -2066,6 +2402,79 @@ class TestLocalWalStorageStrategy:
         # THEN it returns False
         assert result_non_existing is False
 
+    @pytest.mark.parametrize(
+        ("archived_wals", "expected_missing_wal"),
+        [
+            # All the WAL files are archived, together with a history file
+            (
+                [
+                    "00000001.history",
+                    "000000010000000000000001",
+                    "000000010000000000000002",
+                    "000000010000000000000003",
+                    "000000010000000000000004",
+                ],
+                None,
+            ),
+            # The second WAL file is missing
+            (
+                ["000000010000000000000001", "000000010000000000000003"],
+                "000000010000000000000002",
+            ),
+            # The xlogdb is empty
+            ([], "000000010000000000000001"),
+        ],
+    )
+    def test_get_first_missing_wal(self, archived_wals, expected_missing_wal, tmpdir):
+        """
+        Test that :meth:`get_first_missing_wal` looks up the WAL files in the
+        xlogdb.
+        """
+        # GIVEN a LocalWalStorageStrategy instance
+        backup_manager = build_backup_manager(name="TestServer")
+        wal_storage = LocalWalStorageStrategy(backup_manager, backup_manager.server)
+        # AND an xlogdb containing the archived WAL files
+        xlogdb_file = tmpdir.join("TestServer-xlog.db")
+        xlogdb_file.write(
+            "".join(
+                WalFileInfo(name=name, size=42, time=43).to_xlogdb_line()
+                for name in archived_wals
+            )
+        )
+        backup_manager.server.xlogdb_file_path = xlogdb_file.strpath
+        # AND no WAL file on disk, so only the xlogdb can be used for the check
+        with open(xlogdb_file.strpath) as fxlogdb, patch(
+            "os.path.exists"
+        ) as mock_exists:
+            backup_manager.server.xlogdb.return_value.__enter__.return_value = fxlogdb
+            # WHEN get_first_missing_wal is called on the first three WAL files
+            result = wal_storage.get_first_missing_wal(
+                [
+                    "000000010000000000000001",
+                    "000000010000000000000002",
+                    "000000010000000000000003",
+                ]
+            )
+        # THEN the first missing WAL file is returned
+        assert result == expected_missing_wal
+        # AND no WAL file is checked on disk
+        mock_exists.assert_not_called()
+
+    def test_get_first_missing_wal_no_wals(self):
+        """
+        Test that :meth:`get_first_missing_wal` does not read the xlogdb when
+        there are no WAL files to check.
+        """
+        # GIVEN a LocalWalStorageStrategy instance
+        backup_manager = build_backup_manager(name="TestServer")
+        wal_storage = LocalWalStorageStrategy(backup_manager, backup_manager.server)
+        # WHEN get_first_missing_wal is called without WAL files
+        result = wal_storage.get_first_missing_wal([])
+        # THEN nothing is missing
+        assert result is None
+        # AND the xlogdb is not read
+        backup_manager.server.xlogdb.assert_not_called()
+
     @patch("barman.wal_archiver.xlog.hash_dir", return_value="0000000100000001")
     def test_get_full_path(self, mock_hash_dir):
         """
@@ -2311,6 +2720,52 @@ class TestCloudWalStorageStrategy:
             full_path
         )
 
+    def test_get_first_missing_wal(self):
+        """
+        Test that :meth:`get_first_missing_wal` lists each WAL directory once.
+        """
+        # GIVEN a CloudWalStorageStrategy instance
+        wal_storage = CloudWalStorageStrategy(
+            build_backup_manager(name="TestServer"), MagicMock()
+        )
+        wal_storage.cloud_interface = MagicMock(path="barman-bucket")
+        # AND a bucket containing WAL files with different compressions
+        prefix = "barman-bucket/TestServer/wals/"
+        wal_storage.cloud_interface.list_bucket.side_effect = [
+            [
+                prefix + "0000000100000000/0000000100000000000000FE.gz",
+                prefix + "0000000100000000/0000000100000000000000FF",
+            ],
+            [
+                prefix + "0000000100000001/000000010000000100000000.zst",
+                prefix + "0000000100000001/000000010000000100000002.zst",
+            ],
+        ]
+
+        # WHEN get_first_missing_wal is called
+        result = wal_storage.get_first_missing_wal(
+            [
+                "0000000100000000000000FE",
+                "0000000100000000000000FF",
+                "000000010000000100000000",
+                "000000010000000100000001",
+                "000000010000000100000002",
+            ]
+        )
+
+        # THEN the first missing WAL file is returned
+        assert result == "000000010000000100000001"
+        # AND each WAL directory is listed once
+        wal_storage.cloud_interface.list_bucket.assert_has_calls(
+            [
+                call(prefix + "0000000100000000/", delimiter=""),
+                call(prefix + "0000000100000001/", delimiter=""),
+            ]
+        )
+        assert wal_storage.cloud_interface.list_bucket.call_count == 2
+        # AND no object is checked individually
+        wal_storage.cloud_interface.check_object_existence.assert_not_called()
+
     @patch("barman.wal_archiver.xlog.hash_dir", return_value="0000000100000001")
     def test_get_full_path(self, mock_hash_dir):
         """
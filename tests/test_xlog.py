@@ -343,6 +343,16 @@ class Test(object):
         assert not xlog.is_wal_file("00000001000000000000000A.history")
         assert not xlog.is_wal_file("00000001000000000000000A.partial")
 
+    def test_is_xlog_segment_size(self):
+        assert xlog.is_xlog_segment_size(xlog.DEFAULT_XLOG_SEG_SIZE)
+        assert xlog.is_xlog_segment_size(1 << 20)
+        assert xlog.is_xlog_segment_size(1 << 30)
+        assert not xlog.is_xlog_segment_size(0)
+        assert not xlog.is_xlog_segment_size(1 << 19)
+        assert not xlog.is_xlog_segment_size(1 << 31)
+        assert not xlog.is_xlog_segment_size((1 << 24) - 1)
+        assert not xlog.is_xlog_segment_size(3 << 20)
+
     def test_encode_history_filename(self):
         assert xlog.encode_history_file_name(1) == "00000001.history"
         assert xlog.encode_history_file_name(10) == "0000000A.history"
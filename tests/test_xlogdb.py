@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+# © Copyright EnterpriseDB UK Limited 2011-2025
+#
+# This file is part of Barman.
+#
+# Barman is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Barman is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Barman.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+
+import mock
+import pytest
+from testing_helpers import build_real_server, build_test_backup_info
+
+from barman.infofile import WalFileInfo
+from barman.xlogdb import (
+    XLogDBIndex,
+    get_xlogdb_start,
+    replace_xlogdb_content,
+    set_xlogdb_start,
+)
+
+
+def _xlogdb_line(name):
+    return WalFileInfo(name=name, size=42, time=43).to_xlogdb_line()
+
+
+def _segment(tli, seg):
+    return "%08X%08X%08X" % (tli, 0, seg)
+
+
+def _write_xlogdb(path, names, mode="w"):
+    with open(path, mode) as fxlogdb:
+        for name in names:
+            fxlogdb.write(_xlogdb_line(name))
+
+
+def _names(lines):
+    return [line.split()[0] for line in lines]
+
+
+# noinspection PyMethodMayBeStatic
+class TestXLogDBIndex(object):
+    """
+    Tests for the sparse xlogdb index
+    """
+
+    NAMES = (
+        [_segment(1, seg) for seg in range(1, 10)]
+        + ["00000002.history"]
+        + [_segment(2, seg) for seg in range(10, 20)]
+        + ["00000003.history"]
+        + [_segment(3, seg) for seg in range(20, 30)]
+    )
+
+    def test_scan_seeks_to_start_name(self, tmpdir):
+        # GIVEN an xlogdb with sorted WALs and some history files
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, self.NAMES)
+        index = XLogDBIndex(xlogdb_path, stride=4)
+
+        # WHEN scanning from a WAL in the middle of the catalogue
+        start = _segment(2, 15)
+        with open(xlogdb_path) as fxlogdb:
+            lines = list(index.scan(fxlogdb, start))
+
+        # THEN all the history files and all the WALs from the start are
+        # returned, in the same order as a full scan
+        names = _names(lines)
+        expected = [n for n in self.NAMES if n >= start or n.endswith(".history")]
+        assert [n for n in names if n >= start or n.endswith(".history")] == expected
+        # AND only the lines close to the start have been read
+        skipped = [n for n in names if n < start and not n.endswith(".history")]
+        assert len(skipped) < index.stride
+        assert len(names) < len(self.NAMES)
+        # AND the index file has been written next to the xlogdb
+        assert os.path.exists(xlogdb_path + ".idx")
+
+    def test_scan_without_start_reads_everything(self, tmpdir):
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, self.NAMES)
+        index = XLogDBIndex(xlogdb_path, stride=4)
+        with open(xlogdb_path) as fxlogdb:
+            assert _names(index.scan(fxlogdb)) == self.NAMES
+        # No index is needed for a full scan
+        assert not os.path.exists(index.path)
+
+    def test_scan_unsorted_xlogdb_falls_back_to_full_scan(self, tmpdir):
+        # GIVEN an xlogdb which is not sorted
+        names = list(reversed([_segment(1, seg) for seg in range(1, 20)]))
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, names)
+        index = XLogDBIndex(xlogdb_path, stride=4)
+        # WHEN scanning from any WAL
+        with open(xlogdb_path) as fxlogdb:
+            lines = list(index.scan(fxlogdb, _segment(1, 10)))
+        # THEN the whole file is returned
+        assert _names(lines) == names
+
+    def test_scan_file_like_object(self, tmpdir):
+        # A file object which is not the indexed xlogdb is read from the start
+        index = XLogDBIndex(tmpdir.join("main-xlog.db").strpath, stride=4)
+        fxlogdb = io.StringIO("".join(_xlogdb_line(n) for n in self.NAMES))
+        assert _names(index.scan(fxlogdb, _segment(3, 25))) == self.NAMES
+
+    def test_index_is_extended_on_append(self, tmpdir):
+        # GIVEN an indexed xlogdb
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, self.NAMES)
+        assert XLogDBIndex(xlogdb_path, stride=4).refresh()
+        checkpoints = list(XLogDBIndex(xlogdb_path, stride=4)._load()["checkpoints"])
+
+        # WHEN new WALs are appended and the index refreshed
+        new_names = [_segment(3, seg) for seg in range(30, 40)]
+        _write_xlogdb(xlogdb_path, new_names, mode="a")
+        index = XLogDBIndex(xlogdb_path, stride=4)
+        assert index.refresh()
+
+        # THEN the old entries are kept and new ones have been added
+        assert index.data["checkpoints"][: len(checkpoints)] == checkpoints
+        assert len(index.data["checkpoints"]) > len(checkpoints)
+        assert index.data["size"] == os.path.getsize(xlogdb_path)
+        # AND the index is equivalent to one built from scratch
+        os.unlink(index.path)
+        rebuilt = XLogDBIndex(xlogdb_path, stride=4)
+        rebuilt.refresh()
+        assert rebuilt.data == index.data
+
+    def test_index_is_rebuilt_on_rewrite(self, tmpdir):
+        # GIVEN an indexed xlogdb
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, self.NAMES)
+        XLogDBIndex(xlogdb_path, stride=4).refresh()
+
+        # WHEN the xlogdb is rewritten without its first WALs
+        _write_xlogdb(xlogdb_path, self.NAMES[5:])
+        index = XLogDBIndex(xlogdb_path, stride=4)
+        index.refresh()
+
+        # THEN the index only describes the new content
+        assert index.data["checkpoints"][0] == [self.NAMES[5], 0]
+        assert index.data["size"] == os.path.getsize(xlogdb_path)
+
+    def test_remaining_history(self, tmpdir):
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, self.NAMES)
+        for start in (None, _segment(1, 5)):
+            index = XLogDBIndex(xlogdb_path, stride=4)
+            with open(xlogdb_path) as fxlogdb:
+                # Stop after the first WAL on timeline 2
+                for line in index.scan(fxlogdb, start):
+                    if line.startswith("00000002000"):
+                        break
+                remaining = _names(index.remaining_history(fxlogdb))
+            assert remaining == ["00000003.history"]
+
+    def test_invalidate(self, tmpdir):
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, self.NAMES)
+        index = XLogDBIndex(xlogdb_path)
+        index.refresh()
+        assert os.path.exists(index.path)
+        index.invalidate()
+        assert not os.path.exists(index.path)
+        # Invalidating a missing index is not an error
+        index.invalidate()
+
+    def test_server_uses_index(self, tmpdir):
+        # GIVEN a server with a large xlogdb
+        wals_dir = tmpdir.mkdir("wals")
+        server = build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals_dir.strpath},
+        )
+        server.postgres = None
+        names = [_segment(1, seg) for seg in range(1, 5000)]
+        _write_xlogdb(server.xlogdb_file_path, names)
+        backup = build_test_backup_info(
+            begin_wal=_segment(1, 4000),
+            end_wal=_segment(1, 4010),
+            timeline=1,
+        )
+
+        # WHEN the WALs required by a backup are requested
+        wals = [w.name for w in server.get_required_xlog_files(backup)]
+
+        # THEN all the WALs from the beginning of the backup are returned
+        assert wals == names[3999:]
+        # AND the index has been built
+        assert os.path.exists(server.xlogdb_file_path + ".idx")
+
+        # WHEN the xlogdb is rewritten through the server
+        set_xlogdb_start(server.xlogdb_file_path, 100)
+        with server.xlogdb("w"):
+            pass
+        # THEN the index is invalidated and the logical start reset
+        assert not os.path.exists(server.xlogdb_file_path + ".idx")
+        assert get_xlogdb_start(server.xlogdb_file_path) == 0
+
+
+# noinspection PyMethodMayBeStatic
+class TestXLogDBStart(object):
+    """
+    Tests for the logical start offset of the xlogdb
+    """
+
+    def test_get_set_xlogdb_start(self, tmpdir):
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, [_segment(1, seg) for seg in range(1, 10)])
+        # A missing start file means the whole file is live
+        assert get_xlogdb_start(xlogdb_path) == 0
+        set_xlogdb_start(xlogdb_path, 100)
+        assert get_xlogdb_start(xlogdb_path) == 100
+        # A start beyond the end of the file is ignored
+        set_xlogdb_start(xlogdb_path, 100000)
+        assert get_xlogdb_start(xlogdb_path) == 0
+        # Resetting the start removes the file
+        set_xlogdb_start(xlogdb_path, 0)
+        assert not os.path.exists(xlogdb_path + ".start")
+
+    def test_replace_xlogdb_content(self, tmpdir):
+        xlogdb_path = tmpdir.join("main-xlog.db").strpath
+        _write_xlogdb(xlogdb_path, [_segment(1, seg) for seg in range(1, 10)])
+        set_xlogdb_start(xlogdb_path, 100)
+        XLogDBIndex(xlogdb_path).refresh()
+        new_content = io.StringIO(_xlogdb_line(_segment(1, 20)))
+        with open(xlogdb_path, "r+") as fxlogdb:
+            replace_xlogdb_content(fxlogdb, new_content)
+        with open(xlogdb_path) as fxlogdb:
+            assert _names(fxlogdb) == [_segment(1, 20)]
+        assert get_xlogdb_start(xlogdb_path) == 0
+        assert not os.path.exists(xlogdb_path + ".idx")
+
+    def _build_server(self, tmpdir):
+        wals_dir = tmpdir.mkdir("wals")
+        server = build_real_server(
+            global_conf={"barman_lock_directory": tmpdir.mkdir("lock").strpath},
+            main_conf={"wals_directory": wals_dir.strpath},
+        )
+        return server
+
+    def _create_wals(self, server, names):
+        for name in names:
+            path = os.path.join(server.config.wals_directory, name)
+            if not name.endswith(".history"):
+                path = os.path.join(server.config.wals_directory, name[:16], name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, "w").close()
+        _write_xlogdb(server.xlogdb_file_path, names, mode="a")
+
+    def _read_xlogdb(self, server):
+        with server.xlogdb() as fxlogdb:
+            return _names(fxlogdb)
+
+    def test_retention_trims_xlogdb_in_place(self, tmpdir):
+        # GIVEN a server with an indexed xlogdb
+        server = self._build_server(tmpdir)
+        names = [_segment(2, seg) for seg in range(1, 100)]
+        self._create_wals(server, names)
+        size = os.path.getsize(server.xlogdb_file_path)
+        XLogDBIndex(server.xlogdb_file_path).refresh()
+
+        # WHEN the WALs before a backup are removed
+        backup = build_test_backup_info(
+            server=server,
+            begin_wal=_segment(2, 20),
+            end_wal=_segment(2, 25),
+        )
+        removed = server.backup_manager.remove_wal_before_backup(backup)
+
+        # THEN the WALs have been removed
+        assert removed == names[:19]
+        # AND the xlogdb has not been rewritten, only its logical start moved
+        assert os.path.getsize(server.xlogdb_file_path) == size
+        assert get_xlogdb_start(server.xlogdb_file_path) == 19 * len(
+            _xlogdb_line(names[0])
+        )
+        # AND readers only see the live lines
+        assert self._read_xlogdb(server) == names[19:]
+        # AND the patched index is equivalent to a freshly built one
+        index = XLogDBIndex(server.xlogdb_file_path)
+        assert index.refresh()
+        os.unlink(index.path)
+        rebuilt = XLogDBIndex(server.xlogdb_file_path)
+        rebuilt.refresh()
+        assert index.data["start"] == rebuilt.data["start"]
+        assert index.data["history"] == rebuilt.data["history"] == []
+        # AND range queries still work
+        backup.begin_wal = _segment(2, 50)
+        server.get_next_backup = lambda backup_id: None
+        wals = [w.name for w in server.get_wal_until_next_backup(backup, True)]
+        assert wals == names[49:]
+
+        # WHEN most of the remaining WALs are removed
+        backup.begin_wal = _segment(2, 90)
+        server.backup_manager.remove_wal_before_backup(backup)
+
+        # THEN the xlogdb has been compacted
+        assert get_xlogdb_start(server.xlogdb_file_path) == 0
+        assert os.path.getsize(server.xlogdb_file_path) < size
+        assert self._read_xlogdb(server) == names[89:]
+
+    def test_retention_trims_xlogdb_in_place_with_kept_lines(self, tmpdir):
+        # GIVEN a server with an indexed xlogdb containing a history file
+        # which sorts before the WALs of its timeline
+        server = self._build_server(tmpdir)
+        names = (
+            [_segment(1, seg) for seg in range(1, 10)]
+            + ["00000002.history"]
+            + [_segment(2, seg) for seg in range(10, 100)]
+        )
+        self._create_wals(server, names)
+        size = os.path.getsize(server.xlogdb_file_path)
+        XLogDBIndex(server.xlogdb_file_path).refresh()
+
+        # WHEN the WALs before a backup are removed
+        backup = build_test_backup_info(
+            server=server,
+            begin_wal=_segment(2, 20),
+            end_wal=_segment(2, 25),
+        )
+        removed = server.backup_manager.remove_wal_before_backup(backup)
+
+        # THEN the WALs have been removed
+        assert removed == [n for n in names[:20] if not n.endswith(".history")]
+        # AND the xlogdb has not been rewritten, the history file has been
+        # moved right before the first live WAL and the logical start to it
+        assert os.path.getsize(server.xlogdb_file_path) == size
+        cut = sum(len(_xlogdb_line(name)) for name in names[:20])
+        assert get_xlogdb_start(server.xlogdb_file_path) == cut - len(
+            _xlogdb_line("00000002.history")
+        )
+        assert not os.path.exists(server.xlogdb_file_path + ".start.tmp")
+        # AND readers see the history file and the live lines
+        expected = ["00000002.history"] + names[20:]
+        assert self._read_xlogdb(server) == expected
+        # AND the patched index is equivalent to a freshly built one
+        index = XLogDBIndex(server.xlogdb_file_path)
+        assert index.refresh()
+        os.unlink(index.path)
+        rebuilt = XLogDBIndex(server.xlogdb_file_path)
+        rebuilt.refresh()
+        assert index.data["start"] == rebuilt.data["start"]
+        assert index.data["history"] == rebuilt.data["history"]
+        # AND range queries still work
+        backup.begin_wal = _segment(2, 50)
+        server.get_next_backup = lambda backup_id: None
+        wals = [w.name for w in server.get_wal_until_next_backup(backup, True)]
+        assert wals == ["00000002.history"] + names[50:]
+
+    @pytest.mark.parametrize(
+        ("names", "expected"),
+        [
+            # Only the logical start is moved
+            (
+                [_segment(2, seg) for seg in range(1, 100)],
+                [_segment(2, seg) for seg in range(1, 100)],
+            ),
+            # The history file is moved before the logical start
+            (
+                ["00000002.history"] + [_segment(2, seg) for seg in range(1, 100)],
+                ["00000002.history"] + [_segment(2, seg) for seg in range(20, 100)],
+            ),
+        ],
+    )
+    def test_retention_interrupted(self, names, expected, tmpdir):
+        # GIVEN a server with an indexed xlogdb
+        server = self._build_server(tmpdir)
+        self._create_wals(server, names)
+        XLogDBIndex(server.xlogdb_file_path).refresh()
+        backup = build_test_backup_info(
+            server=server,
+            begin_wal=_segment(2, 20),
+            end_wal=_segment(2, 25),
+        )
+
+        # WHEN the trim of the xlogdb is interrupted while writing the kept
+        # lines, or before moving the logical start if there is none
+        def crash_writing_lines(xlogdb_path, offset, lines):
+            with open(xlogdb_path, "r+b") as fxlogdb_bin:
+                fxlogdb_bin.seek(offset)
+                fxlogdb_bin.write(lines[:10].encode())
+            raise OSError("crash")
+
+        def crash_moving_start(xlogdb_path, offset, lines=None):
+            if not lines:
+                raise OSError("crash")
+            set_xlogdb_start(xlogdb_path, offset, lines)
+
+        with mock.patch(
+            "barman.xlogdb._write_xlogdb_lines", side_effect=crash_writing_lines
+        ), mock.patch("barman.xlogdb.set_xlogdb_start", side_effect=crash_moving_start):
+            with pytest.raises(OSError):
+                server.backup_manager.remove_wal_before_backup(backup)
+
+        # THEN the xlogdb holds every live line, none of them corrupted
+        assert self._read_xlogdb(server) == expected
+
+    def test_sync_status_ignores_removed_lines(self, tmpdir):
+        # GIVEN an xlogdb whose logical start has been moved forward
+        server = self._build_server(tmpdir)
+        names = [_segment(1, seg) for seg in range(1, 10)]
+        _write_xlogdb(server.xlogdb_file_path, names)
+        set_xlogdb_start(server.xlogdb_file_path, len(_xlogdb_line(names[0])) * 5)
+        # WHEN the sync starting point is before the logical start
+        with server.xlogdb() as fxlogdb:
+            start = fxlogdb.tell()
+            position = server.set_sync_starting_point(fxlogdb, names[1], 0, start)
+            # THEN reading starts over from the logical start
+            assert position == start
+            assert _names(fxlogdb) == names[5:]
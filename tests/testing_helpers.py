@@ -287,6 +287,7 @@ def build_config_dictionary(config_keys=None):
         "archiver": True,
         "worm_mode": False,
         "archiver_batch_size": 0,
+        "archiver_parallel_jobs": 1,
         "autogenerate_manifest": False,
         "aws_await_snapshots_timeout": 3600,
         "aws_check_object_lock": False,
@@ -371,6 +372,7 @@ def build_config_dictionary(config_keys=None):
         "wal_retention_policy": "main",
         "wals_directory": "/some/barman/home/main/wals",
         "xlogdb_directory": "/some/barman/home/main/wals",
+        "zstd_dictionary": False,
         "basebackup_retry_sleep": 30,
         "basebackup_retry_times": 0,
         "post_archive_script": None,